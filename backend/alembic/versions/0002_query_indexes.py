@@ -0,0 +1,47 @@
+"""query indexes
+
+主要な検索・集計クエリの絞り込み／並び順に合わせた複合インデックスを追加する。
+init_db() の create_all で作成済みのDBにも適用できるよう IF NOT EXISTS で作成する。
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 23:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (インデックス名, テーブル名, カラム)
+INDEXES = [
+    ("ix_requests_applicant_status_created", "requests", ["applicant_id", "status", "created_at"]),
+    ("ix_requests_status_type", "requests", ["status", "type"]),
+    ("ix_requests_created_at", "requests", ["created_at"]),
+    ("ix_leave_requests_request_dates", "leave_requests", ["request_id", "start_date", "end_date"]),
+    ("ix_leave_requests_dates", "leave_requests", ["start_date", "end_date"]),
+    ("ix_overtime_requests_request_work_date", "overtime_requests", ["request_id", "work_date"]),
+    ("ix_overtime_requests_work_date", "overtime_requests", ["work_date"]),
+    ("ix_expense_requests_request_id", "expense_requests", ["request_id"]),
+    ("ix_holiday_work_requests_request_work_date", "holiday_work_requests", ["request_id", "work_date"]),
+    ("ix_holiday_work_requests_work_date", "holiday_work_requests", ["work_date"]),
+    ("ix_construction_daily_reports_user_date", "construction_daily_reports", ["user_id", "report_date"]),
+    ("ix_leave_balances_user_year", "leave_balances", ["user_id", "fiscal_year"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
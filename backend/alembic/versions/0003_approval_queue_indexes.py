@@ -0,0 +1,37 @@
+"""approval queue indexes
+
+承認待ち一覧のステータス絞り込みと (applied_at, id) のキーセットページングに
+合わせたインデックスを追加する。
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (インデックス名, テーブル名, カラム)
+INDEXES = [
+    ("ix_requests_status_applied", "requests", ["status", "applied_at", "id"]),
+    ("ix_requests_applied_at", "requests", ["applied_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
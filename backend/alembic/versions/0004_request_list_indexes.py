@@ -0,0 +1,37 @@
+"""request list indexes
+
+申請一覧の申請者・ステータス絞り込みと (created_at, id) のキーセットページングに
+合わせたインデックスを追加する。
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (インデックス名, テーブル名, カラム)
+INDEXES = [
+    ("ix_requests_applicant_created", "requests", ["applicant_id", "created_at", "id"]),
+    ("ix_requests_status_created", "requests", ["status", "created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
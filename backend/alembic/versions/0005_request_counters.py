@@ -0,0 +1,49 @@
+"""request counters
+
+申請者 × 種別 × ステータスごとの申請件数を保持する集計テーブルを追加し、
+既存の requests から初期値を投入する。
+init_db() の create_all で作成済みのDBでは作成・初期値の投入を行わない（init_db が作成時に投入済み）。
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 15:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('request_counters'):
+        return
+    op.create_table(
+        'request_counters',
+        sa.Column('applicant_id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['applicant_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('applicant_id', 'type', 'status')
+    )
+    op.execute(
+        """
+        INSERT INTO request_counters (applicant_id, type, status, count)
+        SELECT applicant_id, type, status, COUNT(*)
+        FROM requests
+        WHERE applicant_id IS NOT NULL AND status IS NOT NULL
+        GROUP BY applicant_id, type, status
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('request_counters')
@@ -0,0 +1,65 @@
+"""revoked tokens
+
+ログアウト・リフレッシュで失効させたトークンの jti を保持するテーブルを追加する。
+各プロセスは id 順に差分を同期し、有効期限を過ぎた行は expires_at のインデックスで削除する。
+削除した行の id が再利用されないよう SQLite では AUTOINCREMENT で作成する。
+init_db() の create_all で作成済みのDBでは、AUTOINCREMENT でない場合のみテーブルを作り直す。
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_sqlite_autoincrement(bind) -> bool:
+    sql = bind.execute(
+        sa.text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'revoked_tokens'")
+    ).scalar()
+    return "AUTOINCREMENT" in (sql or "").upper()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table('revoked_tokens'):
+        if bind.dialect.name == 'sqlite' and not _has_sqlite_autoincrement(bind):
+            with op.batch_alter_table('revoked_tokens', recreate='always',
+                                      table_kwargs={'sqlite_autoincrement': True}):
+                pass
+        return
+
+    op.create_table(
+        'revoked_tokens',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('jti', sa.String(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('token_type', sa.String(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('revoked_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('jti'),
+        sqlite_autoincrement=True
+    )
+    with op.batch_alter_table('revoked_tokens', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_revoked_tokens_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_revoked_tokens_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('revoked_tokens', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_revoked_tokens_expires_at'))
+        batch_op.drop_index(batch_op.f('ix_revoked_tokens_id'))
+
+    op.drop_table('revoked_tokens')
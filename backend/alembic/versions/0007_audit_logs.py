@@ -0,0 +1,122 @@
+"""audit logs
+
+給与連携の変更フィード用に、変更履歴テーブル audit_logs（id が変更の通し番号）と
+requests.updated_at を追加する。
+
+既存のデータは、承認済みの勤怠明細（休暇・時間外・休日出勤）と工事日報を
+更新日時順に upsert として登録し、フィードを最初から読めば現在の状態になるようにする。
+init_db() の create_all で作成済みのDBにも適用できるよう、既にあるカラム・テーブルは作成せず、
+初期登録は audit_logs が空の場合のみ行う。
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (種別, テーブル, 項目)
+DETAILS = [
+    ("leave", "leave_requests", ["id", "request_id", "leave_type", "start_date", "end_date", "start_duration",
+                                 "end_duration", "days", "hours", "compensatory_work_date"]),
+    ("overtime", "overtime_requests", ["id", "request_id", "work_date", "start_time", "end_time", "break_time",
+                                       "total_hours", "project_name"]),
+    ("holiday_work", "holiday_work_requests", ["id", "request_id", "work_date", "start_time", "end_time",
+                                               "break_time", "compensatory_leave_date"]),
+]
+DAILY_REPORT_COLUMNS = ["id", "user_id", "report_date", "site_name", "early_start",
+                        "work_start_time", "work_end_time", "overtime", "updated_at"]
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if 'updated_at' not in {column['name'] for column in inspector.get_columns('requests')}:
+        with op.batch_alter_table('requests', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute(
+        "UPDATE requests SET updated_at = COALESCE(approved_at, rejected_at, applied_at, created_at) "
+        "WHERE updated_at IS NULL"
+    )
+
+    audit_logs = sa.table(
+        'audit_logs',
+        sa.column('entity_type'), sa.column('entity_id'), sa.column('action'),
+        sa.column('old_values', sa.JSON()), sa.column('new_values', sa.JSON()), sa.column('created_at', sa.DateTime()),
+    )
+    if inspector.has_table('audit_logs'):
+        if bind.execute(sa.select(sa.func.count()).select_from(audit_logs)).scalar():
+            return
+    else:
+        op.create_table(
+            'audit_logs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('entity_type', sa.String(), nullable=False),
+            sa.Column('entity_id', sa.Integer(), nullable=False),
+            sa.Column('action', sa.String(), nullable=False),
+            sa.Column('old_values', sa.JSON(), nullable=True),
+            sa.Column('new_values', sa.JSON(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_audit_logs_id'), ['id'], unique=False)
+            batch_op.create_index('ix_audit_logs_entity', ['entity_type', 'entity_id'], unique=False)
+
+    # 既存データの初期登録（更新日時順）
+    now = datetime.utcnow()
+    entries = []
+    requests = sa.table('requests', sa.column('id'), sa.column('applicant_id'),
+                        sa.column('status'), sa.column('updated_at', sa.DateTime()))
+    for entity_type, table_name, columns in DETAILS:
+        table = sa.table(table_name, *[sa.column(name) for name in columns])
+        rows = bind.execute(
+            sa.select(table, requests.c.applicant_id, requests.c.updated_at)
+            .join(requests, requests.c.id == table.c.request_id)
+            .where(requests.c.status == 'approved')
+        ).mappings()
+        for row in rows:
+            values = {name: _json_value(row[name]) for name in columns}
+            values["applicant_id"] = row["applicant_id"]
+            entries.append((row["updated_at"] or now, entity_type, row["id"], values))
+    reports = sa.table('construction_daily_reports', *[
+        sa.column(name, sa.DateTime() if name == 'updated_at' else None) for name in DAILY_REPORT_COLUMNS
+    ])
+    for row in bind.execute(sa.select(reports)).mappings():
+        values = {name: _json_value(row[name]) for name in DAILY_REPORT_COLUMNS}
+        entries.append((row["updated_at"] or now, "construction_daily_report", row["id"], values))
+
+    entries.sort(key=lambda entry: entry[0])
+    if entries:
+        op.bulk_insert(audit_logs, [
+            {"entity_type": entity_type, "entity_id": entity_id, "action": "upsert",
+             "old_values": None, "new_values": values, "created_at": now}
+            for _, entity_type, entity_id, values in entries
+        ])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_audit_logs_entity')
+        batch_op.drop_index(batch_op.f('ix_audit_logs_id'))
+
+    op.drop_table('audit_logs')
+
+    with op.batch_alter_table('requests', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
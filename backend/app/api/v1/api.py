@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, requests, users, approvals, admin, setup, construction_daily, attendance, reports
+from app.api.v1.endpoints import auth, requests, users, approvals, admin, setup, construction_daily, attendance, reports, changes
 
 api_router = APIRouter()
 
@@ -30,7 +30,5 @@ api_router.include_router(construction_daily.router, prefix="/construction-daily
 # 勤怠管理関連のエンドポイント
 api_router.include_router(attendance.router, prefix="/attendance", tags=["勤怠管理"])
 
-
-
-
-
+# 変更フィード（給与連携）
+api_router.include_router(changes.router, prefix="/changes", tags=["変更フィード"])
@@ -1,86 +1,231 @@
 from fastapi import APIRouter, Depends
-from datetime import datetime, date
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from datetime import datetime
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.auth import get_current_admin_user
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.password_hasher import password_hasher
+from app.core.rate_limit import login_rate_limiter
 from app.core.database import get_db
 from app.models.database import User, Request
+from app.services.request_counters import (
+    check_request_counters, get_request_counts, rebuild_request_counters,
+)
+from app.services.pdf_cache import pdf_cache
+from app.services.pdf_prerender import pdf_prerenderer
+from app.services.pdf_renderer import pdf_render_service
+from app.services.report_summary import summary_cache
+from app.services.token_revocation import revocation_syncer
 
 router = APIRouter()
 
-@router.get("/stats")
-async def get_admin_stats(
-    current_user: dict = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
-):
-    """
-    管理画面用の統計情報を取得（実データ）
-    """
+# 申請種別（該当件数0でも統計に含める）
+REQUEST_TYPES = ["leave", "overtime", "expense", "holiday_work", "reimbursement", "settlement"]
+
+# 管理画面の統計情報キャッシュ（データ量に関係なく一定コストで返す）
+admin_stats_cache = TTLCache(
+    ttl=settings.ADMIN_STATS_CACHE_TTL,
+    stale_ttl=settings.ADMIN_STATS_STALE_TTL,
+)
+
+
+async def _collect_admin_stats(db: AsyncSession) -> dict:
+    """統計情報を集計（ユーザー1クエリ・申請件数の集計テーブル1クエリ・最近のアクティビティ1クエリ）"""
     # ユーザー統計
-    total_users = db.query(func.count(User.id)).scalar()
-    active_users = db.query(func.count(User.id)).filter(User.is_active == True).scalar()
-
-    # 申請統計
-    total_requests = db.query(func.count(Request.id)).scalar()
-    pending_requests = db.query(func.count(Request.id)).filter(Request.status == "applied").scalar()
-    approved_requests = db.query(func.count(Request.id)).filter(Request.status == "approved").scalar()
-    rejected_requests = db.query(func.count(Request.id)).filter(Request.status == "rejected").scalar()
-
-    # 申請種別ごとの統計
-    requests_by_type = {}
-    request_types = ["leave", "overtime", "expense", "holiday_work", "reimbursement", "settlement"]
-    for req_type in request_types:
-        count = db.query(func.count(Request.id)).filter(Request.type == req_type).scalar()
-        requests_by_type[req_type] = count or 0
-
-    # 申請種別ごとの承認待ち件数
-    pending_by_type = {}
-    for req_type in request_types:
-        count = db.query(func.count(Request.id)).filter(
-            Request.type == req_type,
-            Request.status == "applied"
-        ).scalar()
-        pending_by_type[req_type] = count or 0
-
-    # 最近のアクティビティ（直近10件）
-    recent_requests = db.query(Request).order_by(Request.created_at.desc()).limit(10).all()
-    recent_activities = []
-    for req in recent_requests:
-        user = db.query(User).filter(User.id == req.applicant_id).first()
-        recent_activities.append({
-            "id": str(req.id),
-            "user_name": user.name if user else "不明",
+    user_counts = (await db.execute(select(
+        func.count(User.id),
+        func.coalesce(func.sum(case((User.is_active == True, 1), else_=0)), 0),  # noqa: E712
+    ))).one()
+    total_users, active_users = user_counts
+
+    # 申請統計（種別 × ステータスの件数、集計テーブルから取得）
+    requests_by_type = {req_type: 0 for req_type in REQUEST_TYPES}
+    pending_by_type = {req_type: 0 for req_type in REQUEST_TYPES}
+    by_status = {}
+    for (req_type, req_status), count in (await get_request_counts(db)).items():
+        requests_by_type[req_type] = requests_by_type.get(req_type, 0) + count
+        by_status[req_status] = by_status.get(req_status, 0) + count
+        if req_status == "applied":
+            pending_by_type[req_type] = pending_by_type.get(req_type, 0) + count
+
+    # 最近のアクティビティ（直近10件、申請者を結合）
+    recent_rows = (await db.execute(
+        select(Request.id, Request.title, Request.created_at, func.coalesce(User.name, "不明"))
+        .outerjoin(User, User.id == Request.applicant_id)
+        .order_by(Request.created_at.desc())
+        .limit(10)
+    )).all()
+    recent_activities = [
+        {
+            "id": str(request_id),
+            "user_name": user_name,
             "action": "申請を作成",
-            "target": req.title,
-            "timestamp": req.created_at.isoformat() if req.created_at else datetime.now().isoformat()
-        })
+            "target": title,
+            "timestamp": created_at.isoformat() if created_at else datetime.now().isoformat()
+        }
+        for request_id, title, created_at, user_name in recent_rows
+    ]
 
-    stats = {
+    return {
         "total_users": total_users or 0,
         "active_users": active_users or 0,
-        "total_requests": total_requests or 0,
-        "pending_requests": pending_requests or 0,
-        "approved_requests": approved_requests or 0,
-        "rejected_requests": rejected_requests or 0,
+        "total_requests": sum(by_status.values()),
+        "pending_requests": by_status.get("applied", 0),
+        "approved_requests": by_status.get("approved", 0),
+        "rejected_requests": by_status.get("rejected", 0),
         "requests_by_type": requests_by_type,
         "pending_by_type": pending_by_type,
-        "recent_activities": recent_activities
+        "recent_activities": recent_activities,
+        "generated_at": datetime.now().isoformat()
     }
 
+
+@router.get("/stats")
+async def get_admin_stats(
+    current_user: dict = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    管理画面用の統計情報を取得（実データ）
+    - ADMIN_STATS_CACHE_TTL 秒間はキャッシュを返し、その後 ADMIN_STATS_STALE_TTL 秒間は
+      古い値を返しつつバックグラウンドで再集計する
+    """
+    async def load():
+        # バックグラウンド再集計はリクエスト終了後にも走るため、専用のセッションを使う
+        async with AsyncSession(bind=db.bind, expire_on_commit=False) as session:
+            return await _collect_admin_stats(session)
+
+    stats = await admin_stats_cache.get("admin_stats", load)
+
     return {
         "success": True,
         "data": stats
     }
 
+@router.get("/stats/cache")
+async def get_admin_stats_cache(
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """
+    統計情報キャッシュのヒット・ミス件数を取得
+    """
+    return {
+        "success": True,
+        "data": admin_stats_cache.stats()
+    }
+
+@router.get("/password-hasher/stats")
+async def get_password_hasher_stats(
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """
+    パスワードハッシュ処理の実行数・待ち件数を取得
+    """
+    return {
+        "success": True,
+        "data": password_hasher.stats()
+    }
+
+@router.get("/login-rate-limit/stats")
+async def get_login_rate_limit_stats(
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """
+    ログイン試行制限の統計（許可・拒否件数など）を取得
+    """
+    return {
+        "success": True,
+        "data": login_rate_limiter.stats()
+    }
+
+@router.get("/token-revocation/stats")
+async def get_token_revocation_stats(
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """
+    トークン失効リスト（メモリ上）の件数・同期状況を取得
+    """
+    return {
+        "success": True,
+        "data": revocation_syncer.stats()
+    }
+
+@router.get("/pdf-renderer/stats")
+async def get_pdf_renderer_stats(
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """
+    PDF生成ワーカーの待ち件数・生成時間・稼働率を取得
+    """
+    return {
+        "success": True,
+        "data": pdf_render_service.stats()
+    }
+
+@router.get("/pdf-cache/stats")
+async def get_pdf_cache_stats(
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """
+    PDFキャッシュの件数・サイズ・ヒット率と事前生成の件数を取得
+    """
+    return {
+        "success": True,
+        "data": {**pdf_cache.stats(), "prerender": pdf_prerenderer.stats()}
+    }
+
+@router.get("/report-summary/stats")
+async def get_report_summary_cache_stats(
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """
+    集計レポート（締まった期間）のキャッシュの件数・ヒット数を取得
+    """
+    return {
+        "success": True,
+        "data": summary_cache.stats()
+    }
+
+@router.get("/request-counters/check")
+async def check_request_counter_consistency(
+    current_user: dict = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    申請件数の集計テーブルと requests の不一致を確認
+    """
+    mismatches = await db.run_sync(lambda session: check_request_counters(session.connection()))
+    return {
+        "success": True,
+        "data": {"consistent": not mismatches, "mismatches": mismatches}
+    }
+
+@router.post("/request-counters/rebuild")
+async def rebuild_request_counter_table(
+    current_user: dict = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    申請件数の集計テーブルを requests から再構築
+    """
+    rows = await db.run_sync(lambda session: rebuild_request_counters(session.connection()))
+    await db.commit()
+    admin_stats_cache.invalidate()
+    return {
+        "success": True,
+        "data": {"rows": rows}
+    }
+
 @router.get("/users")
 async def get_all_users(
     current_user: dict = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     全ユーザー一覧を取得（実データ）
     """
-    users = db.query(User).all()
+    users = (await db.scalars(select(User))).all()
 
     users_data = []
     for user in users:
@@ -1,54 +1,112 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import case, func, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import datetime, timedelta
 
 from app.core.auth import get_current_admin_user
 from app.core.database import get_db
+from app.core.pagination import decode_cursor, split_page
 from app.models.database import Request as RequestModel, User
 
 router = APIRouter()
 
+# 承認待ちとして扱うステータス（作成時は pending、提出時は applied）
+PENDING_STATUSES = ("pending", "applied")
+
+# 並び順: applied_at は新しい順、priority は古い順（＝優先度が高い順）
+SORT_ORDERS = ("applied_at", "priority")
+
+
+def _priority_expression(now: datetime):
+    """申請からの経過日数による優先度（4日以上: high / 1日未満: low / それ以外: medium）"""
+    return case(
+        (RequestModel.applied_at <= now - timedelta(days=4), literal("high")),
+        (RequestModel.applied_at > now - timedelta(days=1), literal("low")),
+        else_=literal("medium"),
+    )
+
+
 @router.get("/")
 async def get_approval_requests(
-    db: Session = Depends(get_db),
+    status: str = Query("pending", description="pending（承認待ち）/ all / 個別ステータス"),
+    type: Optional[str] = Query(None, description="申請種別"),
+    sort: str = Query("applied_at", description="applied_at（新しい順）/ priority（古い順）"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_admin_user)
 ):
     """
-    承認待ちの申請一覧を取得（管理者のみ）
+    承認対象の申請一覧を取得（管理者のみ）
+    - 提出済みの申請を (applied_at, id) のキーセットでページング
+    - 続きは next_cursor を cursor に指定して取得
     """
-    # 全ステータスの申請を取得（承認済み、却下、差戻しも含む）
-    requests = db.query(RequestModel).order_by(RequestModel.created_at.desc()).all()
-
-    # レスポンスデータを構築
-    approval_requests = []
-    for req in requests:
-        applicant = db.query(User).filter(User.id == req.applicant_id).first()
-
-        # 優先度を計算（簡易版：申請日が古いほど優先度高）
-        priority = "medium"
-        if req.applied_at:
-            days_old = (datetime.now() - req.applied_at).days
-            if days_old > 3:
-                priority = "high"
-            elif days_old < 1:
-                priority = "low"
-
-        approval_requests.append({
-            "id": str(req.id),
-            "type": req.type,
-            "applicant_id": str(req.applicant_id),
-            "applicant_name": applicant.name if applicant else "不明",
-            "status": req.status,
-            "title": req.title,
-            "description": req.description,
-            "applied_at": req.applied_at.isoformat() if req.applied_at else req.created_at.isoformat(),
-            "created_at": req.created_at.isoformat(),
-            "priority": priority
-        })
+    if sort not in SORT_ORDERS:
+        raise HTTPException(status_code=400, detail="並び順の指定が不正です")
+    after = decode_cursor(cursor, keys=("applied_at", "id"), datetime_keys=("applied_at",))
+
+    # 未提出（applied_at なし）の下書きは承認対象外
+    conditions = [RequestModel.applied_at.is_not(None)]
+    if status == "pending":
+        conditions.append(RequestModel.status.in_(PENDING_STATUSES))
+    elif status != "all":
+        conditions.append(RequestModel.status == status)
+    if type:
+        conditions.append(RequestModel.type == type)
+
+    # 総件数はカーソル位置に関係なくフィルタ条件のみで数える（インデックスのみで完結）
+    total = await db.scalar(select(func.count()).select_from(RequestModel).where(*conditions))
+
+    sort_key = tuple_(RequestModel.applied_at, RequestModel.id)
+    if sort == "applied_at":
+        order_by = (RequestModel.applied_at.desc(), RequestModel.id.desc())
+        if after:
+            conditions.append(sort_key < tuple_(after["applied_at"], after["id"]))
+    else:
+        order_by = (RequestModel.applied_at.asc(), RequestModel.id.asc())
+        if after:
+            conditions.append(sort_key > tuple_(after["applied_at"], after["id"]))
+
+    query = select(
+        RequestModel.id,
+        RequestModel.type,
+        RequestModel.applicant_id,
+        func.coalesce(User.name, "不明").label("applicant_name"),
+        RequestModel.status,
+        RequestModel.title,
+        RequestModel.description,
+        RequestModel.applied_at,
+        RequestModel.created_at,
+        _priority_expression(datetime.now()).label("priority"),
+    ).outerjoin(User, User.id == RequestModel.applicant_id).where(*conditions).order_by(*order_by)
+
+    # 1件多く取得して続きの有無を判定
+    rows, has_more, next_cursor = split_page(
+        (await db.execute(query.limit(limit + 1))).all(), limit,
+        lambda row: {"applied_at": row.applied_at, "id": row.id}
+    )
+
+    approval_requests = [
+        {
+            "id": str(row.id),
+            "type": row.type,
+            "applicant_id": str(row.applicant_id),
+            "applicant_name": row.applicant_name,
+            "status": row.status,
+            "title": row.title,
+            "description": row.description,
+            "applied_at": row.applied_at.isoformat(),
+            "created_at": row.created_at.isoformat(),
+            "priority": row.priority
+        }
+        for row in rows
+    ]
 
     return {
         "success": True,
         "data": approval_requests,
-        "total": len(approval_requests)
+        "total": total,
+        "has_more": has_more,
+        "next_cursor": next_cursor
     }
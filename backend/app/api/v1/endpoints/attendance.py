@@ -1,8 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import Response
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import List, Dict, Any
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, date, timedelta
 import calendar
 from urllib.parse import quote
@@ -12,7 +11,12 @@ from app.models.database import (
     User, Request, LeaveRequest, OvertimeRequest, HolidayWorkRequest,
     ConstructionDailyReport, LeaveBalance
 )
-from app.services.pdf_generator import generate_shift_table_pdf, generate_timesheet_pdf
+from app.services.attendance_matrix import (
+    AttendanceMatrix, COMPENSATORY_LEAVE, PAID_LEAVE, SPECIAL_LEAVE, TIMESHEET_LEAVE_LABELS
+)
+from app.services.pdf_cache import invalidate_leave_balance, shift_table_tags, timesheet_tags
+from app.services.pdf_prerender import pdf_prerenderer
+from app.services.pdf_renderer import open_pdf_file, pdf_file_response
 
 router = APIRouter()
 
@@ -29,15 +33,90 @@ def get_weekday_name(d: date) -> str:
     return weekdays[d.weekday()]
 
 
-def _get_shift_data(year: int, month: int, db: Session) -> dict:
-    """シフト表データを取得（内部関数）"""
+async def _load_attendance_rows(
+    start_date: date,
+    end_date: date,
+    db: AsyncSession,
+    user_id: Optional[int] = None
+) -> Tuple[list, list]:
+    """期間内の承認済み休暇・休日出勤を取得
+
+    user_id を省略すると全従業員分を取得する（クエリ数は従業員数によらず一定）。
+    休暇は (申請者ID, 休暇種別, 開始日, 終了日)、休日出勤は (申請者ID, 出勤日) の登録順。
+    """
+    leave_conditions = [
+        Request.status == "approved",
+        or_(
+            and_(LeaveRequest.start_date >= start_date, LeaveRequest.start_date <= end_date),
+            and_(LeaveRequest.end_date >= start_date, LeaveRequest.end_date <= end_date),
+            and_(LeaveRequest.start_date <= start_date, LeaveRequest.end_date >= end_date)
+        )
+    ]
+    holiday_work_conditions = [
+        Request.status == "approved",
+        HolidayWorkRequest.work_date >= start_date,
+        HolidayWorkRequest.work_date <= end_date
+    ]
+    if user_id is not None:
+        leave_conditions.append(Request.applicant_id == user_id)
+        holiday_work_conditions.append(Request.applicant_id == user_id)
+
+    leave_rows = (await db.execute(
+        select(
+            Request.applicant_id, LeaveRequest.leave_type,
+            LeaveRequest.start_date, LeaveRequest.end_date
+        ).join(Request).where(and_(*leave_conditions)).order_by(LeaveRequest.id)
+    )).all()
+
+    holiday_work_rows = (await db.execute(
+        select(Request.applicant_id, HolidayWorkRequest.work_date).join(Request).where(
+            and_(*holiday_work_conditions)
+        ).order_by(HolidayWorkRequest.id)
+    )).all()
+
+    return leave_rows, holiday_work_rows
+
+
+async def _load_leave_balances(fiscal_year: int, db: AsyncSession) -> Dict[int, LeaveBalance]:
+    """年度の休暇残高を従業員IDごとに取得"""
+    balances = (await db.scalars(
+        select(LeaveBalance).where(LeaveBalance.fiscal_year == fiscal_year).order_by(LeaveBalance.id)
+    )).all()
+
+    balance_by_user: Dict[int, LeaveBalance] = {}
+    for balance in balances:
+        balance_by_user.setdefault(balance.user_id, balance)
+    return balance_by_user
+
+
+async def _build_attendance_matrix(
+    user_ids: List[int],
+    start_date: date,
+    end_date: date,
+    db: AsyncSession,
+    user_id: Optional[int] = None
+) -> AttendanceMatrix:
+    """期間内の休暇・休日出勤を勤怠マトリクスに展開"""
+    leave_rows, holiday_work_rows = await _load_attendance_rows(start_date, end_date, db, user_id)
+    matrix = AttendanceMatrix(user_ids, start_date, end_date)
+    matrix.add_leaves(leave_rows)
+    matrix.add_holiday_work(holiday_work_rows)
+    return matrix
+
+
+async def _get_shift_data(year: int, month: int, db: AsyncSession, include_matrix: bool = False) -> dict:
+    """シフト表データを取得（内部関数）
+
+    include_matrix=True の場合は PDF 生成用に勤怠マトリクスを "matrix" に含める。
+    """
     # 全ユーザー取得
-    users = db.query(User).filter(User.is_active == True).all()
+    users = (await db.scalars(select(User).where(User.is_active == True))).all()
 
     # 対象月の日付リスト
     month_dates = get_month_dates(year, month)
     start_date = month_dates[0]
     end_date = month_dates[-1]
+    date_keys = [d.strftime("%Y-%m-%d") for d in month_dates]
 
     result = {
         "year": year,
@@ -53,89 +132,29 @@ def _get_shift_data(year: int, month: int, db: Session) -> dict:
         "employees": []
     }
 
+    # 対象月の申請を全従業員分まとめて展開
+    matrix = await _build_attendance_matrix([user.id for user in users], start_date, end_date, db)
+    balances = await _load_leave_balances(year, db)
+
+    symbols = matrix.symbol_rows()
+    paid_leave_counts = matrix.leave_request_count("paid")
+    compensatory_leave_counts = matrix.leave_request_count("compensatory")
+    special_leave_counts = matrix.leave_request_count("special")
+
     # 各従業員のシフトデータを作成
-    for user in users:
-        # 休暇申請を取得
-        leave_requests = db.query(LeaveRequest).join(Request).filter(
-            and_(
-                Request.applicant_id == user.id,
-                Request.status == "approved",
-                or_(
-                    and_(LeaveRequest.start_date >= start_date, LeaveRequest.start_date <= end_date),
-                    and_(LeaveRequest.end_date >= start_date, LeaveRequest.end_date <= end_date),
-                    and_(LeaveRequest.start_date <= start_date, LeaveRequest.end_date >= end_date)
-                )
-            )
-        ).all()
-
-        # 休日出勤申請を取得
-        holiday_work_requests = db.query(HolidayWorkRequest).join(Request).filter(
-            and_(
-                Request.applicant_id == user.id,
-                Request.status == "approved",
-                HolidayWorkRequest.work_date >= start_date,
-                HolidayWorkRequest.work_date <= end_date
-            )
-        ).all()
-
-        # 休暇残高を取得
-        leave_balance = db.query(LeaveBalance).filter(
-            and_(
-                LeaveBalance.user_id == user.id,
-                LeaveBalance.fiscal_year == year
-            )
-        ).first()
-
-        # 各日付のステータスを判定
-        daily_status = {}
-        for d in month_dates:
-            status = None
-
-            # 休暇チェック
-            for leave in leave_requests:
-                if leave.start_date <= d <= leave.end_date:
-                    if leave.leave_type == "paid":
-                        status = "有"  # 有給休暇
-                    elif leave.leave_type == "compensatory":
-                        status = "代"  # 代休
-                    elif leave.leave_type == "special":
-                        status = "特"  # 特別休暇
-                    break
-
-            # 休日出勤チェック
-            if not status:
-                for hw in holiday_work_requests:
-                    if hw.work_date == d:
-                        status = "◎"  # 振替出勤
-                        break
-
-            daily_status[d.strftime("%Y-%m-%d")] = status
-
-        # 休暇集計
-        paid_leave_count = sum(
-            1 for leave in leave_requests
-            if leave.leave_type == "paid"
-        )
-        compensatory_leave_count = sum(
-            1 for leave in leave_requests
-            if leave.leave_type == "compensatory"
-        )
-        special_leave_count = sum(
-            1 for leave in leave_requests
-            if leave.leave_type == "special"
-        )
-        holiday_work_count = len(holiday_work_requests)
+    for i, user in enumerate(users):
+        leave_balance = balances.get(user.id)
 
         employee_data = {
             "user_id": user.id,
             "name": user.name,
             "department": user.department,
-            "daily_status": daily_status,
+            "daily_status": dict(zip(date_keys, symbols[i])),
             "summary": {
-                "paid_leave": paid_leave_count,
-                "compensatory_leave": compensatory_leave_count,
-                "special_leave": special_leave_count,
-                "holiday_work": holiday_work_count
+                "paid_leave": int(paid_leave_counts[i]),
+                "compensatory_leave": int(compensatory_leave_counts[i]),
+                "special_leave": int(special_leave_counts[i]),
+                "holiday_work": int(matrix.holiday_work_counts[i])
             },
             "balance": {
                 "paid_leave": leave_balance.paid_leave_balance if leave_balance else 0.0,
@@ -145,6 +164,9 @@ def _get_shift_data(year: int, month: int, db: Session) -> dict:
 
         result["employees"].append(employee_data)
 
+    if include_matrix:
+        result["matrix"] = matrix
+
     return result
 
 
@@ -153,7 +175,7 @@ async def get_monthly_shift(
     year: int,
     month: int,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     月次シフト表データを取得
@@ -163,13 +185,62 @@ async def get_monthly_shift(
     if current_user.get("role") != "admin":
         raise HTTPException(status_code=403, detail="管理者のみアクセスできます")
 
-    return _get_shift_data(year, month, db)
+    return await _get_shift_data(year, month, db)
+
+
+@router.get("/shift/{year}/{month}/summary")
+async def get_shift_summary(
+    year: int,
+    month: int,
+    months: int = 12,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    複数月の休暇・休日出勤集計を取得
+    - 指定月から months か月分（最大24か月）を従業員ごと・月ごとに集計
+    - 管理者のみアクセス可能
+    """
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="管理者のみアクセスできます")
+    if not 1 <= month <= 12 or not 1 <= months <= 24:
+        raise HTTPException(status_code=400, detail="月または期間の指定が不正です")
+
+    users = (await db.scalars(select(User).where(User.is_active == True))).all()
+
+    start_date = date(year, month, 1)
+    end_year, end_month = divmod(month - 1 + months, 12)
+    end_date = date(year + end_year, end_month + 1, 1) - timedelta(days=1)
+
+    matrix = await _build_attendance_matrix([user.id for user in users], start_date, end_date, db)
+    monthly = matrix.monthly_summary()
+    totals = {
+        "paid_leave_days": matrix.leave_day_counts(PAID_LEAVE),
+        "compensatory_leave_days": matrix.leave_day_counts(COMPENSATORY_LEAVE),
+        "special_leave_days": matrix.leave_day_counts(SPECIAL_LEAVE),
+        "holiday_work_days": matrix.holiday_work.sum(axis=1),
+    }
+
+    return {
+        "start_date": start_date.strftime("%Y-%m-%d"),
+        "end_date": end_date.strftime("%Y-%m-%d"),
+        "employees": [
+            {
+                "user_id": user.id,
+                "name": user.name,
+                "department": user.department,
+                "months": monthly[i]["months"],
+                "total": {key: int(values[i]) for key, values in totals.items()}
+            }
+            for i, user in enumerate(users)
+        ]
+    }
 
 
-def _get_timesheet_data(user_id: int, year: int, month: int, db: Session) -> dict:
+async def _get_timesheet_data(user_id: int, year: int, month: int, db: AsyncSession) -> dict:
     """出勤簿データを取得（内部関数）"""
     # 対象ユーザー取得
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
 
@@ -179,48 +250,39 @@ def _get_timesheet_data(user_id: int, year: int, month: int, db: Session) -> dic
     end_date = month_dates[-1]
 
     # 工事日報を取得
-    daily_reports = db.query(ConstructionDailyReport).filter(
+    daily_reports = (await db.scalars(select(ConstructionDailyReport).where(
         and_(
             ConstructionDailyReport.user_id == user_id,
             ConstructionDailyReport.report_date >= start_date,
             ConstructionDailyReport.report_date <= end_date
         )
-    ).all()
+    ))).all()
     daily_reports_dict = {report.report_date: report for report in daily_reports}
 
-    # 休暇申請を取得
-    leave_requests = db.query(LeaveRequest).join(Request).filter(
-        and_(
-            Request.applicant_id == user_id,
-            Request.status == "approved",
-            or_(
-                and_(LeaveRequest.start_date >= start_date, LeaveRequest.start_date <= end_date),
-                and_(LeaveRequest.end_date >= start_date, LeaveRequest.end_date <= end_date),
-                and_(LeaveRequest.start_date <= start_date, LeaveRequest.end_date >= end_date)
-            )
-        )
-    ).all()
+    # 休暇・休日出勤を勤怠マトリクスに展開（1従業員分）
+    matrix = await _build_attendance_matrix([user.id], start_date, end_date, db, user_id=user.id)
+    leave_codes = matrix.leave[0].tolist()
 
     # 残業申請を取得
-    overtime_requests = db.query(OvertimeRequest).join(Request).filter(
+    overtime_requests = (await db.scalars(select(OvertimeRequest).join(Request).where(
         and_(
             Request.applicant_id == user_id,
             Request.status == "approved",
             OvertimeRequest.work_date >= start_date,
             OvertimeRequest.work_date <= end_date
         )
-    ).all()
+    ))).all()
     overtime_dict = {ot.work_date: ot for ot in overtime_requests}
 
     # 休日出勤申請を取得
-    holiday_work_requests = db.query(HolidayWorkRequest).join(Request).filter(
+    holiday_work_requests = (await db.scalars(select(HolidayWorkRequest).join(Request).where(
         and_(
             Request.applicant_id == user_id,
             Request.status == "approved",
             HolidayWorkRequest.work_date >= start_date,
             HolidayWorkRequest.work_date <= end_date
         )
-    ).all()
+    ))).all()
     holiday_work_dict = {hw.work_date: hw for hw in holiday_work_requests}
 
     # 各日の出勤簿データを作成
@@ -228,14 +290,13 @@ def _get_timesheet_data(user_id: int, year: int, month: int, db: Session) -> dic
     total_work_days = 0
     total_overtime_hours = 0.0
     total_early_hours = 0.0
-    paid_leave_days = 0
-    compensatory_leave_days = 0
-    special_leave_days = 0
+    paid_leave_days = int(matrix.leave_day_counts(PAID_LEAVE)[0])
+    compensatory_leave_days = int(matrix.leave_day_counts(COMPENSATORY_LEAVE)[0])
+    special_leave_days = int(matrix.leave_day_counts(SPECIAL_LEAVE)[0])
     holiday_work_days = 0
     substitute_work_days = 0
 
-    for d in month_dates:
-        leave_status = None
+    for d, leave_code in zip(month_dates, leave_codes):
         attendance_am = None
         attendance_pm = None
         early_hours = 0.0
@@ -244,18 +305,7 @@ def _get_timesheet_data(user_id: int, year: int, month: int, db: Session) -> dic
         supervisor = ""
 
         # 休暇チェック
-        for leave in leave_requests:
-            if leave.start_date <= d <= leave.end_date:
-                if leave.leave_type == "paid":
-                    leave_status = "有給"
-                    paid_leave_days += 1
-                elif leave.leave_type == "compensatory":
-                    leave_status = "代休"
-                    compensatory_leave_days += 1
-                elif leave.leave_type == "special":
-                    leave_status = "特別休"
-                    special_leave_days += 1
-                break
+        leave_status = TIMESHEET_LEAVE_LABELS.get(leave_code)
 
         # 休日出勤チェック
         if d in holiday_work_dict:
@@ -342,7 +392,7 @@ async def get_monthly_timesheet(
     year: int,
     month: int,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     個人別月次出勤簿データを取得
@@ -351,7 +401,7 @@ async def get_monthly_timesheet(
     if current_user.get("id") != user_id and current_user.get("role") != "admin":
         raise HTTPException(status_code=403, detail="アクセス権限がありません")
 
-    return _get_timesheet_data(user_id, year, month, db)
+    return await _get_timesheet_data(user_id, year, month, db)
 
 
 @router.get("/balance/{user_id}")
@@ -359,7 +409,7 @@ async def get_leave_balance(
     user_id: int,
     fiscal_year: int = None,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     休暇残高を取得
@@ -371,12 +421,12 @@ async def get_leave_balance(
     if fiscal_year is None:
         fiscal_year = datetime.now().year
 
-    balance = db.query(LeaveBalance).filter(
+    balance = await db.scalar(select(LeaveBalance).where(
         and_(
             LeaveBalance.user_id == user_id,
             LeaveBalance.fiscal_year == fiscal_year
         )
-    ).first()
+    ))
 
     if not balance:
         # デフォルト値を返す
@@ -411,7 +461,7 @@ async def update_leave_balance(
     compensatory_leave_total: float = 0.0,
     special_leave_total: float = 0.0,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     休暇残高を更新（管理者のみ）
@@ -419,12 +469,12 @@ async def update_leave_balance(
     if current_user.get("role") != "admin":
         raise HTTPException(status_code=403, detail="管理者のみアクセスできます")
 
-    balance = db.query(LeaveBalance).filter(
+    balance = await db.scalar(select(LeaveBalance).where(
         and_(
             LeaveBalance.user_id == user_id,
             LeaveBalance.fiscal_year == fiscal_year
         )
-    ).first()
+    ))
 
     if not balance:
         # 新規作成
@@ -448,18 +498,75 @@ async def update_leave_balance(
         balance.special_leave_total = special_leave_total
         balance.special_leave_balance = special_leave_total - balance.special_leave_used
 
-    db.commit()
-    db.refresh(balance)
+    await db.commit()
+    await db.refresh(balance)
+
+    # 残高を表示しているシフト表PDF（キャッシュ）を破棄
+    invalidate_leave_balance(fiscal_year)
 
     return {"message": "休暇残高を更新しました", "balance": balance}
 
 
+def shift_table_pdf_job(year: int, month: int):
+    """シフト表PDFの事前生成ジョブ"""
+    async def job(db: AsyncSession):
+        shift_data = await _get_shift_data(year, month, db, include_matrix=True)
+        return "shift_table", shift_data, shift_table_tags(year, month)
+    return job
+
+
+def timesheet_pdf_job(user_id: int, year: int, month: int):
+    """出勤簿PDFの事前生成ジョブ"""
+    async def job(db: AsyncSession):
+        timesheet_data = await _get_timesheet_data(user_id, year, month, db)
+        return "timesheet", timesheet_data, timesheet_tags(user_id, year, month)
+    return job
+
+
+async def prerender_attendance_pdfs(user_ids: List[int], months: List[Tuple[int, int]]):
+    """対象月のシフト表と、指定した従業員の出勤簿PDFを事前生成
+
+    ダウンロード時の生成を待たせないよう、ワーカーを1つずつ使って順に生成する。
+    """
+    for year, month in months:
+        await pdf_prerenderer.run(("shift_table", year, month), shift_table_pdf_job(year, month))
+        for user_id in user_ids:
+            await pdf_prerenderer.run(("timesheet", user_id, year, month), timesheet_pdf_job(user_id, year, month))
+
+
+@router.post("/shift/{year}/{month}/prerender")
+async def prerender_month_pdfs(
+    year: int,
+    month: int,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    月締め: 対象月のシフト表と全従業員の出勤簿PDFをバックグラウンドで生成しておく
+    - 管理者のみアクセス可能
+    """
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="管理者のみアクセスできます")
+    if not 1 <= month <= 12:
+        raise HTTPException(status_code=400, detail="月の指定が不正です")
+
+    user_ids = (await db.scalars(select(User.id).where(User.is_active == True).order_by(User.id))).all()
+    background_tasks.add_task(prerender_attendance_pdfs, list(user_ids), [(year, month)])
+
+    return {
+        "success": True,
+        "message": f"{year}年{month}月のPDFを生成しています",
+        "data": {"jobs": 1 + len(user_ids)}
+    }
+
+
 @router.get("/shift/{year}/{month}/pdf")
 async def get_shift_table_pdf(
     year: int,
     month: int,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     月次シフト表をPDFで出力
@@ -469,17 +576,16 @@ async def get_shift_table_pdf(
         raise HTTPException(status_code=403, detail="管理者のみアクセスできます")
 
     # シフトデータを取得
-    shift_data = _get_shift_data(year, month, db)
+    shift_data = await _get_shift_data(year, month, db, include_matrix=True)
 
-    # PDF生成
-    pdf_bytes = generate_shift_table_pdf(shift_data)
+    # PDF生成（キャッシュ済みならそのファイル。生成は専用プロセスで実行し、混雑時は 429）
+    pdf_file = await open_pdf_file("shift_table", shift_data, shift_table_tags(year, month))
 
     # レスポンス
     filename = f"shift_table_{year}_{month:02d}.pdf"
     filename_encoded = quote(f"シフト表_{year}_{month:02d}.pdf")
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
+    return pdf_file_response(
+        pdf_file,
         headers={
             "Content-Disposition": f"attachment; filename={filename}; filename*=UTF-8''{filename_encoded}"
         }
@@ -492,7 +598,7 @@ async def get_timesheet_pdf(
     year: int,
     month: int,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     個人別月次出勤簿をPDFで出力
@@ -502,18 +608,17 @@ async def get_timesheet_pdf(
         raise HTTPException(status_code=403, detail="アクセス権限がありません")
 
     # 出勤簿データを取得
-    timesheet_data = _get_timesheet_data(user_id, year, month, db)
+    timesheet_data = await _get_timesheet_data(user_id, year, month, db)
+    user = await db.scalar(select(User).where(User.id == user_id))
 
-    # PDF生成
-    pdf_bytes = generate_timesheet_pdf(timesheet_data)
+    # PDF生成（キャッシュ済みならそのファイル。生成は専用プロセスで実行し、混雑時は 429）
+    pdf_file = await open_pdf_file("timesheet", timesheet_data, timesheet_tags(user_id, year, month))
 
     # レスポンス
-    user = db.query(User).filter(User.id == user_id).first()
     filename = f"timesheet_{year}_{month:02d}.pdf"
     filename_encoded = quote(f"出勤簿_{user.name}_{year}_{month:02d}.pdf")
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
+    return pdf_file_response(
+        pdf_file,
         headers={
             "Content-Disposition": f"attachment; filename={filename}; filename*=UTF-8''{filename_encoded}"
         }
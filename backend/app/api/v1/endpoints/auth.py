@@ -1,20 +1,32 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Header
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Optional
 from datetime import timedelta
-import bcrypt
 
 from app.core.database import get_db
-from app.core.security import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.password_hasher import PasswordHasherBusy, password_hasher
+from app.core.rate_limit import RateLimitExceeded, login_rate_limiter
+from app.core.security import create_access_token, create_refresh_token, decode_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.token_revocation import revocation_list
 from app.models.database import User
+from app.services.token_revocation import revoke_token
+from logger import get_security_logger
 
 router = APIRouter()
+security_logger = get_security_logger()
 
 class LoginRequest(BaseModel):
     email: str
     password: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
 class LoginResponse(BaseModel):
     access_token: str
     token_type: str
@@ -23,28 +35,43 @@ class LoginResponse(BaseModel):
     role: str
 
 @router.post("/login")
-async def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, http_request: Request, db: AsyncSession = Depends(get_db)):
     """
     ユーザーログイン
+    - メールアドレス・接続元IPごとの失敗した試行回数が上限を超えた場合は 429（成功した試行は数えない）
     """
-    # メールアドレスでユーザーを検索
-    user = db.query(User).filter(User.email == request.email).first()
-
-    if not user:
+    # 試行回数の制限（DB検索・パスワード検証より前に判定）
+    ip_address = http_request.client.host if http_request.client else None
+    try:
+        await login_rate_limiter.hit(request.email, ip_address)
+    except RateLimitExceeded as e:
+        security_logger.log_rate_limit_exceeded(
+            ip_address=ip_address or "unknown",
+            endpoint=f"/api/v1/auth/login ({e.scope})",
+            limit=e.limit,
+            window=e.window
+        )
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="メールアドレスまたはパスワードが正しくありません"
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="ログインの試行回数が上限に達しました。しばらくしてから再度お試しください",
+            headers={"Retry-After": str(e.retry_after)}
         )
 
-    # パスワード検証（bcryptを直接使用）
+    # メールアドレスでユーザーを検索し、パスワードを検証（専用スレッドで実行し、混雑時は 503）
+    # 判定できなかった試行は失敗として数えない
     try:
-        password_valid = bcrypt.checkpw(
-            request.password.encode('utf-8'),
-            user.hashed_password.encode('utf-8')
+        user = await db.scalar(select(User).where(User.email == request.email))
+        password_valid = user is not None and await password_hasher.verify(request.password, user.hashed_password)
+    except PasswordHasherBusy as e:
+        await login_rate_limiter.release(request.email, ip_address)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="ログインが混み合っています。しばらくしてから再度お試しください",
+            headers={"Retry-After": str(e.retry_after)}
         )
-    except Exception as e:
-        print(f"[LOGIN ERROR] Password verification failed: {e}")
-        password_valid = False
+    except Exception:
+        await login_rate_limiter.release(request.email, ip_address)
+        raise
 
     if not password_valid:
         raise HTTPException(
@@ -59,20 +86,10 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
             detail="このアカウントは無効化されています"
         )
 
-    # JWTトークン生成
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={
-            "sub": str(user.id),
-            "email": user.email,
-            "role": user.role
-        },
-        expires_delta=access_token_expires
-    )
+    await login_rate_limiter.succeeded(request.email, ip_address)
 
     return {
-        "access_token": access_token,
-        "token_type": "bearer",
+        **_issue_tokens(user),
         "user_id": str(user.id),
         "name": user.name,
         "role": user.role,
@@ -86,15 +103,89 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
         }
     }
 
+def _issue_tokens(user: User) -> dict:
+    """短命のアクセストークンとリフレッシュトークンを発行"""
+    access_token = create_access_token(
+        data={
+            "sub": str(user.id),
+            "email": user.email,
+            "role": user.role
+        },
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return {
+        "access_token": access_token,
+        "refresh_token": create_refresh_token({"sub": str(user.id)}),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+@router.post("/refresh")
+async def refresh(request: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """
+    リフレッシュトークンでアクセストークンを再発行
+    - 使用したリフレッシュトークンは失効させ、新しいものを返す
+    """
+    payload = decode_access_token(request.refresh_token)
+    if (
+        payload is None
+        or payload.get("type") != "refresh"
+        or revocation_list.is_revoked(payload.get("jti"))
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="無効なリフレッシュトークンです"
+        )
+
+    user = await db.scalar(select(User).where(User.id == int(payload["sub"])))
+    if user is None or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="無効なリフレッシュトークンです"
+        )
+
+    # 失効の登録に成功した1回だけ発行する（同じトークンの同時使用は後続を 401）
+    if not await revoke_token(db, payload, user_id=user.id):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="無効なリフレッシュトークンです"
+        )
+    return _issue_tokens(user)
+
 @router.post("/logout")
-async def logout():
+async def logout(
+    request: Optional[LogoutRequest] = None,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
     """
     ユーザーログアウト
+    - アクセストークン（Authorization）と、指定があればリフレッシュトークンを失効させる
+    - リフレッシュトークンは、アクセストークンが有効ならそれと同じユーザーのもののみ失効させる
+      （アクセストークンの期限切れ後のログアウトでは、リフレッシュトークンの保持者を本人とみなす）
+    - 無効・期限切れのトークンは失効不要のため無視する
     """
+    owner = None
+    if authorization:
+        payload = decode_access_token(authorization.replace("Bearer ", ""))
+        if payload and payload.get("sub") and payload.get("type") != "refresh":
+            owner = payload["sub"]
+            await revoke_token(db, payload, user_id=int(owner))
+
+    if request and request.refresh_token:
+        payload = decode_access_token(request.refresh_token)
+        if (
+            payload
+            and payload.get("type") == "refresh"
+            and payload.get("sub")
+            and (owner is None or payload["sub"] == owner)
+        ):
+            await revoke_token(db, payload, user_id=int(payload["sub"]))
+
     return {"message": "ログアウトしました"}
 
 @router.get("/me")
-async def get_me(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
+async def get_me(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
     """
     現在のユーザー情報を取得
     """
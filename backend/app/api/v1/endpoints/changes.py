@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.auth import get_current_admin_user
+from app.core.database import get_db
+from app.core.pagination import decode_cursor, encode_cursor
+from app.services.change_feed import CHANGE_FEED_ENTITIES, latest_sequence, read_changes, to_ndjson
+
+router = APIRouter()
+
+
+@router.get("/")
+async def get_changes(
+    cursor: Optional[str] = Query(None, description="前回のレスポンスの X-Next-Cursor（省略時は最初から）"),
+    limit: int = Query(1000, ge=1, le=10000),
+    types: Optional[str] = Query(None, description="対象の種別（カンマ区切り）"),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """
+    変更フィード（給与連携用）
+
+    - cursor より後の変更を通し番号順に NDJSON（1行1件）で返す
+    - 続きを取得するには X-Next-Cursor を cursor に指定する（X-Has-More が false なら最新まで取得済み）
+    - 変更がなくても X-Next-Cursor は返すため、保存して次回の取得に使う
+    """
+    after = decode_cursor(cursor, keys=("seq",))
+    after_seq = after["seq"] if after else 0
+    if not isinstance(after_seq, int):
+        raise HTTPException(status_code=400, detail="カーソルが不正です")
+
+    entity_types = None
+    if types:
+        entity_types = [name.strip() for name in types.split(",") if name.strip()]
+        unknown = set(entity_types) - set(CHANGE_FEED_ENTITIES)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"types は {', '.join(CHANGE_FEED_ENTITIES)} から指定してください"
+            )
+
+    # 1件多く取得して続きの有無を判定
+    changes = await read_changes(db, after_seq, limit + 1, entity_types)
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    last_seq = changes[-1].id if changes else after_seq
+
+    return Response(
+        content=to_ndjson(changes),
+        media_type="application/x-ndjson",
+        headers={
+            "X-Next-Cursor": encode_cursor({"seq": last_seq}),
+            "X-Has-More": "true" if has_more else "false",
+        }
+    )
+
+
+@router.get("/cursor")
+async def get_latest_cursor(
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """
+    最新の変更を指すカーソルを取得（全件エクスポートで初期取り込みした後、以降の変更だけを取得する場合）
+    """
+    seq = await latest_sequence(db)
+    return {
+        "success": True,
+        "data": {"cursor": encode_cursor({"seq": seq}), "seq": seq}
+    }
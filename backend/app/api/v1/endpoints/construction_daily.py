@@ -1,16 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends, Response
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import date
-import io
 from urllib.parse import quote
 
 from app.core.auth import get_current_user
 from app.core.database import get_db
 from app.models.database import ConstructionDailyReport as ReportModel, User
-from app.services.pdf_generator import generate_construction_daily_pdf
+from app.services.pdf_cache import construction_daily_tags, invalidate_construction_daily
+from app.services.pdf_prerender import pdf_prerenderer
+from app.services.pdf_renderer import construction_daily_payload, open_pdf_file, pdf_file_response
 
 router = APIRouter()
 
@@ -81,10 +82,22 @@ class ConstructionDailyReportResponse(BaseModel):
         from_attributes = True
 
 
+def construction_daily_pdf_job(report_id: int):
+    """工事日報PDFの事前生成ジョブ"""
+    async def job(db: AsyncSession):
+        report = await db.scalar(select(ReportModel).where(ReportModel.id == report_id))
+        if not report:
+            raise HTTPException(status_code=404, detail="工事日報が見つかりません")
+        user = await db.scalar(select(User).where(User.id == report.user_id))
+        return "construction_daily", construction_daily_payload(report, user), construction_daily_tags(report.id)
+    return job
+
+
 @router.post("/", response_model=ConstructionDailyReportResponse)
 async def create_construction_daily_report(
     report_data: ConstructionDailyReportCreate,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -113,8 +126,16 @@ async def create_construction_daily_report(
     )
 
     db.add(new_report)
-    db.commit()
-    db.refresh(new_report)
+    await db.commit()
+    await db.refresh(new_report)
+
+    # 同じ月の出勤簿PDF（キャッシュ）を破棄
+    invalidate_construction_daily(new_report.id, new_report.user_id, new_report.report_date)
+
+    # 続けてダウンロードされることが多いため、レスポンス後にPDFを生成しておく
+    background_tasks.add_task(
+        pdf_prerenderer.run, ("construction_daily", new_report.id), construction_daily_pdf_job(new_report.id)
+    )
 
     return ConstructionDailyReportResponse(
         id=new_report.id,
@@ -127,19 +148,19 @@ async def create_construction_daily_report(
 
 @router.get("/")
 async def get_construction_daily_reports(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     工事日報一覧を取得
     """
-    query = db.query(ReportModel)
+    query = select(ReportModel)
 
     # 管理者以外は自分の日報のみ表示
     if current_user.get("role") != "admin":
-        query = query.filter(ReportModel.user_id == current_user["id"])
+        query = query.where(ReportModel.user_id == current_user["id"])
 
-    reports = query.order_by(ReportModel.report_date.desc()).all()
+    reports = (await db.scalars(query.order_by(ReportModel.report_date.desc()))).all()
 
     return {
         "success": True,
@@ -159,13 +180,13 @@ async def get_construction_daily_reports(
 @router.get("/{report_id}/pdf")
 async def get_construction_daily_pdf(
     report_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     工事日報をPDFで出力
     """
-    report = db.query(ReportModel).filter(ReportModel.id == report_id).first()
+    report = await db.scalar(select(ReportModel).where(ReportModel.id == report_id))
 
     if not report:
         raise HTTPException(status_code=404, detail="工事日報が見つかりません")
@@ -175,17 +196,18 @@ async def get_construction_daily_pdf(
         raise HTTPException(status_code=403, detail="この工事日報を閲覧する権限がありません")
 
     # ユーザー情報を取得
-    user = db.query(User).filter(User.id == report.user_id).first()
+    user = await db.scalar(select(User).where(User.id == report.user_id))
 
-    # PDFを生成
-    pdf_bytes = generate_construction_daily_pdf(report, user)
+    # PDFを生成（キャッシュ済みならそのファイル。生成は専用プロセスで実行し、混雑時は 429）
+    pdf_file = await open_pdf_file(
+        "construction_daily", construction_daily_payload(report, user), construction_daily_tags(report.id)
+    )
 
-    # PDFをStreamingResponseで返す
+    # 生成済みのファイルをそのまま返す
     filename = f"construction_daily_{report.report_date.strftime('%Y%m%d')}.pdf"
     filename_encoded = quote(f"工事日報_{report.report_date.strftime('%Y%m%d')}_{report.site_name}.pdf")
-    return StreamingResponse(
-        io.BytesIO(pdf_bytes),
-        media_type="application/pdf",
+    return pdf_file_response(
+        pdf_file,
         headers={
             "Content-Disposition": f"attachment; filename={filename}; filename*=UTF-8''{filename_encoded}"
         }
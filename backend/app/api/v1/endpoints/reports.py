@@ -1,45 +1,173 @@
 from fastapi import APIRouter, Depends, Query
+from datetime import date, datetime, time, timedelta
 from typing import Optional
+from sqlalchemy import event, func, inspect, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from app.core.auth import get_current_admin_user
+from app.core.database import get_db
+from app.models.database import (
+    ConstructionDailyReport, HolidayWorkRequest, LeaveRequest, OvertimeRequest, Request, User,
+)
+from app.api.v1.endpoints.requests import ATTENDANCE_REQUEST_TYPES
+from app.services.report_summary import summarize, summary_cache
 
 router = APIRouter()
 
 
-@router.get("/reports/summary")
-async def get_summary_report(
-    start_date: Optional[str] = Query(None),
-    end_date: Optional[str] = Query(None),
-    current_user: dict = Depends(get_current_admin_user)
-):
-    """
-    集計レポートデータを取得
-    """
-    summary = {
+def _month_expression(db: AsyncSession):
+    """申請日の年月（YYYY-MM）。GROUP BY と SELECT で同じ式になるよう書式はリテラルで埋め込む"""
+    if db.bind.dialect.name == "postgresql":
+        return func.to_char(
+            func.date_trunc(literal_column("'month'"), Request.applied_at), literal_column("'YYYY-MM'")
+        )
+    return func.strftime(literal_column("'%Y-%m'"), Request.applied_at)
+
+
+def _date_range(column, start_date: Optional[date], end_date: Optional[date]) -> list:
+    conditions = []
+    if start_date:
+        conditions.append(column >= start_date)
+    if end_date:
+        conditions.append(column <= end_date)
+    return conditions
+
+
+async def _collect_summary(db: AsyncSession, start_date: Optional[date], end_date: Optional[date]) -> dict:
+    """集計レポート（申請はステータス × 種別 × 月 × 部署の GROUP BY 1クエリ、出勤簿は1クエリ）"""
+    # 申請日（applied_at）が期間内の申請。終了日はその日の終わりまで含める
+    applied_conditions = []
+    if start_date:
+        applied_conditions.append(Request.applied_at >= datetime.combine(start_date, time.min))
+    if end_date:
+        applied_conditions.append(Request.applied_at < datetime.combine(end_date + timedelta(days=1), time.min))
+    month = _month_expression(db)
+    groups = (await db.execute(
+        select(Request.status, Request.type, month, User.department, func.count(Request.id))
+        .join(User, User.id == Request.applicant_id)
+        .where(*applied_conditions)
+        .group_by(Request.status, Request.type, month, User.department)
+    )).all()
+    summary = summarize(groups)
+
+    # 出勤簿: 日報を提出した延べ日数と、承認済みの時間外・休暇・休日出勤（勤務日・休暇開始日が期間内）
+    work_days = select(ConstructionDailyReport.user_id, ConstructionDailyReport.report_date).where(
+        *_date_range(ConstructionDailyReport.report_date, start_date, end_date)
+    ).distinct().subquery()
+    overtime_hours = select(func.coalesce(func.sum(OvertimeRequest.total_hours), 0)).join(
+        Request, Request.id == OvertimeRequest.request_id
+    ).where(Request.status == "approved", *_date_range(OvertimeRequest.work_date, start_date, end_date))
+    leave_days = select(func.coalesce(func.sum(LeaveRequest.days), 0)).join(
+        Request, Request.id == LeaveRequest.request_id
+    ).where(Request.status == "approved", *_date_range(LeaveRequest.start_date, start_date, end_date))
+    holiday_work_days = select(func.count(HolidayWorkRequest.id)).join(
+        Request, Request.id == HolidayWorkRequest.request_id
+    ).where(Request.status == "approved", *_date_range(HolidayWorkRequest.work_date, start_date, end_date))
+    attendance = (await db.execute(select(
+        select(func.count()).select_from(work_days).scalar_subquery(),
+        overtime_hours.scalar_subquery(),
+        leave_days.scalar_subquery(),
+        holiday_work_days.scalar_subquery(),
+    ))).one()
+
+    return {
         "period": {
-            "start": start_date or "2025-10-01",
-            "end": end_date or "2025-10-31"
+            "start": start_date.isoformat() if start_date else None,
+            "end": end_date.isoformat() if end_date else None
         },
+        **summary,
         "requests_summary": {
-            "total": 45,
-            "by_type": {
-                "leave": 20,
-                "overtime": 15,
-                "expense": 7,
-                "holiday_work": 3
-            },
-            "by_status": {
-                "pending": 5,
-                "approved": 35,
-                "rejected": 5
-            }
+            "total": summary["total_requests"],
+            "by_type": {key: item["count"] for key, item in summary["type_summary"].items()},
+            "by_status": {key: item["count"] for key, item in summary["status_summary"].items()}
         },
         "attendance_summary": {
-            "total_work_days": 22,
-            "total_overtime_hours": 48.5,
-            "total_leave_days": 12
+            "total_work_days": attendance[0],
+            "total_overtime_hours": float(attendance[1]),
+            "total_leave_days": float(attendance[2]),
+            "total_holiday_work_days": attendance[3]
         }
     }
 
+
+# 変更を記録するときの「すべての期間」
+_ALL_PERIODS = "*"
+
+# 明細の日付（勤務日・休暇開始日・日報の日付）
+_DETAIL_DATES = {
+    LeaveRequest: "start_date",
+    OvertimeRequest: "work_date",
+    HolidayWorkRequest: "work_date",
+    ConstructionDailyReport: "report_date",
+}
+
+
+def _values(obj, name: str) -> set:
+    """属性の現在の値と、このフラッシュで変わる前の値（None を除く）"""
+    history = inspect(obj).attrs[name].history
+    return {value for value in (getattr(obj, name), *history.deleted) if value is not None}
+
+
+def _modified(obj, names) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in names)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_summary_changes(session, flush_context):
+    """集計レポートに関わる変更を記録（コミット後に summary_cache から該当期間を破棄する）"""
+    days = session.info.setdefault("summary_changed_days", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        is_dirty = obj not in session.new and obj not in session.deleted
+        if isinstance(obj, Request):
+            if is_dirty and not _modified(obj, ("status", "type", "applied_at", "applicant_id")):
+                continue
+            days.update(_values(obj, "applied_at"))
+            if "approved" in _values(obj, "status") and _values(obj, "type") & ATTENDANCE_REQUEST_TYPES:
+                # 承認の取り消し・承認で出勤簿の集計が変わる。勤務日・休暇日は申請日と
+                # 別の期間にあることがあるため、すべて破棄する
+                days.add(_ALL_PERIODS)
+        elif type(obj) in _DETAIL_DATES:
+            name = _DETAIL_DATES[type(obj)]
+            if not is_dirty or session.is_modified(obj, include_collections=False):
+                days.update(_values(obj, name))
+        elif isinstance(obj, User):
+            if obj in session.deleted or (is_dirty and _modified(obj, ("department",))):
+                days.add(_ALL_PERIODS)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_summary_cache(session):
+    days = session.info.pop("summary_changed_days", None)
+    if not days:
+        return
+    if _ALL_PERIODS in days:
+        summary_cache.invalidate()
+        return
+    for day in days:
+        summary_cache.invalidate_date(day)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_summary_changes(session, previous_transaction):
+    session.info.pop("summary_changed_days", None)
+
+
+@router.get("/reports/summary")
+async def get_summary_report(
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_admin_user)
+):
+    """
+    集計レポートデータを取得（締まった期間はキャッシュから）
+    """
+    summary = await summary_cache.get(
+        (start_date, end_date), start_date, end_date,
+        lambda: _collect_summary(db, start_date, end_date),
+    )
+
     return {
         "success": True,
         "data": summary
@@ -1,20 +1,49 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query, status
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import List, Optional
-from datetime import datetime, date
+from typing import List, Optional, Tuple
+from datetime import datetime, date, time, timedelta
 
 from app.core.auth import get_current_admin_user, get_current_user
 from app.core.database import get_db
+from app.core.pagination import decode_cursor, split_page
 from app.models.database import (
     User, Request as RequestModel, LeaveRequest as LeaveRequestModel,
     OvertimeRequest as OvertimeRequestModel, ExpenseRequest as ExpenseRequestModel,
     ReimbursementRequest as ReimbursementRequestModel, SettlementRequest as SettlementRequestModel,
     HolidayWorkRequest as HolidayWorkRequestModel, ExpenseLine as ExpenseLineModel
 )
+from app.api.v1.endpoints.attendance import prerender_attendance_pdfs
+from app.services.pdf_cache import invalidate_attendance
 
 router = APIRouter()
 
+# 承認状態が出勤簿・シフト表に反映される申請の種類
+ATTENDANCE_REQUEST_TYPES = {"leave", "overtime", "holiday_work"}
+
+
+async def _attendance_months(db: AsyncSession, request: RequestModel) -> List[Tuple[int, int]]:
+    """勤怠系の申請が対象とする年月（休暇は開始日〜終了日の各月）"""
+    if request.type == "leave":
+        columns = (LeaveRequestModel.start_date, LeaveRequestModel.end_date)
+        detail = LeaveRequestModel
+    elif request.type == "overtime":
+        columns = (OvertimeRequestModel.work_date, OvertimeRequestModel.work_date)
+        detail = OvertimeRequestModel
+    else:
+        columns = (HolidayWorkRequestModel.work_date, HolidayWorkRequestModel.work_date)
+        detail = HolidayWorkRequestModel
+    rows = (await db.execute(select(*columns).where(detail.request_id == request.id))).all()
+
+    months = set()
+    for start, end in rows:
+        year, month = start.year, start.month
+        while (year, month) <= (end.year, end.month):
+            months.add((year, month))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return sorted(months)
+
 class Request(BaseModel):
     id: str
     type: str
@@ -114,31 +143,78 @@ class ApproveRequestBody(BaseModel):
 
 @router.get("/")
 async def get_requests(
-    db: Session = Depends(get_db),
+    type: Optional[str] = Query(None, description="申請種別"),
+    status: Optional[str] = Query(None, description="ステータス"),
+    start_date: Optional[date] = Query(None, description="作成日（開始）"),
+    end_date: Optional[date] = Query(None, description="作成日（終了）"),
+    applicant_id: Optional[int] = Query(None, description="申請者ID（管理者のみ）"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    with_total: bool = Query(True, description="総件数を返すか（2ページ目以降は false 推奨）"),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     申請一覧を取得
+    - 作成日時の新しい順に (created_at, id) のキーセットでページング
+    - 続きは next_cursor を cursor に指定して取得
     """
-    # データベースから申請を取得（リレーションを事前読み込み）
-    query = db.query(RequestModel).options(
-        joinedload(RequestModel.applicant),
-        joinedload(RequestModel.approver)
-    )
+    after = decode_cursor(cursor, keys=("created_at", "id"), datetime_keys=("created_at",))
 
+    conditions = []
     # 管理者以外は自分の申請のみ表示
     if current_user.get("role") != "admin":
-        query = query.filter(RequestModel.applicant_id == current_user["id"])
+        if applicant_id is not None and applicant_id != current_user["id"]:
+            raise HTTPException(status_code=403, detail="他の申請者の申請を閲覧する権限がありません")
+        applicant_id = current_user["id"]
+    if applicant_id is not None:
+        conditions.append(RequestModel.applicant_id == applicant_id)
+    if type:
+        conditions.append(RequestModel.type == type)
+    if status:
+        conditions.append(RequestModel.status == status)
+    if start_date:
+        conditions.append(RequestModel.created_at >= datetime.combine(start_date, time.min))
+    if end_date:
+        conditions.append(RequestModel.created_at < datetime.combine(end_date + timedelta(days=1), time.min))
+
+    # 総件数はカーソル位置に関係なくフィルタ条件のみで数える
+    total = None
+    if with_total:
+        total = await db.scalar(select(func.count()).select_from(RequestModel).where(*conditions))
+
+    if after:
+        conditions.append(
+            tuple_(RequestModel.created_at, RequestModel.id) < tuple_(after["created_at"], after["id"])
+        )
+
+    query = select(
+        RequestModel.id,
+        RequestModel.type,
+        RequestModel.applicant_id,
+        func.coalesce(User.name, "不明").label("applicant_name"),
+        RequestModel.status,
+        RequestModel.title,
+        RequestModel.description,
+        RequestModel.applied_at,
+        RequestModel.created_at,
+    ).outerjoin(User, User.id == RequestModel.applicant_id).where(*conditions).order_by(
+        RequestModel.created_at.desc(), RequestModel.id.desc()
+    )
 
-    requests = query.order_by(RequestModel.created_at.desc()).all()
+    # 1件多く取得して続きの有無を判定
+    requests, has_more, next_cursor = split_page(
+        (await db.execute(query.limit(limit + 1))).all(), limit,
+        lambda row: {"created_at": row.created_at, "id": row.id}
+    )
 
-    # 仮払金申請情報を一括取得
+    # 仮払金申請情報をページ分だけ一括取得
     expense_request_ids = [req.id for req in requests if req.type == "expense"]
     expense_requests = {}
     if expense_request_ids:
-        expenses = db.query(ExpenseRequestModel).filter(
-            ExpenseRequestModel.request_id.in_(expense_request_ids)
-        ).all()
+        expenses = (await db.scalars(
+            select(ExpenseRequestModel).where(ExpenseRequestModel.request_id.in_(expense_request_ids))
+        )).all()
         expense_requests = {exp.request_id: exp for exp in expenses}
 
     # レスポンスデータを構築
@@ -148,7 +224,7 @@ async def get_requests(
             "id": str(req.id),
             "type": req.type,
             "applicant_id": str(req.applicant_id),
-            "applicant_name": req.applicant.name if req.applicant else "不明",
+            "applicant_name": req.applicant_name,
             "status": req.status,
             "title": req.title,
             "description": req.description,
@@ -172,19 +248,21 @@ async def get_requests(
     return {
         "success": True,
         "data": requests_data,
-        "total": len(requests_data)
+        "total": total,
+        "has_more": has_more,
+        "next_cursor": next_cursor
     }
 
 @router.get("/{request_id}")
 async def get_request(
     request_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     特定の申請を取得
     """
-    request = db.query(RequestModel).filter(RequestModel.id == int(request_id)).first()
+    request = await db.scalar(select(RequestModel).where(RequestModel.id == int(request_id)))
 
     if not request:
         raise HTTPException(status_code=404, detail="申請が見つかりません")
@@ -194,7 +272,7 @@ async def get_request(
         raise HTTPException(status_code=403, detail="この申請を閲覧する権限がありません")
 
     # 申請者情報を取得
-    applicant = db.query(User).filter(User.id == request.applicant_id).first()
+    applicant = await db.scalar(select(User).where(User.id == request.applicant_id))
 
     return {
         "id": str(request.id),
@@ -222,7 +300,7 @@ def get_leave_type_japanese(leave_type: str) -> str:
 @router.post("/leave", response_model=Request)
 async def create_leave_request(
     request: LeaveRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -242,7 +320,7 @@ async def create_leave_request(
         applied_at=datetime.now()
     )
     db.add(new_request)
-    db.flush()  # IDを取得するため
+    await db.flush()  # IDを取得するため
 
     # 休暇申請詳細を作成
     leave_request = LeaveRequestModel(
@@ -259,8 +337,8 @@ async def create_leave_request(
         compensatory_work_date=leave_data.compensatory_work_date
     )
     db.add(leave_request)
-    db.commit()
-    db.refresh(new_request)
+    await db.commit()
+    await db.refresh(new_request)
 
     return Request(
         id=str(new_request.id),
@@ -276,7 +354,7 @@ async def create_leave_request(
 @router.post("/overtime", response_model=Request)
 async def create_overtime_request(
     request: OvertimeRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -295,7 +373,7 @@ async def create_overtime_request(
         applied_at=datetime.now()
     )
     db.add(new_request)
-    db.flush()
+    await db.flush()
 
     # 残業申請詳細を作成
     overtime_request = OvertimeRequestModel(
@@ -307,8 +385,8 @@ async def create_overtime_request(
         reason=overtime_data.reason
     )
     db.add(overtime_request)
-    db.commit()
-    db.refresh(new_request)
+    await db.commit()
+    await db.refresh(new_request)
 
     return Request(
         id=str(new_request.id),
@@ -324,13 +402,13 @@ async def create_overtime_request(
 @router.delete("/{request_id}")
 async def cancel_request(
     request_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     申請を取り消し
     """
-    request = db.query(RequestModel).filter(RequestModel.id == int(request_id)).first()
+    request = await db.scalar(select(RequestModel).where(RequestModel.id == int(request_id)))
 
     if not request:
         raise HTTPException(status_code=404, detail="申請が見つかりません")
@@ -345,7 +423,7 @@ async def cancel_request(
 
     # ステータスを「取り消し」に変更
     request.status = "cancelled"
-    db.commit()
+    await db.commit()
 
     return {
         "success": True,
@@ -355,7 +433,7 @@ async def cancel_request(
 @router.post("/expense", response_model=Request)
 async def create_expense_request(
     request: AdvancePaymentRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -374,7 +452,7 @@ async def create_expense_request(
         applied_at=datetime.now()
     )
     db.add(new_request)
-    db.flush()
+    await db.flush()
 
     # 仮払金申請詳細を作成
     expense_request = ExpenseRequestModel(
@@ -385,8 +463,8 @@ async def create_expense_request(
         request_amount=expense_data.request_amount
     )
     db.add(expense_request)
-    db.commit()
-    db.refresh(new_request)
+    await db.commit()
+    await db.refresh(new_request)
 
     return Request(
         id=str(new_request.id),
@@ -402,16 +480,16 @@ async def create_expense_request(
 @router.post("/expense-settlement", response_model=Request)
 async def create_settlement_request(
     request: SettlementRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     仮払金精算を作成
     """
     # 仮払金申請の存在確認
-    advance_request = db.query(ExpenseRequestModel).filter(
+    advance_request = await db.scalar(select(ExpenseRequestModel).where(
         ExpenseRequestModel.id == int(request.advance_payment_request_id)
-    ).first()
+    ))
 
     if not advance_request:
         raise HTTPException(status_code=404, detail="仮払金申請が見つかりません")
@@ -425,7 +503,7 @@ async def create_settlement_request(
         description=f"精算期日: {request.settlement_date}, 使用金額: ¥{request.total_amount:,}, 残額: ¥{request.balance_amount:,}"
     )
     db.add(new_request)
-    db.flush()
+    await db.flush()
 
     # 精算申請詳細を作成
     settlement_request = SettlementRequestModel(
@@ -454,8 +532,8 @@ async def create_settlement_request(
         )
         db.add(expense_line)
 
-    db.commit()
-    db.refresh(new_request)
+    await db.commit()
+    await db.refresh(new_request)
 
     return Request(
         id=str(new_request.id),
@@ -471,7 +549,7 @@ async def create_settlement_request(
 @router.post("/reimbursement", response_model=Request)
 async def create_reimbursement_request(
     request: ReimbursementRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -486,7 +564,7 @@ async def create_reimbursement_request(
         description=f"申請者: {request.applicant_name}, 現場: {request.site_name}, 合計: ¥{request.total_amount:,}"
     )
     db.add(new_request)
-    db.flush()
+    await db.flush()
 
     # 立替金申請詳細を作成
     reimbursement_request = ReimbursementRequestModel(
@@ -510,8 +588,8 @@ async def create_reimbursement_request(
         )
         db.add(expense_line)
 
-    db.commit()
-    db.refresh(new_request)
+    await db.commit()
+    await db.refresh(new_request)
 
     return Request(
         id=str(new_request.id),
@@ -527,7 +605,7 @@ async def create_reimbursement_request(
 @router.post("/holiday-work", response_model=Request)
 async def create_holiday_work_request(
     request: HolidayWorkRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -546,7 +624,7 @@ async def create_holiday_work_request(
         applied_at=datetime.now()
     )
     db.add(new_request)
-    db.flush()
+    await db.flush()
 
     # 休日出勤申請詳細を作成
     holiday_work_request = HolidayWorkRequestModel(
@@ -560,8 +638,8 @@ async def create_holiday_work_request(
         compensatory_leave_date=holiday_data.compensatory_leave_date
     )
     db.add(holiday_work_request)
-    db.commit()
-    db.refresh(new_request)
+    await db.commit()
+    await db.refresh(new_request)
 
     return Request(
         id=str(new_request.id),
@@ -577,13 +655,13 @@ async def create_holiday_work_request(
 @router.post("/{request_id}/submit")
 async def submit_request(
     request_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     申請を提出
     """
-    request = db.query(RequestModel).filter(RequestModel.id == int(request_id)).first()
+    request = await db.scalar(select(RequestModel).where(RequestModel.id == int(request_id)))
 
     if not request:
         raise HTTPException(status_code=404, detail="申請が見つかりません")
@@ -595,22 +673,23 @@ async def submit_request(
     # ステータスを更新
     request.status = "applied"
     request.applied_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
 
     return {"message": f"申請 {request_id} を提出しました"}
 
 @router.post("/{request_id}/approve")
 async def approve_request(
     request_id: str,
+    background_tasks: BackgroundTasks,
     body: Optional[ApproveRequestBody] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_admin_user)
 ):
     """
     申請を承認
     仮払金申請の場合は受領日も記録
     """
-    request = db.query(RequestModel).filter(RequestModel.id == int(request_id)).first()
+    request = await db.scalar(select(RequestModel).where(RequestModel.id == int(request_id)))
 
     if not request:
         raise HTTPException(status_code=404, detail="申請が見つかりません")
@@ -624,13 +703,19 @@ async def approve_request(
 
     # 仮払金申請の場合は受領日を記録
     if request.type == "expense" and body and body.received_date:
-        expense = db.query(ExpenseRequestModel).filter(
+        expense = await db.scalar(select(ExpenseRequestModel).where(
             ExpenseRequestModel.request_id == request.id
-        ).first()
+        ))
         if expense:
             expense.received_date = body.received_date
 
-    db.commit()
+    await db.commit()
+
+    # 出勤簿・シフト表のPDF（キャッシュ）を破棄し、レスポンス後に対象月の分を生成しておく
+    if request.type in ATTENDANCE_REQUEST_TYPES:
+        invalidate_attendance(request.applicant_id)
+        months = await _attendance_months(db, request)
+        background_tasks.add_task(prerender_attendance_pdfs, [request.applicant_id], months)
 
     response = {"message": f"申請 {request_id} を承認しました"}
     if body and body.received_date:
@@ -641,13 +726,13 @@ async def approve_request(
 @router.post("/{request_id}/reject")
 async def reject_request(
     request_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_admin_user)
 ):
     """
     申請を却下
     """
-    request = db.query(RequestModel).filter(RequestModel.id == int(request_id)).first()
+    request = await db.scalar(select(RequestModel).where(RequestModel.id == int(request_id)))
 
     if not request:
         raise HTTPException(status_code=404, detail="申請が見つかりません")
@@ -656,7 +741,11 @@ async def reject_request(
     request.status = "rejected"
     request.rejected_at = datetime.utcnow()
     request.approver_id = current_user["id"]
-    db.commit()
+    await db.commit()
+
+    # 承認済みからの却下もあるため、出勤簿・シフト表のPDF（キャッシュ）を破棄
+    if request.type in ATTENDANCE_REQUEST_TYPES:
+        invalidate_attendance(request.applicant_id)
 
     return {"message": f"申請 {request_id} を却下しました"}
 
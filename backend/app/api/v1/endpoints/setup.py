@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.models.database import User
 import bcrypt
@@ -7,12 +8,12 @@ import bcrypt
 router = APIRouter()
 
 @router.post("/initialize")
-async def initialize_users(db: Session = Depends(get_db)):
+async def initialize_users(db: AsyncSession = Depends(get_db)):
     """
     初期ユーザーを作成（一度だけ実行）
     """
     # 既存ユーザーチェック
-    existing_user = db.query(User).first()
+    existing_user = await db.scalar(select(User).limit(1))
     if existing_user:
         raise HTTPException(status_code=400, detail="ユーザーが既に存在します")
 
@@ -56,7 +57,7 @@ async def initialize_users(db: Session = Depends(get_db)):
             user = User(**user_data)
             db.add(user)
 
-        db.commit()
+        await db.commit()
 
         return {
             "message": "初期ユーザー作成完了",
@@ -67,7 +68,7 @@ async def initialize_users(db: Session = Depends(get_db)):
             ]
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"ユーザー作成エラー: {str(e)}")
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
 from datetime import datetime
@@ -7,6 +8,8 @@ from datetime import datetime
 from app.core.database import get_db
 from app.core.security import get_password_hash, validate_password_strength
 from app.core.auth import get_current_admin_user
+from app.core.password_hasher import PasswordHasherBusy, password_hasher
+from app.core.user_cache import user_cache
 from app.models.database import User
 
 router = APIRouter()
@@ -43,14 +46,14 @@ class UserUpdate(BaseModel):
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register_user(
     user_data: UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: dict = Depends(get_current_admin_user)
 ):
     """
     新規ユーザー登録（管理者のみ）
     """
     # メールアドレス重複チェック
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -65,8 +68,15 @@ async def register_user(
             detail=message
         )
 
-    # パスワードハッシュ化
-    hashed_password = get_password_hash(user_data.password)
+    # パスワードハッシュ化（専用スレッドで実行）
+    try:
+        hashed_password = await password_hasher.run(get_password_hash, user_data.password)
+    except PasswordHasherBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="処理が混み合っています。しばらくしてから再度お試しください",
+            headers={"Retry-After": str(e.retry_after)}
+        )
 
     # ユーザー作成
     new_user = User(
@@ -79,8 +89,8 @@ async def register_user(
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     return new_user
 
@@ -88,23 +98,23 @@ async def register_user(
 async def get_users(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     ユーザー一覧取得
     """
-    users = db.query(User).offset(skip).limit(limit).all()
+    users = (await db.scalars(select(User).offset(skip).limit(limit))).all()
     return users
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     ユーザー詳細取得
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -116,13 +126,13 @@ async def get_user(
 async def update_user(
     user_id: int,
     user_data: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: dict = Depends(get_current_admin_user)
 ):
     """
     ユーザー情報更新（管理者のみ）
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -143,28 +153,31 @@ async def update_user(
 
     user.updated_at = datetime.utcnow()
 
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    # 権限変更・無効化を次のリクエストから反映
+    await user_cache.invalidate(user_id)
 
     return user
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: dict = Depends(get_current_admin_user)
 ):
     """
     ユーザー削除（管理者のみ）
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="ユーザーが見つかりません"
         )
 
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
+    await user_cache.invalidate(user_id)
 
     return None
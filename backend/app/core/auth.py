@@ -1,12 +1,15 @@
 from fastapi import Depends, HTTPException, status, Header
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
 from app.core.database import get_db
 from app.core.security import decode_access_token
+from app.core.token_revocation import revocation_list
+from app.core.user_cache import user_cache
 from app.models.database import User
 
-async def get_current_user(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
+async def get_current_user(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
     """
     現在のユーザーを取得（JWTトークンから）
     """
@@ -26,36 +29,42 @@ async def get_current_user(authorization: Optional[str] = Header(None), db: Sess
             detail="無効なトークンです"
         )
 
+    # リフレッシュトークンでのアクセス・失効済みトークンは拒否（判定はメモリ上のみ）
     user_id = payload.get("sub")
-    if user_id is None:
+    if user_id is None or payload.get("type", "access") != "access" or revocation_list.is_revoked(payload.get("jti")):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="無効なトークンです"
         )
 
-    # データベースからユーザーを取得
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="ユーザーが見つかりません"
-        )
+    # キャッシュ → データベースの順にユーザーを取得
+    current_user = await user_cache.get(user_id)
+    if current_user is None:
+        user = await db.scalar(select(User).where(User.id == int(user_id)))
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="ユーザーが見つかりません"
+            )
+        current_user = {
+            "id": user.id,
+            "user_id": user.id,
+            "name": user.name,
+            "email": user.email,
+            "role": user.role,
+            "department": user.department,
+            "position": user.position,
+            "is_active": user.is_active
+        }
+        await user_cache.set(user_id, current_user)
 
-    if not user.is_active:
+    if not current_user.pop("is_active"):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="このアカウントは無効化されています"
         )
 
-    return {
-        "id": user.id,
-        "user_id": user.id,
-        "name": user.name,
-        "email": user.email,
-        "role": user.role,
-        "department": user.department,
-        "position": user.position
-    }
+    return current_user
 
 async def get_current_admin_user(current_user: dict = Depends(get_current_user)):
     """
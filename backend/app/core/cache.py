@@ -0,0 +1,114 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+# プロセス内 TTL キャッシュ（stale-while-revalidate 対応）
+#
+# - 取得から ttl 秒以内: キャッシュをそのまま返す（hit）
+# - ttl を過ぎても stale_ttl 秒以内: 古い値を返しつつバックグラウンドで再取得（stale）
+# - それ以降・未取得: その場で取得（miss）。同じキーの同時取得は1回にまとめる
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+class TTLCache:
+    """stale-while-revalidate 付きの非同期 TTL キャッシュ"""
+
+    def __init__(self, ttl: float, stale_ttl: float = 0.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        # key -> (値, 取得時刻)
+        self._entries: Dict[Hashable, Tuple[Any, float]] = {}
+        # 取得中のキー（同時取得・再取得の重複防止）
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    async def get(self, key: Hashable, loader: Loader) -> Any:
+        """キャッシュから取得（期限切れ・未取得なら loader で取得）"""
+        if self.ttl <= 0:
+            self.misses += 1
+            return await loader()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, loaded_at = entry
+            age = self._clock() - loaded_at
+            if age < self.ttl:
+                self.hits += 1
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self._start_refresh(key, loader)
+                return value
+
+        self.misses += 1
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        return await self._load(key, loader)
+
+    async def _load(self, key: Hashable, loader: Loader) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except BaseException as e:
+            self.errors += 1
+            future.set_exception(e)
+            # 待機者がいない場合に "exception was never retrieved" を出さない
+            future.exception()
+            raise
+        else:
+            self._entries[key] = (value, self._clock())
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _start_refresh(self, key: Hashable, loader: Loader):
+        """バックグラウンドで再取得（失敗時は古い値を残す）"""
+        self.refreshes += 1
+
+        async def refresh():
+            try:
+                await self._load(key, loader)
+            except Exception:
+                pass
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """キャッシュを破棄（key 省略時は全件）"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """キャッシュとカウンタを初期化"""
+        self._entries.clear()
+        self.hits = self.stale_hits = self.misses = self.refreshes = self.errors = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット・ミス件数などの統計情報"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Union
+from typing import List, Optional, Union
 from pydantic import field_validator
 import os
 
@@ -13,7 +13,8 @@ class Settings(BaseSettings):
     # セキュリティ設定
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
 
     # CORS設定
     ALLOWED_ORIGINS: Union[List[str], str] = "http://localhost:3000,http://localhost:3001,https://niwayakanri.com,https://determined-ambition-production.up.railway.app"
@@ -23,6 +24,16 @@ class Settings(BaseSettings):
     APP_NAME: str = "勤怠・社内申請システム"
     DEBUG: bool = True
 
+    # 管理画面統計のキャッシュ（秒）: TTL 経過後も STALE_TTL の間は古い値を返して再集計
+    ADMIN_STATS_CACHE_TTL: float = 10.0
+    ADMIN_STATS_STALE_TTL: float = 60.0
+
+    # PDFの日本語フォント（未指定時は既定のパスから探索。.ttc は PDF_FONT_SUBFONT_INDEX を使用）
+    PDF_FONT_PATH: Optional[str] = None
+    PDF_FONT_SUBFONT_INDEX: int = 0
+    # シフト表・出勤簿をキャンバスへ直接描く高速版で生成（False で platypus の Table を使用）
+    PDF_FAST_RENDERER: bool = True
+
     # ログ設定
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "json"
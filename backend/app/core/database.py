@@ -1,26 +1,86 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
 
 # SQLite データベース設定
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./niwayakanri.db")
 
-# SQLite データベースエンジンを作成
+# SQL文をログ出力するか（開発時のみ）
+SQL_ECHO = os.getenv("SQL_ECHO", "true").lower() == "true"
+
+
+def to_async_database_url(url: str) -> str:
+    """同期ドライバのURLを非同期ドライバ（aiosqlite / asyncpg）のURLに変換"""
+    if url.startswith("sqlite:///"):
+        return "sqlite+aiosqlite:///" + url[len("sqlite:///"):]
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+# 非同期エンジン用URL（明示指定がなければ DATABASE_URL から導出）
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_database_url(DATABASE_URL))
+
+# SQLite データベースエンジンを作成（セットアップスクリプト・テーブル作成用）
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-    echo=True  # SQL文をログ出力（開発時のみ）
+    echo=SQL_ECHO
+)
+
+
+def async_pool_options(url: str) -> dict:
+    """非同期エンジンの接続プール設定（ASYNC_DB_POOL_SIZE / ASYNC_DB_MAX_OVERFLOW）
+
+    SQLAlchemy 2.0.23 の aiosqlite はファイルDBでも NullPool が既定で、セッションごとに接続を
+    開き直し、aiosqlite の接続用スレッドも毎回作り直す。asyncpg と同じくプールして使い回す
+    （:memory: は接続ごとに別のDBになるため既定の StaticPool のまま）。
+    """
+    options = {
+        "pool_size": int(os.getenv("ASYNC_DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("ASYNC_DB_MAX_OVERFLOW", "10")),
+    }
+    if url.startswith("sqlite"):
+        if make_url(url).database in (None, "", ":memory:"):
+            return {}
+        options["poolclass"] = AsyncAdaptedQueuePool
+    return options
+
+
+# 非同期エンジンを作成（APIエンドポイント用）
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=SQL_ECHO,
+    pool_pre_ping=not ASYNC_DATABASE_URL.startswith("sqlite"),
+    **async_pool_options(ASYNC_DATABASE_URL),
 )
 
 # セッションファクトリーを作成
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 非同期セッションファクトリー
+# commit後に属性アクセスで遅延ロード（=ブロッキングI/O）が走らないよう expire_on_commit=False
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # ベースクラスを作成
 Base = declarative_base()
 
-# データベースセッションの依存性
-def get_db():
+# データベースセッションの依存性（非同期）
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# 同期セッション（セットアップスクリプト等のイベントループ外の処理用）
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
@@ -28,10 +88,38 @@ def get_db():
         db.close()
 
 # データベース初期化
+# マイグレーション（backend/alembic）
+ALEMBIC_SCRIPT_LOCATION = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic"
+)
+
+
 def init_db():
-    """データベーステーブル作成"""
+    """データベーステーブル作成・マイグレーション適用
+
+    新規DBは create_all で作成し、最新のリビジョンとして記録する。
+    既存DBは alembic upgrade head で追加のテーブル・カラムを適用する
+    （create_all は既存テーブルにカラムを追加しないため）。リビジョンが記録されていない
+    既存DB（以前の create_all で作成）は初期スキーマ 0001 として記録してから適用する。
+    """
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import inspect
     from app.models.database import Base as ModelsBase
-    ModelsBase.metadata.create_all(bind=engine)
+
+    config = Config()
+    config.set_main_option("script_location", ALEMBIC_SCRIPT_LOCATION)
+    with engine.begin() as conn:
+        config.attributes["connection"] = conn
+        tables = set(inspect(conn).get_table_names())
+        if "users" not in tables:
+            ModelsBase.metadata.create_all(bind=conn)
+            command.stamp(config, "head")
+            return
+        if "alembic_version" not in tables:
+            command.stamp(config, "0001")
+        command.upgrade(config, "head")
+
 
 def _create_initial_users():
     """初期ユーザー（管理者・承認者・従業員）を作成"""
@@ -0,0 +1,47 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+
+# キーセットページネーション用カーソル
+# 最後に返した行の並び替えキーを URL セーフな Base64(JSON) にして返す
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """並び替えキーをカーソル文字列に変換（datetime は ISO 形式）"""
+    payload = {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in values.items()
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(
+    cursor: Optional[str], keys: tuple = (), datetime_keys: tuple = ()
+) -> Optional[Dict[str, Any]]:
+    """カーソル文字列を並び替えキーに戻す（keys の欠落や不正な値は 400）"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, dict):
+            raise ValueError("cursor must be an object")
+        for key in keys:
+            if values.get(key) is None:
+                raise KeyError(key)
+        for key in datetime_keys:
+            values[key] = datetime.fromisoformat(values[key])
+        return values
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="カーソルが不正です")
+
+def split_page(
+    rows: Sequence[Any], limit: int, cursor_values: Callable[[Any], Dict[str, Any]]
+) -> Tuple[List[Any], bool, Optional[str]]:
+    """limit + 1 件取得した結果を (ページ, 続きの有無, 次のカーソル) に分ける"""
+    page = list(rows[:limit])
+    has_more = len(rows) > limit
+    next_cursor = encode_cursor(cursor_values(page[-1])) if has_more else None
+    return page, has_more, next_cursor
@@ -0,0 +1,129 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+import bcrypt
+
+# パスワードのハッシュ化・検証用の専用スレッドプール
+#
+# bcrypt は1回あたり数百msのCPUを使うため、イベントループ上で実行すると他のAPIが止まる。
+# 専用のスレッドで実行し（bcrypt は計算中 GIL を解放する）、処理中＋待ちの件数が
+# 上限に達したら PasswordHasherBusy を送出して呼び出し側で 503 を返す。
+
+
+class PasswordHasherBusy(Exception):
+    """ハッシュ処理の待ちが上限に達している"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"password hasher is saturated (retry after {retry_after}s)")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """上限付きのハッシュ処理実行器"""
+
+    def __init__(self, workers: int = 2, max_pending: int = 16):
+        self.workers = max(1, workers)
+        # 処理中＋待ちの上限（超えたら受け付けない）
+        self.max_pending = max(self.workers, max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._stats = {"completed": 0, "rejected": 0, "total_ms": 0.0, "max_queue_depth": 0}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hasher")
+        return self._executor
+
+    def _retry_after(self) -> int:
+        """待ちがはけるまでの目安（秒）"""
+        completed = self._stats["completed"]
+        avg_seconds = self._stats["total_ms"] / completed / 1000 if completed else 0.3
+        return max(1, math.ceil(self._pending * avg_seconds / self.workers))
+
+    async def run(self, func: Callable, *args) -> Any:
+        """func(*args) を専用スレッドで実行（上限超過時は PasswordHasherBusy）"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise PasswordHasherBusy(self._retry_after())
+            self._pending += 1
+            self._stats["max_queue_depth"] = max(
+                self._stats["max_queue_depth"], self._pending - self._running
+            )
+
+        def _call():
+            with self._lock:
+                self._running += 1
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                with self._lock:
+                    self._running -= 1
+                    self._stats["completed"] += 1
+                    self._stats["total_ms"] += elapsed
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), _call)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """bcrypt でパスワードを検証（ハッシュ形式が不正な場合は False）"""
+        return await self.run(_checkpw, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        """bcrypt でパスワードをハッシュ化"""
+        return await self.run(_hashpw, password)
+
+    def stats(self) -> Dict[str, Any]:
+        """処理件数・待ち件数などの統計"""
+        with self._lock:
+            completed = self._stats["completed"]
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._running,
+                "queue_depth": self._pending - self._running,
+                "max_queue_depth": self._stats["max_queue_depth"],
+                "completed": completed,
+                "rejected": self._stats["rejected"],
+                "avg_ms": round(self._stats["total_ms"] / completed, 3) if completed else 0.0,
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    @classmethod
+    def from_env(cls) -> "PasswordHasher":
+        """環境変数から作成（PASSWORD_HASH_WORKERS / PASSWORD_HASH_MAX_PENDING）"""
+        workers = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+        return cls(
+            workers=workers,
+            max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(workers * 8))),
+        )
+
+
+def _checkpw(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    except ValueError:
+        return False
+
+
+def _hashpw(password: str) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+password_hasher = PasswordHasher.from_env()
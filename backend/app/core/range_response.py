@@ -0,0 +1,101 @@
+"""
+Range 対応のファイルレスポンス
+
+starlette 0.27 の FileResponse は Range ヘッダーを扱わないため、大きなエクスポートの
+ダウンロードが途中で切れると最初からやり直しになる。Range: bytes=start-end（単一範囲）を
+受け取ったら 206 で指定範囲だけを返し、ダウンロードを途中から再開できるようにする。
+
+複数範囲の指定や、If-Range がファイルの ETag と一致しない場合はファイル全体を 200 で返す。
+範囲がファイルの外なら 416 を返す。
+"""
+import hashlib
+import os
+import re
+from typing import Optional, Tuple
+
+import anyio
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+CHUNK_SIZE = 64 * 1024
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """FileResponse と同じ形式の ETag（mtime とサイズから）"""
+    base = f"{stat_result.st_mtime}-{stat_result.st_size}"
+    return f'"{hashlib.md5(base.encode(), usedforsecurity=False).hexdigest()}"'
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Range ヘッダーを (先頭, 末尾) の位置に変換（扱えない指定は None、範囲外は ValueError）"""
+    match = _RANGE.match(header.strip())
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # bytes=-500: 末尾の500バイト
+        length = int(end)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    first = int(start)
+    last = min(int(end), size - 1) if end else size - 1
+    if first >= size or first > last:
+        raise ValueError("range not satisfiable")
+    return first, last
+
+
+async def _read_range(path: str, start: int, end: int):
+    async with await anyio.open_file(path, mode="rb") as file:
+        await file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def range_file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    filename: str,
+    background: Optional[BackgroundTask] = None,
+) -> Response:
+    """ファイルを返す（Range 指定時は 206 で指定範囲のみ）
+
+    media_type はそのまま Content-Type になる（text/* でも charset を付け足さない）。
+    """
+    stat_result = os.stat(path)
+    size = stat_result.st_size
+    etag = file_etag(stat_result)
+    headers = {
+        "Content-Type": media_type,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "ETag": etag,
+    }
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                _read_range(path, start, end), status_code=206,
+                media_type=media_type, headers=headers, background=background,
+            )
+
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result, background=background)
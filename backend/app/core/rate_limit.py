@@ -0,0 +1,292 @@
+import math
+import os
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# ログイン試行のスライディングウィンドウ制限
+#
+# ウィンドウを buckets 個の区間に分け、キー（メールアドレス・IP）ごとに区間別の件数を
+# リングバッファで持つ。直近ウィンドウ内の合計が上限に達したら、DB検索や bcrypt を
+# 行う前に拒否する。試行は判定と同時に数え（同時に来た試行が上限を超えて通らないように）、
+# ログインに成功した場合は取り消す。成功したメールアドレスはカウントをリセットし、接続元IPは
+# その1件だけを減らすため、同じIPから多数がログインする事業所（NAT）でも失敗だけが数えられる。
+
+
+class RateLimitExceeded(Exception):
+    """試行回数の上限に達している"""
+
+    def __init__(self, scope: str, limit: int, window: int, retry_after: int):
+        super().__init__(f"rate limit exceeded for {scope} ({limit}/{window}s)")
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+        self.retry_after = retry_after
+
+
+def _retry_after(counts, limit: int, current: int, now: float, bucket_seconds: float) -> int:
+    """ウィンドウ内の合計が上限を下回るまでの秒数（counts は古い区間から順）"""
+    buckets = len(counts)
+    excess = sum(counts) - limit + 1
+    for index, count in enumerate(counts):
+        excess -= count
+        if excess <= 0:
+            # index 番目の区間（番号 current - (buckets - 1 - index)）がウィンドウから外れる時刻
+            expires_at = (current + index + 1) * bucket_seconds
+            return max(1, math.ceil(expires_at - now))
+    return max(1, math.ceil(buckets * bucket_seconds))
+
+
+class SlidingWindowCounter:
+    """プロセス内のスライディングウィンドウカウンタ（キーごとのリングバッファ）"""
+
+    def __init__(
+        self, limit: int, window: int, buckets: int = 10, max_keys: int = 100000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.limit = limit
+        self.window = window
+        self.buckets = max(1, buckets)
+        self.bucket_seconds = window / self.buckets
+        self.max_keys = max_keys
+        self._clock = clock
+        # key -> (区間ごとの件数, 最後に書き込んだ区間番号)
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+
+    def _advance(self, key: str, current: int) -> Optional[list]:
+        """current 区間まで進め、ウィンドウ外になった区間を0にする"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        counts, last = entry
+        elapsed = current - last
+        if elapsed >= self.buckets:
+            for i in range(self.buckets):
+                counts[i] = 0
+        else:
+            for step in range(1, elapsed + 1):
+                counts[(last + step) % self.buckets] = 0
+        entry[1] = current
+        self._entries.move_to_end(key)
+        return entry
+
+    async def hit(self, key: str) -> Tuple[bool, int]:
+        """試行を1件記録（上限超過時は記録せず (False, 再試行までの秒数)）"""
+        now = self._clock()
+        current = int(now // self.bucket_seconds)
+        entry = self._advance(key, current)
+        if entry is None:
+            entry = [array('I', bytes(4 * self.buckets)), current]
+            self._entries[key] = entry
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+        counts = entry[0]
+        if sum(counts) >= self.limit:
+            oldest_first = [counts[(current - age) % self.buckets] for age in range(self.buckets - 1, -1, -1)]
+            return False, _retry_after(oldest_first, self.limit, current, now, self.bucket_seconds)
+        counts[current % self.buckets] += 1
+        return True, 0
+
+    async def release(self, key: str):
+        """記録した試行を1件取り消す（ウィンドウ内で最も新しい区間から）"""
+        current = int(self._clock() // self.bucket_seconds)
+        entry = self._advance(key, current)
+        if entry is None:
+            return
+        counts = entry[0]
+        for age in range(self.buckets):
+            index = (current - age) % self.buckets
+            if counts[index]:
+                counts[index] -= 1
+                return
+
+    async def reset(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+# KEYS: ウィンドウ内の区間キー（古い順）、ARGV: 上限, キーの有効期限（秒）
+# 上限未満なら最新の区間に1件加えて空の配列、上限に達していれば区間ごとの件数を返す
+REDIS_HIT_SCRIPT = """
+local counts = redis.call('MGET', unpack(KEYS))
+local total = 0
+for i = 1, #KEYS do
+    counts[i] = tonumber(counts[i]) or 0
+    total = total + counts[i]
+end
+if total >= tonumber(ARGV[1]) then
+    return counts
+end
+redis.call('INCR', KEYS[#KEYS])
+redis.call('EXPIRE', KEYS[#KEYS], ARGV[2])
+return {}
+"""
+
+# KEYS: ウィンドウ内の区間キー（古い順）。最も新しい区間から1件減らす
+REDIS_RELEASE_SCRIPT = """
+for i = #KEYS, 1, -1 do
+    if (tonumber(redis.call('GET', KEYS[i])) or 0) > 0 then
+        return redis.call('DECR', KEYS[i])
+    end
+end
+return 0
+"""
+
+
+class RedisSlidingWindowCounter:
+    """Redis を使うスライディングウィンドウカウンタ（複数ワーカーで上限を共有する場合）
+
+    区間ごとに "prefix{key}:区間番号" のキーへ INCR し、ウィンドウ分の区間を MGET で合計する。
+    合計の判定と INCR は Lua スクリプト（EVAL）で1回に行い、複数ワーカーから同時に試行されても
+    上限を超えて通さない（キーはハッシュタグ {key} で Redis Cluster でも同じスロットに置く）。
+    client には redis.asyncio.Redis 互換のオブジェクト（eval / delete）を渡す。
+    Redis に接続できない間は制限せずに通す（ログインそのものは止めない）。
+    """
+
+    def __init__(
+        self, client, limit: int, window: int, buckets: int = 10, prefix: str = "login_rate:",
+        clock: Callable[[], float] = time.time
+    ):
+        self.client = client
+        self.limit = limit
+        self.window = window
+        self.buckets = max(1, buckets)
+        self.bucket_seconds = window / self.buckets
+        self.prefix = prefix
+        self._clock = clock
+        self.errors = 0
+
+    def _keys(self, key: str, current: int):
+        return [f"{self.prefix}{{{key}}}:{current - age}" for age in range(self.buckets - 1, -1, -1)]
+
+    async def hit(self, key: str) -> Tuple[bool, int]:
+        now = self._clock()
+        current = int(now // self.bucket_seconds)
+        keys = self._keys(key, current)
+        try:
+            counts = await self.client.eval(
+                REDIS_HIT_SCRIPT, len(keys), *keys, self.limit, math.ceil(self.window + self.bucket_seconds)
+            )
+        except Exception:
+            self.errors += 1
+            return True, 0
+        if counts:
+            return False, _retry_after([int(count) for count in counts], self.limit, current, now, self.bucket_seconds)
+        return True, 0
+
+    async def release(self, key: str):
+        keys = self._keys(key, int(self._clock() // self.bucket_seconds))
+        try:
+            await self.client.eval(REDIS_RELEASE_SCRIPT, len(keys), *keys)
+        except Exception:
+            self.errors += 1
+
+    async def reset(self, key: str):
+        try:
+            await self.client.delete(*self._keys(key, int(self._clock() // self.bucket_seconds)))
+        except Exception:
+            self.errors += 1
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class LoginRateLimiter:
+    """メールアドレス単位・接続元IP単位のログイン試行制限"""
+
+    def __init__(self, per_email, per_ip, enabled: bool = True):
+        self.per_email = per_email
+        self.per_ip = per_ip
+        self.enabled = enabled
+        self.allowed = 0
+        self.blocked = {"email": 0, "ip": 0}
+
+    async def hit(self, email: str, ip_address: Optional[str]):
+        """試行を記録（上限超過時は RateLimitExceeded）"""
+        if not self.enabled:
+            return
+        checks = [("ip", self.per_ip, ip_address or "unknown"), ("email", self.per_email, email.strip().lower())]
+        for index, (scope, counter, key) in enumerate(checks):
+            allowed, retry_after = await counter.hit(key)
+            if not allowed:
+                # 先に数えた分（IP）は、拒否した試行のため取り消す
+                for _, counted, counted_key in checks[:index]:
+                    await counted.release(counted_key)
+                self.blocked[scope] += 1
+                raise RateLimitExceeded(scope, counter.limit, counter.window, retry_after)
+        self.allowed += 1
+
+    async def succeeded(self, email: str, ip_address: Optional[str]):
+        """ログイン成功時: メールアドレスのカウントを消し、接続元IPの今回の試行を取り消す"""
+        if not self.enabled:
+            return
+        await self.per_email.reset(email.strip().lower())
+        await self.per_ip.release(ip_address or "unknown")
+
+    async def release(self, email: str, ip_address: Optional[str]):
+        """資格情報を判定できなかった試行（パスワード検証の混雑・DBエラーなど）を両方のカウントから取り消す"""
+        if not self.enabled:
+            return
+        await self.per_email.release(email.strip().lower())
+        await self.per_ip.release(ip_address or "unknown")
+
+    def clear(self):
+        """カウンタと統計を初期化（プロセス内カウンタのみ）"""
+        for counter in (self.per_email, self.per_ip):
+            if isinstance(counter, SlidingWindowCounter):
+                counter.clear()
+        self.allowed = 0
+        self.blocked = {"email": 0, "ip": 0}
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "enabled": self.enabled,
+            "allowed": self.allowed,
+            "blocked_email": self.blocked["email"],
+            "blocked_ip": self.blocked["ip"],
+            "email_limit": {"limit": self.per_email.limit, "window": self.per_email.window},
+            "ip_limit": {"limit": self.per_ip.limit, "window": self.per_ip.window},
+            "tracked_emails": self.per_email.size(),
+            "tracked_ips": self.per_ip.size(),
+        }
+        errors = getattr(self.per_email, "errors", 0) + getattr(self.per_ip, "errors", 0)
+        if errors:
+            stats["backend_errors"] = errors
+        return stats
+
+
+def create_login_rate_limiter() -> LoginRateLimiter:
+    """環境変数からログイン制限を作成
+
+    LOGIN_RATE_LIMIT_ENABLED: true（既定）/ false
+    LOGIN_RATE_LIMIT_WINDOW: ウィンドウ（秒）
+    LOGIN_RATE_LIMIT_PER_EMAIL / LOGIN_RATE_LIMIT_PER_IP: ウィンドウ内の試行回数の上限
+    LOGIN_RATE_LIMIT_BACKEND: memory（既定）/ redis（REDIS_URL に接続）
+    """
+    window = int(os.getenv("LOGIN_RATE_LIMIT_WINDOW", "300"))
+    per_email = int(os.getenv("LOGIN_RATE_LIMIT_PER_EMAIL", "10"))
+    per_ip = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", "100"))
+    enabled = os.getenv("LOGIN_RATE_LIMIT_ENABLED", "true").lower() == "true"
+    if os.getenv("LOGIN_RATE_LIMIT_BACKEND", "memory").lower() == "redis":
+        import redis.asyncio as redis
+
+        client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        return LoginRateLimiter(
+            RedisSlidingWindowCounter(client, per_email, window, prefix="login_rate:email:"),
+            RedisSlidingWindowCounter(client, per_ip, window, prefix="login_rate:ip:"),
+            enabled=enabled,
+        )
+    return LoginRateLimiter(
+        SlidingWindowCounter(per_email, window),
+        SlidingWindowCounter(per_ip, window),
+        enabled=enabled,
+    )
+
+
+login_rate_limiter = create_login_rate_limiter()
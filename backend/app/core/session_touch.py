@@ -0,0 +1,121 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# セッションの最終アクセス時刻（last_accessed）の書き込みをまとめる
+#
+# セッション検証のたびに UPDATE + commit すると、読み取りだけのリクエストも書き込み
+# トランザクションになる。検証時はメモリ上に (トークン → 時刻) を記録するだけにし、
+# interval 秒ごと・max_buffer 件に達した時・終了時に1回のバッチ UPDATE で反映する。
+# 同じトークンへの複数回のアクセスは最新の時刻だけを書き込む。
+
+FlushFunc = Callable[[List[Tuple[str, datetime]]], Awaitable[Any]]
+
+
+class SessionTouchBuffer:
+    """last_accessed 更新のバッファ"""
+
+    def __init__(
+        self,
+        flush_func: FlushFunc,
+        interval: float = 30.0,
+        max_buffer: int = 1000,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    ):
+        self.flush_func = flush_func
+        self.interval = interval
+        self.max_buffer = max(1, max_buffer)
+        self._clock = clock
+        self._pending: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.touches = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.errors = 0
+        self.last_flush_ms = 0.0
+
+    def touch(self, session_token: str):
+        """アクセスを記録（DBへの書き込みは flush 時）"""
+        self.touches += 1
+        self._pending[session_token] = self._clock()
+        if len(self._pending) >= self.max_buffer and self._flush_task is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            self._flush_task = loop.create_task(self._flush_when_full())
+
+    async def _flush_when_full(self):
+        try:
+            await self.flush()
+        finally:
+            self._flush_task = None
+
+    async def flush(self) -> int:
+        """溜まっている更新を1回のバッチで書き込む（書き込んだ件数を返す）"""
+        async with self._lock:
+            if not self._pending:
+                return 0
+            items, self._pending = list(self._pending.items()), {}
+            start = time.perf_counter()
+            try:
+                await self.flush_func(items)
+            except Exception:
+                self.errors += 1
+                # 失敗分は次回に再送（その間に新しいアクセスがあればそちらを優先）
+                for token, accessed_at in items:
+                    self._pending.setdefault(token, accessed_at)
+                raise
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+            self.flushes += 1
+            self.flushed_rows += len(items)
+            return len(items)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                pass
+
+    def start(self):
+        """定期書き込みを開始"""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """定期書き込みを止め、残りを書き込む"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval": self.interval,
+            "max_buffer": self.max_buffer,
+            "pending": len(self._pending),
+            "touches": self.touches,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "errors": self.errors,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+    @classmethod
+    def from_env(cls, flush_func: FlushFunc) -> "SessionTouchBuffer":
+        """環境変数から作成（SESSION_TOUCH_FLUSH_INTERVAL 秒 / SESSION_TOUCH_MAX_BUFFER 件）"""
+        return cls(
+            flush_func,
+            interval=float(os.getenv("SESSION_TOUCH_FLUSH_INTERVAL", "30")),
+            max_buffer=int(os.getenv("SESSION_TOUCH_MAX_BUFFER", "1000")),
+        )
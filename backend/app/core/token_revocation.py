@@ -0,0 +1,204 @@
+import asyncio
+import calendar
+import hashlib
+import math
+import os
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+# 失効済みトークン（jti）の判定
+#
+# ログアウト・リフレッシュで失効させたトークンの jti を revoked_tokens テーブルに保存し、
+# 各プロセスはそれを定期的にメモリへ同期する。認証のたびに DB を引かないよう、
+# 判定はブルームフィルタ → dict の順に行い、ほとんどのトークン（未失効）は
+# フィルタのビット確認だけで通す。トークン自体の有効期限を過ぎた jti は同期時に削除する。
+
+
+def to_timestamp(value) -> float:
+    """datetime（UTC、naive 可）・数値を UNIX 秒に変換"""
+    if isinstance(value, datetime):
+        return calendar.timegm(value.utctimetuple()) + value.microsecond / 1e6
+    if isinstance(value, str):
+        return to_timestamp(datetime.fromisoformat(value))
+    return float(value)
+
+
+class BloomFilter:
+    """jti 用のブルームフィルタ（偽陽性あり・偽陰性なし）"""
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.01):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationList:
+    """失効済み jti の集合（jti → トークンの有効期限）"""
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.01, clock: Callable[[], float] = time.time):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._clock = clock
+        self._entries: Dict[str, float] = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+        # revoked_tokens から同期済みの最大 id
+        self.last_id = 0
+        self.checks = 0
+        self.bloom_passes = 0
+        self.revoked_hits = 0
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """jti が失効済みか（jti のない旧形式のトークンは False）"""
+        if not jti:
+            return False
+        self.checks += 1
+        if jti not in self._bloom:
+            return False
+        self.bloom_passes += 1
+        expires_at = self._entries.get(jti)
+        if expires_at is None or expires_at <= self._clock():
+            return False
+        self.revoked_hits += 1
+        return True
+
+    def add(self, jti: str, expires_at, row_id: Optional[int] = None):
+        """失効済みとして登録（expires_at はトークンの有効期限）"""
+        expires_at = to_timestamp(expires_at)
+        if expires_at <= self._clock():
+            return
+        if jti not in self._entries:
+            if self._bloom.count >= self._bloom.capacity:
+                self._rebuild(capacity=self._bloom.capacity * 2)
+            self._bloom.add(jti)
+        self._entries[jti] = expires_at
+        if row_id is not None:
+            self.last_id = max(self.last_id, row_id)
+
+    def load(self, rows: Iterable[Tuple[int, str, Any]]):
+        """revoked_tokens の行 (id, jti, expires_at) を取り込む"""
+        for row_id, jti, expires_at in rows:
+            self.add(jti, expires_at, row_id)
+
+    def purge(self) -> int:
+        """有効期限を過ぎた jti を削除（削除件数を返す）"""
+        now = self._clock()
+        expired = [jti for jti, expires_at in self._entries.items() if expires_at <= now]
+        for jti in expired:
+            del self._entries[jti]
+        # ブルームフィルタからは消せないため、登録数の半分以上が期限切れなら作り直す
+        if expired and len(expired) * 2 >= self._bloom.count:
+            self._rebuild(capacity=max(self.capacity, len(self._entries) * 2))
+        return len(expired)
+
+    def _rebuild(self, capacity: int):
+        self._bloom = BloomFilter(capacity, self.error_rate)
+        for jti in self._entries:
+            self._bloom.add(jti)
+
+    def clear(self):
+        self._entries.clear()
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self.last_id = 0
+        self.checks = self.bloom_passes = self.revoked_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "revoked": len(self._entries),
+            "last_id": self.last_id,
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hash_count,
+            "bloom_entries": self._bloom.count,
+            "checks": self.checks,
+            "bloom_passes": self.bloom_passes,
+            "revoked_hits": self.revoked_hits,
+        }
+
+
+class RevocationSyncer:
+    """revoked_tokens → RevocationList の定期同期
+
+    fetch(after_id) は id が after_id より大きい行 (id, jti, expires_at) を返す。行は id 順にコミットされる
+    （同期済みの id より小さい行が後から見えない）前提とする（app.models.database.RevokedToken を参照）。
+    cleanup() は有効期限を過ぎた行をテーブルから削除する（書き込みになるため cleanup_every 回に1回）。
+    """
+
+    def __init__(
+        self,
+        revocations: RevocationList,
+        fetch: Callable[[int], Awaitable[Iterable[Tuple[int, str, Any]]]],
+        cleanup: Optional[Callable[[], Awaitable[int]]] = None,
+        interval: float = 5.0,
+        cleanup_every: int = 60,
+    ):
+        self.revocations = revocations
+        self.fetch = fetch
+        self.cleanup = cleanup
+        self.interval = interval
+        self.cleanup_every = max(1, cleanup_every)
+        self._task: Optional[asyncio.Task] = None
+        self.syncs = 0
+        self.errors = 0
+
+    async def sync_once(self):
+        self.revocations.load(await self.fetch(self.revocations.last_id))
+        self.revocations.purge()
+        if self.cleanup is not None and self.syncs % self.cleanup_every == 0:
+            await self.cleanup()
+        self.syncs += 1
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sync_once()
+            except Exception:
+                self.errors += 1
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.revocations.stats(), "interval": self.interval, "syncs": self.syncs, "sync_errors": self.errors}
+
+
+def create_revocation_list() -> RevocationList:
+    """環境変数から作成（TOKEN_REVOCATION_CAPACITY: ブルームフィルタの初期容量）"""
+    return RevocationList(capacity=int(os.getenv("TOKEN_REVOCATION_CAPACITY", "100000")))
+
+
+# 同期間隔（秒）: 他プロセスでの失効がこの秒数以内に反映される
+TOKEN_REVOCATION_SYNC_INTERVAL = float(os.getenv("TOKEN_REVOCATION_SYNC_INTERVAL", "5"))
+
+revocation_list = create_revocation_list()
@@ -0,0 +1,156 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+# 認証済みユーザーのキャッシュ
+#
+# get_current_user は全APIで呼ばれるため、JWT 検証後のユーザー取得をキャッシュして
+# users テーブルへの問い合わせを減らす。ユーザー更新・無効化・削除・権限変更・
+# パスワードリセット時は invalidate で即時に破棄し、それ以外（DBの直接更新や
+# 他ワーカーのメモリキャッシュ）も TTL 秒以内に反映される。
+
+
+class UserCache:
+    """プロセス内の LRU + TTL キャッシュ（ユーザーID → ユーザー情報）"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        # user_id -> (ユーザー情報, 有効期限)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get(self, user_id: Any) -> Optional[Dict[str, Any]]:
+        key = str(user_id)
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= self._clock():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(entry[0])
+
+    async def set(self, user_id: Any, user: Dict[str, Any]):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        key = str(user_id)
+        self._entries[key] = (dict(user), self._clock() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def invalidate(self, user_id: Any):
+        self.invalidations += 1
+        self._entries.pop(str(user_id), None)
+
+    async def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "ttl": self.ttl,
+            "maxsize": self.maxsize,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class RedisUserCache:
+    """Redis を使うキャッシュ（複数ワーカー間で無効化を共有する場合）
+
+    client には redis.asyncio.Redis 互換のオブジェクト（get / set(ex=) / delete / scan_iter）を渡す。
+    Redis に接続できない間の取得・保存はキャッシュなしとして扱う（DBから取得する）。
+    無効化の失敗も errors に数えるだけで例外にしない（DB の更新は完了しているため）。
+    その間に Redis へ残ったエントリは ttl 秒で消える。
+    """
+
+    def __init__(self, client, ttl: float = 30.0, prefix: str = "user_cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def _key(self, user_id: Any) -> str:
+        return f"{self.prefix}{user_id}"
+
+    async def get(self, user_id: Any) -> Optional[Dict[str, Any]]:
+        try:
+            raw = await self.client.get(self._key(user_id))
+        except Exception:
+            self.errors += 1
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, user_id: Any, user: Dict[str, Any]):
+        if self.ttl <= 0:
+            return
+        try:
+            await self.client.set(
+                self._key(user_id), json.dumps(user, default=str), ex=max(1, int(self.ttl))
+            )
+        except Exception:
+            self.errors += 1
+
+    async def invalidate(self, user_id: Any):
+        self.invalidations += 1
+        try:
+            await self.client.delete(self._key(user_id))
+        except Exception:
+            self.errors += 1
+
+    async def clear(self):
+        try:
+            keys = [key async for key in self.client.scan_iter(match=f"{self.prefix}*")]
+            if keys:
+                await self.client.delete(*keys)
+        except Exception:
+            self.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis",
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+        }
+
+
+def create_user_cache():
+    """環境変数からキャッシュを作成
+
+    USER_CACHE_BACKEND: memory（既定）/ redis（REDIS_URL に接続）
+    USER_CACHE_TTL: 有効期間（秒、0 で無効）
+    USER_CACHE_MAXSIZE: メモリキャッシュの最大件数
+    """
+    ttl = float(os.getenv("USER_CACHE_TTL", "30"))
+    if os.getenv("USER_CACHE_BACKEND", "memory").lower() == "redis":
+        import redis.asyncio as redis
+
+        client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        return RedisUserCache(client, ttl=ttl)
+    return UserCache(maxsize=int(os.getenv("USER_CACHE_MAXSIZE", "1024")), ttl=ttl)
+
+
+user_cache = create_user_cache()
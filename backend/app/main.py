@@ -2,7 +2,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1.api import api_router
-from app.core.database import init_db
+from app.core.database import async_engine, init_db
+from app.core.password_hasher import password_hasher
+from app.services.pdf_generator import register_japanese_font
+from app.services.pdf_renderer import pdf_render_service
+from app.services.token_revocation import revocation_syncer
 
 app = FastAPI(
     title="勤怠・社内申請システム API",
@@ -17,10 +21,25 @@ app = FastAPI(
 async def startup_event():
     """アプリケーション起動時にデータベースを初期化"""
     init_db()
+    # PDF用の日本語フォントを先に登録（初回PDF生成時の待ちをなくす）
+    register_japanese_font()
+    # PDF生成ワーカーを起動（各ワーカーもフォント登録まで済ませる）
+    pdf_render_service.start()
+    # 失効トークンの同期を開始（他プロセスでのログアウトを反映）
+    revocation_syncer.start()
     # CORS設定をログ出力
     print(f"[CORS] ALLOWED_ORIGINS type: {type(settings.ALLOWED_ORIGINS)}")
     print(f"[CORS] ALLOWED_ORIGINS value: {settings.ALLOWED_ORIGINS}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """アプリケーション終了時にバックグラウンド処理を停止"""
+    await revocation_syncer.stop()
+    pdf_render_service.shutdown()
+    password_hasher.shutdown()
+    # プールした接続を閉じる（aiosqlite は接続ごとのスレッドが残るとプロセスが終了しない）
+    await async_engine.dispose()
+
 # CORS middleware - ルーター追加前に設定
 # ALLOWED_ORIGINS が設定されているか確認
 if not settings.ALLOWED_ORIGINS or settings.ALLOWED_ORIGINS == ['']:
@@ -1,7 +1,10 @@
-from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Boolean, Text, Date, JSON
+from sqlalchemy import (
+    Column, String, Integer, Float, DateTime, ForeignKey, Boolean, Text, Date, JSON, Index, event, func, inspect, select,
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.orm import Session, column_property, relationship
+from datetime import date, datetime
 
 Base = declarative_base()
 
@@ -28,12 +31,29 @@ class User(Base):
 
 class Request(Base):
     __tablename__ = "requests"
+    __table_args__ = (
+        # 申請者ごとの一覧（ステータス絞り込み＋作成日時順）
+        Index("ix_requests_applicant_status_created", "applicant_id", "status", "created_at"),
+        # ステータス・種別ごとの集計と承認待ち一覧
+        Index("ix_requests_status_type", "status", "type"),
+        # 全件の新着順
+        Index("ix_requests_created_at", "created_at"),
+        # 承認待ち一覧（ステータス絞り込み＋申請日時のキーセットページング）
+        Index("ix_requests_status_applied", "status", "applied_at", "id"),
+        # 全ステータスの申請日時順
+        Index("ix_requests_applied_at", "applied_at", "id"),
+        # 申請一覧（申請者・ステータス絞り込み＋作成日時のキーセットページング）
+        Index("ix_requests_applicant_created", "applicant_id", "created_at", "id"),
+        Index("ix_requests_status_created", "status", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     type = Column(String, nullable=False)  # leave, overtime, expense, reimbursement, settlement, holiday_work
     applicant_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     approver_id = Column(Integer, ForeignKey("users.id"))
-    status = Column(String, default="draft")  # draft, applied, approved, rejected, returned
+    # draft, applied, approved, rejected, returned
+    # 変更前の値を集計・変更履歴に使うため、読み込み前に代入された場合も旧値を読み込む
+    status = column_property(Column(String, default="draft"), active_history=True)
     title = Column(String, nullable=False)
     description = Column(Text)
 
@@ -42,6 +62,7 @@ class Request(Base):
     applied_at = Column(DateTime)
     approved_at = Column(DateTime)
     rejected_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # コメント
     applicant_comment = Column(Text)
@@ -60,6 +81,12 @@ class Request(Base):
 
 class LeaveRequest(Base):
     __tablename__ = "leave_requests"
+    __table_args__ = (
+        # 申請との結合と期間判定を索引だけで済ませる
+        Index("ix_leave_requests_request_dates", "request_id", "start_date", "end_date"),
+        # 期間重複検索
+        Index("ix_leave_requests_dates", "start_date", "end_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     request_id = Column(Integer, ForeignKey("requests.id"), nullable=False)
@@ -80,6 +107,10 @@ class LeaveRequest(Base):
 
 class OvertimeRequest(Base):
     __tablename__ = "overtime_requests"
+    __table_args__ = (
+        Index("ix_overtime_requests_request_work_date", "request_id", "work_date"),
+        Index("ix_overtime_requests_work_date", "work_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     request_id = Column(Integer, ForeignKey("requests.id"), nullable=False)
@@ -98,6 +129,9 @@ class OvertimeRequest(Base):
 
 class ExpenseRequest(Base):
     __tablename__ = "expense_requests"
+    __table_args__ = (
+        Index("ix_expense_requests_request_id", "request_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     request_id = Column(Integer, ForeignKey("requests.id"), nullable=False)
@@ -149,6 +183,10 @@ class SettlementRequest(Base):
 
 class HolidayWorkRequest(Base):
     __tablename__ = "holiday_work_requests"
+    __table_args__ = (
+        Index("ix_holiday_work_requests_request_work_date", "request_id", "work_date"),
+        Index("ix_holiday_work_requests_work_date", "work_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     request_id = Column(Integer, ForeignKey("requests.id"), nullable=False)
@@ -195,6 +233,9 @@ class UploadedFile(Base):
 
 class ConstructionDailyReport(Base):
     __tablename__ = "construction_daily_reports"
+    __table_args__ = (
+        Index("ix_construction_daily_reports_user_date", "user_id", "report_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -232,6 +273,9 @@ class ConstructionDailyReport(Base):
 class LeaveBalance(Base):
     """休暇残高管理テーブル"""
     __tablename__ = "leave_balances"
+    __table_args__ = (
+        Index("ix_leave_balances_user_year", "user_id", "fiscal_year"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -256,3 +300,262 @@ class LeaveBalance(Base):
 
     # Relationships
     user = relationship("User", back_populates="leave_balances")
+
+
+class RequestCounter(Base):
+    """申請件数の集計テーブル（申請者 × 種別 × ステータス）
+
+    requests への追加・ステータス変更と同じトランザクションで更新する（下記 after_flush）。
+    整合性の確認・再構築は app.services.request_counters を参照。
+    """
+    __tablename__ = "request_counters"
+
+    applicant_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    type = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class RevokedToken(Base):
+    """失効させたトークン（ログアウト・リフレッシュ時に登録）
+
+    各プロセスは id 順にメモリへ同期する（app.core.token_revocation）。
+    PostgreSQL の SERIAL は採番順とコミット順が一致しないため、登録（INSERT）からコミットまでを
+    REVOKED_TOKEN_LOCK_KEY のアドバイザリロックで直列にし、同期済みの id より小さい行が後から
+    見えることがないようにする（SQLite は書き込みが直列のため不要）。
+    expires_at（トークン自体の有効期限）を過ぎた行は同期時に削除する。
+    最大の id の行が削除されても id が再利用されない（同期済みの id 以下で登録されない）よう、
+    SQLite でも AUTOINCREMENT にする。
+    """
+    __tablename__ = "revoked_tokens"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String, unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    token_type = Column(String, nullable=False, default="access")
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow)
+
+
+# PostgreSQL で失効の登録をコミットまで直列にするアドバイザリロックのキー
+REVOKED_TOKEN_LOCK_KEY = 7341002
+
+
+class AuditLog(Base):
+    """変更履歴（給与連携の変更フィードの元）
+
+    申請・勤怠明細・工事日報の変更と同じトランザクションで記録する（下記 after_flush）。
+    id が変更の通し番号で、コミット順に増える（PostgreSQL では記録からコミットまで
+    アドバイザリロックで直列にする）。読み出しは app.services.change_feed を参照。
+    """
+    __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index("ix_audit_logs_entity", "entity_type", "entity_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    entity_type = Column(String, nullable=False)  # request, leave, overtime, holiday_work, construction_daily_report
+    entity_id = Column(Integer, nullable=False)
+    action = Column(String, nullable=False)  # created, status_changed, deleted, upsert, delete
+    old_values = Column(JSON)
+    new_values = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+def _counter_key(request: Request, previous: bool = False):
+    """集計キー (applicant_id, type, status)（previous=True なら変更前の値）"""
+    state = inspect(request)
+    key = []
+    for name in ("applicant_id", "type", "status"):
+        value = getattr(request, name)
+        if previous:
+            history = state.attrs[name].history
+            if history.deleted:
+                value = history.deleted[0]
+        key.append(value)
+    return tuple(key)
+
+
+def apply_request_counter_deltas(connection, deltas):
+    """集計テーブルに件数の増減を反映（{(applicant_id, type, status): 増減}）"""
+    rows = [
+        {"applicant_id": applicant_id, "type": type_, "status": status, "count": delta}
+        for (applicant_id, type_, status), delta in deltas.items()
+        if delta and applicant_id is not None and status is not None
+    ]
+    if not rows:
+        return
+    table = RequestCounter.__table__
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.applicant_id, table.c.type, table.c.status],
+        set_={"count": table.c.count + stmt.excluded.count},
+    )
+    connection.execute(stmt, rows)
+
+
+@event.listens_for(Session, "after_flush")
+def _update_request_counters(session, flush_context):
+    """申請の追加・ステータス変更・削除を集計テーブルに反映（同一トランザクション）"""
+    deltas = {}
+
+    def add(key, delta):
+        deltas[key] = deltas.get(key, 0) + delta
+
+    for obj in session.new:
+        if isinstance(obj, Request):
+            add(_counter_key(obj), 1)
+    for obj in session.dirty:
+        if isinstance(obj, Request) and session.is_modified(obj, include_collections=False):
+            before, after = _counter_key(obj, previous=True), _counter_key(obj)
+            if before != after:
+                add(before, -1)
+                add(after, 1)
+    for obj in session.deleted:
+        if isinstance(obj, Request):
+            add(_counter_key(obj, previous=True), -1)
+
+    if deltas:
+        apply_request_counter_deltas(session.connection(), deltas)
+
+
+# 変更フィードに載せる項目
+CHANGE_FEED_COLUMNS = {
+    "request": ("id", "type", "applicant_id", "approver_id", "status", "title",
+                "applied_at", "approved_at", "rejected_at", "updated_at"),
+    "leave": ("id", "request_id", "leave_type", "start_date", "end_date", "start_duration",
+              "end_duration", "days", "hours", "compensatory_work_date"),
+    "overtime": ("id", "request_id", "work_date", "start_time", "end_time", "break_time",
+                 "total_hours", "project_name"),
+    "holiday_work": ("id", "request_id", "work_date", "start_time", "end_time", "break_time",
+                     "compensatory_leave_date"),
+    "construction_daily_report": ("id", "user_id", "report_date", "site_name", "early_start",
+                                  "work_start_time", "work_end_time", "overtime", "updated_at"),
+}
+# 承認済みのものだけを載せる勤怠明細（申請種別 → モデル）
+CHANGE_FEED_DETAILS = {"leave": LeaveRequest, "overtime": OvertimeRequest, "holiday_work": HolidayWorkRequest}
+# PostgreSQL で変更履歴の記録をコミットまで直列にするアドバイザリロックのキー
+AUDIT_LOG_LOCK_KEY = 7341001
+# フラッシュで集めた変更履歴をコミット直前まで保持する Session.info のキー
+AUDIT_LOG_PENDING_KEY = "pending_audit_logs"
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+def _snapshot(values, entity_type: str, **extra):
+    """変更フィードの項目（values はモデルのインスタンスか行の mapping）"""
+    get = values.get if isinstance(values, dict) else lambda name: getattr(values, name)
+    snapshot = {name: _json_value(get(name)) for name in CHANGE_FEED_COLUMNS[entity_type]}
+    snapshot.update(extra)
+    return snapshot
+
+
+def _previous(obj, name: str):
+    history = inspect(obj).attrs[name].history
+    return history.deleted[0] if history.deleted else getattr(obj, name)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_audit_logs(session, flush_context):
+    """申請のステータス変更・承認済みの勤怠明細・工事日報の変更を集める（記録はコミット直前）"""
+    connection = session.connection()
+    entries = {}
+
+    def add(entity_type, entity_id, action, old_values=None, new_values=None):
+        # 勤怠明細・日報は同じフラッシュ内の最後の状態だけ残す（申請は操作ごとに残す）
+        key = (entity_type, entity_id, action if entity_type == "request" else None)
+        entries.pop(key, None)
+        entries[key] = {
+            "entity_type": entity_type, "entity_id": entity_id, "action": action,
+            "old_values": old_values, "new_values": new_values, "created_at": datetime.utcnow(),
+        }
+
+    # このフラッシュで変わった申請の (変更前のステータス, 変更後のステータス, 申請者)
+    requests = {}
+    for obj in session.new:
+        if isinstance(obj, Request):
+            requests[obj.id] = (None, obj.status, obj.applicant_id)
+            add("request", obj.id, "created", new_values=_snapshot(obj, "request"))
+    for obj in session.dirty:
+        if isinstance(obj, Request) and inspect(obj).attrs.status.history.has_changes():
+            before, after = _previous(obj, "status"), obj.status
+            requests[obj.id] = (before, after, obj.applicant_id)
+            add("request", obj.id, "status_changed", {"status": before}, _snapshot(obj, "request"))
+            # 承認・承認の取り消しで勤怠明細が給与計算の対象に入る・外れる
+            if obj.type in CHANGE_FEED_DETAILS and (before == "approved") != (after == "approved"):
+                table = CHANGE_FEED_DETAILS[obj.type].__table__
+                columns = [table.c[name] for name in CHANGE_FEED_COLUMNS[obj.type]]
+                for row in connection.execute(select(*columns).where(table.c.request_id == obj.id)).mappings():
+                    if after == "approved":
+                        add(obj.type, row["id"], "upsert",
+                            new_values=_snapshot(dict(row), obj.type, applicant_id=obj.applicant_id))
+                    else:
+                        add(obj.type, row["id"], "delete", old_values=_snapshot(dict(row), obj.type))
+    for obj in session.deleted:
+        if isinstance(obj, Request):
+            requests[obj.id] = (_previous(obj, "status"), None, obj.applicant_id)
+            add("request", obj.id, "deleted", old_values=_snapshot(obj, "request"))
+
+    def parent(request_id):
+        if request_id not in requests:
+            row = connection.execute(
+                select(Request.status, Request.applicant_id).where(Request.id == request_id)
+            ).first()
+            requests[request_id] = (row[0], row[0], row[1]) if row else (None, None, None)
+        return requests[request_id]
+
+    changed = [
+        obj for obj in (*session.new, *session.dirty, *session.deleted)
+        if obj not in session.dirty or session.is_modified(obj, include_collections=False)
+    ]
+    # 勤怠明細は承認済みの申請のものだけ
+    for entity_type, model in CHANGE_FEED_DETAILS.items():
+        for obj in changed:
+            if not isinstance(obj, model):
+                continue
+            before, after, applicant_id = parent(obj.request_id)
+            if obj in session.deleted:
+                if "approved" in (before, after):
+                    add(entity_type, obj.id, "delete", old_values=_snapshot(obj, entity_type))
+            elif after == "approved":
+                add(entity_type, obj.id, "upsert", new_values=_snapshot(obj, entity_type, applicant_id=applicant_id))
+    for obj in changed:
+        if isinstance(obj, ConstructionDailyReport):
+            if obj in session.deleted:
+                add("construction_daily_report", obj.id, "delete",
+                    old_values=_snapshot(obj, "construction_daily_report"))
+            else:
+                add("construction_daily_report", obj.id, "upsert",
+                    new_values=_snapshot(obj, "construction_daily_report"))
+
+    if entries:
+        session.info.setdefault(AUDIT_LOG_PENDING_KEY, []).extend(entries.values())
+
+
+@event.listens_for(Session, "before_commit")
+def _record_audit_logs(session):
+    """集めた変更履歴を同一トランザクションで記録
+
+    PostgreSQL では通し番号の採番からコミットまでをアドバイザリロックで直列にし、番号順と
+    コミット順を揃える（フィードの読み手が後からコミットされる小さい番号を読み飛ばさないため）。
+    ロックを持つのは記録の INSERT からコミットまでの間だけになるよう、記録はコミット直前に行う。
+    """
+    session.flush()
+    entries = session.info.pop(AUDIT_LOG_PENDING_KEY, None)
+    if not entries:
+        return
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        connection.execute(select(func.pg_advisory_xact_lock(AUDIT_LOG_LOCK_KEY)))
+    connection.execute(AuditLog.__table__.insert(), entries)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_audit_logs(session, transaction):
+    # コミットされずに終わった（ロールバック・close）トランザクションの分を捨てる
+    if transaction.parent is None:
+        session.info.pop(AUDIT_LOG_PENDING_KEY, None)
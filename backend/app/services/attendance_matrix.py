@@ -0,0 +1,181 @@
+"""
+勤怠マトリクス
+
+従業員 × 日 の int8 行列に休暇・休日出勤を展開し、シフト表・出勤簿・
+年間集計で共通に使う。日別ステータスの判定は区間の一括代入、
+従業員ごとの集計は行方向の縮約で行う。
+"""
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 休暇コード（leave 行列の値）
+NO_LEAVE = 0
+PAID_LEAVE = 1  # 有給休暇
+COMPENSATORY_LEAVE = 2  # 代休
+SPECIAL_LEAVE = 3  # 特別休暇
+OTHER_LEAVE = 4  # 上記以外の休暇種別（記号なし）
+
+LEAVE_CODES = {
+    "paid": PAID_LEAVE,
+    "compensatory": COMPENSATORY_LEAVE,
+    "special": SPECIAL_LEAVE,
+}
+
+# シフト表の記号（status 行列の値 → 記号）
+HOLIDAY_WORK = 5
+SHIFT_SYMBOLS = {
+    PAID_LEAVE: "有",
+    COMPENSATORY_LEAVE: "代",
+    SPECIAL_LEAVE: "特",
+    HOLIDAY_WORK: "◎",  # 振替出勤
+}
+
+# 出勤簿の休暇表記
+TIMESHEET_LEAVE_LABELS = {
+    PAID_LEAVE: "有給",
+    COMPENSATORY_LEAVE: "代休",
+    SPECIAL_LEAVE: "特別休",
+}
+
+
+class AttendanceMatrix:
+    """従業員 × 日 の勤怠マトリクス"""
+
+    def __init__(self, user_ids: Sequence[int], start_date: date, end_date: date):
+        self.user_ids = list(user_ids)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.num_days = (end_date - start_date).days + 1
+        self._rows = {user_id: i for i, user_id in enumerate(self.user_ids)}
+
+        shape = (len(self.user_ids), self.num_days)
+        # 日ごとの休暇コード（同じ日に重なる場合は先に登録された休暇）
+        self.leave = np.zeros(shape, dtype=np.int8)
+        # 休日出勤の有無
+        self.holiday_work = np.zeros(shape, dtype=bool)
+        # 期間内の申請件数（種別ごと）
+        self.leave_request_counts = np.zeros((len(self.user_ids), OTHER_LEAVE + 1), dtype=np.int32)
+        self.holiday_work_counts = np.zeros(len(self.user_ids), dtype=np.int32)
+
+    def row(self, user_id: int) -> Optional[int]:
+        return self._rows.get(user_id)
+
+    def add_leaves(self, leaves: Iterable[Tuple[int, str, date, date]]):
+        """休暇を登録順に追加（user_id, leave_type, start_date, end_date）
+
+        対象外の従業員は無視する。日付の重なりは先に登録された休暇を優先する。
+        """
+        rows, codes, firsts, lasts = [], [], [], []
+        for user_id, leave_type, start, end in leaves:
+            row = self._rows.get(user_id)
+            if row is None:
+                continue
+            rows.append(row)
+            codes.append(LEAVE_CODES.get(leave_type, OTHER_LEAVE))
+            firsts.append(max((start - self.start_date).days, 0))
+            lasts.append(min((end - self.start_date).days, self.num_days - 1))
+
+        if not rows:
+            return
+
+        rows = np.asarray(rows)
+        codes = np.asarray(codes, dtype=np.int8)
+        np.add.at(self.leave_request_counts, (rows, codes), 1)
+
+        # 既に埋まっている日は上書きしないよう、後の休暇から順に代入して先の休暇で上書きする
+        already = self.leave != NO_LEAVE
+        painted = np.zeros_like(self.leave)
+        for row, code, first, last in zip(rows[::-1], codes[::-1], firsts[::-1], lasts[::-1]):
+            if first <= last:
+                painted[row, first:last + 1] = code
+        self.leave = np.where(already, self.leave, painted).astype(np.int8)
+
+    def add_holiday_work(self, entries: Iterable[Tuple[int, date]]):
+        """休日出勤を追加（user_id, work_date）"""
+        rows, days = [], []
+        for user_id, work_date in entries:
+            row = self._rows.get(user_id)
+            if row is None:
+                continue
+            rows.append(row)
+            days.append((work_date - self.start_date).days)
+
+        if not rows:
+            return
+
+        rows = np.asarray(rows)
+        days = np.asarray(days)
+        np.add.at(self.holiday_work_counts, rows, 1)
+        in_range = (days >= 0) & (days < self.num_days)
+        self.holiday_work[rows[in_range], days[in_range]] = True
+
+    @property
+    def status(self) -> np.ndarray:
+        """シフト表の日別ステータス（休暇優先、休暇記号のない日に休日出勤）"""
+        has_symbol = (self.leave != NO_LEAVE) & (self.leave != OTHER_LEAVE)
+        return np.where(
+            has_symbol, self.leave, np.where(self.holiday_work, HOLIDAY_WORK, NO_LEAVE)
+        ).astype(np.int8)
+
+    def symbol_rows(self) -> List[List[Optional[str]]]:
+        """従業員ごとの日別記号（記号なしは None）"""
+        lookup = np.array(
+            [SHIFT_SYMBOLS.get(code) for code in range(HOLIDAY_WORK + 1)], dtype=object
+        )
+        return lookup[self.status].tolist()
+
+    def leave_day_counts(self, code: int) -> np.ndarray:
+        """従業員ごとの休暇日数"""
+        return np.count_nonzero(self.leave == code, axis=1)
+
+    def leave_request_count(self, leave_type: str) -> np.ndarray:
+        """従業員ごとの期間内の休暇申請件数"""
+        return self.leave_request_counts[:, LEAVE_CODES[leave_type]]
+
+    def month_slices(self) -> List[Tuple[str, slice]]:
+        """期間内の各月（"YYYY-MM"）と列範囲"""
+        result = []
+        first = 0
+        current = self.start_date
+        while first < self.num_days:
+            if current.month == 12:
+                next_month = date(current.year + 1, 1, 1)
+            else:
+                next_month = date(current.year, current.month + 1, 1)
+            last = min((next_month - self.start_date).days, self.num_days)
+            result.append((f"{current.year}-{current.month:02d}", slice(first, last)))
+            first = last
+            current = next_month
+        return result
+
+    def monthly_summary(self) -> List[Dict[str, Any]]:
+        """従業員ごとの月別 休暇日数・休日出勤日数"""
+        months = self.month_slices()
+        per_month = []
+        for _, columns in months:
+            leave = self.leave[:, columns]
+            per_month.append((
+                np.count_nonzero(leave == PAID_LEAVE, axis=1),
+                np.count_nonzero(leave == COMPENSATORY_LEAVE, axis=1),
+                np.count_nonzero(leave == SPECIAL_LEAVE, axis=1),
+                np.count_nonzero(self.holiday_work[:, columns], axis=1),
+            ))
+
+        result = []
+        for i, user_id in enumerate(self.user_ids):
+            result.append({
+                "user_id": user_id,
+                "months": [
+                    {
+                        "month": label,
+                        "paid_leave_days": int(paid[i]),
+                        "compensatory_leave_days": int(compensatory[i]),
+                        "special_leave_days": int(special[i]),
+                        "holiday_work_days": int(holiday[i]),
+                    }
+                    for (label, _), (paid, compensatory, special, holiday) in zip(months, per_month)
+                ],
+            })
+        return result
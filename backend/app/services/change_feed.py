@@ -0,0 +1,66 @@
+"""
+給与連携の変更フィード（audit_logs）
+
+給与システムが毎晩すべての申請をエクスポートし直さなくて済むよう、前回の取得以降の
+変更だけを通し番号（audit_logs.id）順に返す。記録は app.models.database でフラッシュごとに集め、
+変更と同じトランザクションのコミット直前に行う。ここでは読み出しと NDJSON への変換を扱う。
+
+PostgreSQL では番号順とコミット順を揃えるため、記録の INSERT からコミットまでアドバイザリロックを
+持つ。変更を記録するトランザクションのコミットはこの間だけ直列になる（記録しない更新・参照は
+影響を受けない）。1件あたりの待ちはおおむね INSERT 1回とコミット（WAL の書き込み）の時間になる。
+
+対象と操作:
+    request                    申請の作成（created）・ステータス変更（status_changed）・削除（deleted）
+    leave / overtime / holiday_work
+                               承認済みの勤怠明細。承認・承認後の修正で upsert、
+                               承認の取り消し・削除で delete
+    construction_daily_report  工事日報の作成・修正で upsert、削除で delete
+
+カーソルは最後に返した通し番号を持つ。変更がなかった場合も同じカーソルを返すため、
+クライアントは受け取ったカーソルを保存して次回そのまま指定すればよい。
+"""
+import json
+from typing import Iterable, List, Optional, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database import CHANGE_FEED_COLUMNS, AuditLog
+
+# 変更フィードの対象
+CHANGE_FEED_ENTITIES = tuple(CHANGE_FEED_COLUMNS)
+
+
+def changes_query(after_seq: int, limit: int, entity_types: Optional[Sequence[str]] = None):
+    """after_seq より後の変更（通し番号順、limit 件）"""
+    query = select(AuditLog).where(AuditLog.id > after_seq)
+    if entity_types:
+        query = query.where(AuditLog.entity_type.in_(entity_types))
+    return query.order_by(AuditLog.id).limit(limit)
+
+
+async def read_changes(
+    db: AsyncSession, after_seq: int, limit: int, entity_types: Optional[Sequence[str]] = None
+) -> List[AuditLog]:
+    return list((await db.execute(changes_query(after_seq, limit, entity_types))).scalars())
+
+
+async def latest_sequence(db: AsyncSession) -> int:
+    """最新の通し番号（変更がなければ 0）"""
+    return (await db.scalar(select(func.max(AuditLog.id)))) or 0
+
+
+def to_ndjson(changes: Iterable[AuditLog]) -> bytes:
+    """変更を1行1件の JSON（NDJSON）にする"""
+    return b"".join(
+        json.dumps({
+            "seq": change.id,
+            "entity": change.entity_type,
+            "id": change.entity_id,
+            "action": change.action,
+            "changed_at": change.created_at.isoformat(),
+            "data": change.new_values,
+            "previous": change.old_values,
+        }, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        for change in changes
+    )
@@ -0,0 +1,387 @@
+"""
+エクスポートのバックグラウンドジョブ
+
+件数の多いエクスポートをリクエストの中で生成するとプロキシのタイムアウトにかかるため、
+POST /api/v1/exports でジョブを登録してすぐに返し、ワーカーがファイルを生成する。
+クライアントは GET /api/v1/exports/{id} で進捗（処理済みの行数）を確認し、完了後に
+ダウンロードする（Range 対応のため途中から再開できる）。
+
+- キュー: 既定はプロセス内（LocalExportQueue）。EXPORT_JOB_BACKEND=redis のときは Redis の
+  リストとキーでジョブと状態を共有し、どのプロセスのワーカーでも処理・参照できる
+  （その場合 EXPORT_JOB_DIR は全プロセスから見える場所にする）。
+- 重複排除: 同じユーザーが同じ条件のエクスポートを実行中（待ち・処理中）に再度登録した場合は、
+  新しいジョブを作らず実行中のジョブを返す。
+- 後片付け: 完了・失敗から EXPORT_JOB_TTL 秒を過ぎたジョブは、ファイルとともに削除する。
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# ジョブの処理: (パラメータ, 出力先のパス, 進捗の通知) を受け取りファイルを書き込む
+ExportHandler = Callable[[Dict[str, Any], str, Callable[[int], Awaitable[None]]], Awaitable[None]]
+
+
+class LocalExportQueue:
+    """プロセス内のジョブキューと状態（既定）"""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._claims: Dict[str, str] = {}
+        self._pending: List[str] = []
+        self._ready: Optional[asyncio.Event] = None
+        self._loop = None
+
+    def _event(self) -> asyncio.Event:
+        # イベントは作成したループでしか待てないため、ループごとに作り直す
+        loop = asyncio.get_running_loop()
+        if self._ready is None or self._loop is not loop:
+            self._ready = asyncio.Event()
+            self._loop = loop
+            if self._pending:
+                self._ready.set()
+        return self._ready
+
+    async def push(self, job_id: str):
+        self._pending.append(job_id)
+        self._event().set()
+
+    async def pop(self, timeout: float) -> Optional[str]:
+        ready = self._event()
+        if not self._pending:
+            ready.clear()
+            # wait_for は待ち終わりと同時に cancel されると cancel を握りつぶすことがあり、
+            # stop() が終わらなくなるため asyncio.wait で待つ
+            waiter = asyncio.ensure_future(ready.wait())
+            try:
+                await asyncio.wait({waiter}, timeout=timeout)
+            finally:
+                waiter.cancel()
+        return self._pending.pop(0) if self._pending else None
+
+    async def save(self, job: Dict[str, Any], ttl: int):
+        self._jobs[job["id"]] = job
+
+    async def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def delete(self, job_id: str):
+        self._jobs.pop(job_id, None)
+
+    async def job_ids(self) -> List[str]:
+        return list(self._jobs)
+
+    async def claim(self, dedup_key: str, job_id: str, ttl: int) -> Optional[str]:
+        """dedup_key を job_id で確保（確保済みなら既存のジョブID）"""
+        existing = self._claims.get(dedup_key)
+        if existing is not None:
+            return existing
+        self._claims[dedup_key] = job_id
+        return None
+
+    async def release(self, dedup_key: str, job_id: str):
+        if self._claims.get(dedup_key) == job_id:
+            del self._claims[dedup_key]
+
+    def clear(self):
+        self._jobs.clear()
+        self._claims.clear()
+        self._pending.clear()
+
+
+class RedisExportQueue:
+    """Redis を使うジョブキューと状態（複数プロセスで共有する場合）
+
+    client には redis.asyncio.Redis 互換のオブジェクト
+    （rpush / blpop / get / set(ex=, nx=) / delete / scan_iter）を渡す。
+    """
+
+    def __init__(self, client, prefix: str = "export_jobs:"):
+        self.client = client
+        self.prefix = prefix
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.prefix}job:{job_id}"
+
+    def _claim_key(self, dedup_key: str) -> str:
+        return f"{self.prefix}dedup:{dedup_key}"
+
+    @staticmethod
+    def _text(value) -> Optional[str]:
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def push(self, job_id: str):
+        await self.client.rpush(f"{self.prefix}queue", job_id)
+
+    async def pop(self, timeout: float) -> Optional[str]:
+        item = await self.client.blpop([f"{self.prefix}queue"], timeout=max(1, int(timeout)))
+        return self._text(item[1]) if item else None
+
+    async def save(self, job: Dict[str, Any], ttl: int):
+        await self.client.set(self._job_key(job["id"]), json.dumps(job), ex=max(1, int(ttl)))
+
+    async def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.client.get(self._job_key(job_id))
+        return json.loads(raw) if raw is not None else None
+
+    async def delete(self, job_id: str):
+        await self.client.delete(self._job_key(job_id))
+
+    async def job_ids(self) -> List[str]:
+        start = len(self._job_key(""))
+        return [self._text(key)[start:] async for key in self.client.scan_iter(match=self._job_key("*"))]
+
+    async def claim(self, dedup_key: str, job_id: str, ttl: int) -> Optional[str]:
+        key = self._claim_key(dedup_key)
+        if await self.client.set(key, job_id, ex=max(1, int(ttl)), nx=True):
+            return None
+        existing = self._text(await self.client.get(key))
+        if existing is None:
+            # 確認の間に期限切れになった場合は取り直す
+            return await self.claim(dedup_key, job_id, ttl)
+        return existing
+
+    async def release(self, dedup_key: str, job_id: str):
+        key = self._claim_key(dedup_key)
+        if self._text(await self.client.get(key)) == job_id:
+            await self.client.delete(key)
+
+
+class ExportJobManager:
+    """エクスポートジョブの登録・実行・後片付け"""
+
+    def __init__(
+        self,
+        queue,
+        directory: str,
+        workers: int = 2,
+        ttl: int = 3600,
+        poll_interval: float = 5.0,
+        cleanup_interval: float = 60.0,
+    ):
+        self.queue = queue
+        self.directory = directory
+        self.workers = max(1, workers)
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.cleanup_interval = cleanup_interval
+        # 種類 -> (処理, 拡張子, MIMEタイプ)
+        self._kinds: Dict[str, Tuple[ExportHandler, str, str]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._loop = None
+        self._stats = {"submitted": 0, "deduplicated": 0, "completed": 0, "failed": 0, "expired": 0}
+
+    def register(self, kind: str, handler: ExportHandler, suffix: str, media_type: str):
+        self._kinds[kind] = (handler, suffix, media_type)
+
+    @property
+    def kinds(self) -> List[str]:
+        return list(self._kinds)
+
+    def path(self, job: Dict[str, Any]) -> str:
+        return os.path.join(self.directory, job["id"] + self._kinds[job["kind"]][1])
+
+    # ---- 登録・参照 ----
+
+    async def submit(self, kind: str, params: Dict[str, Any], owner_id: Any) -> Tuple[Dict[str, Any], bool]:
+        """ジョブを登録して (ジョブ, 新規に作成したか) を返す"""
+        if kind not in self._kinds:
+            raise ValueError(f"unknown export kind: {kind}")
+        self.start()
+        dedup_key = hashlib.sha256(
+            json.dumps([kind, params, str(owner_id)], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        job_id = uuid.uuid4().hex
+        existing_id = await self.queue.claim(dedup_key, job_id, self.ttl)
+        if existing_id is not None:
+            existing = await self.queue.load(existing_id)
+            if existing is not None and existing["status"] in (QUEUED, RUNNING):
+                self._stats["deduplicated"] += 1
+                return existing, False
+            # ジョブが消えた・終わっているのに確保が残っている場合は解放して登録し直す
+            await self.queue.release(dedup_key, existing_id)
+            return await self.submit(kind, params, owner_id)
+
+        now = time.time()
+        suffix = self._kinds[kind][1]
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "params": params,
+            "owner_id": str(owner_id),
+            "status": QUEUED,
+            "rows": 0,
+            "size": None,
+            "error": None,
+            "filename": f"{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}",
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "expires_at": None,
+            "dedup_key": dedup_key,
+        }
+        await self.queue.save(job, self.ttl)
+        await self.queue.push(job_id)
+        self._stats["submitted"] += 1
+        return job, True
+
+    async def get(self, job_id: str, owner_id: Any = None) -> Optional[Dict[str, Any]]:
+        """ジョブを取得（owner_id 指定時は本人のジョブのみ）"""
+        job = await self.queue.load(job_id)
+        if job is None or (owner_id is not None and job["owner_id"] != str(owner_id)):
+            return None
+        if job["expires_at"] is not None and job["expires_at"] <= time.time():
+            return None
+        return job
+
+    def media_type(self, job: Dict[str, Any]) -> str:
+        return self._kinds[job["kind"]][2]
+
+    # ---- 実行 ----
+
+    async def run_job(self, job_id: str):
+        """ジョブを1件実行"""
+        job = await self.queue.load(job_id)
+        if job is None or job["status"] != QUEUED:
+            return
+        handler = self._kinds[job["kind"]][0]
+        path = self.path(job)
+        job.update(status=RUNNING, started_at=time.time())
+        await self.queue.save(job, self.ttl)
+
+        async def progress(rows: int):
+            job["rows"] = rows
+            await self.queue.save(job, self.ttl)
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            await handler(job["params"], path, progress)
+            job.update(status=COMPLETED, size=os.path.getsize(path))
+            self._stats["completed"] += 1
+        except Exception as e:
+            logger.exception("export job %s (%s) failed", job_id, job["kind"])
+            if os.path.exists(path):
+                os.unlink(path)
+            job.update(status=FAILED, error=getattr(e, "message", None) or str(e) or type(e).__name__)
+            self._stats["failed"] += 1
+        finally:
+            finished_at = time.time()
+            job.update(finished_at=finished_at, expires_at=finished_at + self.ttl)
+            await self.queue.save(job, self.ttl)
+            await self.queue.release(job["dedup_key"], job_id)
+
+    async def _worker(self):
+        while True:
+            try:
+                job_id = await self.queue.pop(self.poll_interval)
+                if job_id is not None:
+                    await self.run_job(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("export worker error")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _cleaner(self):
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                await self.cleanup()
+            except Exception:
+                logger.exception("export cleanup error")
+
+    def start(self):
+        """ワーカーを起動（起動済みなら何もしない）"""
+        loop = asyncio.get_running_loop()
+        if self._tasks and self._loop is loop:
+            return
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(loop.create_task(self._cleaner()))
+        self._loop = loop
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, RuntimeError):
+                # 別のループで作られたタスク（テストで起動し直した場合）は待てない
+                pass
+        self._loop = None
+
+    # ---- 後片付け ----
+
+    async def cleanup(self, now: Optional[float] = None) -> int:
+        """期限切れのジョブとファイル、ジョブの残っていないファイルを削除（削除件数を返す）"""
+        now = time.time() if now is None else now
+        removed = 0
+        for job_id in await self.queue.job_ids():
+            job = await self.queue.load(job_id)
+            if job is not None and job["expires_at"] is not None and job["expires_at"] <= now:
+                await self.queue.delete(job_id)
+                removed += 1
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                # ジョブの記録が消えたファイル（期限切れ・Redis のキー失効・再起動前の残り）
+                if entry.is_file() and await self.queue.load(os.path.splitext(entry.name)[0]) is None:
+                    try:
+                        os.unlink(entry.path)
+                    except FileNotFoundError:
+                        pass
+        self._stats["expired"] += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.queue).__name__,
+            "workers": self.workers,
+            "running": bool(self._tasks),
+            "ttl": self.ttl,
+            **self._stats,
+        }
+
+    def clear(self):
+        if hasattr(self.queue, "clear"):
+            self.queue.clear()
+        self._stats = {key: 0 for key in self._stats}
+
+    @classmethod
+    def from_env(cls) -> "ExportJobManager":
+        """環境変数から作成
+
+        EXPORT_JOB_BACKEND: memory（既定）/ redis（REDIS_URL に接続）
+        EXPORT_JOB_DIR: 生成したファイルの保存先
+        EXPORT_JOB_WORKERS: ワーカー数（プロセスごと）
+        EXPORT_JOB_TTL: 完了後にファイルを残す秒数
+        """
+        if os.getenv("EXPORT_JOB_BACKEND", "memory").lower() == "redis":
+            import redis.asyncio as redis
+
+            queue = RedisExportQueue(redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0")))
+        else:
+            queue = LocalExportQueue()
+        return cls(
+            queue,
+            directory=os.getenv("EXPORT_JOB_DIR", os.path.join(tempfile.gettempdir(), "niwayakanri_exports")),
+            workers=int(os.getenv("EXPORT_JOB_WORKERS", "2")),
+            ttl=int(os.getenv("EXPORT_JOB_TTL", "3600")),
+        )
+
+
+export_job_manager = ExportJobManager.from_env()
@@ -0,0 +1,310 @@
+"""
+PDFのディスクキャッシュ（内容アドレス方式）
+
+同じ入力データからは同じPDFが生成されるため、生成に渡す (種類, データ) とテンプレートの
+バージョンから SHA-256 のキーを作り、生成済みのファイルを PDF_CACHE_DIR に保存する。
+2回目以降のダウンロードは保存済みのファイルを返すだけで、ワーカーでの生成は行わない。
+
+データが変われば別のキーになるため、古いPDFが返ることはない。日報の作成・申請の承認・
+休暇残高の変更時は、対象のタグ（"timesheet:3:2025-07" など）に紐づくファイルを
+invalidate() で削除してディスクを空ける。合計サイズが PDF_CACHE_MAX_BYTES を超えたら
+最も長く使われていないファイルから削除する（LRU）。
+
+ファイルは一時ファイルに書き込んでから os.replace でキーの名前に置き換えるため、書き込み途中の
+ファイルを読むことはない。返す側は open() で開いたファイルを使うため、開いた後に削除・置き換え
+されても最後まで読める。一覧にあってもファイルが消えていた場合（他のプロセスが削除した）は
+キャッシュになかったものとして扱う。削除時は記録したファイル（inode・mtime）と異なる場合は
+他のプロセスが置き換え・使用した直後とみなしてファイルを残し、一覧からだけ外す。
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as time_of_day
+from decimal import Decimal
+from typing import Any, BinaryIO, Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+
+SUFFIX = ".pdf"
+TMP_SUFFIX = ".tmp"
+# これより古い一時ファイルは書き込み中に異常終了した残りとみなして削除する（秒）
+STALE_TMP_SECONDS = 3600
+
+
+def _canonical(value: Any):
+    """json.dumps で扱えない値をキー計算用の値に変換"""
+    if isinstance(value, np.ndarray):
+        digest = hashlib.blake2b(np.ascontiguousarray(value).tobytes(), digest_size=16).hexdigest()
+        return {"dtype": str(value.dtype), "shape": list(value.shape), "data": digest}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (date, datetime, time_of_day)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    if hasattr(value, "__dict__"):
+        return {str(k): v for k, v in vars(value).items()}
+    raise TypeError(f"cannot hash {type(value).__name__} for pdf cache key")
+
+
+def content_key(kind: str, payload: Dict[str, Any], template_version: int) -> str:
+    """(種類, データ, テンプレートのバージョン) のハッシュ"""
+    document = json.dumps(
+        [kind, template_version, payload],
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=_canonical,
+    )
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+
+class PdfCache:
+    """サイズ上限付きの PDF ファイルキャッシュ"""
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._loaded = False
+        # key -> ファイルサイズ（古い順）
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._bytes = 0
+        # key -> 最後に書き込み・使用したときのファイル (inode, mtime_ns)
+        self._stamps: Dict[str, Tuple[int, int]] = {}
+        # タグ -> key、key -> タグ
+        self._tags: Dict[str, Set[str]] = {}
+        self._key_tags: Dict[str, Tuple[str, ...]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidated = 0
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    @staticmethod
+    def _stamp(stat_result: os.stat_result) -> Tuple[int, int]:
+        return stat_result.st_ino, stat_result.st_mtime_ns
+
+    def _load(self):
+        """初回アクセス時に既存のファイルを最終使用時刻（mtime）の順に取り込む"""
+        if self._loaded:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            if entry.name.endswith(SUFFIX):
+                files.append((stat.st_mtime, entry.name[:-len(SUFFIX)], stat))
+            elif entry.name.endswith(TMP_SUFFIX) and now - stat.st_mtime > STALE_TMP_SECONDS:
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+        for _, key, stat in sorted(files, key=lambda file: file[:2]):
+            self._entries[key] = stat.st_size
+            self._bytes += stat.st_size
+            self._stamps[key] = self._stamp(stat)
+        self._loaded = True
+        self._evict()
+
+    def _touch(self, key: str) -> bool:
+        """使用を記録（ファイルが消えていたら一覧から外して False）"""
+        path = self.path(key)
+        try:
+            # 再起動後も LRU の順序が残るよう mtime を更新
+            os.utime(path)
+            self._stamps[key] = self._stamp(os.stat(path))
+        except FileNotFoundError:
+            self._remove(key, delete_file=False)
+            return False
+        self._entries.move_to_end(key)
+        return True
+
+    def get(self, key: str) -> Optional[str]:
+        """保存済みならファイルのパス（なければ None）"""
+        with self._lock:
+            self._load()
+            if key not in self._entries or not self._touch(key):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self.path(key)
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """保存済みならファイルを開いて返す（なければ None）
+
+        開いた後に削除・置き換えされても読み続けられるため、返す側はパスではなくこちらを使う。
+        """
+        with self._lock:
+            self._load()
+            if key in self._entries:
+                try:
+                    file = open(self.path(key), "rb")
+                except FileNotFoundError:
+                    self._remove(key, delete_file=False)
+                else:
+                    self._touch(key)
+                    self.hits += 1
+                    return file
+            self.misses += 1
+            return None
+
+    def reserve(self) -> str:
+        """書き込み用の一時ファイル（キャッシュと同じディレクトリ）のパス"""
+        with self._lock:
+            self._load()
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=TMP_SUFFIX)
+        os.close(fd)
+        return tmp_path
+
+    def adopt(self, key: str, tmp_path: str, tags: Iterable[str] = ()) -> str:
+        """書き込み済みの一時ファイルをキャッシュに登録してパスを返す
+
+        書き込み途中のファイルを返さないよう、完成したファイルをキーの名前に置き換える。
+        """
+        size = os.path.getsize(tmp_path)
+        with self._lock:
+            self._load()
+            os.replace(tmp_path, self.path(key))
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)
+            self._entries[key] = size
+            self._bytes += size
+            self._stamps[key] = self._stamp(os.stat(self.path(key)))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            self._key_tags[key] = tuple(set(self._key_tags.get(key, ())) | set(tags))
+            self.stores += 1
+            self._evict()
+            return self.path(key)
+
+    def put(self, key: str, data: bytes, tags: Iterable[str] = ()) -> str:
+        """PDFを保存してファイルのパスを返す"""
+        tmp_path = self.reserve()
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return self.adopt(key, tmp_path, tags)
+
+    def _remove(self, key: str, delete_file: bool = True):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._bytes -= size
+        stamp = self._stamps.pop(key, None)
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        if delete_file:
+            path = self.path(key)
+            try:
+                # 他のプロセスが置き換え・使用した直後のファイルは消さない
+                if self._stamp(os.stat(path)) == stamp:
+                    os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        """上限を超えている間、古いものから削除（直前に保存した1件は残す）"""
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def invalidate(self, *tags: str) -> int:
+        """タグに紐づくファイルを削除（削除件数を返す）"""
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.get(tag, set())
+            for key in keys:
+                self._remove(key)
+            self.invalidated += len(keys)
+            return len(keys)
+
+    def clear(self):
+        """全ファイルを削除し、統計を初期化"""
+        with self._lock:
+            self._load()
+            for key in list(self._entries):
+                self._remove(key)
+            self.hits = self.misses = self.stores = self.evictions = self.invalidated = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "directory": self.directory,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "invalidated": self.invalidated,
+                "tags": len(self._tags),
+            }
+
+    @classmethod
+    def from_env(cls) -> "PdfCache":
+        """環境変数から作成（PDF_CACHE_DIR / PDF_CACHE_MAX_BYTES）"""
+        return cls(
+            directory=os.getenv("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "niwayakanri_pdf_cache")),
+            max_bytes=int(os.getenv("PDF_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+        )
+
+
+# ---- タグ（無効化の単位） ----
+
+def construction_daily_tags(report_id: int) -> Tuple[str, ...]:
+    return (f"construction_daily:{report_id}",)
+
+
+def shift_table_tags(year: int, month: int) -> Tuple[str, ...]:
+    return ("shift_table", f"shift_table:{year}", f"shift_table:{year}-{month:02d}")
+
+
+def timesheet_tags(user_id: int, year: int, month: int) -> Tuple[str, ...]:
+    return (f"timesheet:{user_id}", f"timesheet:{user_id}:{year}-{month:02d}")
+
+
+# ---- 無効化フック ----
+
+def invalidate_construction_daily(report_id: Optional[int], user_id: int, report_date: date) -> int:
+    """日報の作成・編集時: その日報のPDFと、同じ月の出勤簿"""
+    tags = [f"timesheet:{user_id}:{report_date.year}-{report_date.month:02d}"]
+    if report_id is not None:
+        tags.extend(construction_daily_tags(report_id))
+    return pdf_cache.invalidate(*tags)
+
+
+def invalidate_attendance(user_id: int) -> int:
+    """申請の承認・却下時: 申請者の出勤簿とシフト表
+
+    休暇の期間は月をまたぐことがあるため、月は絞らずに削除する（シフト表は月に1件）。
+    """
+    return pdf_cache.invalidate(f"timesheet:{user_id}", "shift_table")
+
+
+def invalidate_leave_balance(fiscal_year: int) -> int:
+    """休暇残高の変更時: その年度のシフト表（残高を表示しているため）"""
+    return pdf_cache.invalidate(f"shift_table:{fiscal_year}")
+
+
+pdf_cache = PdfCache.from_env()
@@ -0,0 +1,323 @@
+"""
+シフト表・出勤簿PDFの高速版（キャンバスへ直接描画）
+
+platypus の Table はセルごとにスタイルを解決して行・列の大きさを計算するため、
+行数×列数が増えると生成時間が大きく伸びる（31日×200人のシフト表など）。
+ここでは列の位置と行の高さをあらかじめ決めた固定レイアウトで、背景・文字・罫線を
+キャンバスに直接描く。背景は列・行の範囲ごとに1つの矩形、罫線は行・列ごとに1本の線にまとめる。
+
+固定の行の高さに収まらないデータ（セル内の改行など）は LayoutOverflow を送出する。
+呼び出し側（pdf_generator）はその場合 platypus 版で生成し直す。
+"""
+from datetime import date
+from typing import Any, BinaryIO, Callable, Dict, List, Sequence, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+
+MARGIN = 10 * mm
+# platypus Table の既定値に合わせる（左右 6pt・上下 3pt のパディング、行送りは文字サイズ×1.2）
+PADDING_X = 6
+PADDING_Y = 3
+LINE_WIDTH = 0.5
+
+# (列の開始, 行の開始, 列の終了, 行の終了, 色)。行・列の -1 は最後を表す
+Fill = Tuple[int, int, int, int, Any]
+
+
+class LayoutOverflow(Exception):
+    """固定レイアウトに収まらない"""
+
+
+def row_height(font_size: float, lines: int = 1) -> float:
+    return font_size * 1.2 * lines + PADDING_Y * 2
+
+
+class Columns:
+    """列の x 座標を事前に計算したもの（ページ幅の中央に配置）"""
+
+    def __init__(self, widths: Sequence[float], page_width: float):
+        self.widths = list(widths)
+        self.width = sum(self.widths)
+        left = (page_width - self.width) / 2
+        self.xs = [left]
+        for width in self.widths:
+            self.xs.append(self.xs[-1] + width)
+        self.left, self.right = self.xs[0], self.xs[-1]
+
+
+class PageWriter:
+    """上から順に描画し、入りきらなければ改ページするキャンバス"""
+
+    def __init__(self, output: BinaryIO, pagesize, font_name: str):
+        self.canvas = Canvas(output, pagesize=pagesize)
+        self.page_width, self.page_height = pagesize
+        self.font_name = font_name
+        self.y = self.page_height - MARGIN
+        self._widths: Dict[Tuple[str, float], float] = {}
+
+    def width(self, text: str, font_size: float) -> float:
+        key = (text, font_size)
+        width = self._widths.get(key)
+        if width is None:
+            width = self._widths[key] = stringWidth(text, self.font_name, font_size)
+        return width
+
+    def new_page(self):
+        self.canvas.showPage()
+        self.y = self.page_height - MARGIN
+
+    def remaining(self) -> float:
+        return self.y - MARGIN
+
+    def space(self, height: float):
+        self.y -= height
+
+    def text(self, text: str, font_size: float, align: str = "LEFT", space_after: float = 0):
+        """1行の見出し・説明文"""
+        self.y -= font_size * 1.2
+        self.canvas.setFont(self.font_name, font_size)
+        if align == "CENTER":
+            self.canvas.drawCentredString(self.page_width / 2, self.y + font_size * 0.2, text)
+        else:
+            self.canvas.drawString(MARGIN, self.y + font_size * 0.2, text)
+        self.y -= space_after
+
+    def table(
+        self,
+        columns: Columns,
+        rows: Sequence[Sequence[str]],
+        heights: Sequence[float],
+        font_size: float,
+        align: Callable[[int, int], str],
+        fills: Sequence[Fill] = (),
+        repeat_rows: int = 0,
+    ):
+        """表を描画（入りきらない行は次のページへ。先頭 repeat_rows 行は各ページに繰り返す）"""
+        total = len(rows)
+        index = 0
+        first = True
+        while index < total:
+            start = index
+            drawn = [] if first else list(range(repeat_rows))
+            available = self.remaining() - sum(heights[i] for i in drawn)
+            while index < total and heights[index] <= available:
+                drawn.append(index)
+                available -= heights[index]
+                index += 1
+            # 見出し行だけがページ末尾に残らないよう、最初のページは見出し＋1行以上を必要とする
+            minimum = min(total, repeat_rows + 1) if first else 1
+            if index - start < minimum:
+                at_top = self.y >= self.page_height - MARGIN - 1e-6
+                if index == start and at_top:
+                    raise LayoutOverflow("row does not fit on a page")
+                if not at_top:
+                    index = start
+                    self.new_page()
+                    continue
+            self._draw_rows(columns, rows, heights, drawn, font_size, align, fills, total)
+            first = False
+            if index < total:
+                self.new_page()
+
+    def _draw_rows(self, columns, rows, heights, drawn, font_size, align, fills, total):
+        c = self.canvas
+        top = self.y
+        tops = []
+        y = top
+        for i in drawn:
+            tops.append(y)
+            y -= heights[i]
+        bottom = y
+        last_col = len(columns.widths) - 1
+
+        # 背景（表の行番号で指定された範囲のうち、このページに描く連続した行ごとに1つの矩形）
+        for col0, row0, col1, row1, color in fills:
+            row1 = total - 1 if row1 < 0 else row1
+            col1 = last_col if col1 < 0 else col1
+            x0, x1 = columns.xs[col0], columns.xs[col1 + 1]
+            run_top = run_bottom = None
+            for position, i in enumerate(drawn):
+                if row0 <= i <= row1:
+                    if run_top is None:
+                        run_top = tops[position]
+                    run_bottom = tops[position] - heights[i]
+                elif run_top is not None:
+                    self._fill(x0, run_bottom, x1, run_top, color)
+                    run_top = None
+            if run_top is not None:
+                self._fill(x0, run_bottom, x1, run_top, color)
+
+        # 文字
+        c.setFillColor(colors.black)
+        c.setFont(self.font_name, font_size)
+        leading = font_size * 1.2
+        for position, i in enumerate(drawn):
+            row_top = tops[position]
+            middle = row_top - heights[i] / 2
+            for col, text in enumerate(rows[i]):
+                if not text:
+                    continue
+                lines = text.split("\n")
+                baseline = middle + (len(lines) - 1) * leading / 2 - font_size * 0.35
+                cell_align = align(i, col)
+                for line in lines:
+                    if cell_align == "CENTER":
+                        x = (columns.xs[col] + columns.xs[col + 1] - self.width(line, font_size)) / 2
+                    else:
+                        x = columns.xs[col] + PADDING_X
+                    c.drawString(x, baseline, line)
+                    baseline -= leading
+
+        # 罫線（行の境界・列の境界をそれぞれ1本の線で）
+        c.setStrokeColor(colors.black)
+        c.setLineWidth(LINE_WIDTH)
+        lines = [(columns.left, y, columns.right, y) for y in tops + [bottom]]
+        lines += [(x, top, x, bottom) for x in columns.xs]
+        c.lines(lines)
+
+        self.y = bottom
+
+    def _fill(self, x0, y0, x1, y1, color):
+        self.canvas.setFillColor(color)
+        self.canvas.rect(x0, y0, x1 - x0, y1 - y0, stroke=0, fill=1)
+
+    def save(self):
+        self.canvas.save()
+
+
+def draw_shift_table_pdf(shift_data: Dict[str, Any], output: BinaryIO, font_name: str):
+    """月次シフト表（横向きA4。generate_shift_table_pdf と同じ内容）"""
+    page = PageWriter(output, landscape(A4), font_name)
+    year = shift_data.get('year', 2025)
+    month = shift_data.get('month', 1)
+    dates = shift_data.get('dates', [])
+    employees = shift_data.get('employees', [])
+
+    page.text(f"≪ {year}年 NIWAYAホールディングス（株）シフト表≫", 12, "CENTER", space_after=3 * mm)
+    page.text(f"{year}年{month}月分", 7)
+    page.space(3 * mm)
+    page.text("会社休（法定付与分）：■　会社休（計画付与分）：□　代休（振替休）：○", 7)
+    page.text("有給休暇：有　振替出勤：◎　特別休暇：特　休日出勤：☆", 7)
+    page.space(2 * mm)
+
+    # 勤怠マトリクスがあれば日別記号をまとめて取得
+    matrix = shift_data.get('matrix')
+    symbol_rows = matrix.symbol_rows() if matrix is not None else None
+
+    rows: List[List[str]] = [[''] + [str(d['day']) for d in dates], [''] + [d['weekday'] for d in dates]]
+    for emp_idx, emp in enumerate(employees):
+        if symbol_rows is not None:
+            symbols = symbol_rows[emp_idx]
+        else:
+            daily_status = emp.get('daily_status', {})
+            symbols = [daily_status.get(d['date']) for d in dates]
+        rows.append([emp['name']] + [symbol or '' for symbol in symbols])
+
+    columns = Columns([25 * mm] + [6 * mm] * len(dates), page.page_width)
+    fills: List[Fill] = [(0, 0, -1, 1, colors.lightgrey), (0, 2, 0, -1, colors.lightyellow)]
+    # 土日の列はピンク
+    fills += [
+        (col, 0, col, -1, colors.pink)
+        for col, d in enumerate(dates, start=1) if d['weekday'] in ['土', '日']
+    ]
+    page.table(columns, rows, [row_height(6)] * len(rows), 6, lambda row, col: "CENTER", fills, repeat_rows=2)
+    page.space(3 * mm)
+
+    # 休暇残日数サマリー
+    summary_rows = [
+        ['', '休暇残日数', '参考', '休暇残日数', ''],
+        ['', '(8月19日現在まで', '', '(6月30日現在)', ''],
+        ['', 'の届け出分による)', '', '', ''],
+        ['', '有給休暇', '代休', '有給休暇', '代休'],
+    ]
+    for emp in employees:
+        balance = emp.get('balance', {})
+        summary = emp.get('summary', {})
+        summary_rows.append([
+            emp['name'],
+            str(summary.get('paid_leave', 0)),
+            str(summary.get('compensatory_leave', 0)),
+            f"{balance.get('paid_leave', 0):.1f}",
+            f"{balance.get('compensatory_leave', 0):.1f}",
+        ])
+    summary_columns = Columns([25 * mm] + [15 * mm] * 4, page.page_width)
+    page.table(
+        summary_columns, summary_rows, [row_height(7)] * len(summary_rows), 7,
+        lambda row, col: "CENTER" if col else "LEFT", [(1, 0, -1, 0, colors.lightgrey)], repeat_rows=4,
+    )
+    page.save()
+
+
+TIMESHEET_HEADER = ['日', '曜日', '午前\n8:00-12:00', '午後\n13:00-17:00', '早出(H)', '残業(H)', '現場担当者', '業務内容']
+
+
+def draw_timesheet_pdf(timesheet_data: Dict[str, Any], output: BinaryIO, font_name: str):
+    """個人別月次出勤簿（A4。generate_timesheet_pdf と同じ内容）"""
+    daily_records = timesheet_data.get('daily_records', [])
+    rows: List[List[str]] = [TIMESHEET_HEADER]
+    for record in daily_records:
+        date_obj = date.fromisoformat(record['date'])
+        row = [
+            f"{date_obj.month}/{date_obj.day}",
+            record['weekday'],
+            record.get('attendance_am') or '',
+            record.get('attendance_pm') or '',
+            f"{record.get('early_hours', 0):.1f}" if record.get('early_hours', 0) > 0 else '',
+            f"{record.get('overtime_hours', 0):.1f}" if record.get('overtime_hours', 0) > 0 else '',
+            record.get('supervisor') or '',
+            record.get('work_content') or '',
+        ]
+        # 複数行のセルは行の高さが変わるため platypus 版に任せる
+        if any("\n" in text for text in row):
+            raise LayoutOverflow("multi-line cell in timesheet")
+        rows.append(row)
+
+    page = PageWriter(output, A4, font_name)
+    year = timesheet_data.get('year', 2025)
+    month = timesheet_data.get('month', 1)
+    user_info = timesheet_data.get('user', {})
+    page.text(f"出勤簿　{year}年　{month}月分", 12, "CENTER", space_after=2 * mm)
+    page.text(f"氏名: {user_info.get('name', '')}", 8)
+    page.space(3 * mm)
+
+    columns = Columns([12 * mm, 10 * mm, 15 * mm, 15 * mm, 12 * mm, 12 * mm, 20 * mm, 94 * mm], page.page_width)
+    fills: List[Fill] = [(0, 0, -1, 0, colors.lightgrey)]
+    fills += [
+        (0, idx, -1, idx, colors.lightyellow)
+        for idx, record in enumerate(daily_records, start=1) if record['weekday'] in ['土', '日']
+    ]
+    heights = [row_height(6, 2)] + [row_height(6)] * len(daily_records)
+    page.table(columns, rows, heights, 6, lambda row, col: "CENTER" if col <= 5 else "LEFT", fills, repeat_rows=1)
+    page.space(3 * mm)
+
+    summary = timesheet_data.get('summary', {})
+    summary_rows = [
+        ['早出(H)', '残業(H)', '', '', '', '', '', '', ''],
+        [
+            f"{summary.get('total_early_hours', 0):.1f}",
+            f"{summary.get('total_overtime_hours', 0):.1f}",
+            '', '', '', '', '', '', '',
+        ],
+        ['出勤日数', '振替出', '休勤', '出勤数', '有給', '振替休', '特別休', '労働時間', '欠勤'],
+        [
+            str(summary.get('total_work_days', 0)),
+            str(summary.get('substitute_work_days', 0)),
+            '0.0',
+            str(summary.get('total_work_days', 0)),
+            str(summary.get('paid_leave_days', 0)),
+            '0.0',
+            str(summary.get('special_leave_days', 0)),
+            f"{summary.get('total_work_hours', 0):.2f}",
+            str(summary.get('absence_days', 0)),
+        ],
+    ]
+    summary_columns = Columns([15 * mm] * 7 + [20 * mm, 15 * mm], page.page_width)
+    page.table(
+        summary_columns, summary_rows, [row_height(7)] * 4, 7, lambda row, col: "CENTER",
+        [(0, 0, -1, 0, colors.lightgrey), (0, 2, -1, 2, colors.lightgrey)],
+    )
+    page.save()
@@ -7,19 +7,56 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 import io
-from typing import List, Dict, Any
+import logging
+import os
+import threading
+from typing import Any, BinaryIO, Dict, List, Optional
 from datetime import date
 
+from app.core.config import settings
+from app.services.pdf_canvas import LayoutOverflow, draw_shift_table_pdf, draw_timesheet_pdf
 
-def generate_construction_daily_pdf(report, user) -> bytes:
+logger = logging.getLogger(__name__)
+
+
+def _finish(buffer, output: Optional[BinaryIO]) -> Optional[bytes]:
+    """output 指定時は書き込み済みのため None、未指定時はPDFのバイト列を返す
+
+    PDFをメモリ上に二重に持たないよう、大きな出力はファイル（SpooledTemporaryFile 等）を
+    output に渡して書き込む。
+    """
+    if output is not None:
+        return None
+    pdf_bytes = buffer.getvalue()
+    buffer.close()
+    return pdf_bytes
+
+
+def _draw_fast(draw, data: Dict[str, Any], output: Optional[BinaryIO]):
+    """キャンバス描画の高速版で生成し (生成したか, 結果) を返す
+
+    固定レイアウトに収まらない場合は何も書き込まずに (False, None) を返し、platypus 版に任せる。
+    """
+    _, font_name = register_japanese_font()
+    buffer = output if output is not None else io.BytesIO()
+    try:
+        draw(data, buffer, font_name)
+    except LayoutOverflow as e:
+        logger.debug("falling back to platypus layout: %s", e)
+        return False, None
+    return True, _finish(buffer, output)
+
+
+def generate_construction_daily_pdf(report, user, output: Optional[BinaryIO] = None) -> Optional[bytes]:
     """
     工事日報をPDFで生成
     A4サイズ1枚に収める
+    output（ファイル等）を指定した場合はそこへ書き込み、None を返す
     """
-    buffer = io.BytesIO()
+    buffer = output if output is not None else io.BytesIO()
 
     # 日本語フォントを登録
-    font_registered, font_name = _register_japanese_font()
+    font_registered, font_name = register_japanese_font()
 
     # PDFドキュメント作成（A4サイズ、マージン小さめ）
     doc = SimpleDocTemplate(
@@ -214,86 +251,85 @@ def generate_construction_daily_pdf(report, user) -> bytes:
     # PDFビルド
     doc.build(content)
 
-    pdf_bytes = buffer.getvalue()
-    buffer.close()
-
-    return pdf_bytes
-
-
-def _register_japanese_font() -> tuple[bool, str]:
-    """日本語フォントを登録"""
-    import os
-    import subprocess
-    font_registered = False
-    font_name = 'Helvetica'
-
-    # デバッグ：利用可能なフォントを確認
-    print("[PDF] Checking available fonts...")
-    try:
-        result = subprocess.run(
-            ['find', '/usr/share/fonts', '-name', '*Noto*CJK*', '-type', 'f'],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        if result.stdout:
-            print(f"[PDF] Found fonts:\n{result.stdout}")
-        else:
-            print("[PDF] No Noto CJK fonts found")
-    except Exception as e:
-        print(f"[PDF] Font check failed: {e}")
-
-    # 試すフォントパスとインデックスのリスト
-    font_paths = [
-        # Windows
-        ('C:\\Windows\\Fonts\\msgothic.ttc', [0]),
-        # IPAフォント（確実に動作する）- 最優先
-        ('/usr/share/fonts/truetype/ipafont/ipagp.ttf', [None]),
-        ('/usr/share/fonts/truetype/ipafont/ipag.ttf', [None]),
-        ('/usr/share/fonts/opentype/ipafont-gothic/ipagp.ttf', [None]),
-        ('/usr/share/fonts/opentype/ipaexfont-gothic/ipaexg.ttf', [None]),
-        # Noto Sans JP (TrueType - PostScriptではない)
-        ('/usr/share/fonts/truetype/noto-cjk/NotoSansJP-Regular.ttf', [None]),
-        ('/usr/share/fonts/truetype/noto/NotoSansJP-Regular.ttf', [None]),
-        ('/usr/share/fonts/truetype/noto-cjk/NotoSansCJK-Regular.ttf', [None]),
-    ]
-
-    for font_path, subfont_indices in font_paths:
-        # ファイルの存在確認
-        if not os.path.exists(font_path):
-            print(f"[PDF] Font file not found: {font_path}")
-            continue
-
-        print(f"[PDF] Trying to load: {font_path}")
-        for subfont_index in subfont_indices:
+    return _finish(buffer, output)
+
+
+# 試すフォントパスとサブフォント番号（.ttc の場合）のリスト
+FONT_CANDIDATES = [
+    # Windows
+    ('C:\\Windows\\Fonts\\msgothic.ttc', 0),
+    # IPAフォント（確実に動作する）- 最優先
+    ('/usr/share/fonts/truetype/ipafont/ipagp.ttf', None),
+    ('/usr/share/fonts/truetype/ipafont/ipag.ttf', None),
+    ('/usr/share/fonts/opentype/ipafont-gothic/ipagp.ttf', None),
+    ('/usr/share/fonts/opentype/ipaexfont-gothic/ipaexg.ttf', None),
+    # Noto Sans JP (TrueType - PostScriptではない)
+    ('/usr/share/fonts/truetype/noto-cjk/NotoSansJP-Regular.ttf', None),
+    ('/usr/share/fonts/truetype/noto/NotoSansJP-Regular.ttf', None),
+    ('/usr/share/fonts/truetype/noto-cjk/NotoSansCJK-Regular.ttf', None),
+]
+
+# 登録結果（プロセス内で1回だけ探索・登録する）
+_font_lock = threading.Lock()
+_registered_font = None
+
+
+def _font_candidates():
+    """設定（PDF_FONT_PATH）のフォントを優先し、なければ既定の候補を順に試す"""
+    if settings.PDF_FONT_PATH:
+        path = settings.PDF_FONT_PATH
+        yield path, (settings.PDF_FONT_SUBFONT_INDEX if path.lower().endswith('.ttc') else None)
+    yield from FONT_CANDIDATES
+
+
+def register_japanese_font() -> tuple[bool, str]:
+    """日本語フォントを登録（初回のみ探索・TTF解析を行い、以降は結果を返す）"""
+    global _registered_font
+    if _registered_font is not None:
+        return _registered_font
+
+    with _font_lock:
+        if _registered_font is not None:
+            return _registered_font
+
+        for font_path, subfont_index in _font_candidates():
+            if not os.path.exists(font_path):
+                continue
             try:
                 if subfont_index is not None:
                     pdfmetrics.registerFont(TTFont('Japanese', font_path, subfontIndex=subfont_index))
                 else:
                     pdfmetrics.registerFont(TTFont('Japanese', font_path))
-                font_registered = True
-                font_name = 'Japanese'
-                print(f"[PDF] SUCCESS: Font registered: {font_path} (index={subfont_index})")
-                break
             except Exception as e:
-                print(f"[PDF] FAILED: Could not load {font_path} (index={subfont_index}): {e}")
+                logger.warning("PDF font could not be loaded: %s (index=%s): %s", font_path, subfont_index, e)
                 continue
-        if font_registered:
+            logger.info("PDF font registered: %s (index=%s)", font_path, subfont_index)
+            _registered_font = (True, 'Japanese')
             break
+        else:
+            if settings.PDF_FONT_PATH:
+                logger.warning("PDF_FONT_PATH is not usable: %s", settings.PDF_FONT_PATH)
+            logger.warning("Japanese font not found, PDFs will use Helvetica (set PDF_FONT_PATH)")
+            _registered_font = (False, 'Helvetica')
 
-    if not font_registered:
-        print(f"[PDF] Warning: Japanese font not found, using Helvetica")
-
-    return font_registered, font_name
+    return _registered_font
 
 
-def generate_shift_table_pdf(shift_data: Dict[str, Any]) -> bytes:
+def generate_shift_table_pdf(
+    shift_data: Dict[str, Any], output: Optional[BinaryIO] = None, fast: Optional[bool] = None
+) -> Optional[bytes]:
     """
     月次シフト表をPDFで生成（横向き・A4）
     参考資料: 7月シフト表.pdf
+    fast（既定は settings.PDF_FAST_RENDERER）の場合はキャンバスへ直接描く高速版を使う
     """
-    buffer = io.BytesIO()
-    font_registered, font_name = _register_japanese_font()
+    if settings.PDF_FAST_RENDERER if fast is None else fast:
+        done, result = _draw_fast(draw_shift_table_pdf, shift_data, output)
+        if done:
+            return result
+
+    buffer = output if output is not None else io.BytesIO()
+    font_registered, font_name = register_japanese_font()
 
     # 横向きA4サイズ
     doc = SimpleDocTemplate(
@@ -356,10 +392,19 @@ def generate_shift_table_pdf(shift_data: Dict[str, Any]) -> bytes:
     # データ行を作成
     data_rows = [header_row, weekday_row]
 
-    for emp in employees:
+    # 勤怠マトリクスがあれば日別記号をまとめて取得
+    matrix = shift_data.get('matrix')
+    symbol_rows = matrix.symbol_rows() if matrix is not None else None
+
+    for emp_idx, emp in enumerate(employees):
         row = [emp['name']]
         daily_status = emp.get('daily_status', {})
 
+        if symbol_rows is not None:
+            row.extend(symbol or '' for symbol in symbol_rows[emp_idx])
+            data_rows.append(row)
+            continue
+
         for d in dates:
             date_str = d['date']
             status = daily_status.get(date_str, '')
@@ -434,19 +479,26 @@ def generate_shift_table_pdf(shift_data: Dict[str, Any]) -> bytes:
     content.append(summary_table)
 
     doc.build(content)
-    pdf_bytes = buffer.getvalue()
-    buffer.close()
 
-    return pdf_bytes
+    return _finish(buffer, output)
 
 
-def generate_timesheet_pdf(timesheet_data: Dict[str, Any]) -> bytes:
+def generate_timesheet_pdf(
+    timesheet_data: Dict[str, Any], output: Optional[BinaryIO] = None, fast: Optional[bool] = None
+) -> Optional[bytes]:
     """
     個人別月次出勤簿をPDFで生成（A4）
     参考資料: 出勤簿7月　ホールディングス.pdf
+    fast（既定は settings.PDF_FAST_RENDERER）の場合はキャンバスへ直接描く高速版を使う
+    （セル内に改行がある場合は platypus 版）
     """
-    buffer = io.BytesIO()
-    font_registered, font_name = _register_japanese_font()
+    if settings.PDF_FAST_RENDERER if fast is None else fast:
+        done, result = _draw_fast(draw_timesheet_pdf, timesheet_data, output)
+        if done:
+            return result
+
+    buffer = output if output is not None else io.BytesIO()
+    font_registered, font_name = register_japanese_font()
 
     doc = SimpleDocTemplate(
         buffer,
@@ -575,7 +627,5 @@ def generate_timesheet_pdf(timesheet_data: Dict[str, Any]) -> bytes:
     content.append(summary_table)
 
     doc.build(content)
-    pdf_bytes = buffer.getvalue()
-    buffer.close()
 
-    return pdf_bytes
+    return _finish(buffer, output)
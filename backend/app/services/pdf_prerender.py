@@ -0,0 +1,83 @@
+"""
+PDFの事前生成（状態遷移後のバックグラウンド処理）
+
+工事日報の作成・申請の承認・月締めの直後は、続けてPDFがダウンロードされることが多い。
+これらのエンドポイントはレスポンスを返した後（BackgroundTasks）に対象のPDFを生成し、
+pdf_cache に保存しておく。ダウンロード時は同じデータから同じキーになるため、保存済みの
+ファイルがそのまま返る。事前生成が済んでいない・失敗した場合は従来どおりその場で生成する。
+
+同じ対象（job_key）のジョブが実行中に再度登録された場合は新しく実行せず、実行中のジョブが
+終わった後にもう1回だけ生成し直す（その間にデータが変わっている可能性があるため）。
+"""
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Set, Tuple
+
+from fastapi import HTTPException
+
+from app.core.database import AsyncSessionLocal
+from app.services.pdf_renderer import render_pdf_file
+
+logger = logging.getLogger(__name__)
+
+# db を受け取り (PDFの種類, データ, キャッシュのタグ) を返す
+PdfJob = Callable[[Any], Awaitable[Tuple[str, Dict[str, Any], Iterable[str]]]]
+
+
+class PdfPrerenderer:
+    """対象ごとに重複を除いて PDF を事前生成する"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        # ジョブ用のセッション（リクエストのセッションはレスポンス後に閉じられるため別に開く）
+        self.session_factory = AsyncSessionLocal
+        self._running: Set[Hashable] = set()
+        self._rerun: Set[Hashable] = set()
+        self._stats = {"completed": 0, "deduplicated": 0, "skipped": 0, "failed": 0}
+
+    async def run(self, job_key: Hashable, job: PdfJob):
+        """ジョブを実行（同じ job_key が実行中なら再実行の予約だけ行う）"""
+        if not self.enabled:
+            return
+        if job_key in self._running:
+            self._rerun.add(job_key)
+            self._stats["deduplicated"] += 1
+            return
+        self._running.add(job_key)
+        try:
+            while True:
+                self._rerun.discard(job_key)
+                try:
+                    async with self.session_factory() as db:
+                        kind, payload, tags = await job(db)
+                    await render_pdf_file(kind, payload, tags)
+                except HTTPException as e:
+                    # ワーカーが混み合っている（429）・対象が消えた（404）: ダウンロード時の生成に任せる
+                    self._stats["skipped"] += 1
+                    logger.info("pdf prerender skipped for %s: %s", job_key, e.detail)
+                    break
+                except Exception:
+                    self._stats["failed"] += 1
+                    logger.exception("pdf prerender failed for %s", job_key)
+                    break
+                self._stats["completed"] += 1
+                if job_key not in self._rerun:
+                    break
+        finally:
+            self._running.discard(job_key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "running": len(self._running), **self._stats}
+
+    def clear(self):
+        self._running.clear()
+        self._rerun.clear()
+        self._stats = {key: 0 for key in self._stats}
+
+    @classmethod
+    def from_env(cls) -> "PdfPrerenderer":
+        """環境変数から作成（PDF_PRERENDER_ENABLED: true（既定）/ false）"""
+        return cls(enabled=os.getenv("PDF_PRERENDER_ENABLED", "true").lower() == "true")
+
+
+pdf_prerenderer = PdfPrerenderer.from_env()
@@ -0,0 +1,353 @@
+"""
+PDF生成サービス（プロセスプール）
+
+ReportLab による PDF 生成は CPU を使い続けるため、API のイベントループやスレッドでは
+実行せず、起動時に立ち上げた専用のワーカープロセスで行う。各ワーカーは起動時に
+ReportLab の読み込みと日本語フォントの登録を1回だけ行う。
+
+ジョブは (種類, dict) で渡す（ORM オブジェクトは渡さない）。処理中＋待ちの件数が
+上限に達した場合は PdfRenderBusy を送出し、エンドポイントは 429 + Retry-After を返す。
+ワーカーが異常終了してプールが壊れた場合（BrokenProcessPool）はプールを作り直して1回だけ
+再実行し、それでも失敗した場合は PdfRenderUnavailable を送出してエンドポイントは 503 を返す。
+ワーカーはPDFをファイルへ直接書き込み、API プロセスはそのファイルを pdf_file_response で
+（Content-Length 付き・チャンク単位で）返すため、PDF全体をメモリに持たない。
+生成したPDFは pdf_cache に保存し、同じデータでの2回目以降は生成せずにファイルを返す。
+返すファイルは開いた状態で受け渡すため、送信中にキャッシュから削除されても最後まで返せる。
+"""
+import asyncio
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+from typing import Any, BinaryIO, Dict, Iterable, Optional, Tuple
+
+import anyio
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.services.pdf_cache import content_key, pdf_cache
+
+
+class PdfRenderBusy(Exception):
+    """PDF生成の待ちが上限に達している"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"pdf renderer is saturated (retry after {retry_after}s)")
+        self.retry_after = retry_after
+
+
+class PdfRenderUnavailable(Exception):
+    """PDF生成ワーカーが作り直した後も異常終了した"""
+
+    def __init__(self, retry_after: int = 5):
+        super().__init__(f"pdf renderer workers crashed (retry after {retry_after}s)")
+        self.retry_after = retry_after
+
+
+# ---- ワーカープロセス側 ----
+
+def _init_worker():
+    """ワーカー起動時に ReportLab を読み込み、日本語フォントを登録"""
+    from app.services.pdf_generator import register_japanese_font
+
+    register_japanese_font()
+
+
+def _render_construction_daily(payload: Dict[str, Any], output: Optional[BinaryIO] = None) -> Optional[bytes]:
+    from app.services.pdf_generator import generate_construction_daily_pdf
+
+    user = payload.get("user")
+    return generate_construction_daily_pdf(
+        SimpleNamespace(**payload["report"]), SimpleNamespace(**user) if user else None, output
+    )
+
+
+def _render_shift_table(payload: Dict[str, Any], output: Optional[BinaryIO] = None) -> Optional[bytes]:
+    from app.services.pdf_generator import generate_shift_table_pdf
+
+    return generate_shift_table_pdf(payload, output)
+
+
+def _render_timesheet(payload: Dict[str, Any], output: Optional[BinaryIO] = None) -> Optional[bytes]:
+    from app.services.pdf_generator import generate_timesheet_pdf
+
+    return generate_timesheet_pdf(payload, output)
+
+
+def _render_export_report(payload: Dict[str, Any], output: Optional[BinaryIO] = None) -> Optional[bytes]:
+    # 旧API（backend/main.py）の申請一覧・集計レポート（集計は SQL で集計済みの結果を受け取る）
+    from export_service import export_service
+
+    if payload.get("report_type") == "summary":
+        return export_service.generate_summary_pdf(payload["summary"], output)
+    return export_service.generate_pdf_report(payload["requests"], output)
+
+
+RENDERERS = {
+    "construction_daily": _render_construction_daily,
+    "shift_table": _render_shift_table,
+    "timesheet": _render_timesheet,
+    "export_report": _render_export_report,
+}
+
+# テンプレート（レイアウト）のバージョン。変更したら上げると、キャッシュ済みのPDFは使われなくなる
+TEMPLATE_VERSIONS = {
+    "construction_daily": 1,
+    "shift_table": 2,
+    "timesheet": 2,
+    "export_report": 1,
+}
+
+
+def _render(kind: str, payload: Dict[str, Any]) -> Tuple[bytes, float]:
+    """ジョブを実行し (PDF, 生成時間ms) を返す"""
+    start = time.perf_counter()
+    pdf_bytes = RENDERERS[kind](payload)
+    return pdf_bytes, (time.perf_counter() - start) * 1000
+
+
+def _render_to_file(kind: str, payload: Dict[str, Any], path: str) -> Tuple[int, float]:
+    """ジョブを実行して path に書き込み (サイズ, 生成時間ms) を返す
+
+    PDF本体はプロセス間で受け渡さず、API プロセスはファイルをそのまま返す。
+    """
+    start = time.perf_counter()
+    with open(path, "wb") as output:
+        RENDERERS[kind](payload, output)
+    return os.path.getsize(path), (time.perf_counter() - start) * 1000
+
+
+def _noop() -> int:
+    return os.getpid()
+
+
+# ---- API プロセス側 ----
+
+class PdfRenderService:
+    """上限付きのプロセスプールで PDF を生成する"""
+
+    def __init__(self, workers: int = 2, max_pending: int = 8, start_method: Optional[str] = "spawn"):
+        self.workers = max(1, workers)
+        # 処理中＋待ちの上限（超えたら受け付けない）
+        self.max_pending = max(self.workers, max_pending)
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._started_at: Optional[float] = None
+        self._stats = {
+            "completed": 0, "failed": 0, "rejected": 0, "restarts": 0,
+            "render_ms": 0.0, "max_render_ms": 0.0, "max_queue_depth": 0,
+        }
+
+    def start(self):
+        """ワーカープロセスを起動（フォント登録まで済ませておく）"""
+        with self._lock:
+            if self._executor is not None:
+                return self._executor
+            context = multiprocessing.get_context(self.start_method) if self.start_method else None
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=context, initializer=_init_worker
+            )
+            self._started_at = time.monotonic()
+        # 全ワーカーを立ち上げておく（初回リクエストで起動待ちにならないように）
+        for _ in range(self.workers):
+            self._executor.submit(_noop)
+        return self._executor
+
+    def _retry_after(self) -> int:
+        """待ちがはけるまでの目安（秒）"""
+        completed = self._stats["completed"]
+        avg_seconds = self._stats["render_ms"] / completed / 1000 if completed else 1.0
+        return max(1, math.ceil(self._pending * avg_seconds / self.workers))
+
+    async def render(self, kind: str, payload: Dict[str, Any]) -> bytes:
+        """PDFを生成（上限超過時は PdfRenderBusy）"""
+        return await self._submit(kind, _render, kind, payload)
+
+    async def render_to_file(self, kind: str, payload: Dict[str, Any], path: str) -> int:
+        """PDFを path に生成してサイズを返す（上限超過時は PdfRenderBusy）"""
+        return await self._submit(kind, _render_to_file, kind, payload, path)
+
+    async def _submit(self, kind: str, func, *args):
+        if kind not in RENDERERS:
+            raise ValueError(f"unknown pdf kind: {kind}")
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise PdfRenderBusy(self._retry_after())
+            self._pending += 1
+            self._stats["max_queue_depth"] = max(
+                self._stats["max_queue_depth"], self._pending - min(self._pending, self.workers)
+            )
+
+        try:
+            result, render_ms = await self._run(func, *args)
+        except Exception:
+            with self._lock:
+                self._stats["failed"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        with self._lock:
+            self._stats["completed"] += 1
+            self._stats["render_ms"] += render_ms
+            self._stats["max_render_ms"] = max(self._stats["max_render_ms"], render_ms)
+        return result
+
+    async def _run(self, func, *args):
+        """ワーカーで実行（プールが壊れていたら作り直して1回だけ再実行）"""
+        loop = asyncio.get_running_loop()
+        executor = self._executor or self.start()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            self._restart(executor)
+        executor = self._executor or self.start()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool as e:
+            # このジョブでワーカーが落ち続ける場合も、次のリクエストは新しいプールで受け付ける
+            self._restart(executor)
+            raise PdfRenderUnavailable() from e
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """壊れたプールを作り直す（同時に失敗したジョブのうち最初の1件だけが作り直す）"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+            self._stats["restarts"] += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def stats(self) -> Dict[str, Any]:
+        """待ち件数・生成時間・ワーカー稼働率"""
+        with self._lock:
+            completed = self._stats["completed"]
+            uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+            busy = min(self._pending, self.workers)
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": busy,
+                "queue_depth": self._pending - busy,
+                "max_queue_depth": self._stats["max_queue_depth"],
+                "completed": completed,
+                "failed": self._stats["failed"],
+                "rejected": self._stats["rejected"],
+                "restarts": self._stats["restarts"],
+                "avg_render_ms": round(self._stats["render_ms"] / completed, 3) if completed else 0.0,
+                "max_render_ms": round(self._stats["max_render_ms"], 3),
+                # 起動からの経過時間に対する生成時間の割合（全ワーカー合計）
+                "utilization": round(self._stats["render_ms"] / 1000 / (uptime * self.workers), 4) if uptime else 0.0,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def from_env(cls) -> "PdfRenderService":
+        """環境変数から作成（PDF_RENDER_WORKERS / PDF_RENDER_MAX_PENDING / PDF_RENDER_START_METHOD）"""
+        workers = int(os.getenv("PDF_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+        return cls(
+            workers=workers,
+            max_pending=int(os.getenv("PDF_RENDER_MAX_PENDING", str(workers * 4))),
+            start_method=os.getenv("PDF_RENDER_START_METHOD", "spawn") or None,
+        )
+
+
+async def render_pdf_to_file(kind: str, payload: Dict[str, Any], path: str) -> int:
+    """エンドポイント用: PDFを path に生成（混雑時は 429、ワーカー異常時は 503 + Retry-After）"""
+    try:
+        return await pdf_render_service.render_to_file(kind, payload, path)
+    except PdfRenderBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="PDF生成が混み合っています。しばらくしてから再度お試しください",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except PdfRenderUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="PDFを生成できませんでした。しばらくしてから再度お試しください",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+async def _render_to_cache(kind: str, payload: Dict[str, Any], key: str, tags: Iterable[str]) -> BinaryIO:
+    """PDFを生成してキャッシュに保存し、保存したファイルを開いて返す"""
+    # ワーカーがキャッシュ用の一時ファイルへ直接書き込み、完成後にキーの名前へ置き換える
+    tmp_path = pdf_cache.reserve()
+    try:
+        await render_pdf_to_file(kind, payload, tmp_path)
+        # 置き換えた直後に削除（LRU・無効化・他のプロセス）されても返せるよう、置き換える前に開く
+        pdf_file = open(tmp_path, "rb")
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    try:
+        pdf_cache.adopt(key, tmp_path, tags)
+    except BaseException:
+        pdf_file.close()
+        raise
+    return pdf_file
+
+
+async def open_pdf_file(kind: str, payload: Dict[str, Any], tags: Iterable[str] = ()) -> BinaryIO:
+    """エンドポイント用: キャッシュ済みならそのファイル、なければ生成・保存したファイルを開いて返す
+
+    キャッシュの一覧にあってもファイルが削除されていた場合は、なかったものとして生成し直す。
+    """
+    key = content_key(kind, payload, TEMPLATE_VERSIONS[kind])
+    pdf_file = pdf_cache.open(key)
+    if pdf_file is None:
+        pdf_file = await _render_to_cache(kind, payload, key, tags)
+    return pdf_file
+
+
+async def render_pdf_file(kind: str, payload: Dict[str, Any], tags: Iterable[str] = ()) -> None:
+    """事前生成用: キャッシュになければ生成・保存する"""
+    key = content_key(kind, payload, TEMPLATE_VERSIONS[kind])
+    if pdf_cache.get(key) is None:
+        (await _render_to_cache(kind, payload, key, tags)).close()
+
+
+async def _read_file(pdf_file: BinaryIO, chunk_size: int = 64 * 1024):
+    try:
+        while True:
+            chunk = await anyio.to_thread.run_sync(pdf_file.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        pdf_file.close()
+
+
+def pdf_file_response(pdf_file: BinaryIO, headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """開いたPDFファイルをチャンク単位で返す（Content-Length 付き、送信後に閉じる）"""
+    return StreamingResponse(
+        _read_file(pdf_file),
+        media_type="application/pdf",
+        headers={**(headers or {}), "Content-Length": str(os.fstat(pdf_file.fileno()).st_size)},
+    )
+
+
+def construction_daily_payload(report, user) -> Dict[str, Any]:
+    """工事日報の ORM オブジェクトをワーカーに渡せる dict に変換"""
+    return {
+        "report": {column.name: getattr(report, column.name) for column in report.__table__.columns},
+        "user": {"id": user.id, "name": user.name, "department": user.department} if user else None,
+    }
+
+
+pdf_render_service = PdfRenderService.from_env()
@@ -0,0 +1,175 @@
+"""
+集計レポート（ステータス・種別・月・部署別の件数と承認率）
+
+集計は SQL の GROUP BY（ステータス × 種別 × 月 × 部署）で行い、DB からは集計済みの行だけを
+受け取る。summarize() はその行を API・PDF の形（件数と比率）に整える。
+
+終了日が過去の期間（締まった期間）の結果は SummaryCache に保存する。締まった期間でも
+過去の申請が承認・却下されると件数が変わるため、申請のステータス変更時に申請日を含む期間の
+結果を、部署の変更時にはすべての結果を破棄する。破棄はプロセス内のみのため、複数プロセスで
+動かす場合は SUMMARY_CACHE_TTL 秒まで古い結果が返ることがある。
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+# 部署が未設定のユーザーの集計キー
+NO_DEPARTMENT = "未設定"
+
+# 集計行: (ステータス, 種別, 月 YYYY-MM, 部署, 件数)
+SummaryRow = Tuple[Optional[str], Optional[str], Optional[str], Optional[str], int]
+
+
+def _breakdown(counts: Dict[str, int], total: int) -> Dict[str, Dict[str, Any]]:
+    return {
+        key: {"count": count, "percentage": round(count / total * 100, 1)}
+        for key, count in counts.items()
+    }
+
+
+def summarize(rows: Iterable[SummaryRow]) -> Dict[str, Any]:
+    """GROUP BY の結果から集計レポートを作成"""
+    status_counts: Dict[str, int] = {}
+    type_counts: Dict[str, int] = {}
+    monthly_counts: Dict[str, int] = {}
+    department_counts: Dict[str, int] = {}
+    total = 0
+
+    for status, req_type, month, department, count in rows:
+        total += count
+        status_counts[status or ""] = status_counts.get(status or "", 0) + count
+        type_counts[req_type or ""] = type_counts.get(req_type or "", 0) + count
+        if month:
+            monthly_counts[month] = monthly_counts.get(month, 0) + count
+        department = department or NO_DEPARTMENT
+        department_counts[department] = department_counts.get(department, 0) + count
+
+    if total == 0:
+        return {
+            "total_requests": 0,
+            "status_summary": {},
+            "type_summary": {},
+            "monthly_summary": {},
+            "department_summary": {},
+            "approval_rate": 0
+        }
+
+    return {
+        "total_requests": total,
+        "status_summary": _breakdown(status_counts, total),
+        "type_summary": _breakdown(type_counts, total),
+        "monthly_summary": dict(sorted(monthly_counts.items())),
+        "department_summary": _breakdown(department_counts, total),
+        "approval_rate": round(status_counts.get("approved", 0) / total * 100, 1)
+    }
+
+
+def _to_date(value) -> Optional[date]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def is_closed_period(start_date, end_date, today: Optional[date] = None) -> bool:
+    """終了日が今日（UTC）より前の期間か（終了日なし・解釈できない日付は締まっていない扱い）"""
+    end = _to_date(end_date)
+    if end is None or (start_date and _to_date(start_date) is None):
+        return False
+    return end < (today or datetime.now(timezone.utc).date())
+
+
+class SummaryCache:
+    """締まった期間の集計結果のキャッシュ（期間ごと、件数上限つき）"""
+
+    def __init__(self, ttl: int = 3600, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[float, Optional[date], date, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 破棄のたびに進める。集計中に破棄があった結果は保存しない
+        self._generation = 0
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "invalidations": 0}
+
+    async def get(
+        self,
+        key: Hashable,
+        start_date,
+        end_date,
+        loader: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """期間 [start_date, end_date] の集計結果（締まっていない期間は毎回 loader で集計）"""
+        if self.ttl <= 0 or not is_closed_period(start_date, end_date):
+            self._stats["bypassed"] += 1
+            return await loader()
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[3]
+            self._stats["misses"] += 1
+            generation = self._generation
+
+        value = await loader()
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (now + self.ttl, _to_date(start_date), _to_date(end_date), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate_date(self, day):
+        """day（申請日）を含む期間の結果を破棄"""
+        day = _to_date(day)
+        with self._lock:
+            self._generation += 1
+            self._stats["invalidations"] += 1
+            if day is None:
+                return
+            for key, (_, start, end, _) in list(self._entries.items()):
+                if (start is None or start <= day) and day <= end:
+                    del self._entries[key]
+
+    def invalidate(self):
+        """すべての結果を破棄"""
+        with self._lock:
+            self._generation += 1
+            self._stats["invalidations"] += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._entries), "ttl": self.ttl, "maxsize": self.maxsize, **self._stats}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self._stats = {key: 0 for key in self._stats}
+
+    @classmethod
+    def from_env(cls) -> "SummaryCache":
+        """環境変数から作成
+
+        SUMMARY_CACHE_TTL: 締まった期間の結果を保持する秒数（0 でキャッシュしない）
+        SUMMARY_CACHE_MAXSIZE: 保持する期間の数
+        """
+        return cls(
+            ttl=int(os.getenv("SUMMARY_CACHE_TTL", "3600")),
+            maxsize=int(os.getenv("SUMMARY_CACHE_MAXSIZE", "256")),
+        )
+
+
+# 新API（app/）の集計レポート用。旧API（database_sqlite）は別のインスタンスを持つ
+summary_cache = SummaryCache.from_env()
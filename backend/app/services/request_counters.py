@@ -0,0 +1,112 @@
+"""
+申請件数の集計テーブル（request_counters）
+
+ダッシュボード・管理画面の件数は requests を走査せず、この集計テーブルから取得する。
+日々の更新は app.models.database の after_flush で行い、ここでは参照・整合性の確認・
+再構築を扱う。
+
+使い方:
+    cd backend
+    python -m app.services.request_counters check    # 不一致があれば一覧を表示して終了コード1
+    python -m app.services.request_counters rebuild  # requests から作り直す
+"""
+import argparse
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database import Request, RequestCounter
+
+CounterKey = Tuple[int, str, str]
+
+
+def _actual_counts_query():
+    """requests から集計した件数（申請者 × 種別 × ステータス）"""
+    return select(
+        Request.applicant_id, Request.type, Request.status, func.count().label("count")
+    ).where(
+        Request.applicant_id.is_not(None), Request.status.is_not(None)
+    ).group_by(Request.applicant_id, Request.type, Request.status)
+
+
+def check_request_counters(connection) -> List[Dict]:
+    """集計テーブルと requests の件数の不一致を返す（一致していれば空リスト）"""
+    expected: Dict[CounterKey, int] = {
+        (applicant_id, type_, status): count
+        for applicant_id, type_, status, count in connection.execute(_actual_counts_query())
+    }
+    stored: Dict[CounterKey, int] = {
+        (row.applicant_id, row.type, row.status): row.count
+        for row in connection.execute(select(RequestCounter))
+    }
+
+    mismatches = []
+    for key in sorted(set(expected) | set(stored), key=str):
+        if expected.get(key, 0) != stored.get(key, 0):
+            applicant_id, type_, status = key
+            mismatches.append({
+                "applicant_id": applicant_id,
+                "type": type_,
+                "status": status,
+                "expected": expected.get(key, 0),
+                "stored": stored.get(key, 0),
+            })
+    return mismatches
+
+
+def rebuild_request_counters(connection) -> int:
+    """集計テーブルを requests から作り直す（作成した行数を返す）"""
+    connection.execute(delete(RequestCounter))
+    result = connection.execute(
+        insert(RequestCounter).from_select(
+            ["applicant_id", "type", "status", "count"], _actual_counts_query()
+        )
+    )
+    return result.rowcount
+
+
+async def get_request_counts(
+    db: AsyncSession, applicant_id: Optional[int] = None
+) -> Dict[Tuple[str, str], int]:
+    """種別 × ステータスごとの件数（applicant_id 指定時はその申請者のみ）"""
+    query = select(
+        RequestCounter.type, RequestCounter.status, func.sum(RequestCounter.count)
+    ).group_by(RequestCounter.type, RequestCounter.status)
+    if applicant_id is not None:
+        query = query.where(RequestCounter.applicant_id == applicant_id)
+    return {
+        (type_, status): int(count or 0)
+        for type_, status, count in (await db.execute(query)).all()
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["check", "rebuild"])
+    args = parser.parse_args(argv)
+
+    from app.core.database import engine
+
+    with engine.begin() as connection:
+        if args.command == "rebuild":
+            rows = rebuild_request_counters(connection)
+            print(f"request_counters を再構築しました（{rows} 行）")
+            return 0
+
+        mismatches = check_request_counters(connection)
+    if not mismatches:
+        print("request_counters は requests と一致しています")
+        return 0
+    for item in mismatches:
+        print(
+            f"applicant_id={item['applicant_id']} type={item['type']} status={item['status']}: "
+            f"expected={item['expected']} stored={item['stored']}"
+        )
+    print(f"{len(mismatches)} 件の不一致があります（rebuild で修復できます）")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+トークン失効（revoked_tokens）の登録と同期
+
+失効の登録は revoked_tokens へ書き込むと同時に、このプロセスのメモリにも即時反映する。
+他のプロセスへは revocation_syncer（起動時に開始）が TOKEN_REVOCATION_SYNC_INTERVAL 秒ごとに
+差分を取り込む。
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.core.token_revocation import TOKEN_REVOCATION_SYNC_INTERVAL, RevocationSyncer, revocation_list
+from app.models.database import REVOKED_TOKEN_LOCK_KEY, RevokedToken
+
+
+async def revoke_token(db: AsyncSession, payload: Dict[str, Any], user_id: Optional[int] = None) -> bool:
+    """デコード済みトークン（jti・exp・type を含む）を失効させる
+
+    この呼び出しで新たに登録した場合のみ True を返す（失効済み・jti なしは False）。
+    リフレッシュトークンのローテーションは True の場合のみ新しいトークンを発行し、
+    同じトークンの同時使用（他プロセスを含む）で二重に発行しないようにする。
+    """
+    jti = payload.get("jti")
+    if not jti or "exp" not in payload:
+        return False
+    expires_at = datetime.utcfromtimestamp(payload["exp"])
+    table = RevokedToken.__table__
+    if db.bind.dialect.name == "postgresql":
+        # id 順にコミットされるよう、コミットまで登録を直列にする（同期は id > 同期済み id で取得するため）
+        await db.execute(select(func.pg_advisory_xact_lock(REVOKED_TOKEN_LOCK_KEY)))
+        dialect = postgresql
+    else:
+        dialect = sqlite
+    result = await db.execute(
+        dialect.insert(table).values(
+            jti=jti,
+            user_id=user_id,
+            token_type=payload.get("type", "access"),
+            expires_at=expires_at,
+            revoked_at=datetime.utcnow(),
+        ).on_conflict_do_nothing(index_elements=[table.c.jti])
+    )
+    await db.commit()
+    revocation_list.add(jti, expires_at)
+    return result.rowcount == 1
+
+
+async def fetch_revoked_tokens(after_id: int):
+    """id が after_id より大きい未期限切れの失効トークン (id, jti, expires_at)"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at).where(
+                RevokedToken.id > after_id, RevokedToken.expires_at > datetime.utcnow()
+            ).order_by(RevokedToken.id)
+        )
+        return result.all()
+
+
+async def delete_expired_revoked_tokens() -> int:
+    """トークン自体の有効期限を過ぎた行を削除"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+        await db.commit()
+        return result.rowcount
+
+
+revocation_syncer = RevocationSyncer(
+    revocation_list,
+    fetch=fetch_revoked_tokens,
+    cleanup=delete_expired_revoked_tokens,
+    interval=TOKEN_REVOCATION_SYNC_INTERVAL,
+)
@@ -1,4 +1,5 @@
 import os
+import uuid
 import jwt
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
@@ -9,7 +10,9 @@ class AuthManager:
     def __init__(self):
         self.secret_key = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
         self.algorithm = "HS256"
-        self.access_token_expire_minutes = 480  # 8時間
+        # アクセストークンは短命にし、期限切れ後はリフレッシュトークンで再発行する
+        self.access_token_expire_minutes = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+        self.refresh_token_expire_days = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
         self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
     def create_access_token(self, data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
@@ -20,10 +23,21 @@ class AuthManager:
         else:
             expire = datetime.utcnow() + timedelta(minutes=self.access_token_expire_minutes)
 
-        to_encode.update({"exp": expire, "iat": datetime.utcnow()})
+        to_encode.update({"exp": expire, "iat": datetime.utcnow(), "jti": uuid.uuid4().hex, "type": "access"})
         encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
         return encoded_jwt
 
+    def create_refresh_token(self, user_id: str) -> str:
+        """JWTリフレッシュトークンを作成（アクセストークンの再発行専用）"""
+        to_encode = {
+            "sub": user_id,
+            "exp": datetime.utcnow() + timedelta(days=self.refresh_token_expire_days),
+            "iat": datetime.utcnow(),
+            "jti": uuid.uuid4().hex,
+            "type": "refresh",
+        }
+        return jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
         """JWTトークンを検証し、ペイロードを返す"""
         try:
@@ -40,6 +54,13 @@ class AuthManager:
                 detail="Could not validate token"
             )
 
+    def decode_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """JWTトークンを検証し、ペイロードを返す（無効・期限切れは例外にせず None）"""
+        try:
+            return jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except jwt.PyJWTError:
+            return None
+
     def hash_password(self, password: str) -> str:
         """パスワードをハッシュ化"""
         return self.pwd_context.hash(password)
@@ -0,0 +1,108 @@
+"""
+申請CSVエクスポートのメモリ使用量と最初の1バイトまでの時間のベンチマーク
+
+一時DBに申請を件数を変えて登録し、次の2通りでCSVを最後まで読み出したときの
+Python ヒープのピーク（tracemalloc）、最初のブロックまでの時間（TTFB）、全体の時間を比較する。
+
+    list:   get_requests_with_details で全件を読み、generate_csv_export で文字列にする旧実装
+    stream: iter_requests_for_export でカーソルから chunk 行ずつ読み、stream_csv_export で
+            エンコードしながら返す現行実装
+
+使い方:
+    cd backend
+    python benchmarks/bench_csv_export.py --rows 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("SQL_ECHO", "false")
+
+from database_sqlite import SQLiteDatabaseManager  # noqa: E402
+from export_service import export_service  # noqa: E402
+
+TYPES = ("leave", "overtime", "expense")
+STATUSES = ("applied", "approved", "rejected")
+
+
+async def seed(manager: SQLiteDatabaseManager, rows: int):
+    users = [
+        await manager.create_user({"email": f"bench{i}@example.com", "name": f"従業員{i}", "role": "user"}, "password123")
+        for i in range(20)
+    ]
+
+    def _insert(conn):
+        conn.executemany(
+            "INSERT INTO requests (id, type, applicant_id, title, description, status, applied_at, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, datetime('2025-01-01', ?), datetime('2025-01-01', ?))",
+            (
+                (f"{i:012d}", TYPES[i % 3], users[i % len(users)], f"申請 {i}", "説明" * 10,
+                 STATUSES[i % 3], f"+{i % 365} days", f"+{i} seconds")
+                for i in range(rows)
+            ),
+        )
+    await manager.pool.run_write(_insert)
+
+
+async def via_list(manager, encoding, chunk_size):
+    start = time.perf_counter()
+    requests_data = await manager.get_requests_with_details()
+    body = export_service.generate_csv_export(requests_data).encode("utf-8")
+    ttfb = time.perf_counter() - start
+    return ttfb, len(body)
+
+
+async def via_stream(manager, encoding, chunk_size):
+    start = time.perf_counter()
+    ttfb = None
+    total = 0
+    chunks = manager.iter_requests_for_export(chunk_size=chunk_size)
+    async for block in export_service.stream_csv_export(chunks, encoding):
+        if ttfb is None:
+            ttfb = time.perf_counter() - start
+        total += len(block)
+    return ttfb, total
+
+
+def measure(method, manager, encoding, chunk_size):
+    """(ピークMB, TTFB ms, 全体 ms, CSVサイズ)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    ttfb, size = asyncio.run(method(manager, encoding, chunk_size))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6, ttfb * 1000, elapsed * 1000, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--encoding", default="utf-8-bom", choices=["utf-8", "utf-8-bom", "shift_jis"])
+    parser.add_argument("--skip-list", action="store_true", help="旧実装を計測しない（件数が多いとき）")
+    args = parser.parse_args()
+
+    methods = [("stream", via_stream)] if args.skip_list else [("list", via_list), ("stream", via_stream)]
+    print(f"{'rows':>9} {'method':<7} {'csv MB':>8} {'peak MB':>9} {'ttfb ms':>9} {'total ms':>9}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.environ["SQLITE_DB_PATH"] = os.path.join(tmpdir, "bench.db")
+            manager = SQLiteDatabaseManager()
+            try:
+                asyncio.run(seed(manager, rows))
+                for label, method in methods:
+                    peak, ttfb, elapsed, size = measure(method, manager, args.encoding, args.chunk_size)
+                    print(f"{rows:>9} {label:<7} {size / 1e6:>8.1f} {peak:>9.1f} {ttfb:>9.1f} {elapsed:>9.0f}")
+            finally:
+                manager.pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+申請Excelエクスポートの時間とメモリ使用量のベンチマーク（pandas 版と write_only 版）
+
+一時DBに申請を件数を変えて登録し、次の2通りで申請一覧の xlsx をファイルへ出力したときの
+所要時間と Python ヒープのピーク（tracemalloc）を比較する。あわせて pandas の import に
+かかる時間（起動時間への影響）を別プロセスで計測する。
+
+    pandas:     get_requests_with_details で全件を読み、DataFrame → pd.ExcelWriter で書き込み、
+                全セルをたどって列幅を調整する旧実装
+    write_only: iter_requests_for_export でカーソルから chunk 行ずつ読み、openpyxl の
+                write_only ブックへ書き込む現行実装（列幅は先頭の行から測る）
+
+使い方:
+    cd backend
+    python benchmarks/bench_excel_export.py --rows 10000 100000
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("SQL_ECHO", "false")
+
+from benchmarks.bench_csv_export import seed  # noqa: E402
+from database_sqlite import SQLiteDatabaseManager  # noqa: E402
+from export_service import REQUEST_HEADERS, export_service  # noqa: E402
+
+
+async def via_pandas(manager, path, chunk_size):
+    import pandas as pd
+
+    requests_data = await manager.get_requests_with_details()
+    df = pd.DataFrame([
+        dict(zip(REQUEST_HEADERS, export_service._request_row((
+            req.get('id'), req.get('type'), req['applicant'].get('name'), req['applicant'].get('email'),
+            req.get('title'), req.get('description'), req.get('status'), req.get('applied_at'),
+            req.get('approved_at'), (req.get('approver') or {}).get('name'), req.get('comments'),
+        ))))
+        for req in requests_data
+    ])
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='申請一覧', index=False)
+        worksheet = writer.sheets['申請一覧']
+        for column in worksheet.columns:
+            max_length = max(len(str(cell.value)) for cell in column)
+            worksheet.column_dimensions[column[0].column_letter].width = min(max_length + 2, 50)
+
+
+async def via_write_only(manager, path, chunk_size):
+    await export_service.write_excel_export(
+        {"requests": manager.iter_requests_for_export(chunk_size=chunk_size)}, path
+    )
+
+
+def measure(method, manager, path, chunk_size):
+    """(ピークMB, ms, xlsx サイズ)
+
+    tracemalloc は処理を大きく遅くするため、時間とピークメモリは別々に実行して測る。
+    """
+    start = time.perf_counter()
+    asyncio.run(method(manager, path, chunk_size))
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    asyncio.run(method(manager, path, chunk_size))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6, elapsed * 1000, os.path.getsize(path)
+
+
+def import_time(module: str) -> float:
+    """新しいプロセスで module の import にかかる時間（ms）"""
+    code = f"import time; s = time.perf_counter(); import {module}; print(time.perf_counter() - s)"
+    return float(subprocess.check_output([sys.executable, "-c", code])) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"import pandas:   {import_time('pandas'):>7.0f} ms")
+    print(f"import openpyxl: {import_time('openpyxl'):>7.0f} ms")
+    print()
+    print(f"{'rows':>8} {'method':<11} {'xlsx MB':>8} {'peak MB':>9} {'ms':>9}")
+    methods = [("pandas", via_pandas), ("write_only", via_write_only)]
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.environ["SQLITE_DB_PATH"] = os.path.join(tmpdir, "bench.db")
+            manager = SQLiteDatabaseManager()
+            try:
+                asyncio.run(seed(manager, rows))
+                for label, method in methods:
+                    path = os.path.join(tmpdir, f"{label}.xlsx")
+                    peak, elapsed, size = measure(method, manager, path, args.chunk_size)
+                    print(f"{rows:>8} {label:<11} {size / 1e6:>8.1f} {peak:>9.1f} {elapsed:>9.0f}")
+            finally:
+                manager.pool.close()
+
+
+if __name__ == "__main__":
+    main()
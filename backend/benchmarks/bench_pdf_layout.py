@@ -0,0 +1,89 @@
+"""
+シフト表・出勤簿PDFの生成時間のベンチマーク（platypus 版とキャンバス描画版）
+
+31日分のシフト表を従業員数を変えて、platypus の Table で組む旧実装と、列の位置を事前に
+計算してキャンバスへ直接描く高速版（pdf_canvas）で生成し、所要時間・ページ数・サイズを比較する。
+あわせて1か月分の出勤簿も比較する。
+
+使い方:
+    cd backend
+    python benchmarks/bench_pdf_layout.py --employees 10 50 100 200 500
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("SQL_ECHO", "false")
+
+from benchmarks.bench_pdf_output import YEAR, MONTH, shift_data  # noqa: E402
+from app.api.v1.endpoints.attendance import get_month_dates, get_weekday_name  # noqa: E402
+from app.services.pdf_generator import (  # noqa: E402
+    generate_shift_table_pdf, generate_timesheet_pdf, register_japanese_font,
+)
+
+
+def timesheet_data() -> dict:
+    return {
+        "year": YEAR,
+        "month": MONTH,
+        "user": {"id": 1, "name": "従業員1", "department": "工事部"},
+        "daily_records": [
+            {
+                "date": d.strftime("%Y-%m-%d"),
+                "day": d.day,
+                "weekday": get_weekday_name(d),
+                "attendance_am": "○",
+                "attendance_pm": "○",
+                "early_hours": 1.0 if d.day % 5 == 0 else 0.0,
+                "overtime_hours": 2.0 if d.day % 3 == 0 else 0.0,
+                "supervisor": "従業員1",
+                "work_content": "本社ビル改修 内装工事",
+                "leave_status": None,
+            }
+            for d in get_month_dates(YEAR, MONTH)
+        ],
+        "summary": {"total_work_days": 22, "total_work_hours": 176.0},
+    }
+
+
+def measure(render, repeat: int):
+    """(最良ms, PDF)"""
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pdf_bytes = render()
+        elapsed.append((time.perf_counter() - start) * 1000)
+    return min(elapsed), pdf_bytes
+
+
+def pages(pdf_bytes: bytes) -> int:
+    return len(re.findall(rb"/Type /Page\b", pdf_bytes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, nargs="+", default=[10, 50, 100, 200, 500])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # フォント登録はプロセスで1回（ワーカー起動時に済ませているため計測から除く）
+    register_japanese_font()
+
+    print(f"{'case':<14} {'impl':<9} {'pages':>6} {'pdf KB':>8} {'best ms':>9} {'speedup':>8}")
+    cases = [(f"shift x{n}", generate_shift_table_pdf, shift_data(n)) for n in args.employees]
+    cases.append(("timesheet", generate_timesheet_pdf, timesheet_data()))
+    for name, generate, data in cases:
+        platypus_ms, platypus_pdf = measure(lambda: generate(data, fast=False), args.repeat)
+        canvas_ms, canvas_pdf = measure(lambda: generate(data, fast=True), args.repeat)
+        print(f"{name:<14} {'platypus':<9} {pages(platypus_pdf):>6} {len(platypus_pdf) / 1024:>8.0f} "
+              f"{platypus_ms:>9.1f} {'':>8}")
+        print(f"{name:<14} {'canvas':<9} {pages(canvas_pdf):>6} {len(canvas_pdf) / 1024:>8.0f} "
+              f"{canvas_ms:>9.1f} {platypus_ms / canvas_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
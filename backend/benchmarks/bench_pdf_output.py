@@ -0,0 +1,152 @@
+"""
+PDF出力先ごとのピークメモリのベンチマーク
+
+大きなシフト表（従業員数）と申請一覧レポート（申請件数）を、次の3通りで出力したときの
+Python ヒープのピーク（tracemalloc）と、出力後にメモリ上に残るサイズを比較する。
+
+    bytes:   BytesIO に生成して getvalue() し、StreamingResponse(BytesIO(...)) で返す旧実装
+    spooled: SpooledTemporaryFile に書き込み、閾値を超えたらディスクへ書き出す
+    file:    ファイルへ直接書き込む（PDF生成ワーカー → FileResponse の現行実装）
+
+使い方:
+    cd backend
+    python benchmarks/bench_pdf_output.py --employees 50 200 --requests 1000 5000
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("SQL_ECHO", "false")
+
+from app.api.v1.endpoints.attendance import get_month_dates, get_weekday_name  # noqa: E402
+from app.services.pdf_generator import generate_shift_table_pdf, register_japanese_font  # noqa: E402
+from export_service import export_service  # noqa: E402
+
+YEAR, MONTH = 2025, 7
+SYMBOLS = (None, None, None, "有", "代", "特", "◎")
+CHUNK_SIZE = 64 * 1024
+
+
+def shift_data(employees: int) -> dict:
+    month_dates = get_month_dates(YEAR, MONTH)
+    return {
+        "year": YEAR,
+        "month": MONTH,
+        "dates": [
+            {"date": d.strftime("%Y-%m-%d"), "day": d.day, "weekday": get_weekday_name(d)}
+            for d in month_dates
+        ],
+        "employees": [
+            {
+                "user_id": i,
+                "name": f"従業員{i}",
+                "department": "工事部",
+                "daily_status": {
+                    d.strftime("%Y-%m-%d"): SYMBOLS[(i + d.day) % len(SYMBOLS)] for d in month_dates
+                },
+                "summary": {"paid_leave": 1, "compensatory_leave": 1, "special_leave": 0, "holiday_work": 1},
+                "balance": {"paid_leave": 10.0, "compensatory_leave": 1.0},
+            }
+            for i in range(employees)
+        ],
+    }
+
+
+def requests_data(count: int) -> list:
+    start = date(YEAR, 1, 1)
+    return [
+        {
+            "id": f"{i:08d}-0000-0000-0000-000000000000",
+            "type": ("leave", "overtime", "expense")[i % 3],
+            "applicant": {"name": f"従業員{i % 200}"},
+            "title": f"申請 {i}",
+            "status": ("approved", "pending", "rejected")[i % 3],
+            "applied_at": (start + timedelta(days=i % 365)).isoformat(),
+            "approved_at": None,
+        }
+        for i in range(count)
+    ]
+
+
+def drain(stream) -> int:
+    """レスポンス送信相当（チャンク単位で読み出す）"""
+    stream.seek(0)
+    total = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return total
+        total += len(chunk)
+
+
+def via_bytes(render, tmpdir, threshold):
+    pdf_bytes = render(None)
+    body = io.BytesIO(pdf_bytes)
+    return drain(body), pdf_bytes, body
+
+
+def via_spooled(render, tmpdir, threshold):
+    output = tempfile.SpooledTemporaryFile(max_size=threshold, dir=tmpdir)
+    render(output)
+    return drain(output), output
+
+
+def via_file(render, tmpdir, threshold):
+    path = os.path.join(tmpdir, "out.pdf")
+    with open(path, "wb") as output:
+        render(output)
+    with open(path, "rb") as stream:
+        return drain(stream), path
+
+
+def measure(render, method, tmpdir, threshold):
+    """(ピークMB, 出力後に保持しているMB, PDFサイズ, ms)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = method(render, tmpdir, threshold)
+    elapsed = (time.perf_counter() - start) * 1000
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = result[0]
+    del result
+    return peak / 1e6, retained / 1e6, size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--requests", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--spool-threshold", type=int, default=1024 * 1024,
+                        help="SpooledTemporaryFile がディスクへ書き出すサイズ（バイト）")
+    args = parser.parse_args()
+
+    # フォント登録はプロセスで1回（ワーカー起動時に済ませているため計測から除く）
+    register_japanese_font()
+
+    cases = [
+        (f"shift x{n}", (lambda data: lambda output: generate_shift_table_pdf(data, output))(shift_data(n)))
+        for n in args.employees
+    ] + [
+        (f"report x{n}", (lambda data: lambda output: export_service.generate_pdf_report(data, "requests", output))(
+            requests_data(n)))
+        for n in args.requests
+    ]
+    methods = [("bytes", via_bytes), ("spooled", via_spooled), ("file", via_file)]
+
+    print(f"{'case':<14} {'output':<8} {'pdf KB':>8} {'peak MB':>9} {'held MB':>9} {'ms':>9}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, render in cases:
+            for label, method in methods:
+                peak, retained, size, elapsed = measure(render, method, tmpdir, args.spool_threshold)
+                print(f"{name:<14} {label:<8} {size / 1024:>8.0f} {peak:>9.1f} {retained:>9.2f} {elapsed:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+シフト表データ取得（_get_shift_data）のベンチマーク
+
+従業員ごとに3クエリを発行していた旧実装と、月単位で一括取得する現行実装を
+10 / 100 / 1000 人で比較し、クエリ数・所要時間と出力の一致を確認する。
+あわせて勤怠マトリクスによる12か月分の集計（年間ビュー）の所要時間も計測する。
+
+使い方:
+    cd backend
+    python benchmarks/bench_shift_loader.py --employees 10 100 1000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("SQL_ECHO", "false")
+
+from sqlalchemy import and_, create_engine, event, insert, or_, select  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.api.v1.endpoints.attendance import (  # noqa: E402
+    _build_attendance_matrix, _get_shift_data, get_month_dates, get_weekday_name,
+)
+from app.models.database import (  # noqa: E402
+    Base, HolidayWorkRequest, LeaveBalance, LeaveRequest, Request, User,
+)
+
+YEAR, MONTH = 2025, 7
+LEAVE_TYPES = ("paid", "compensatory", "special")
+
+
+async def legacy_get_shift_data(year: int, month: int, db) -> dict:
+    """旧実装（従業員ごとに休暇・休日出勤・残高を個別に取得）"""
+    users = (await db.scalars(select(User).where(User.is_active == True))).all()  # noqa: E712
+    month_dates = get_month_dates(year, month)
+    start_date = month_dates[0]
+    end_date = month_dates[-1]
+
+    result = {
+        "year": year,
+        "month": month,
+        "dates": [
+            {"date": d.strftime("%Y-%m-%d"), "day": d.day, "weekday": get_weekday_name(d)}
+            for d in month_dates
+        ],
+        "employees": []
+    }
+
+    for user in users:
+        leave_requests = (await db.scalars(select(LeaveRequest).join(Request).where(
+            and_(
+                Request.applicant_id == user.id,
+                Request.status == "approved",
+                or_(
+                    and_(LeaveRequest.start_date >= start_date, LeaveRequest.start_date <= end_date),
+                    and_(LeaveRequest.end_date >= start_date, LeaveRequest.end_date <= end_date),
+                    and_(LeaveRequest.start_date <= start_date, LeaveRequest.end_date >= end_date)
+                )
+            )
+        ))).all()
+        holiday_work_requests = (await db.scalars(select(HolidayWorkRequest).join(Request).where(
+            and_(
+                Request.applicant_id == user.id,
+                Request.status == "approved",
+                HolidayWorkRequest.work_date >= start_date,
+                HolidayWorkRequest.work_date <= end_date
+            )
+        ))).all()
+        leave_balance = await db.scalar(select(LeaveBalance).where(
+            and_(LeaveBalance.user_id == user.id, LeaveBalance.fiscal_year == year)
+        ))
+
+        daily_status = {}
+        for d in month_dates:
+            status = None
+            for leave in leave_requests:
+                if leave.start_date <= d <= leave.end_date:
+                    if leave.leave_type == "paid":
+                        status = "有"
+                    elif leave.leave_type == "compensatory":
+                        status = "代"
+                    elif leave.leave_type == "special":
+                        status = "特"
+                    break
+            if not status:
+                for hw in holiday_work_requests:
+                    if hw.work_date == d:
+                        status = "◎"
+                        break
+            daily_status[d.strftime("%Y-%m-%d")] = status
+
+        result["employees"].append({
+            "user_id": user.id,
+            "name": user.name,
+            "department": user.department,
+            "daily_status": daily_status,
+            "summary": {
+                "paid_leave": sum(1 for leave in leave_requests if leave.leave_type == "paid"),
+                "compensatory_leave": sum(1 for leave in leave_requests if leave.leave_type == "compensatory"),
+                "special_leave": sum(1 for leave in leave_requests if leave.leave_type == "special"),
+                "holiday_work": len(holiday_work_requests)
+            },
+            "balance": {
+                "paid_leave": leave_balance.paid_leave_balance if leave_balance else 0.0,
+                "compensatory_leave": leave_balance.compensatory_leave_balance if leave_balance else 0.0
+            }
+        })
+
+    return result
+
+
+def seed(db_url: str, employees: int):
+    """従業員1人あたり休暇3件（月をまたぐものを含む）・休日出勤1件・残高1件を投入"""
+    engine = create_engine(db_url)
+    Base.metadata.create_all(engine)
+    month_start = date(YEAR, MONTH, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"email": f"user{i}@example.com", "name": f"従業員{i}", "hashed_password": "x",
+             "department": "工事部", "role": "user", "is_active": True}
+            for i in range(employees)
+        ])
+        requests, leaves, holiday_work, balances = [], [], [], []
+        request_id = 0
+        for user_id in range(1, employees + 1):
+            for k, offset in enumerate((-3, 9 + user_id % 5, 27)):
+                request_id += 1
+                start = month_start + timedelta(days=offset)
+                requests.append({"id": request_id, "type": "leave", "applicant_id": user_id,
+                                 "status": "approved", "title": "休暇申請"})
+                leaves.append({"request_id": request_id, "leave_type": LEAVE_TYPES[(user_id + k) % 3],
+                               "start_date": start, "end_date": start + timedelta(days=k + 2),
+                               "days": k + 3})
+            request_id += 1
+            requests.append({"id": request_id, "type": "holiday_work", "applicant_id": user_id,
+                             "status": "approved", "title": "休日出勤申請"})
+            holiday_work.append({"request_id": request_id, "work_date": month_start + timedelta(days=5),
+                                 "start_time": "08:00", "end_time": "17:00"})
+            balances.append({"user_id": user_id, "fiscal_year": YEAR,
+                             "paid_leave_balance": 10.0, "compensatory_leave_balance": 1.0})
+        conn.execute(insert(Request), requests)
+        conn.execute(insert(LeaveRequest), leaves)
+        conn.execute(insert(HolidayWorkRequest), holiday_work)
+        conn.execute(insert(LeaveBalance), balances)
+    engine.dispose()
+
+
+async def measure(async_url: str, func, repeat: int):
+    """(最良ms, クエリ数, 結果) を返す"""
+    engine = create_async_engine(async_url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    queries = [0]
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count(*args):
+        queries[0] += 1
+
+    elapsed = []
+    for _ in range(repeat):
+        queries[0] = 0
+        async with session_factory() as db:
+            start = time.perf_counter()
+            result = await func(YEAR, MONTH, db)
+            elapsed.append((time.perf_counter() - start) * 1000)
+    await engine.dispose()
+    return min(elapsed), queries[0], result
+
+
+async def year_summary(year: int, month: int, db) -> list:
+    """12か月分の従業員別・月別集計（年間ビュー相当）"""
+    user_ids = (await db.scalars(select(User.id).where(User.is_active == True))).all()  # noqa: E712
+    matrix = await _build_attendance_matrix(user_ids, date(year, 1, 1), date(year, 12, 31), db)
+    return matrix.monthly_summary()
+
+
+async def main_async(employee_counts, repeat: int):
+    print(f"{'employees':>9} {'impl':<8} {'queries':>8} {'best ms':>10}")
+    for employees in employee_counts:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "bench.db")
+            seed(f"sqlite:///{path}", employees)
+            async_url = f"sqlite+aiosqlite:///{path}"
+
+            legacy_ms, legacy_queries, legacy_result = await measure(async_url, legacy_get_shift_data, repeat)
+            new_ms, new_queries, new_result = await measure(async_url, _get_shift_data, repeat)
+
+            assert legacy_result == new_result, "旧実装と出力が一致しません"
+            print(f"{employees:>9} {'before':<8} {legacy_queries:>8} {legacy_ms:>10.1f}")
+            print(f"{employees:>9} {'after':<8} {new_queries:>8} {new_ms:>10.1f}")
+
+            year_ms, year_queries, _ = await measure(async_url, year_summary, repeat)
+            print(f"{employees:>9} {'year':<8} {year_queries:>8} {year_ms:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.employees, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
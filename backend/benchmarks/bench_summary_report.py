@@ -0,0 +1,90 @@
+"""
+集計レポートの所要時間のベンチマーク（Python で数える旧実装と GROUP BY 版）
+
+一時DBに申請を件数を変えて登録し、1年分の集計レポートを次の2通りで作成したときの
+所要時間と Python ヒープのピーク（tracemalloc）を比較する。あわせて締まった期間の
+2回目以降（キャッシュ）の時間も測る。
+
+    python:   get_requests_with_details で全件を読み、ステータス・種別・月を Python で数える旧実装
+    group_by: get_request_summary で GROUP BY の集計済みの行だけを受け取る現行実装
+
+使い方:
+    cd backend
+    python benchmarks/bench_summary_report.py --rows 10000 100000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("SQL_ECHO", "false")
+
+from benchmarks.bench_csv_export import seed  # noqa: E402
+from database_sqlite import SQLiteDatabaseManager  # noqa: E402
+
+START_DATE, END_DATE = "2025-01-01", "2025-12-31"
+
+
+async def via_python(manager):
+    requests_data = await manager.get_requests_with_details(start_date=START_DATE, end_date=END_DATE)
+    status_counts, type_counts, monthly_counts = {}, {}, {}
+    for req in requests_data:
+        status_counts[req['status']] = status_counts.get(req['status'], 0) + 1
+        type_counts[req['type']] = type_counts.get(req['type'], 0) + 1
+        month = datetime.fromisoformat(req['applied_at']).strftime('%Y-%m')
+        monthly_counts[month] = monthly_counts.get(month, 0) + 1
+    return len(requests_data)
+
+
+async def via_group_by(manager):
+    manager.summary_cache.clear()
+    return (await manager.get_request_summary(START_DATE, END_DATE))["total_requests"]
+
+
+async def via_cache(manager):
+    return (await manager.get_request_summary(START_DATE, END_DATE))["total_requests"]
+
+
+def measure(method, manager, repeat):
+    """(ピークMB, 最良ms, 件数)"""
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        total = asyncio.run(method(manager))
+        elapsed.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    asyncio.run(method(manager))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6, min(elapsed), total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'method':<9} {'total':>8} {'peak MB':>9} {'best ms':>9}")
+    methods = [("python", via_python), ("group_by", via_group_by), ("cache", via_cache)]
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.environ["SQLITE_DB_PATH"] = os.path.join(tmpdir, "bench.db")
+            manager = SQLiteDatabaseManager()
+            try:
+                asyncio.run(seed(manager, rows))
+                for label, method in methods:
+                    peak, elapsed, total = measure(method, manager, args.repeat)
+                    print(f"{rows:>8} {label:<9} {total:>8} {peak:>9.1f} {elapsed:>9.1f}")
+            finally:
+                manager.pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -150,6 +150,9 @@ def create_sqlite_schema():
     CREATE INDEX IF NOT EXISTS idx_users_employee_id ON users(employee_id);
     CREATE INDEX IF NOT EXISTS idx_requests_applicant_id ON requests(applicant_id);
     CREATE INDEX IF NOT EXISTS idx_requests_status ON requests(status);
+    CREATE INDEX IF NOT EXISTS idx_requests_created_at ON requests(created_at);
+    CREATE INDEX IF NOT EXISTS idx_approvals_request_action ON approvals(request_id, action);
+    CREATE INDEX IF NOT EXISTS idx_request_expense_lines_request_id ON request_expense_lines(request_id);
     CREATE INDEX IF NOT EXISTS idx_user_sessions_token ON user_sessions(session_token);
     CREATE INDEX IF NOT EXISTS idx_user_sessions_user_id ON user_sessions(user_id);
     """
@@ -1,14 +1,375 @@
 import os
+import queue
 import sqlite3
 import asyncio
-from datetime import datetime, timedelta, date
-from typing import Optional, List, Dict, Any
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, date, timezone
+from typing import Optional, List, Dict, Any, AsyncIterator, Callable, Sequence
 from contextlib import asynccontextmanager
 from auth import auth_manager
+from app.core.password_hasher import password_hasher
+from app.core.session_touch import SessionTouchBuffer
+from app.core.user_cache import user_cache
+from app.services.report_summary import SummaryCache, summarize
+
+
+class SQLiteConnectionPool:
+    """SQLite接続プール
+
+    読み取りは長寿命接続のプールから、書き込みは専用の1接続で直列に実行する。
+    sqlite3 の呼び出しはすべてスレッドプール上で行い、イベントループを塞がない。
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        pool_size: int = 4,
+        journal_mode: str = "WAL",
+        synchronous: str = "NORMAL",
+        cache_size: int = -16000,
+        mmap_size: int = 268435456,
+        busy_timeout: int = 5000,
+    ):
+        self.db_path = db_path
+        self.pool_size = max(1, pool_size)
+        self.pragmas = {
+            "journal_mode": journal_mode,
+            "synchronous": synchronous,
+            "cache_size": int(cache_size),
+            "mmap_size": int(mmap_size),
+            "busy_timeout": int(busy_timeout),
+        }
+
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._all_readers: List[sqlite3.Connection] = []
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.Lock()
+        self._read_executor: Optional[ThreadPoolExecutor] = None
+        self._write_executor: Optional[ThreadPoolExecutor] = None
+        self._open_lock = threading.Lock()
+        self._stream_semaphore: Optional[asyncio.Semaphore] = None
+        self._stream_loop = None
+
+        self._stats_lock = threading.Lock()
+        self._pending = 0
+        self._stats = {
+            "reads": 0,
+            "writes": 0,
+            "errors": 0,
+            "streams": 0,
+            "read_waits": 0,
+            "read_wait_ms": 0.0,
+            "write_wait_ms": 0.0,
+        }
+
+    @classmethod
+    def from_env(cls, db_path: str) -> "SQLiteConnectionPool":
+        """環境変数から設定を読み込んで生成"""
+        return cls(
+            db_path,
+            pool_size=int(os.getenv("SQLITE_POOL_SIZE", "4")),
+            journal_mode=os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+            synchronous=os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+            cache_size=int(os.getenv("SQLITE_CACHE_SIZE", "-16000")),
+            mmap_size=int(os.getenv("SQLITE_MMAP_SIZE", "268435456")),
+            busy_timeout=int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000")),
+        )
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+
+    def _connect(self, readonly: bool = False) -> sqlite3.Connection:
+        """PRAGMA適用済みの接続を作成"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.pragmas["busy_timeout"] / 1000,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA journal_mode={self.pragmas['journal_mode']}")
+        conn.execute(f"PRAGMA synchronous={self.pragmas['synchronous']}")
+        conn.execute(f"PRAGMA cache_size={self.pragmas['cache_size']}")
+        conn.execute(f"PRAGMA mmap_size={self.pragmas['mmap_size']}")
+        conn.execute(f"PRAGMA busy_timeout={self.pragmas['busy_timeout']}")
+        if readonly:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def open(self):
+        """接続とスレッドプールを作成（既に開いていれば何もしない）"""
+        if self.is_open:
+            return
+        with self._open_lock:
+            if self.is_open:
+                return
+            for _ in range(self.pool_size):
+                conn = self._connect(readonly=True)
+                self._all_readers.append(conn)
+                self._readers.put(conn)
+            self._read_executor = ThreadPoolExecutor(
+                max_workers=self.pool_size, thread_name_prefix="sqlite-read"
+            )
+            self._write_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="sqlite-write"
+            )
+            # is_open の判定に使うため書き込み接続は最後に設定する
+            self._writer = self._connect()
+
+    def close(self):
+        """実行中の処理を待ってから全接続を閉じる"""
+        with self._open_lock:
+            if not self.is_open:
+                return
+            self._read_executor.shutdown(wait=True)
+            self._write_executor.shutdown(wait=True)
+            for conn in self._all_readers:
+                conn.close()
+            self._writer.close()
+            self._all_readers = []
+            self._readers = queue.Queue()
+            self._writer = None
+            self._read_executor = None
+            self._write_executor = None
+
+    def _count(self, key: str, value=1):
+        with self._stats_lock:
+            self._stats[key] += value
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        start = time.perf_counter()
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            self._count("read_waits")
+            conn = self._readers.get()
+        self._count("read_wait_ms", (time.perf_counter() - start) * 1000)
+        return conn
+
+    def _release_reader(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        self._readers.put(conn)
+
+    def _acquire_writer(self) -> sqlite3.Connection:
+        start = time.perf_counter()
+        self._writer_lock.acquire()
+        self._count("write_wait_ms", (time.perf_counter() - start) * 1000)
+        return self._writer
+
+    def _release_writer(self):
+        if self._writer.in_transaction:
+            self._writer.rollback()
+        self._writer_lock.release()
+
+    def _read(self, func: Callable, args: tuple):
+        conn = self._acquire_reader()
+        try:
+            result = func(conn, *args)
+            self._count("reads")
+            return result
+        except Exception:
+            self._count("errors")
+            raise
+        finally:
+            self._release_reader(conn)
+
+    def _write(self, func: Callable, args: tuple):
+        conn = self._acquire_writer()
+        try:
+            result = func(conn, *args)
+            conn.commit()
+            self._count("writes")
+            return result
+        except Exception:
+            self._count("errors")
+            raise
+        finally:
+            self._release_writer()
+
+    async def _submit(self, executor_name: str, func: Callable, *args):
+        self.open()
+        executor = getattr(self, executor_name)
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    async def run_read(self, func: Callable, *args):
+        """読み取り用接続で func(conn, *args) を実行"""
+        return await self._submit("_read_executor", self._read, func, args)
+
+    async def run_write(self, func: Callable, *args):
+        """書き込み専用接続で func(conn, *args) を実行し、成功時にコミット"""
+        return await self._submit("_write_executor", self._write, func, args)
+
+    @asynccontextmanager
+    async def connection(self, readonly: bool = False):
+        """接続を直接借りるコンテキストマネージャー（既存スクリプト互換用）"""
+        if readonly:
+            conn = await self._submit("_read_executor", self._acquire_reader)
+            try:
+                yield conn
+            finally:
+                self._release_reader(conn)
+        else:
+            conn = await self._submit("_write_executor", self._acquire_writer)
+            try:
+                yield conn
+            finally:
+                self._release_writer()
+
+    def _stream_slots(self) -> asyncio.Semaphore:
+        # セマフォは作成したループでしか待てないため、ループごとに作り直す
+        loop = asyncio.get_running_loop()
+        if self._stream_loop is not loop:
+            self._stream_semaphore = asyncio.Semaphore(self.pool_size)
+            self._stream_loop = loop
+        return self._stream_semaphore
+
+    async def iterate(self, sql: str, params: Sequence = (), chunk_size: int = 1000) -> AsyncIterator[List[sqlite3.Row]]:
+        """結果を chunk_size 行ずつ返す（大量行のエクスポート用）
+
+        fetchall せず、カーソルから fetchmany した分だけを渡す。読み終えるか呼び出し側が途中で
+        やめる（接続断など）まで接続を持ち続けるため、読み取りプールの接続・スレッドは使わず、
+        専用の接続とスレッドで読む（プールを使うと、同時に流すエクスポートと run_read が
+        互いの接続とスレッドを待ち合って止まる）。同時に流せる数は pool_size までで、
+        超えた分はイベントループ上で待つ。WAL では開始時点のスナップショットを読む。
+        """
+        self.open()
+        async with self._stream_slots():
+            loop = asyncio.get_running_loop()
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-stream")
+            conn = cursor = None
+            self._count("streams")
+            try:
+                conn = await loop.run_in_executor(executor, self._connect, True)
+                cursor = await loop.run_in_executor(executor, conn.execute, sql, tuple(params))
+                while True:
+                    rows = await loop.run_in_executor(executor, cursor.fetchmany, chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+                self._count("reads")
+            finally:
+                self._count("streams", -1)
+                # 途中でやめた場合も待たずに閉じられるよう、後片付けは専用スレッドに任せる
+                executor.submit(self._close_stream, conn, cursor)
+                executor.shutdown(wait=False)
+
+    @staticmethod
+    def _close_stream(conn: Optional[sqlite3.Connection], cursor: Optional[sqlite3.Cursor]):
+        if cursor is not None:
+            cursor.close()
+        if conn is not None:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """プール統計を取得"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        idle = self._readers.qsize() if self.is_open else 0
+        reads = stats["reads"] or 1
+        return {
+            "db_path": self.db_path,
+            "open": self.is_open,
+            "pool_size": self.pool_size,
+            "idle_readers": idle,
+            "readers_in_use": self.pool_size - idle if self.is_open else 0,
+            "writer_busy": self._writer_lock.locked(),
+            "pending_tasks": self._pending,
+            "reads": stats["reads"],
+            "writes": stats["writes"],
+            "errors": stats["errors"],
+            "active_streams": stats["streams"],
+            "read_waits": stats["read_waits"],
+            "avg_read_wait_ms": round(stats["read_wait_ms"] / reads, 3),
+            "avg_write_wait_ms": round(stats["write_wait_ms"] / (stats["writes"] or 1), 3),
+            "pragmas": dict(self.pragmas),
+        }
+
+
+# 申請件数の集計（request_counters）
+_ACTUAL_REQUEST_COUNTS_SQL = """
+    SELECT applicant_id, type, status, COUNT(*) AS count
+    FROM requests
+    WHERE applicant_id IS NOT NULL AND status IS NOT NULL
+    GROUP BY applicant_id, type, status
+"""
+
+
+def _adjust_request_counter(conn, applicant_id: str, request_type: str,
+                            old_status: Optional[str], new_status: Optional[str]):
+    """申請の追加・ステータス変更を集計テーブルに反映（呼び出し元と同じトランザクション）"""
+    for status, delta in ((old_status, -1), (new_status, 1)):
+        if status is None:
+            continue
+        conn.execute("""
+            INSERT INTO request_counters (applicant_id, type, status, count)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (applicant_id, type, status) DO UPDATE SET count = count + excluded.count
+        """, (applicant_id, request_type, status, delta))
+
+
+def _change_request_status(
+    conn, request_id: str, from_status: str, to_status: str, extra_sql: str = ""
+) -> Optional[sqlite3.Row]:
+    """from_status の申請を to_status に更新し、集計テーブルも更新する
+
+    更新した申請の (applicant_id, type, applied_at) を返す（from_status でなければ None）。
+    """
+    cursor = conn.execute(f"""
+        UPDATE requests
+        SET status = ?{extra_sql}
+        WHERE id = ? AND status = ?
+    """, (to_status, request_id, from_status))
+    if cursor.rowcount == 0:
+        return None
+    row = conn.execute("SELECT applicant_id, type, applied_at FROM requests WHERE id = ?", (request_id,)).fetchone()
+    _adjust_request_counter(conn, row[0], row[1], from_status, to_status)
+    return row
+
+
+def _rebuild_request_counters(conn) -> int:
+    """集計テーブルを requests から作り直す"""
+    conn.execute("DELETE FROM request_counters")
+    cursor = conn.execute(
+        f"INSERT INTO request_counters (applicant_id, type, status, count) {_ACTUAL_REQUEST_COUNTS_SQL}"
+    )
+    return cursor.rowcount
+
+
+def _check_request_counters(conn) -> List[Dict[str, Any]]:
+    """集計テーブルと requests の件数の不一致を返す"""
+    expected = {
+        (row[0], row[1], row[2]): row[3] for row in conn.execute(_ACTUAL_REQUEST_COUNTS_SQL)
+    }
+    stored = {
+        (row[0], row[1], row[2]): row[3]
+        for row in conn.execute("SELECT applicant_id, type, status, count FROM request_counters")
+    }
+    return [
+        {
+            "applicant_id": key[0], "type": key[1], "status": key[2],
+            "expected": expected.get(key, 0), "stored": stored.get(key, 0),
+        }
+        for key in sorted(set(expected) | set(stored))
+        if expected.get(key, 0) != stored.get(key, 0)
+    ]
+
 
 class SQLiteDatabaseManager:
     def __init__(self):
         self.db_path = os.getenv('SQLITE_DB_PATH', 'niwayakanri.db')
+        self.pool = SQLiteConnectionPool.from_env(self.db_path)
+        # セッションの last_accessed はまとめて書き込む
+        self.session_touches = SessionTouchBuffer.from_env(self._flush_session_touches)
+        # 締まった期間の集計レポート
+        self.summary_cache = SummaryCache.from_env()
         self.init_database()
 
     def init_database(self):
@@ -68,6 +429,25 @@ class SQLiteDatabaseManager:
             updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
         );
 
+        -- Revoked tokens table（ログアウト・リフレッシュで失効させた jti）
+        CREATE TABLE IF NOT EXISTS revoked_tokens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            jti TEXT UNIQUE NOT NULL,
+            user_id TEXT,
+            token_type TEXT NOT NULL DEFAULT 'access',
+            expires_at DATETIME NOT NULL,
+            revoked_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+
+        -- Request counters table（申請者 × 種別 × ステータスの件数）
+        CREATE TABLE IF NOT EXISTS request_counters (
+            applicant_id TEXT NOT NULL,
+            type TEXT NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (applicant_id, type, status)
+        );
+
         -- Leave requests table
         CREATE TABLE IF NOT EXISTS request_leave (
             id TEXT PRIMARY KEY,
@@ -213,135 +593,167 @@ class SQLiteDatabaseManager:
         CREATE INDEX IF NOT EXISTS idx_users_employee_id ON users(employee_id);
         CREATE INDEX IF NOT EXISTS idx_requests_applicant_id ON requests(applicant_id);
         CREATE INDEX IF NOT EXISTS idx_requests_status ON requests(status);
+        CREATE INDEX IF NOT EXISTS idx_requests_created_at ON requests(created_at);
+        CREATE INDEX IF NOT EXISTS idx_approvals_request_action ON approvals(request_id, action);
+        CREATE INDEX IF NOT EXISTS idx_request_expense_lines_request_id ON request_expense_lines(request_id);
         CREATE INDEX IF NOT EXISTS idx_user_sessions_token ON user_sessions(session_token);
         CREATE INDEX IF NOT EXISTS idx_user_sessions_user_id ON user_sessions(user_id);
+        CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens(expires_at);
         CREATE INDEX IF NOT EXISTS idx_daily_reports_user_date ON daily_reports(user_id, report_date);
         CREATE INDEX IF NOT EXISTS idx_notification_logs_type ON notification_logs(notification_type);
         """
 
+        had_counters = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'request_counters'"
+        ).fetchone() is not None
         conn.executescript(schema_sql)
+        # 既存DBに集計テーブルを追加した場合は requests から初期値を作成
+        if not had_counters:
+            _rebuild_request_counters(conn)
         conn.commit()
         conn.close()
 
+
     async def init_pool(self):
-        """互換性のための空実装"""
-        pass
+        """接続プールを開く"""
+        self.pool.open()
+        self.session_touches.start()
 
     async def close_pool(self):
-        """互換性のための空実装"""
-        pass
+        """未書き込みの last_accessed を反映してから接続プールを閉じる"""
+        await self.session_touches.stop()
+        self.pool.close()
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """接続プールの統計を取得"""
+        return self.pool.stats()
 
     @asynccontextmanager
-    async def get_connection(self):
-        """SQLite接続を取得するコンテキストマネージャー"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
+    async def get_connection(self, readonly: bool = False):
+        """SQLite接続を取得するコンテキストマネージャー
+
+        既存スクリプト互換用。書き込みは専用接続を排他で借りるため、
+        ブロックの中でイベントループを長時間占有しないこと。
+        """
+        async with self.pool.connection(readonly=readonly) as conn:
             yield conn
-        finally:
-            conn.close()
 
     # Authentication
     async def authenticate_user(self, email: str, password: str) -> Optional[Dict[str, Any]]:
         """ユーザー認証"""
-        async with self.get_connection() as conn:
+        def _query(conn):
             cursor = conn.execute("""
                 SELECT u.*, uc.password_hash
                 FROM users u
                 JOIN user_credentials uc ON u.id = uc.user_id
                 WHERE u.email = ? AND u.is_active = 1
             """, (email,))
-            user_data = cursor.fetchone()
+            return cursor.fetchone()
 
-            if not user_data:
-                return None
+        user_data = await self.pool.run_read(_query)
 
-            # パスワード検証（bcrypt使用）
-            if not auth_manager.verify_password(password, user_data['password_hash']):
-                return None
+        if not user_data:
+            return None
+
+        # パスワード検証（bcrypt使用、専用スレッドで実行。混雑時は PasswordHasherBusy）
+        if not await password_hasher.run(auth_manager.verify_password, password, user_data['password_hash']):
+            return None
 
-            return dict(user_data)
+        return dict(user_data)
 
     async def create_session(self, user_id: str, ip_address: str = None, user_agent: str = None) -> str:
         """セッショントークンを作成"""
-        import uuid
         session_token = str(uuid.uuid4())
         expires_at = datetime.now() + timedelta(hours=8)  # 8時間有効
 
-        async with self.get_connection() as conn:
+        def _insert(conn):
             conn.execute("""
                 INSERT INTO user_sessions (id, user_id, session_token, ip_address, user_agent, expires_at)
                 VALUES (?, ?, ?, ?, ?, ?)
             """, (str(uuid.uuid4()), user_id, session_token, ip_address, user_agent, expires_at))
-            conn.commit()
 
+        await self.pool.run_write(_insert)
         return session_token
 
     async def validate_session(self, session_token: str) -> Optional[Dict[str, Any]]:
         """セッショントークンを検証"""
-        async with self.get_connection() as conn:
+        def _query(conn):
             cursor = conn.execute("""
                 SELECT u.*, s.expires_at
                 FROM users u
                 JOIN user_sessions s ON u.id = s.user_id
                 WHERE s.session_token = ? AND s.is_active = 1 AND s.expires_at > datetime('now')
             """, (session_token,))
-            user_data = cursor.fetchone()
+            return cursor.fetchone()
 
-            if user_data:
-                # セッションの最終アクセス時刻を更新
-                conn.execute("""
-                    UPDATE user_sessions SET last_accessed = datetime('now')
-                    WHERE session_token = ?
-                """, (session_token,))
-                conn.commit()
+        user_data = await self.pool.run_read(_query)
+        if not user_data:
+            return None
 
-                return dict(user_data)
+        # セッションの最終アクセス時刻を記録（書き込みは session_touches がまとめて行う）
+        self.session_touches.touch(session_token)
+        return dict(user_data)
 
-            return None
+    async def _flush_session_touches(self, touches: List[tuple]):
+        """溜まった last_accessed を1トランザクションで更新"""
+        rows = [
+            (accessed_at.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'), session_token)
+            for session_token, accessed_at in touches
+        ]
+
+        def _update(conn):
+            conn.executemany("""
+                UPDATE user_sessions SET last_accessed = ?
+                WHERE session_token = ?
+            """, rows)
+
+        await self.pool.run_write(_update)
 
     async def invalidate_session(self, session_token: str):
         """セッションを無効化"""
-        async with self.get_connection() as conn:
+        def _update(conn):
             conn.execute("""
                 UPDATE user_sessions SET is_active = 0
                 WHERE session_token = ?
             """, (session_token,))
-            conn.commit()
+
+        await self.pool.run_write(_update)
 
     # User Management
     async def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
         """ユーザーIDでユーザー情報を取得"""
-        async with self.get_connection() as conn:
-            cursor = conn.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-            user_data = cursor.fetchone()
+        def _query(conn):
+            user_data = conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
             return dict(user_data) if user_data else None
 
+        return await self.pool.run_read(_query)
+
     async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
         """メールアドレスでユーザー情報を取得"""
-        async with self.get_connection() as conn:
-            cursor = conn.execute("SELECT * FROM users WHERE email = ?", (email,))
-            user_data = cursor.fetchone()
+        def _query(conn):
+            user_data = conn.execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()
             return dict(user_data) if user_data else None
 
+        return await self.pool.run_read(_query)
+
     async def get_users(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """ユーザー一覧を取得"""
-        async with self.get_connection() as conn:
+        def _query(conn):
             cursor = conn.execute("""
                 SELECT * FROM users
                 ORDER BY created_at DESC
                 LIMIT ? OFFSET ?
             """, (limit, offset))
-            users = cursor.fetchall()
-            return [dict(user) for user in users]
+            return [dict(user) for user in cursor.fetchall()]
+
+        return await self.pool.run_read(_query)
 
     async def create_user(self, user_data: Dict[str, Any], password: str) -> str:
         """新規ユーザーを作成"""
-        import uuid
         user_id = str(uuid.uuid4())
-        password_hash = auth_manager.hash_password(password)
+        password_hash = await password_hasher.run(auth_manager.hash_password, password)
 
-        async with self.get_connection() as conn:
+        def _insert(conn):
             # ユーザー作成
             conn.execute("""
                 INSERT INTO users (id, email, name, role, department, position, employee_id, is_active)
@@ -356,130 +768,322 @@ class SQLiteDatabaseManager:
                 VALUES (?, ?, ?)
             """, (str(uuid.uuid4()), user_id, password_hash))
 
-            conn.commit()
-
+        await self.pool.run_write(_insert)
         return user_id
 
+    async def update_user(self, user_id: str, user_data: Dict[str, Any]) -> bool:
+        """ユーザー情報を更新"""
+        # 更新可能なフィールドを制限
+        allowed_fields = ['name', 'role', 'department', 'position', 'employee_id', 'is_active']
+        update_fields = {k: v for k, v in user_data.items() if k in allowed_fields}
+        if not update_fields:
+            return False
+
+        set_clause = ", ".join(f"{field} = ?" for field in update_fields)
+
+        def _update(conn):
+            cursor = conn.execute(
+                f"UPDATE users SET {set_clause}, updated_at = datetime('now') WHERE id = ?",
+                (*update_fields.values(), user_id)
+            )
+            return cursor.rowcount > 0
+
+        updated = await self.pool.run_write(_update)
+        await user_cache.invalidate(user_id)
+        if updated and 'department' in update_fields:
+            # 部署別の集計が変わる
+            self.summary_cache.invalidate()
+        return updated
+
+    async def deactivate_user(self, user_id: str) -> bool:
+        """ユーザーを無効化"""
+        def _update(conn):
+            cursor = conn.execute("""
+                UPDATE users
+                SET is_active = 0, updated_at = datetime('now')
+                WHERE id = ?
+            """, (user_id,))
+            return cursor.rowcount > 0
+
+        updated = await self.pool.run_write(_update)
+        await user_cache.invalidate(user_id)
+        return updated
+
+    async def delete_user(self, user_id: str) -> bool:
+        """ユーザーを削除（物理削除）"""
+        def _delete(conn):
+            # 関連するセッション・認証情報を削除
+            conn.execute("DELETE FROM user_sessions WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM user_credentials WHERE user_id = ?", (user_id,))
+            cursor = conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+            return cursor.rowcount > 0
+
+        deleted = await self.pool.run_write(_delete)
+        await user_cache.invalidate(user_id)
+        if deleted:
+            self.summary_cache.invalidate()
+        return deleted
+
+    async def reset_user_password(self, user_id: str, new_password: str) -> bool:
+        """ユーザーのパスワードをリセット"""
+        password_hash = await password_hasher.run(auth_manager.hash_password, new_password)
+
+        def _update(conn):
+            cursor = conn.execute("""
+                UPDATE user_credentials
+                SET password_hash = ?, updated_at = datetime('now')
+                WHERE user_id = ?
+            """, (password_hash, user_id))
+            return cursor.rowcount > 0
+
+        updated = await self.pool.run_write(_update)
+        await user_cache.invalidate(user_id)
+        return updated
+
     # Request Management
-    async def get_requests(self, user_id: str = None, status: str = None, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
-        """申請一覧を取得"""
-        async with self.get_connection() as conn:
-            where_clauses = []
-            params = []
+    async def get_requests(
+        self,
+        user_id: str = None,
+        status: str = None,
+        limit: int = 50,
+        offset: int = 0,
+        after: Optional[tuple] = None
+    ) -> List[Dict[str, Any]]:
+        """申請一覧を取得（after に (created_at, id) を渡すとその次から取得し、offset は使わない）"""
+        where_clauses = []
+        params = []
+
+        if user_id:
+            where_clauses.append("r.applicant_id = ?")
+            params.append(user_id)
+
+        if status:
+            where_clauses.append("r.status = ?")
+            params.append(status)
+
+        if after:
+            where_clauses.append("(r.created_at, r.id) < (?, ?)")
+            params.extend(after)
+            offset = 0
+
+        where_clause = "WHERE " + " AND ".join(where_clauses) if where_clauses else ""
+
+        query = f"""
+            SELECT r.*, u.name as applicant_name, u.department as applicant_department
+            FROM requests r
+            JOIN users u ON r.applicant_id = u.id
+            {where_clause}
+            ORDER BY r.created_at DESC, r.id DESC
+            LIMIT ? OFFSET ?
+        """
+        params.extend([limit, offset])
+
+        def _query(conn):
+            return [dict(req) for req in conn.execute(query, params).fetchall()]
 
-            if user_id:
-                where_clauses.append("r.applicant_id = ?")
-                params.append(user_id)
+        return await self.pool.run_read(_query)
 
-            if status:
-                where_clauses.append("r.status = ?")
-                params.append(status)
+    def _request_export_filters(
+        self,
+        user_id: str = None,
+        status: str = None,
+        request_type: str = None,
+        start_date: str = None,
+        end_date: str = None
+    ):
+        """エクスポート用の絞り込み条件 (WHERE 句, パラメータ)"""
+        where_clauses = []
+        params = []
 
-            where_clause = "WHERE " + " AND ".join(where_clauses) if where_clauses else ""
+        if user_id:
+            where_clauses.append("r.applicant_id = ?")
+            params.append(user_id)
 
-            query = f"""
-                SELECT r.*, u.name as applicant_name, u.department as applicant_department
-                FROM requests r
-                JOIN users u ON r.applicant_id = u.id
-                {where_clause}
-                ORDER BY r.created_at DESC
-                LIMIT ? OFFSET ?
-            """
-            params.extend([limit, offset])
+        if status:
+            where_clauses.append("r.status = ?")
+            params.append(status)
 
-            cursor = conn.execute(query, params)
-            requests = cursor.fetchall()
-            return [dict(req) for req in requests]
+        if request_type:
+            where_clauses.append("r.type = ?")
+            params.append(request_type)
 
-    async def get_requests_with_details(
+        if start_date:
+            where_clauses.append("DATE(r.applied_at) >= ?")
+            params.append(start_date)
+
+        if end_date:
+            where_clauses.append("DATE(r.applied_at) <= ?")
+            params.append(end_date)
+
+        where_clause = "WHERE " + " AND ".join(where_clauses) if where_clauses else ""
+        return where_clause, params
+
+    async def iter_requests_for_export(
         self,
         user_id: str = None,
         status: str = None,
         request_type: str = None,
         start_date: str = None,
         end_date: str = None,
-        limit: int = None
-    ) -> List[Dict[str, Any]]:
-        """詳細な申請一覧を取得（エクスポート用）"""
-        async with self.get_connection() as conn:
-            where_clauses = []
-            params = []
+        chunk_size: int = 1000
+    ) -> AsyncIterator[List[tuple]]:
+        """エクスポート用の申請を chunk_size 行ずつ返す（CSV の列順の行）
 
-            if user_id:
-                where_clauses.append("r.applicant_id = ?")
-                params.append(user_id)
+        get_requests_with_details と違い全件をメモリに載せない。並び順（作成日時の降順）は
+        idx_requests_created_at を使うため、件数によらず先頭行をすぐに返せる。
+        """
+        where_clause, params = self._request_export_filters(user_id, status, request_type, start_date, end_date)
+        query = f"""
+            SELECT
+                r.id, r.type, u.name, u.email, r.title, r.description, r.status,
+                r.applied_at, a.acted_at, approver.name, a.comment
+            FROM requests r
+            JOIN users u ON r.applicant_id = u.id
+            LEFT JOIN approvals a ON r.id = a.request_id AND a.action = 'approve'
+            LEFT JOIN users approver ON a.approver_id = approver.id
+            {where_clause}
+            ORDER BY r.created_at DESC
+        """
+        async for rows in self.pool.iterate(query, params, chunk_size):
+            yield rows
 
-            if status:
-                where_clauses.append("r.status = ?")
-                params.append(status)
+    async def iter_expense_lines_for_export(
+        self,
+        user_id: str = None,
+        status: str = None,
+        request_type: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        chunk_size: int = 1000
+    ) -> AsyncIterator[List[tuple]]:
+        """絞り込んだ申請の経費明細を chunk_size 行ずつ返す"""
+        where_clause, params = self._request_export_filters(user_id, status, request_type, start_date, end_date)
+        query = f"""
+            SELECT
+                r.id, r.title, u.name, l.account_code, l.account_name, l.tax_type,
+                l.amount, l.description
+            FROM request_expense_lines l
+            JOIN requests r ON l.request_id = r.id
+            JOIN users u ON r.applicant_id = u.id
+            {where_clause}
+            ORDER BY r.created_at DESC, l.created_at
+        """
+        async for rows in self.pool.iterate(query, params, chunk_size):
+            yield rows
 
-            if request_type:
-                where_clauses.append("r.type = ?")
-                params.append(request_type)
+    async def iter_approvals_for_export(
+        self,
+        user_id: str = None,
+        status: str = None,
+        request_type: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        chunk_size: int = 1000
+    ) -> AsyncIterator[List[tuple]]:
+        """絞り込んだ申請の承認履歴（承認・却下）を chunk_size 行ずつ返す"""
+        where_clause, params = self._request_export_filters(user_id, status, request_type, start_date, end_date)
+        query = f"""
+            SELECT
+                r.id, r.title, approver.name, a.action, a.comment, a.acted_at
+            FROM approvals a
+            JOIN requests r ON a.request_id = r.id
+            LEFT JOIN users approver ON a.approver_id = approver.id
+            {where_clause}
+            ORDER BY r.created_at DESC, a.acted_at
+        """
+        async for rows in self.pool.iterate(query, params, chunk_size):
+            yield rows
 
-            if start_date:
-                where_clauses.append("DATE(r.applied_at) >= ?")
-                params.append(start_date)
+    async def get_request_summary(self, start_date: str = None, end_date: str = None) -> Dict[str, Any]:
+        """集計レポート（ステータス・種別・月・部署別の件数と承認率）
 
-            if end_date:
-                where_clauses.append("DATE(r.applied_at) <= ?")
-                params.append(end_date)
+        申請を1行ずつ読まずに GROUP BY で集計し、集計済みの行だけを受け取る。
+        締まった期間（終了日が今日より前）の結果はキャッシュする。
+        """
+        where_clause, params = self._request_export_filters(start_date=start_date, end_date=end_date)
+        query = f"""
+            SELECT r.status, r.type, strftime('%Y-%m', r.applied_at), u.department, COUNT(*)
+            FROM requests r
+            JOIN users u ON r.applicant_id = u.id
+            {where_clause}
+            GROUP BY r.status, r.type, strftime('%Y-%m', r.applied_at), u.department
+        """
 
-            where_clause = "WHERE " + " AND ".join(where_clauses) if where_clauses else ""
-            limit_clause = f"LIMIT {limit}" if limit else ""
+        def _query(conn):
+            return conn.execute(query, params).fetchall()
 
-            query = f"""
-                SELECT
-                    r.*,
-                    u.name as applicant_name,
-                    u.email as applicant_email,
-                    u.department as applicant_department,
-                    approver.name as approver_name,
-                    approver.email as approver_email,
-                    a.comment as comments,
-                    a.acted_at as approved_at
-                FROM requests r
-                JOIN users u ON r.applicant_id = u.id
-                LEFT JOIN approvals a ON r.id = a.request_id AND a.action = 'approve'
-                LEFT JOIN users approver ON a.approver_id = approver.id
-                {where_clause}
-                ORDER BY r.created_at DESC
-                {limit_clause}
-            """
-
-            cursor = conn.execute(query, params)
-            requests = cursor.fetchall()
-
-            result = []
-            for req in requests:
-                req_dict = dict(req)
-                # ネストした構造に変換
-                result.append({
-                    "id": req_dict["id"],
-                    "type": req_dict["type"],
-                    "title": req_dict["title"],
-                    "description": req_dict["description"],
-                    "status": req_dict["status"],
-                    "applied_at": req_dict["applied_at"],
-                    "approved_at": req_dict["approved_at"],
-                    "created_at": req_dict["created_at"],
-                    "comments": req_dict["comments"],
-                    "applicant": {
-                        "name": req_dict["applicant_name"],
-                        "email": req_dict["applicant_email"],
-                        "department": req_dict["applicant_department"]
-                    },
-                    "approver": {
-                        "name": req_dict["approver_name"],
-                        "email": req_dict["approver_email"]
-                    } if req_dict["approver_name"] else None
-                })
+        async def _load():
+            return summarize(tuple(row) for row in await self.pool.run_read(_query))
 
-            return result
+        return await self.summary_cache.get((start_date, end_date), start_date, end_date, _load)
+
+    async def get_requests_with_details(
+        self,
+        user_id: str = None,
+        status: str = None,
+        request_type: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        limit: int = None
+    ) -> List[Dict[str, Any]]:
+        """詳細な申請一覧を取得（エクスポート用）"""
+        where_clause, params = self._request_export_filters(user_id, status, request_type, start_date, end_date)
+        limit_clause = f"LIMIT {limit}" if limit else ""
+
+        query = f"""
+            SELECT
+                r.*,
+                u.name as applicant_name,
+                u.email as applicant_email,
+                u.department as applicant_department,
+                approver.name as approver_name,
+                approver.email as approver_email,
+                a.comment as comments,
+                a.acted_at as approved_at
+            FROM requests r
+            JOIN users u ON r.applicant_id = u.id
+            LEFT JOIN approvals a ON r.id = a.request_id AND a.action = 'approve'
+            LEFT JOIN users approver ON a.approver_id = approver.id
+            {where_clause}
+            ORDER BY r.created_at DESC
+            {limit_clause}
+        """
+
+        def _query(conn):
+            return conn.execute(query, params).fetchall()
+
+        requests = await self.pool.run_read(_query)
+
+        result = []
+        for req in requests:
+            req_dict = dict(req)
+            # ネストした構造に変換
+            result.append({
+                "id": req_dict["id"],
+                "type": req_dict["type"],
+                "title": req_dict["title"],
+                "description": req_dict["description"],
+                "status": req_dict["status"],
+                "applied_at": req_dict["applied_at"],
+                "approved_at": req_dict["approved_at"],
+                "created_at": req_dict["created_at"],
+                "comments": req_dict["comments"],
+                "applicant": {
+                    "name": req_dict["applicant_name"],
+                    "email": req_dict["applicant_email"],
+                    "department": req_dict["applicant_department"]
+                },
+                "approver": {
+                    "name": req_dict["approver_name"],
+                    "email": req_dict["approver_email"]
+                } if req_dict["approver_name"] else None
+            })
+
+        return result
 
     async def get_request_by_id(self, request_id: str) -> Optional[Dict[str, Any]]:
         """申請IDで申請詳細を取得"""
-        async with self.get_connection() as conn:
+        def _query(conn):
             # 基本申請情報
             cursor = conn.execute("""
                 SELECT r.*, u.name as applicant_name, u.department as applicant_department, u.email as applicant_email
@@ -528,18 +1132,20 @@ class SQLiteDatabaseManager:
 
             return result
 
+        return await self.pool.run_read(_query)
+
     async def create_leave_request(self, user_id: str, request_data: Dict[str, Any], leave_data: Dict[str, Any]) -> str:
         """休暇申請を作成"""
-        import uuid
         request_id = str(uuid.uuid4())
         leave_id = str(uuid.uuid4())
 
-        async with self.get_connection() as conn:
+        def _insert(conn):
             # 基本申請を作成
             conn.execute("""
                 INSERT INTO requests (id, type, applicant_id, title, description)
                 VALUES (?, 'leave', ?, ?, ?)
             """, (request_id, user_id, request_data.get('title'), request_data.get('description')))
+            _adjust_request_counter(conn, user_id, 'leave', None, 'draft')
 
             # 休暇申請詳細を作成
             conn.execute("""
@@ -549,92 +1155,89 @@ class SQLiteDatabaseManager:
                   leave_data['end_date'], leave_data['days'], leave_data.get('hours'),
                   leave_data.get('reason'), leave_data.get('handover_notes')))
 
-            conn.commit()
-
+        await self.pool.run_write(_insert)
         return request_id
 
     async def submit_request(self, request_id: str) -> bool:
         """申請を提出する"""
-        async with self.get_connection() as conn:
-            cursor = conn.execute("""
-                UPDATE requests
-                SET status = 'applied', applied_at = datetime('now')
-                WHERE id = ? AND status = 'draft'
-            """, (request_id,))
-            conn.commit()
-            return cursor.rowcount > 0
+        def _update(conn):
+            return _change_request_status(
+                conn, request_id, 'draft', 'applied', ", applied_at = datetime('now')"
+            )
+
+        return self._request_status_changed(await self.pool.run_write(_update))
+
+    def _request_status_changed(self, changed: Optional[sqlite3.Row]) -> bool:
+        """ステータス変更のコミット後に、申請日を含む期間の集計結果を破棄する"""
+        if changed is None:
+            return False
+        self.summary_cache.invalidate_date(changed[2])
+        return True
 
     async def approve_request(self, request_id: str, approver_id: str, comment: str = None) -> bool:
         """申請を承認する"""
-        import uuid
         approval_id = str(uuid.uuid4())
 
-        async with self.get_connection() as conn:
+        def _update(conn):
+            # 申請ステータスを更新（承認待ちでなければ何もしない）
+            changed = _change_request_status(
+                conn, request_id, 'applied', 'approved', ", completed_at = datetime('now')"
+            )
+            if changed is None:
+                return None
+
             # 承認履歴を記録
             conn.execute("""
                 INSERT INTO approvals (id, request_id, approver_id, action, comment)
                 VALUES (?, ?, ?, 'approve', ?)
             """, (approval_id, request_id, approver_id, comment))
+            return changed
 
-            # 申請ステータスを更新
-            cursor = conn.execute("""
-                UPDATE requests
-                SET status = 'approved', completed_at = datetime('now')
-                WHERE id = ? AND status = 'applied'
-            """, (request_id,))
-
-            conn.commit()
-            return cursor.rowcount > 0
+        return self._request_status_changed(await self.pool.run_write(_update))
 
     async def reject_request(self, request_id: str, approver_id: str, comment: str = None) -> bool:
         """申請を却下する"""
-        import uuid
         approval_id = str(uuid.uuid4())
 
-        async with self.get_connection() as conn:
+        def _update(conn):
+            # 申請ステータスを更新（承認待ちでなければ何もしない）
+            changed = _change_request_status(
+                conn, request_id, 'applied', 'rejected', ", completed_at = datetime('now')"
+            )
+            if changed is None:
+                return None
+
             # 承認履歴を記録
             conn.execute("""
                 INSERT INTO approvals (id, request_id, approver_id, action, comment)
                 VALUES (?, ?, ?, 'reject', ?)
             """, (approval_id, request_id, approver_id, comment))
+            return changed
 
-            # 申請ステータスを更新
-            cursor = conn.execute("""
-                UPDATE requests
-                SET status = 'rejected', completed_at = datetime('now')
-                WHERE id = ? AND status = 'applied'
-            """, (request_id,))
-
-            conn.commit()
-            return cursor.rowcount > 0
+        return self._request_status_changed(await self.pool.run_write(_update))
 
     # Dashboard
     async def get_dashboard_stats(self, user_id: str) -> Dict[str, int]:
         """ダッシュボード統計を取得"""
-        async with self.get_connection() as conn:
-            # ユーザーの申請統計
+        def _query(conn):
+            # ユーザーの申請統計（集計テーブルから取得）
             cursor = conn.execute("""
                 SELECT
-                    COUNT(*) as total_requests,
-                    SUM(CASE WHEN status = 'applied' THEN 1 ELSE 0 END) as pending_requests,
-                    SUM(CASE WHEN status = 'approved' THEN 1 ELSE 0 END) as approved_requests,
-                    SUM(CASE WHEN status = 'rejected' THEN 1 ELSE 0 END) as rejected_requests
-                FROM requests
+                    COALESCE(SUM(count), 0) as total_requests,
+                    COALESCE(SUM(CASE WHEN status = 'applied' THEN count ELSE 0 END), 0) as pending_requests,
+                    COALESCE(SUM(CASE WHEN status = 'approved' THEN count ELSE 0 END), 0) as approved_requests,
+                    COALESCE(SUM(CASE WHEN status = 'rejected' THEN count ELSE 0 END), 0) as rejected_requests
+                FROM request_counters
                 WHERE applicant_id = ?
             """, (user_id,))
             user_stats = cursor.fetchone()
 
-            # 承認待ちの申請数
+            # 承認待ちの申請数（承認・却下と同時にステータスが変わるため、承認待ちの件数と一致する）
             cursor = conn.execute("""
-                SELECT COUNT(DISTINCT r.id)
-                FROM requests r
-                JOIN users u ON r.applicant_id = u.id
-                WHERE r.status = 'applied'
-                AND NOT EXISTS (
-                    SELECT 1 FROM approvals a
-                    WHERE a.request_id = r.id AND a.approver_id = ?
-                )
-            """, (user_id,))
+                SELECT COALESCE(SUM(count), 0)
+                FROM request_counters
+                WHERE status = 'applied'
+            """)
             pending_approvals = cursor.fetchone()[0]
 
             return {
@@ -642,12 +1245,14 @@ class SQLiteDatabaseManager:
                 "pending_requests": user_stats['pending_requests'],
                 "approved_requests": user_stats['approved_requests'],
                 "rejected_requests": user_stats['rejected_requests'],
-                "my_pending_approvals": pending_approvals or 0
+                "my_pending_approvals": pending_approvals
             }
 
+        return await self.pool.run_read(_query)
+
     async def get_admin_stats(self) -> Dict[str, Any]:
         """管理者向け統計データを取得"""
-        async with self.get_connection() as conn:
+        def _query(conn):
             # ユーザー統計
             cursor = conn.execute("""
                 SELECT
@@ -661,15 +1266,15 @@ class SQLiteDatabaseManager:
             """)
             user_stats = cursor.fetchone()
 
-            # 申請統計
+            # 申請統計（集計テーブルから取得）
             cursor = conn.execute("""
                 SELECT
-                    COUNT(*) as total_requests,
-                    SUM(CASE WHEN status = 'draft' THEN 1 ELSE 0 END) as draft_requests,
-                    SUM(CASE WHEN status = 'applied' THEN 1 ELSE 0 END) as pending_requests,
-                    SUM(CASE WHEN status = 'approved' THEN 1 ELSE 0 END) as approved_requests,
-                    SUM(CASE WHEN status = 'rejected' THEN 1 ELSE 0 END) as rejected_requests
-                FROM requests
+                    COALESCE(SUM(count), 0) as total_requests,
+                    COALESCE(SUM(CASE WHEN status = 'draft' THEN count ELSE 0 END), 0) as draft_requests,
+                    COALESCE(SUM(CASE WHEN status = 'applied' THEN count ELSE 0 END), 0) as pending_requests,
+                    COALESCE(SUM(CASE WHEN status = 'approved' THEN count ELSE 0 END), 0) as approved_requests,
+                    COALESCE(SUM(CASE WHEN status = 'rejected' THEN count ELSE 0 END), 0) as rejected_requests
+                FROM request_counters
             """)
             request_stats = cursor.fetchone()
 
@@ -695,29 +1300,76 @@ class SQLiteDatabaseManager:
                 }
             }
 
+        return await self.pool.run_read(_query)
+
+    async def check_request_counters(self) -> List[Dict[str, Any]]:
+        """集計テーブルと requests の不一致を取得（一致していれば空リスト）"""
+        return await self.pool.run_read(_check_request_counters)
+
+    async def rebuild_request_counters(self) -> int:
+        """集計テーブルを requests から再構築"""
+        return await self.pool.run_write(_rebuild_request_counters)
+
+    # トークン失効関連
+    async def revoke_token(self, jti: str, user_id: Optional[str], token_type: str, expires_at: datetime) -> bool:
+        """トークンを失効済みとして登録（expires_at はトークン自体の有効期限、UTC）
+
+        新たに登録した場合のみ True（既に失効済みなら False）
+        """
+        def _insert(conn):
+            return conn.execute("""
+                INSERT OR IGNORE INTO revoked_tokens (jti, user_id, token_type, expires_at)
+                VALUES (?, ?, ?, ?)
+            """, (jti, user_id, token_type, expires_at.strftime('%Y-%m-%d %H:%M:%S'))).rowcount == 1
+
+        return await self.pool.run_write(_insert)
+
+    async def get_revoked_tokens(self, after_id: int = 0) -> List[tuple]:
+        """id が after_id より大きい未期限切れの失効トークン (id, jti, expires_at)"""
+        def _query(conn):
+            cursor = conn.execute("""
+                SELECT id, jti, expires_at FROM revoked_tokens
+                WHERE id > ? AND expires_at > datetime('now')
+                ORDER BY id
+            """, (after_id,))
+            return [tuple(row) for row in cursor.fetchall()]
+
+        return await self.pool.run_read(_query)
+
+    async def delete_expired_revoked_tokens(self) -> int:
+        """トークン自体の有効期限を過ぎた行を削除"""
+        def _delete(conn):
+            return conn.execute(
+                "DELETE FROM revoked_tokens WHERE expires_at <= datetime('now')"
+            ).rowcount
+
+        return await self.pool.run_write(_delete)
+
     # 通知・リマインド関連
     async def get_all_users(self) -> List[Dict[str, Any]]:
         """全ユーザーを取得"""
-        async with self.get_connection() as conn:
+        def _query(conn):
             cursor = conn.execute("""
                 SELECT id, name, email, role, department, is_active, created_at
                 FROM users
                 WHERE is_active = 1
                 ORDER BY name
             """)
-            users = cursor.fetchall()
-            return [dict(user) for user in users]
+            return [dict(user) for user in cursor.fetchall()]
+
+        return await self.pool.run_read(_query)
 
     async def check_daily_report_exists(self, user_id: str, report_date: date) -> bool:
         """指定日の日報が存在するかチェック"""
-        async with self.get_connection() as conn:
+        def _query(conn):
             cursor = conn.execute("""
                 SELECT COUNT(*) as count
                 FROM daily_reports
                 WHERE user_id = ? AND report_date = ?
             """, (user_id, report_date.isoformat()))
-            result = cursor.fetchone()
-            return result['count'] > 0
+            return cursor.fetchone()['count'] > 0
+
+        return await self.pool.run_read(_query)
 
     async def log_notification_sent(
         self,
@@ -730,7 +1382,8 @@ class SQLiteDatabaseManager:
     ) -> str:
         """通知送信ログを記録"""
         log_id = str(uuid.uuid4())
-        async with self.get_connection() as conn:
+
+        def _insert(conn):
             conn.execute("""
                 INSERT INTO notification_logs (
                     id, notification_type, recipient_email, recipient_name,
@@ -738,12 +1391,13 @@ class SQLiteDatabaseManager:
                 ) VALUES (?, ?, ?, ?, ?, ?, ?)
             """, (log_id, notification_type, recipient_email, recipient_name,
                   subject, status, error_message))
-            conn.commit()
+
+        await self.pool.run_write(_insert)
         return log_id
 
     async def get_notification_settings(self, setting_type: str) -> Optional[Dict[str, Any]]:
         """通知設定を取得"""
-        async with self.get_connection() as conn:
+        def _query(conn):
             cursor = conn.execute("""
                 SELECT * FROM notification_settings
                 WHERE setting_type = ?
@@ -751,65 +1405,68 @@ class SQLiteDatabaseManager:
             result = cursor.fetchone()
             return dict(result) if result else None
 
+        return await self.pool.run_read(_query)
+
     async def save_notification_settings(self, setting_type: str, settings: Dict[str, Any]) -> bool:
         """通知設定を保存"""
+        def _save(conn):
+            # 既存設定をチェック
+            cursor = conn.execute("""
+                SELECT id FROM notification_settings WHERE setting_type = ?
+            """, (setting_type,))
+            existing = cursor.fetchone()
+
+            if existing:
+                # 更新
+                conn.execute("""
+                    UPDATE notification_settings
+                    SET enabled = ?, send_time = ?, target_roles = ?,
+                        skip_weekends = ?, skip_holidays = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE setting_type = ?
+                """, (
+                    settings.get('enabled', True),
+                    settings.get('send_time', '18:00'),
+                    ','.join(settings.get('target_roles', [])),
+                    settings.get('skip_weekends', True),
+                    settings.get('skip_holidays', True),
+                    setting_type
+                ))
+            else:
+                # 新規作成
+                setting_id = str(uuid.uuid4())
+                conn.execute("""
+                    INSERT INTO notification_settings (
+                        id, setting_type, enabled, send_time, target_roles,
+                        skip_weekends, skip_holidays
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    setting_id, setting_type,
+                    settings.get('enabled', True),
+                    settings.get('send_time', '18:00'),
+                    ','.join(settings.get('target_roles', [])),
+                    settings.get('skip_weekends', True),
+                    settings.get('skip_holidays', True)
+                ))
+
         try:
-            async with self.get_connection() as conn:
-                # 既存設定をチェック
-                cursor = conn.execute("""
-                    SELECT id FROM notification_settings WHERE setting_type = ?
-                """, (setting_type,))
-                existing = cursor.fetchone()
-
-                if existing:
-                    # 更新
-                    conn.execute("""
-                        UPDATE notification_settings
-                        SET enabled = ?, send_time = ?, target_roles = ?,
-                            skip_weekends = ?, skip_holidays = ?, updated_at = CURRENT_TIMESTAMP
-                        WHERE setting_type = ?
-                    """, (
-                        settings.get('enabled', True),
-                        settings.get('send_time', '18:00'),
-                        ','.join(settings.get('target_roles', [])),
-                        settings.get('skip_weekends', True),
-                        settings.get('skip_holidays', True),
-                        setting_type
-                    ))
-                else:
-                    # 新規作成
-                    setting_id = str(uuid.uuid4())
-                    conn.execute("""
-                        INSERT INTO notification_settings (
-                            id, setting_type, enabled, send_time, target_roles,
-                            skip_weekends, skip_holidays
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        setting_id, setting_type,
-                        settings.get('enabled', True),
-                        settings.get('send_time', '18:00'),
-                        ','.join(settings.get('target_roles', [])),
-                        settings.get('skip_weekends', True),
-                        settings.get('skip_holidays', True)
-                    ))
-
-                conn.commit()
-                return True
+            await self.pool.run_write(_save)
+            return True
         except Exception as e:
             print(f"Error saving notification settings: {e}")
             return False
 
     async def get_notification_logs(self, limit: int = 100) -> List[Dict[str, Any]]:
         """通知ログを取得"""
-        async with self.get_connection() as conn:
+        def _query(conn):
             cursor = conn.execute("""
                 SELECT * FROM notification_logs
                 ORDER BY sent_at DESC
                 LIMIT ?
             """, (limit,))
-            logs = cursor.fetchall()
-            return [dict(log) for log in logs]
+            return [dict(log) for log in cursor.fetchall()]
+
+        return await self.pool.run_read(_query)
 
 # グローバルデータベースマネージャーインスタンス（SQLite版）
 sqlite_db_manager = SQLiteDatabaseManager()
-db_manager = sqlite_db_manager
\ No newline at end of file
+db_manager = sqlite_db_manager
@@ -80,6 +80,28 @@ class InternalServerError(APIException):
             error_code="INTERNAL_ERROR"
         )
 
+class RateLimitError(APIException):
+    """試行回数超過エラー（Retry-After を返す）"""
+    def __init__(self, message: str = "Too many requests", detail: Optional[str] = None, retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            message=message,
+            detail=detail,
+            error_code="RATE_LIMIT_EXCEEDED"
+        )
+        self.headers = {"Retry-After": str(retry_after)}
+
+class ServiceUnavailableError(APIException):
+    """一時的に処理できないエラー（Retry-After を返す）"""
+    def __init__(self, message: str = "Service temporarily unavailable", detail: Optional[str] = None, retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            message=message,
+            detail=detail,
+            error_code="SERVICE_UNAVAILABLE"
+        )
+        self.headers = {"Retry-After": str(retry_after)}
+
 def create_error_response(exc: APIException) -> JSONResponse:
     """エラーレスポンスを作成"""
     response_data = {
@@ -97,5 +119,6 @@ def create_error_response(exc: APIException) -> JSONResponse:
 
     return JSONResponse(
         status_code=exc.status_code,
-        content=response_data
+        content=response_data,
+        headers=exc.headers
     )
\ No newline at end of file
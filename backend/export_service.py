@@ -1,8 +1,12 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterable, AsyncIterator, BinaryIO, Optional, Sequence, Union
 from datetime import datetime, date
 import io
 import csv
-import pandas as pd
+import codecs
+import asyncio
+import unicodedata
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -13,13 +17,138 @@ from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 import json
 
+REQUEST_HEADERS = [
+    '申請ID', '申請種類', '申請者名', '申請者メール', 'タイトル', '説明',
+    'ステータス', '申請日', '承認日', '承認者', 'コメント'
+]
+EXPENSE_LINE_HEADERS = ['申請ID', 'タイトル', '申請者名', '勘定科目コード', '勘定科目', '税区分', '金額', '摘要']
+APPROVAL_HEADERS = ['申請ID', 'タイトル', '承認者', '操作', 'コメント', '日時']
+
+# CSV の文字コード指定 -> Python のコーデック
+# utf-8-bom: Excel でそのまま開けるよう先頭に BOM を付ける
+# shift_jis: Windows の Excel 向け。cp932 で表せない文字は "?" に置き換える
+CSV_ENCODINGS = {
+    "utf-8": "utf-8",
+    "utf-8-bom": "utf-8-sig",
+    "shift_jis": "cp932",
+}
+
+# Excel の列幅（文字数）の上限と、列幅を測るためにシートごとに溜める先頭の行数
+EXCEL_MAX_COLUMN_WIDTH = 50
+EXCEL_WIDTH_SAMPLE_ROWS = 1000
+
+
+def _display_width(value: Any) -> int:
+    """セルの表示幅（全角文字は2）"""
+    if value is None:
+        return 0
+    text = value if isinstance(value, str) else str(value)
+    if text.isascii():
+        return len(text)
+    return sum(2 if unicodedata.east_asian_width(ch) in ("F", "W") else 1 for ch in text)
+
+
+class _ExcelSheetWriter:
+    """write_only のシートへ行を追加しながら列幅を求める
+
+    xlsx では列幅（<cols>）を行データより前に書く必要があり、write_only のシートは最初の行を
+    追加した時点で列幅を書き出す。そのため先頭の sample_rows 行だけを溜めて幅を測り、
+    幅を設定してから書き出す。以降の行は溜めずにそのまま書き込む。
+    """
+
+    def __init__(self, worksheet, headers: Sequence[str], sample_rows: int = EXCEL_WIDTH_SAMPLE_ROWS):
+        self.worksheet = worksheet
+        self.sample_rows = sample_rows
+        self.widths = [_display_width(header) for header in headers]
+        self.rows = 0
+        self._pending: Optional[List[Sequence[Any]]] = [list(headers)]
+
+    def append_rows(self, rows: Sequence[Sequence[Any]]):
+        for row in rows:
+            self.rows += 1
+            if self._pending is None:
+                self.worksheet.append(row)
+                continue
+            for index, value in enumerate(row):
+                width = _display_width(value)
+                if index >= len(self.widths):
+                    self.widths.append(width)
+                elif width > self.widths[index]:
+                    self.widths[index] = width
+            self._pending.append(row)
+            if len(self._pending) > self.sample_rows:
+                self.flush()
+
+    def flush(self):
+        """列幅を設定し、溜めている行を書き出す"""
+        if self._pending is None:
+            return
+        for index, width in enumerate(self.widths, 1):
+            self.worksheet.column_dimensions[get_column_letter(index)].width = min(width + 2, EXCEL_MAX_COLUMN_WIDTH)
+        self.worksheet.freeze_panes = "A2"
+        for row in self._pending:
+            self.worksheet.append(row)
+        self._pending = None
+
 class ExportService:
     def __init__(self):
         self.styles = getSampleStyleSheet()
 
-    def generate_pdf_report(self, requests_data: List[Dict], report_type: str = "requests") -> bytes:
-        """申請データのPDFレポートを生成"""
-        buffer = io.BytesIO()
+    def generate_pdf_report(self, requests_data: List[Dict], output: Optional[BinaryIO] = None) -> Optional[bytes]:
+        """申請一覧のPDFレポートを生成（output 指定時はそこへ書き込み、None を返す）"""
+        data = None
+        if requests_data:
+            headers = ['申請ID', '種類', '申請者', 'タイトル', 'ステータス', '申請日', '承認日']
+            data = [headers]
+
+            for req in requests_data:
+                row = [
+                    str(req.get('id', ''))[:8] + '...',
+                    self._get_type_text(req.get('type', '')),
+                    req.get('applicant', {}).get('name', ''),
+                    req.get('title', '')[:20] + ('...' if len(req.get('title', '')) > 20 else ''),
+                    self._get_status_text(req.get('status', '')),
+                    self._format_date(req.get('applied_at')),
+                    self._format_date(req.get('approved_at')) if req.get('approved_at') else '-'
+                ]
+                data.append(row)
+
+        title_text = f"申請一覧レポート ({datetime.now().strftime('%Y年%m月%d日')})"
+        return self._build_pdf_report(title_text, data, output)
+
+    def generate_summary_pdf(self, summary: Dict[str, Any], output: Optional[BinaryIO] = None) -> Optional[bytes]:
+        """集計レポートのPDFを生成（summary は report_summary.summarize の結果）"""
+        data = None
+        total_requests = summary.get("total_requests", 0)
+        if total_requests:
+            data = [['項目', '件数', '比率']]
+            sections = [
+                ('=== ステータス別 ===', summary["status_summary"], self._get_status_text),
+                ('=== 申請種類別 ===', summary["type_summary"], self._get_type_text),
+                ('=== 部署別 ===', summary.get("department_summary", {}), str),
+            ]
+            for heading, breakdown, label in sections:
+                data.append([heading, '', ''])
+                for key, item in breakdown.items():
+                    data.append([label(key), str(item["count"]), f"{item['percentage']:.1f}%"])
+                data.append(['', '', ''])
+
+            data.append(['=== 月別 ===', '', ''])
+            for month, count in summary["monthly_summary"].items():
+                data.append([month, str(count), f"{count / total_requests * 100:.1f}%"])
+            data.append(['', '', ''])
+
+            data.append(['承認率', '', f"{summary['approval_rate']:.1f}%"])
+            data.append(['合計', str(total_requests), '100%'])
+
+        title_text = f"集計レポート ({datetime.now().strftime('%Y年%m月%d日')})"
+        return self._build_pdf_report(title_text, data, output)
+
+    def _build_pdf_report(
+        self, title_text: str, data: Optional[List[List[str]]], output: Optional[BinaryIO]
+    ) -> Optional[bytes]:
+        """タイトルと表（None ならデータなし）のPDFを組み立てる"""
+        buffer = output if output is not None else io.BytesIO()
         doc = SimpleDocTemplate(
             buffer,
             pagesize=landscape(A4),
@@ -40,64 +169,12 @@ class ExportService:
             alignment=TA_CENTER
         )
 
-        if report_type == "requests":
-            title_text = f"申請一覧レポート ({datetime.now().strftime('%Y年%m月%d日')})"
-        else:
-            title_text = f"集計レポート ({datetime.now().strftime('%Y年%m月%d日')})"
-
         story.append(Paragraph(title_text, title_style))
         story.append(Spacer(1, 12))
 
-        if not requests_data:
+        if not data:
             story.append(Paragraph("データがありません。", self.styles['Normal']))
         else:
-            # テーブルヘッダー
-            if report_type == "requests":
-                headers = ['申請ID', '種類', '申請者', 'タイトル', 'ステータス', '申請日', '承認日']
-                data = [headers]
-
-                for req in requests_data:
-                    row = [
-                        str(req.get('id', ''))[:8] + '...',
-                        self._get_type_text(req.get('type', '')),
-                        req.get('applicant', {}).get('name', ''),
-                        req.get('title', '')[:20] + ('...' if len(req.get('title', '')) > 20 else ''),
-                        self._get_status_text(req.get('status', '')),
-                        self._format_date(req.get('applied_at')),
-                        self._format_date(req.get('approved_at')) if req.get('approved_at') else '-'
-                    ]
-                    data.append(row)
-            else:
-                # 集計レポート
-                headers = ['項目', '件数', '比率']
-                data = [headers]
-
-                total_requests = len(requests_data)
-                status_counts = {}
-                type_counts = {}
-
-                for req in requests_data:
-                    status = req.get('status', '')
-                    req_type = req.get('type', '')
-
-                    status_counts[status] = status_counts.get(status, 0) + 1
-                    type_counts[req_type] = type_counts.get(req_type, 0) + 1
-
-                # ステータス別集計
-                data.append(['=== ステータス別 ===', '', ''])
-                for status, count in status_counts.items():
-                    ratio = f"{count/total_requests*100:.1f}%" if total_requests > 0 else "0%"
-                    data.append([self._get_status_text(status), str(count), ratio])
-
-                data.append(['', '', ''])
-                data.append(['=== 申請種類別 ===', '', ''])
-                for req_type, count in type_counts.items():
-                    ratio = f"{count/total_requests*100:.1f}%" if total_requests > 0 else "0%"
-                    data.append([self._get_type_text(req_type), str(count), ratio])
-
-                data.append(['', '', ''])
-                data.append(['合計', str(total_requests), '100%'])
-
             # テーブル作成
             table = Table(data, repeatRows=1)
             table.setStyle(TableStyle([
@@ -126,7 +203,8 @@ class ExportService:
         story.append(Paragraph(f"生成日時: {datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')}", footer_style))
 
         doc.build(story)
-        buffer.seek(0)
+        if output is not None:
+            return None
         return buffer.getvalue()
 
     def generate_csv_export(self, requests_data: List[Dict]) -> str:
@@ -135,140 +213,135 @@ class ExportService:
         writer = csv.writer(output)
 
         # ヘッダー
-        headers = [
-            '申請ID', '申請種類', '申請者名', '申請者メール', 'タイトル', '説明',
-            'ステータス', '申請日', '承認日', '承認者', 'コメント'
-        ]
-        writer.writerow(headers)
+        writer.writerow(REQUEST_HEADERS)
 
         # データ行
         for req in requests_data:
             row = [
                 req.get('id', ''),
-                self._get_type_text(req.get('type', '')),
+                req.get('type', ''),
                 req.get('applicant', {}).get('name', ''),
                 req.get('applicant', {}).get('email', ''),
                 req.get('title', ''),
                 req.get('description', ''),
-                self._get_status_text(req.get('status', '')),
-                self._format_date(req.get('applied_at')),
-                self._format_date(req.get('approved_at')) if req.get('approved_at') else '',
+                req.get('status', ''),
+                req.get('applied_at'),
+                req.get('approved_at'),
                 req.get('approver', {}).get('name', '') if req.get('approver') else '',
                 req.get('comments', '')
             ]
-            writer.writerow(row)
+            writer.writerow(self._request_row(row))
 
         return output.getvalue()
 
-    def generate_excel_export(self, requests_data: List[Dict]) -> bytes:
-        """申請データのExcelエクスポートを生成"""
-        output = io.BytesIO()
-
-        # DataFrameを作成
-        df_data = []
-        for req in requests_data:
-            row = {
-                '申請ID': req.get('id', ''),
-                '申請種類': self._get_type_text(req.get('type', '')),
-                '申請者名': req.get('applicant', {}).get('name', ''),
-                '申請者メール': req.get('applicant', {}).get('email', ''),
-                'タイトル': req.get('title', ''),
-                '説明': req.get('description', ''),
-                'ステータス': self._get_status_text(req.get('status', '')),
-                '申請日': self._format_date(req.get('applied_at')),
-                '承認日': self._format_date(req.get('approved_at')) if req.get('approved_at') else '',
-                '承認者': req.get('approver', {}).get('name', '') if req.get('approver') else '',
-                'コメント': req.get('comments', '')
-            }
-            df_data.append(row)
-
-        df = pd.DataFrame(df_data)
-
-        # Excelに書き込み
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='申請一覧', index=False)
-
-            # ワークシートの幅を調整
-            worksheet = writer.sheets['申請一覧']
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-
-        output.seek(0)
-        return output.getvalue()
-
-    def generate_summary_report(self, requests_data: List[Dict]) -> Dict[str, Any]:
-        """集計レポートデータを生成"""
-        total_requests = len(requests_data)
-
-        if total_requests == 0:
-            return {
-                "total_requests": 0,
-                "status_summary": {},
-                "type_summary": {},
-                "monthly_summary": {},
-                "approval_rate": 0
-            }
-
-        # ステータス別集計
-        status_counts = {}
-        type_counts = {}
-        monthly_counts = {}
-        approved_count = 0
+    async def stream_csv_export(
+        self, chunks: AsyncIterable[Sequence[Sequence[Any]]], encoding: str = "utf-8"
+    ) -> AsyncIterator[bytes]:
+        """申請データのCSVを少しずつ生成（StreamingResponse 用）
+
+        chunks は REQUEST_HEADERS の列順の行をまとめて返す非同期イテレータ
+        （db_manager.iter_requests_for_export）。ヘッダーはすぐに返し、その後は受け取った
+        まとまりごとにエンコードして返すため、件数によらずメモリ使用量は一定になる。
+        """
+        codec = CSV_ENCODINGS[encoding]
+        encoder = codecs.getincrementalencoder(codec)(errors="replace" if codec == "cp932" else "strict")
+        output = io.StringIO()
+        writer = csv.writer(output)
 
-        for req in requests_data:
-            status = req.get('status', '')
-            req_type = req.get('type', '')
-
-            status_counts[status] = status_counts.get(status, 0) + 1
-            type_counts[req_type] = type_counts.get(req_type, 0) + 1
-
-            if status == 'approved':
-                approved_count += 1
-
-            # 月別集計
-            applied_at = req.get('applied_at')
-            if applied_at:
-                try:
-                    if isinstance(applied_at, str):
-                        date_obj = datetime.fromisoformat(applied_at.replace('Z', '+00:00'))
-                    else:
-                        date_obj = applied_at
-                    month_key = date_obj.strftime('%Y-%m')
-                    monthly_counts[month_key] = monthly_counts.get(month_key, 0) + 1
-                except:
-                    pass
-
-        approval_rate = (approved_count / total_requests * 100) if total_requests > 0 else 0
+        writer.writerow(REQUEST_HEADERS)
+        yield encoder.encode(output.getvalue())
+
+        async for rows in chunks:
+            output.seek(0)
+            output.truncate()
+            writer.writerows(self._request_row(row) for row in rows)
+            yield encoder.encode(output.getvalue())
+
+        tail = encoder.encode("", final=True)
+        if tail:
+            yield tail
+
+    def _request_row(self, row: Sequence[Any]) -> List[Any]:
+        """REQUEST_HEADERS の列順の値を表示用に変換"""
+        (request_id, type_value, applicant_name, applicant_email, title, description,
+         status_value, applied_at, approved_at, approver_name, comments) = row
+        return [
+            request_id or '',
+            self._get_type_text(type_value or ''),
+            applicant_name or '',
+            applicant_email or '',
+            title or '',
+            description or '',
+            self._get_status_text(status_value or ''),
+            self._format_date(applied_at),
+            self._format_date(approved_at) if approved_at else '',
+            approver_name or '',
+            comments or ''
+        ]
 
+    async def write_excel_export(
+        self,
+        sheets: Dict[str, AsyncIterable[Sequence[Sequence[Any]]]],
+        output: Union[str, BinaryIO],
+        sample_rows: int = EXCEL_WIDTH_SAMPLE_ROWS
+    ) -> Dict[str, int]:
+        """申請データのExcelエクスポートを生成（シートごとの行数を返す）
+
+        sheets は "requests" / "expense_lines" / "approvals" をキーに、各シートの列順の行を
+        まとめて返す非同期イテレータ（db_manager.iter_*_for_export）を渡す。write_only の
+        ブックへ受け取ったまとまりごとに書き込むため、全件をメモリに載せない。
+        書き込み・保存はスレッドで行い、イベントループを止めない。
+        """
+        workbook = Workbook(write_only=True)
+        counts = {}
+        for key, chunks in sheets.items():
+            title, headers, formatter = self._excel_sheets[key]
+            writer = _ExcelSheetWriter(workbook.create_sheet(title), headers, sample_rows)
+            async for rows in chunks:
+                formatted = [formatter(row) for row in rows]
+                await asyncio.to_thread(writer.append_rows, formatted)
+            writer.flush()
+            counts[key] = writer.rows
+        await asyncio.to_thread(workbook.save, output)
+        return counts
+
+    @property
+    def _excel_sheets(self) -> Dict[str, tuple]:
+        """シートのキー -> (シート名, ヘッダー, 行の変換)"""
         return {
-            "total_requests": total_requests,
-            "status_summary": {
-                status: {
-                    "count": count,
-                    "percentage": round(count / total_requests * 100, 1)
-                }
-                for status, count in status_counts.items()
-            },
-            "type_summary": {
-                req_type: {
-                    "count": count,
-                    "percentage": round(count / total_requests * 100, 1)
-                }
-                for req_type, count in type_counts.items()
-            },
-            "monthly_summary": monthly_counts,
-            "approval_rate": round(approval_rate, 1)
+            "requests": ("申請一覧", REQUEST_HEADERS, self._request_row),
+            "expense_lines": ("経費明細", EXPENSE_LINE_HEADERS, self._expense_line_row),
+            "approvals": ("承認履歴", APPROVAL_HEADERS, self._approval_row),
         }
 
+    def _expense_line_row(self, row: Sequence[Any]) -> List[Any]:
+        """EXPENSE_LINE_HEADERS の列順の値を表示用に変換（金額は数値のまま）"""
+        request_id, title, applicant_name, account_code, account_name, tax_type, amount, description = row
+        tax_map = {'taxable': '課税', 'tax_free': '免税', 'non_taxable': '非課税'}
+        return [
+            request_id or '',
+            title or '',
+            applicant_name or '',
+            account_code or '',
+            account_name or '',
+            tax_map.get(tax_type, tax_type or ''),
+            amount,
+            description or ''
+        ]
+
+    def _approval_row(self, row: Sequence[Any]) -> List[Any]:
+        """APPROVAL_HEADERS の列順の値を表示用に変換"""
+        request_id, title, approver_name, action, comment, acted_at = row
+        action_map = {'approve': '承認', 'reject': '却下'}
+        return [
+            request_id or '',
+            title or '',
+            approver_name or '',
+            action_map.get(action, action or ''),
+            comment or '',
+            self._format_date(acted_at)
+        ]
+
     def _get_type_text(self, type_value: str) -> str:
         """申請種類の日本語変換"""
         type_map = {
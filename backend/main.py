@@ -1,19 +1,31 @@
-from fastapi import FastAPI, HTTPException, Depends, status, Request
+from fastapi import FastAPI, HTTPException, Depends, Query, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 import os
+import asyncio
 import uvicorn
-import io
+import tempfile
 
 from models import *
+# models.Request（申請モデル）と区別するため別名でインポート
+from fastapi import Request as HTTPRequest
 from database_sqlite import db_manager
 from auth import auth_manager
-from exceptions import APIException, create_error_response, AuthenticationError, AuthorizationError, NotFoundError, ValidationError, ConflictError
+from exceptions import APIException, create_error_response, AuthenticationError, AuthorizationError, NotFoundError, ValidationError, ConflictError, RateLimitError, ServiceUnavailableError
 from logger import configure_logging, get_request_logger, get_security_logger, get_app_logger
 from export_service import export_service
+from app.core.pagination import decode_cursor, split_page
+from app.core.password_hasher import PasswordHasherBusy, password_hasher
+from app.core.range_response import range_file_response
+from app.core.rate_limit import RateLimitExceeded, login_rate_limiter
+from app.core.token_revocation import TOKEN_REVOCATION_SYNC_INTERVAL, RevocationSyncer, revocation_list
+from app.core.user_cache import user_cache
+from app.services.export_jobs import COMPLETED, export_job_manager
+from app.services.pdf_renderer import PdfRenderBusy, PdfRenderUnavailable, pdf_render_service
 from notification_service import notification_service
 from scheduler_service import scheduler_service
 
@@ -46,6 +58,14 @@ app.add_middleware(
 # セキュリティ
 security = HTTPBearer()
 
+# 失効トークン（revoked_tokens）をメモリへ定期同期
+revocation_syncer = RevocationSyncer(
+    revocation_list,
+    fetch=db_manager.get_revoked_tokens,
+    cleanup=db_manager.delete_expired_revoked_tokens,
+    interval=TOKEN_REVOCATION_SYNC_INTERVAL,
+)
+
 # 認証の依存関数
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
@@ -54,18 +74,28 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     payload = auth_manager.verify_token(token)
     user_id = payload.get("sub")
 
-    if not user_id:
+    # リフレッシュトークンでのアクセス・失効済みトークンは拒否（判定はメモリ上のみ）
+    if not user_id or payload.get("type", "access") != "access" or revocation_list.is_revoked(payload.get("jti")):
         raise AuthenticationError(
             message="認証に失敗しました",
             detail="Invalid token payload"
         )
 
-    # ユーザー情報を取得
-    user_data = await db_manager.get_user_by_id(user_id)
-    if not user_data:
-        raise AuthenticationError(
-            message="ユーザーが見つかりません",
-            detail="User not found"
+    # ユーザー情報を取得（キャッシュになければDBから）
+    user_data = await user_cache.get(user_id)
+    if user_data is None:
+        user_data = await db_manager.get_user_by_id(user_id)
+        if not user_data:
+            raise AuthenticationError(
+                message="ユーザーが見つかりません",
+                detail="User not found"
+            )
+        await user_cache.set(user_id, user_data)
+
+    if not user_data.get('is_active', True):
+        raise AuthorizationError(
+            message="このアカウントは無効化されています",
+            detail="User is deactivated"
         )
 
     return user_data
@@ -94,6 +124,15 @@ async def startup_event():
     app_logger.info("Starting application...")
     await db_manager.init_pool()
 
+    # 失効トークンの同期を開始（他プロセスでのログアウトを反映）
+    revocation_syncer.start()
+
+    # PDF生成ワーカーを起動
+    pdf_render_service.start()
+
+    # エクスポートジョブのワーカーを起動
+    export_job_manager.start()
+
     # スケジューラーサービスを開始
     scheduler_service.start_scheduler()
     app_logger.info("Scheduler service started")
@@ -108,6 +147,10 @@ async def shutdown_event():
     scheduler_service.stop_scheduler()
     app_logger.info("Scheduler service stopped")
 
+    await revocation_syncer.stop()
+    await export_job_manager.stop()
+    pdf_render_service.shutdown()
+    password_hasher.shutdown()
     await db_manager.close_pool()
     app_logger.info("Application shut down successfully")
 
@@ -148,11 +191,40 @@ async def health_check():
 
 # 認証エンドポイント
 @app.post("/api/v1/auth/login", response_model=LoginResponse)
-async def login(login_data: UserLogin):
-    ip_address = "127.0.0.1"  # 簡単化
-    user_agent = "test"
+async def login(login_data: UserLogin, http_request: HTTPRequest):
+    ip_address = http_request.client.host if http_request.client else "unknown"
+    user_agent = http_request.headers.get("user-agent", "unknown")
 
-    user_data = await db_manager.authenticate_user(login_data.email, login_data.password)
+    # 試行回数の制限（DB検索・パスワード検証より前に判定）
+    try:
+        await login_rate_limiter.hit(login_data.email, ip_address)
+    except RateLimitExceeded as e:
+        security_logger.log_rate_limit_exceeded(
+            ip_address=ip_address,
+            endpoint=f"/api/v1/auth/login ({e.scope})",
+            limit=e.limit,
+            window=e.window
+        )
+        raise RateLimitError(
+            message="ログインの試行回数が上限に達しました。しばらくしてから再度お試しください",
+            detail=f"Too many login attempts per {e.scope}",
+            retry_after=e.retry_after
+        )
+
+    # 判定できなかった試行（混雑・DBエラー）は失敗として数えない
+    try:
+        user_data = await db_manager.authenticate_user(login_data.email, login_data.password)
+    except PasswordHasherBusy as e:
+        await login_rate_limiter.release(login_data.email, ip_address)
+        app_logger.warning("Login rejected: password hasher saturated", extra=password_hasher.stats())
+        raise ServiceUnavailableError(
+            message="ログインが混み合っています。しばらくしてから再度お試しください",
+            detail="Password verification queue is full",
+            retry_after=e.retry_after
+        )
+    except Exception:
+        await login_rate_limiter.release(login_data.email, ip_address)
+        raise
 
     if not user_data:
         # ログイン失敗をログに記録
@@ -173,6 +245,8 @@ async def login(login_data: UserLogin):
             detail="Invalid email or password"
         )
 
+    await login_rate_limiter.succeeded(login_data.email, ip_address)
+
     # ログイン成功をログに記録
     request_logger.log_authentication(
         email=login_data.email,
@@ -202,13 +276,69 @@ async def login(login_data: UserLogin):
 
     return LoginResponse(
         access_token=access_token,
+        refresh_token=auth_manager.create_refresh_token(str(user_data['id'])),
+        expires_in=auth_manager.access_token_expire_minutes * 60,
         user=user
     )
 
+async def revoke_token_payload(payload: dict) -> bool:
+    """デコード済みトークンを失効させる（DBに記録し、このプロセスには即時反映）
+
+    この呼び出しで新たに登録した場合のみ True（失効済み・jti なしは False）
+    """
+    jti = payload.get("jti")
+    if not jti or "exp" not in payload:
+        return False
+    expires_at = datetime.utcfromtimestamp(payload["exp"])
+    inserted = await db_manager.revoke_token(jti, payload.get("sub"), payload.get("type", "access"), expires_at)
+    revocation_list.add(jti, expires_at)
+    return inserted
+
+@app.post("/api/v1/auth/refresh")
+async def refresh_token(refresh_data: RefreshTokenRequest):
+    """リフレッシュトークンでアクセストークンを再発行（使用したリフレッシュトークンは失効）"""
+    payload = auth_manager.verify_token(refresh_data.refresh_token)
+    if payload.get("type") != "refresh" or revocation_list.is_revoked(payload.get("jti")):
+        raise AuthenticationError(
+            message="認証に失敗しました",
+            detail="Invalid refresh token"
+        )
+
+    user_data = await db_manager.get_user_by_id(payload["sub"])
+    if not user_data or not user_data.get('is_active', True):
+        raise AuthenticationError(
+            message="認証に失敗しました",
+            detail="Invalid refresh token"
+        )
+
+    # 失効の登録に成功した1回だけ発行する（同じトークンの同時使用は後続を 401）
+    if not await revoke_token_payload(payload):
+        raise AuthenticationError(
+            message="認証に失敗しました",
+            detail="Invalid refresh token"
+        )
+    return {
+        "access_token": auth_manager.create_access_token(
+            data={"sub": str(user_data['id']), "email": user_data['email'], "role": user_data['role']}
+        ),
+        "refresh_token": auth_manager.create_refresh_token(str(user_data['id'])),
+        "token_type": "bearer",
+        "expires_in": auth_manager.access_token_expire_minutes * 60
+    }
+
 @app.post("/api/v1/auth/logout")
-async def logout(current_user: dict = Depends(get_current_user)):
-    # JWTトークンはステートレスなので、単純に成功を返す
-    # 本格的なログアウトを実装する場合は、トークンのブラックリストが必要
+async def logout(
+    logout_data: Optional[LogoutRequest] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict = Depends(get_current_user)
+):
+    # アクセストークンと、指定があればリフレッシュトークンを失効させる
+    # （リフレッシュトークンは本人のもののみ。無効・期限切れなら失効不要のため無視する）
+    await revoke_token_payload(auth_manager.verify_token(credentials.credentials))
+    if logout_data and logout_data.refresh_token:
+        payload = auth_manager.decode_token(logout_data.refresh_token)
+        if payload and payload.get("type") == "refresh" and str(payload.get("sub")) == str(current_user["id"]):
+            await revoke_token_payload(payload)
     return {"success": True, "message": "Logged out successfully"}
 
 @app.get("/api/v1/auth/me", response_model=User)
@@ -416,18 +546,30 @@ async def reset_user_password(
 @app.get("/api/v1/requests/")
 async def get_requests(
     status_filter: Optional[str] = None,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=200),
     offset: int = 0,
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
     # 管理者・承認者は全申請、一般ユーザーは自分の申請のみ
     user_id = None if current_user['role'] in ['admin', 'approver'] else current_user['id']
 
-    requests_data = await db_manager.get_requests(user_id, status_filter, limit, offset)
+    # cursor 指定時は (created_at, id) のキーセットで続きを取得
+    after = decode_cursor(cursor, keys=("created_at", "id"))
+    requests_data, has_more, next_cursor = split_page(
+        await db_manager.get_requests(
+            user_id, status_filter, limit + 1, offset,
+            after=(after["created_at"], after["id"]) if after else None
+        ),
+        limit,
+        lambda row: {"created_at": row["created_at"], "id": row["id"]}
+    )
     return {
         "success": True,
         "data": requests_data,
-        "total": len(requests_data)
+        "total": len(requests_data),
+        "has_more": has_more,
+        "next_cursor": next_cursor
     }
 
 @app.get("/api/v1/requests/{request_id}")
@@ -641,6 +783,71 @@ async def get_admin_stats(current_user: dict = Depends(require_admin)):
         "data": stats
     }
 
+# 申請件数の集計テーブルの整合性確認・再構築
+@app.get("/api/v1/admin/request-counters/check")
+async def check_request_counters(current_user: dict = Depends(require_admin)):
+    mismatches = await db_manager.check_request_counters()
+    return {
+        "success": True,
+        "data": {"consistent": not mismatches, "mismatches": mismatches}
+    }
+
+@app.post("/api/v1/admin/request-counters/rebuild")
+async def rebuild_request_counters(current_user: dict = Depends(require_admin)):
+    rows = await db_manager.rebuild_request_counters()
+    return {
+        "success": True,
+        "data": {"rows": rows}
+    }
+
+# トークン失効リストの統計
+@app.get("/api/v1/admin/auth/token-revocation-stats")
+async def get_token_revocation_stats(current_user: dict = Depends(require_admin)):
+    return {
+        "success": True,
+        "data": revocation_syncer.stats()
+    }
+
+# パスワードハッシュ処理の統計
+@app.get("/api/v1/admin/auth/password-hasher-stats")
+async def get_password_hasher_stats(current_user: dict = Depends(require_admin)):
+    return {
+        "success": True,
+        "data": password_hasher.stats()
+    }
+
+# ログイン試行制限の統計
+@app.get("/api/v1/admin/auth/login-rate-limit-stats")
+async def get_login_rate_limit_stats(current_user: dict = Depends(require_admin)):
+    return {
+        "success": True,
+        "data": login_rate_limiter.stats()
+    }
+
+# DB接続プール統計
+@app.get("/api/v1/admin/db/pool-stats")
+async def get_db_pool_stats(current_user: dict = Depends(require_admin)):
+    return {
+        "success": True,
+        "data": db_manager.get_pool_stats()
+    }
+
+# PDF生成ワーカーの統計
+@app.get("/api/v1/admin/pdf-renderer-stats")
+async def get_pdf_renderer_stats(current_user: dict = Depends(require_admin)):
+    return {
+        "success": True,
+        "data": pdf_render_service.stats()
+    }
+
+# セッション最終アクセス時刻の書き込みバッファ統計
+@app.get("/api/v1/admin/db/session-touch-stats")
+async def get_session_touch_stats(current_user: dict = Depends(require_admin)):
+    return {
+        "success": True,
+        "data": db_manager.session_touches.stats()
+    }
+
 # 監査ログ
 @app.get("/api/v1/admin/audit-logs")
 async def get_audit_logs(
@@ -742,7 +949,47 @@ async def bulk_operations(
 # エクスポート機能
 # =====================
 
-@app.get("/api/v1/export/requests/pdf", response_class=StreamingResponse)
+def export_report_payload(data: Any, report_type: str) -> Dict[str, Any]:
+    """PDF生成ワーカーに渡す内容（申請一覧は申請のリスト、集計は get_request_summary の結果）"""
+    return {"summary" if report_type == "summary" else "requests": data, "report_type": report_type}
+
+async def render_export_pdf(data: Any, report_type: str) -> str:
+    """申請一覧・集計のPDFをPDF生成ワーカーで一時ファイルに作成してパスを返す（混雑時は 429、ワーカー異常時は 503）"""
+    fd, path = tempfile.mkstemp(prefix="export_", suffix=".pdf")
+    os.close(fd)
+    try:
+        await pdf_render_service.render_to_file("export_report", export_report_payload(data, report_type), path)
+    except BaseException as e:
+        os.unlink(path)
+        if isinstance(e, PdfRenderBusy):
+            raise RateLimitError(
+                message="PDF生成が混み合っています。しばらくしてから再度お試しください",
+                detail="PDF render queue is full",
+                retry_after=e.retry_after
+            )
+        if isinstance(e, PdfRenderUnavailable):
+            raise ServiceUnavailableError(
+                message="PDFを生成できませんでした。しばらくしてから再度お試しください",
+                detail="PDF render workers crashed",
+                retry_after=e.retry_after
+            )
+        raise
+    return path
+
+def export_file_response(path: str, filename: str, media_type: str) -> FileResponse:
+    """一時ファイルをチャンク単位で返し、送信後に削除する（Content-Length 付き）"""
+    return FileResponse(
+        path,
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+        background=BackgroundTask(os.unlink, path)
+    )
+
+def export_pdf_response(path: str, filename: str) -> FileResponse:
+    """一時ファイルのPDFを返し、送信後に削除する"""
+    return export_file_response(path, filename, "application/pdf")
+
+@app.get("/api/v1/export/requests/pdf", response_class=FileResponse)
 async def export_requests_pdf(
     current_user: Dict[str, Any] = Depends(get_current_user),
     status: Optional[str] = None,
@@ -761,99 +1008,122 @@ async def export_requests_pdf(
             end_date=end_date
         )
 
-        # PDFを生成
-        pdf_data = export_service.generate_pdf_report(requests_data, "requests")
+        # PDFを生成（専用プロセスで一時ファイルに書き込み、混雑時は 429）
+        pdf_path = await render_export_pdf(requests_data, "requests")
 
-        # レスポンスヘッダーを設定
-        headers = {
-            'Content-Disposition': f'attachment; filename="requests_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf"'
-        }
-
-        return StreamingResponse(
-            io.BytesIO(pdf_data),
-            media_type="application/pdf",
-            headers=headers
+        return export_pdf_response(
+            pdf_path, f"requests_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         )
 
+    except APIException:
+        raise
     except Exception as e:
         app_logger.error(f"PDF export failed: {str(e)}")
         raise HTTPException(status_code=500, detail="PDFエクスポートに失敗しました")
 
+# CSV・Excelエクスポートで DB から1回に読み出す行数
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+CSV_CHARSETS = {"utf-8": "utf-8", "utf-8-bom": "utf-8", "shift_jis": "Shift_JIS"}
+
 @app.get("/api/v1/export/requests/csv", response_class=StreamingResponse)
 async def export_requests_csv(
     current_user: Dict[str, Any] = Depends(get_current_user),
     status: Optional[str] = None,
     type: Optional[str] = None,
     start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+    end_date: Optional[str] = None,
+    encoding: str = Query("utf-8", description="utf-8 / utf-8-bom / shift_jis")
 ):
-    """申請一覧をCSVでエクスポート"""
-    try:
-        # 申請データを取得
-        requests_data = await db_manager.get_requests_with_details(
-            user_id=current_user["id"] if current_user["role"] != "admin" else None,
-            status=status,
-            request_type=type,
-            start_date=start_date,
-            end_date=end_date
+    """申請一覧をCSVでエクスポート
+
+    全件を読み込まず、DBのカーソルから EXPORT_CHUNK_SIZE 行ずつ読んでエンコードしながら
+    返す。送信を始めた後はステータスを変えられないため、途中のエラーはログに残して接続を切る。
+    """
+    if encoding not in CSV_CHARSETS:
+        raise ValidationError(
+            message="文字コードは utf-8 / utf-8-bom / shift_jis のいずれかを指定してください",
+            detail=f"Unsupported encoding: {encoding}"
         )
 
-        # CSVを生成
-        csv_data = export_service.generate_csv_export(requests_data)
+    chunks = db_manager.iter_requests_for_export(
+        user_id=current_user["id"] if current_user["role"] != "admin" else None,
+        status=status,
+        request_type=type,
+        start_date=start_date,
+        end_date=end_date,
+        chunk_size=EXPORT_CHUNK_SIZE
+    )
 
-        # レスポンスヘッダーを設定
-        headers = {
-            'Content-Disposition': f'attachment; filename="requests_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-        }
+    async def body():
+        try:
+            async for block in export_service.stream_csv_export(chunks, encoding):
+                yield block
+        except Exception as e:
+            app_logger.error(f"CSV export failed: {str(e)}")
+            raise
+
+    # レスポンスヘッダーを設定
+    headers = {
+        'Content-Disposition': f'attachment; filename="requests_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"',
+        'Content-Type': f'text/csv; charset={CSV_CHARSETS[encoding]}'
+    }
 
-        return StreamingResponse(
-            io.StringIO(csv_data),
-            media_type="text/csv",
-            headers=headers
-        )
+    return StreamingResponse(body(), headers=headers)
 
-    except Exception as e:
-        app_logger.error(f"CSV export failed: {str(e)}")
-        raise HTTPException(status_code=500, detail="CSVエクスポートに失敗しました")
+# Excelエクスポートのシート -> 行を返す db_manager のメソッド
+EXCEL_EXPORT_SHEETS = {
+    "requests": db_manager.iter_requests_for_export,
+    "expense_lines": db_manager.iter_expense_lines_for_export,
+    "approvals": db_manager.iter_approvals_for_export,
+}
 
-@app.get("/api/v1/export/requests/excel", response_class=StreamingResponse)
+@app.get("/api/v1/export/requests/excel", response_class=FileResponse)
 async def export_requests_excel(
     current_user: Dict[str, Any] = Depends(get_current_user),
     status: Optional[str] = None,
     type: Optional[str] = None,
     start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+    end_date: Optional[str] = None,
+    sheets: str = Query("requests", description="カンマ区切り: requests / expense_lines / approvals")
 ):
-    """申請一覧をExcelでエクスポート"""
-    try:
-        # 申請データを取得
-        requests_data = await db_manager.get_requests_with_details(
-            user_id=current_user["id"] if current_user["role"] != "admin" else None,
-            status=status,
-            request_type=type,
-            start_date=start_date,
-            end_date=end_date
-        )
-
-        # Excelを生成
-        excel_data = export_service.generate_excel_export(requests_data)
+    """申請一覧をExcelでエクスポート
 
-        # レスポンスヘッダーを設定
-        headers = {
-            'Content-Disposition': f'attachment; filename="requests_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
-        }
-
-        return StreamingResponse(
-            io.BytesIO(excel_data),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers=headers
+    DBのカーソルから EXPORT_CHUNK_SIZE 行ずつ読み、write_only のブックへ書き込んだ
+    一時ファイルを返す。sheets で経費明細・承認履歴のシートを同じブックに追加できる。
+    """
+    sheet_keys = [key.strip() for key in sheets.split(",") if key.strip()]
+    if not sheet_keys or any(key not in EXCEL_EXPORT_SHEETS for key in sheet_keys):
+        raise ValidationError(
+            message="シートは requests / expense_lines / approvals から指定してください",
+            detail=f"Unsupported sheets: {sheets}"
         )
 
+    filters = {
+        "user_id": current_user["id"] if current_user["role"] != "admin" else None,
+        "status": status,
+        "request_type": type,
+        "start_date": start_date,
+        "end_date": end_date,
+        "chunk_size": EXPORT_CHUNK_SIZE,
+    }
+    fd, path = tempfile.mkstemp(prefix="export_", suffix=".xlsx")
+    os.close(fd)
+    try:
+        await export_service.write_excel_export(
+            {key: EXCEL_EXPORT_SHEETS[key](**filters) for key in dict.fromkeys(sheet_keys)}, path
+        )
     except Exception as e:
+        os.unlink(path)
         app_logger.error(f"Excel export failed: {str(e)}")
         raise HTTPException(status_code=500, detail="Excelエクスポートに失敗しました")
 
-@app.get("/api/v1/export/summary/pdf", response_class=StreamingResponse)
+    return export_file_response(
+        path,
+        f"requests_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+@app.get("/api/v1/export/summary/pdf", response_class=FileResponse)
 async def export_summary_pdf(
     current_user: Dict[str, Any] = Depends(get_current_user),
     start_date: Optional[str] = None,
@@ -865,30 +1135,183 @@ async def export_summary_pdf(
         if current_user["role"] not in ["admin", "approver"]:
             raise AuthorizationError("この操作には管理者または承認者権限が必要です")
 
-        # 申請データを取得
-        requests_data = await db_manager.get_requests_with_details(
-            start_date=start_date,
-            end_date=end_date
-        )
-
-        # PDFを生成
-        pdf_data = export_service.generate_pdf_report(requests_data, "summary")
+        # SQL で集計（締まった期間はキャッシュから）
+        summary_data = await db_manager.get_request_summary(start_date=start_date, end_date=end_date)
 
-        # レスポンスヘッダーを設定
-        headers = {
-            'Content-Disposition': f'attachment; filename="summary_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf"'
-        }
+        # PDFを生成（専用プロセスで一時ファイルに書き込み、混雑時は 429）
+        pdf_path = await render_export_pdf(summary_data, "summary")
 
-        return StreamingResponse(
-            io.BytesIO(pdf_data),
-            media_type="application/pdf",
-            headers=headers
+        return export_pdf_response(
+            pdf_path, f"summary_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         )
 
+    except APIException:
+        raise
     except Exception as e:
         app_logger.error(f"Summary PDF export failed: {str(e)}")
         raise HTTPException(status_code=500, detail="集計レポートのエクスポートに失敗しました")
 
+# ---- バックグラウンドエクスポート ----
+
+# PDF生成ワーカーが混み合っているときに待って再試行する回数
+EXPORT_PDF_RETRIES = 10
+
+async def _with_progress(chunks, progress, counter: List[int]):
+    """行のまとまりを数えながら進捗を通知する"""
+    async for rows in chunks:
+        counter[0] += len(rows)
+        await progress(counter[0])
+        yield rows
+
+async def _export_requests_csv_job(params: Dict[str, Any], path: str, progress):
+    chunks = _with_progress(
+        db_manager.iter_requests_for_export(chunk_size=EXPORT_CHUNK_SIZE, **params["filters"]), progress, [0]
+    )
+    with open(path, "wb") as output:
+        async for block in export_service.stream_csv_export(chunks, params["encoding"]):
+            output.write(block)
+
+async def _export_requests_excel_job(params: Dict[str, Any], path: str, progress):
+    counter = [0]
+    await export_service.write_excel_export({
+        key: _with_progress(
+            EXCEL_EXPORT_SHEETS[key](chunk_size=EXPORT_CHUNK_SIZE, **params["filters"]), progress, counter
+        )
+        for key in params["sheets"]
+    }, path)
+
+async def _export_pdf_job(params: Dict[str, Any], path: str, progress):
+    if params["report_type"] == "summary":
+        data = await db_manager.get_request_summary(**params["filters"])
+        await progress(data["total_requests"])
+    else:
+        data = await db_manager.get_requests_with_details(**params["filters"])
+        await progress(len(data))
+    payload = export_report_payload(data, params["report_type"])
+    for attempt in range(EXPORT_PDF_RETRIES):
+        try:
+            await pdf_render_service.render_to_file("export_report", payload, path)
+            return
+        except PdfRenderBusy as e:
+            # バックグラウンドでは 429 を返す相手がいないため、空くのを待つ
+            await asyncio.sleep(e.retry_after)
+        except PdfRenderUnavailable:
+            raise ServiceUnavailableError(message="PDF生成ワーカーが異常終了したため、エクスポートできませんでした")
+    raise ServiceUnavailableError(message="PDF生成が混み合っているため、エクスポートできませんでした")
+
+export_job_manager.register("requests_csv", _export_requests_csv_job, ".csv", "text/csv")
+export_job_manager.register(
+    "requests_excel", _export_requests_excel_job, ".xlsx",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+)
+export_job_manager.register("requests_pdf", _export_pdf_job, ".pdf", "application/pdf")
+export_job_manager.register("summary_pdf", _export_pdf_job, ".pdf", "application/pdf")
+
+def _export_job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """ジョブの状態（クライアントに返す項目）"""
+    def iso(timestamp):
+        return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+    view = {
+        "id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "rows": job["rows"],
+        "size": job["size"],
+        "error": job["error"],
+        "filename": job["filename"],
+        "created_at": iso(job["created_at"]),
+        "started_at": iso(job["started_at"]),
+        "finished_at": iso(job["finished_at"]),
+        "expires_at": iso(job["expires_at"]),
+        "status_url": f"/api/v1/exports/{job['id']}",
+    }
+    if job["status"] == COMPLETED:
+        view["download_url"] = f"/api/v1/exports/{job['id']}/download"
+    return view
+
+@app.post("/api/v1/exports", response_model=APIResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_export_job(
+    job_request: ExportJobCreate,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """エクスポートをバックグラウンドジョブとして登録
+
+    同じ条件のエクスポートを実行中の場合は、新しいジョブを作らず実行中のジョブを返す。
+    """
+    kind = job_request.kind.value
+    filters = {
+        "user_id": current_user["id"] if current_user["role"] != "admin" else None,
+        "status": job_request.status,
+        "request_type": job_request.type,
+        "start_date": job_request.start_date,
+        "end_date": job_request.end_date,
+    }
+    params: Dict[str, Any] = {"filters": filters}
+
+    if kind == "requests_csv":
+        if job_request.encoding not in CSV_CHARSETS:
+            raise ValidationError(
+                message="文字コードは utf-8 / utf-8-bom / shift_jis のいずれかを指定してください",
+                detail=f"Unsupported encoding: {job_request.encoding}"
+            )
+        params["encoding"] = job_request.encoding
+    elif kind == "requests_excel":
+        if not job_request.sheets or any(key not in EXCEL_EXPORT_SHEETS for key in job_request.sheets):
+            raise ValidationError(
+                message="シートは requests / expense_lines / approvals から指定してください",
+                detail=f"Unsupported sheets: {job_request.sheets}"
+            )
+        params["sheets"] = list(dict.fromkeys(job_request.sheets))
+    elif kind == "requests_pdf":
+        params["report_type"] = "requests"
+    elif kind == "summary_pdf":
+        if current_user["role"] not in ["admin", "approver"]:
+            raise AuthorizationError("この操作には管理者または承認者権限が必要です")
+        params = {"filters": {"start_date": job_request.start_date, "end_date": job_request.end_date},
+                  "report_type": "summary"}
+
+    job, created = await export_job_manager.submit(kind, params, current_user["id"])
+    return APIResponse(
+        success=True,
+        message="エクスポートを受け付けました" if created else "同じ条件のエクスポートを実行中です",
+        data=_export_job_view(job)
+    )
+
+async def _get_export_job(job_id: str, current_user: Dict[str, Any]) -> Dict[str, Any]:
+    job = await export_job_manager.get(job_id, owner_id=current_user["id"])
+    if job is None:
+        raise NotFoundError(
+            message="エクスポートが見つからないか、保存期間を過ぎています",
+            detail="Export job not found or expired"
+        )
+    return job
+
+@app.get("/api/v1/exports/{job_id}", response_model=APIResponse)
+async def get_export_job(job_id: str, current_user: Dict[str, Any] = Depends(get_current_user)):
+    """エクスポートジョブの状態（進捗）を取得"""
+    job = await _get_export_job(job_id, current_user)
+    return APIResponse(success=True, data=_export_job_view(job))
+
+@app.get("/api/v1/exports/{job_id}/download")
+async def download_export_job(
+    job_id: str,
+    request: Request,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """完了したエクスポートをダウンロード（Range 指定で途中から再開できる）"""
+    job = await _get_export_job(job_id, current_user)
+    path = export_job_manager.path(job)
+    if job["status"] != COMPLETED or not os.path.exists(path):
+        raise ConflictError(
+            message="エクスポートはまだ完了していません",
+            detail=f"Export job is {job['status']}"
+        )
+    media_type = export_job_manager.media_type(job)
+    if job["kind"] == "requests_csv":
+        media_type += f"; charset={CSV_CHARSETS[job['params']['encoding']]}"
+    return range_file_response(request, path, media_type, job["filename"])
+
 @app.get("/api/v1/reports/summary")
 async def get_summary_report(
     current_user: Dict[str, Any] = Depends(get_current_user),
@@ -901,14 +1324,8 @@ async def get_summary_report(
         if current_user["role"] not in ["admin", "approver"]:
             raise AuthorizationError("この操作には管理者または承認者権限が必要です")
 
-        # 申請データを取得
-        requests_data = await db_manager.get_requests_with_details(
-            start_date=start_date,
-            end_date=end_date
-        )
-
-        # 集計レポートを生成
-        summary_data = export_service.generate_summary_report(requests_data)
+        # SQL で集計（締まった期間はキャッシュから）
+        summary_data = await db_manager.get_request_summary(start_date=start_date, end_date=end_date)
 
         return APIResponse(
             success=True,
@@ -916,6 +1333,8 @@ async def get_summary_report(
             data=summary_data
         )
 
+    except APIException:
+        raise
     except Exception as e:
         app_logger.error(f"Summary report failed: {str(e)}")
         raise HTTPException(status_code=500, detail="集計レポートの取得に失敗しました")
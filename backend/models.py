@@ -277,9 +277,17 @@ class LeaveBalance(LeaveBalanceBase, BaseDBModel):
 # Response Models
 class LoginResponse(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
+    expires_in: Optional[int] = None
     user: User
 
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
 class RequestDetailResponse(BaseModel):
     request: Request
     leave_request: Optional[LeaveRequest] = None
@@ -310,6 +318,22 @@ class CompleteExpenseRequestCreate(BaseModel):
     expense_request: ExpenseRequestCreate
     expense_lines: List[ExpenseLineCreate] = []
 
+# Export job models
+class ExportKind(str, Enum):
+    REQUESTS_CSV = "requests_csv"
+    REQUESTS_EXCEL = "requests_excel"
+    REQUESTS_PDF = "requests_pdf"
+    SUMMARY_PDF = "summary_pdf"
+
+class ExportJobCreate(BaseModel):
+    kind: ExportKind
+    status: Optional[str] = None
+    type: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    encoding: str = "utf-8"
+    sheets: List[str] = ["requests"]
+
 # API Response Models
 class APIResponse(BaseModel):
     success: bool
@@ -0,0 +1,1920 @@
+import asyncio
+import os
+import re
+import threading
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+import bcrypt
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, or_, select, text, tuple_
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from app.api.v1.endpoints.admin import admin_stats_cache
+from app.core.cache import TTLCache
+from app.core.database import ALEMBIC_SCRIPT_LOCATION, get_db, init_db
+from app.core.password_hasher import PasswordHasher, PasswordHasherBusy, password_hasher
+from app.core.rate_limit import (
+    REDIS_RELEASE_SCRIPT, LoginRateLimiter, RateLimitExceeded, RedisSlidingWindowCounter, SlidingWindowCounter,
+    login_rate_limiter,
+)
+from app.core.user_cache import RedisUserCache, UserCache, user_cache
+from app.core.security import create_access_token, create_refresh_token
+from app.core.token_revocation import BloomFilter, RevocationList, RevocationSyncer, revocation_list
+from app.models.database import (
+    AuditLog, Base, ConstructionDailyReport, ExpenseRequest, HolidayWorkRequest, LeaveBalance,
+    LeaveRequest, OvertimeRequest, Request, RequestCounter, RevokedToken, User,
+)
+from app.core.database import AsyncSessionLocal
+from app.core.range_response import range_file_response
+from app.services.change_feed import changes_query
+from app.services.export_jobs import (
+    COMPLETED, FAILED, ExportJobManager, LocalExportQueue, RedisExportQueue,
+)
+from app.services.pdf_cache import PdfCache, content_key, pdf_cache
+from app.services.pdf_prerender import PdfPrerenderer, pdf_prerenderer
+from app.services.report_summary import SummaryCache, is_closed_period, summarize, summary_cache
+from app.services.request_counters import check_request_counters, rebuild_request_counters
+
+
+def _hash(password: str) -> str:
+    """テスト用の軽量bcryptハッシュ"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=4)).decode('utf-8')
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """テスト用SQLiteファイル"""
+    return tmp_path / "test_app.db"
+
+
+@pytest.fixture
+def sync_db(db_path):
+    """テーブル作成済みの同期セッション（データ投入用）"""
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def users(sync_db):
+    """管理者と一般ユーザーを作成"""
+    admin = User(email="admin@example.com", name="管理者", role="admin",
+                 hashed_password=_hash("admin123"), department="総務部", is_active=True)
+    user = User(email="user@example.com", name="山田 太郎", role="user",
+                hashed_password=_hash("password123"), department="工事部", is_active=True)
+    sync_db.add_all([admin, user])
+    sync_db.commit()
+    return {"admin": admin.id, "user": user.id}
+
+
+@pytest.fixture
+def client(db_path, users):
+    """非同期セッションをテスト用DBに差し替えたクライアント"""
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    admin_stats_cache.clear()
+    asyncio.run(user_cache.clear())
+    login_rate_limiter.clear()
+    revocation_list.clear()
+    pdf_cache.clear()
+    pdf_prerenderer.clear()
+    pdf_prerenderer.session_factory = session_factory
+    summary_cache.clear()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    pdf_prerenderer.session_factory = AsyncSessionLocal
+
+
+@pytest.fixture
+def admin_headers(users):
+    token = create_access_token({"sub": str(users["admin"]), "role": "admin"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def user_headers(users):
+    token = create_access_token({"sub": str(users["user"]), "role": "user"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+class TestAuth:
+    """認証エンドポイントのテスト"""
+
+    def test_login_success(self, client):
+        response = client.post("/api/v1/auth/login", json={
+            "email": "user@example.com",
+            "password": "password123"
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert data["access_token"]
+        assert data["user"]["email"] == "user@example.com"
+
+    def test_login_failure(self, client):
+        response = client.post("/api/v1/auth/login", json={
+            "email": "user@example.com",
+            "password": "wrong-password"
+        })
+        assert response.status_code == 401
+
+    def test_login_returns_503_when_hasher_saturated(self, client, monkeypatch):
+        monkeypatch.setattr(password_hasher, "max_pending", 0)
+        response = client.post("/api/v1/auth/login", json={
+            "email": "user@example.com",
+            "password": "password123"
+        })
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+
+    def test_login_rate_limited_before_password_check(self, client, monkeypatch):
+        monkeypatch.setattr(login_rate_limiter, "per_email", SlidingWindowCounter(limit=2, window=60))
+        verified = []
+        original_verify = password_hasher.verify
+
+        async def counting_verify(plain, hashed):
+            verified.append(plain)
+            return await original_verify(plain, hashed)
+
+        monkeypatch.setattr(password_hasher, "verify", counting_verify)
+        payload = {"email": "user@example.com", "password": "wrong-password"}
+        assert client.post("/api/v1/auth/login", json=payload).status_code == 401
+        assert client.post("/api/v1/auth/login", json=payload).status_code == 401
+
+        response = client.post("/api/v1/auth/login", json=payload)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        # 拒否された試行ではパスワード検証を行わない
+        assert len(verified) == 2
+        assert login_rate_limiter.stats()["blocked_email"] == 1
+
+    def test_me(self, client, user_headers):
+        response = client.get("/api/v1/auth/me", headers=user_headers)
+        assert response.status_code == 200
+        assert response.json()["name"] == "山田 太郎"
+
+
+class TestUserCache:
+    """認証済みユーザーキャッシュのテスト"""
+
+    def test_cached_until_invalidated(self, client, sync_db, users, user_headers, admin_headers):
+        assert client.get("/api/v1/auth/me", headers=user_headers).json()["name"] == "山田 太郎"
+
+        # DBを直接変更してもTTL内はキャッシュを返す
+        sync_db.execute(text("UPDATE users SET name = '山田 次郎' WHERE id = :id"), {"id": users["user"]})
+        sync_db.commit()
+        assert client.get("/api/v1/auth/me", headers=user_headers).json()["name"] == "山田 太郎"
+
+        # 管理者による更新で破棄される
+        response = client.put(
+            f"/api/v1/users/{users['user']}", json={"role": "admin"}, headers=admin_headers
+        )
+        assert response.status_code == 200
+        me = client.get("/api/v1/auth/me", headers=user_headers).json()
+        assert (me["name"], me["role"]) == ("山田 次郎", "admin")
+
+    def test_deactivation_takes_effect(self, client, users, user_headers, admin_headers):
+        assert client.get("/api/v1/auth/me", headers=user_headers).status_code == 200
+        client.put(f"/api/v1/users/{users['user']}", json={"is_active": False}, headers=admin_headers)
+        assert client.get("/api/v1/auth/me", headers=user_headers).status_code == 403
+
+    def test_lru_and_ttl(self):
+        now = [0.0]
+        cache = UserCache(maxsize=2, ttl=30, clock=lambda: now[0])
+
+        async def run():
+            await cache.set(1, {"id": 1})
+            await cache.set(2, {"id": 2})
+            await cache.get(1)
+            await cache.set(3, {"id": 3})  # 最も古く使われた 2 を追い出す
+            results = [await cache.get(key) for key in (1, 2, 3)]
+            now[0] = 31
+            results.append(await cache.get(1))
+            return results
+
+        assert asyncio.run(run()) == [{"id": 1}, None, {"id": 3}, None]
+        assert cache.stats()["evictions"] == 1
+
+    def test_redis_backend(self):
+        class LocalRedis:
+            """テスト用の Redis 代替（get / set / delete / scan_iter のみ）"""
+
+            def __init__(self):
+                self.data = {}
+
+            async def get(self, key):
+                return self.data.get(key)
+
+            async def set(self, key, value, ex=None):
+                self.data[key] = value
+
+            async def delete(self, *keys):
+                for key in keys:
+                    self.data.pop(key, None)
+
+            async def scan_iter(self, match):
+                for key in list(self.data):
+                    if key.startswith(match.rstrip("*")):
+                        yield key
+
+        redis = LocalRedis()
+        # ワーカー2つが同じ Redis を共有
+        worker_a, worker_b = RedisUserCache(redis, ttl=30), RedisUserCache(redis, ttl=30)
+
+        async def run():
+            await worker_a.set(1, {"id": 1, "role": "user"})
+            cached = await worker_b.get(1)
+            await worker_b.invalidate(1)
+            return cached, await worker_a.get(1)
+
+        assert asyncio.run(run()) == ({"id": 1, "role": "user"}, None)
+
+    def test_redis_unavailable(self):
+        class DownRedis:
+            """接続できない Redis"""
+
+            def __getattr__(self, name):
+                async def fail(*args, **kwargs):
+                    raise ConnectionError("redis is down")
+                return fail
+
+            def scan_iter(self, match):
+                raise ConnectionError("redis is down")
+
+        cache = RedisUserCache(DownRedis(), ttl=30)
+
+        async def run():
+            # 無効化・全削除も例外にしない（呼び出し元の更新処理は DB のコミット後に続く）
+            await cache.set(1, {"id": 1})
+            await cache.invalidate(1)
+            await cache.clear()
+            return await cache.get(1)
+
+        assert asyncio.run(run()) is None
+        assert cache.stats()["errors"] == 4
+
+
+class TestLoginRateLimiter:
+    """ログイン試行制限のテスト"""
+
+    def test_sliding_window_expires_old_attempts(self):
+        now = [1000.0]
+        counter = SlidingWindowCounter(limit=3, window=60, buckets=6, clock=lambda: now[0])
+
+        async def run():
+            results = []
+            for offset in (0, 20, 40):
+                now[0] = 1000.0 + offset
+                results.append(await counter.hit("a"))
+            now[0] = 1050.0
+            results.append(await counter.hit("a"))
+            # 最初の試行（1000秒）の区間がウィンドウから外れた後は再び許可
+            now[0] = 1061.0
+            results.append(await counter.hit("a"))
+            return results
+
+        results = asyncio.run(run())
+        assert [allowed for allowed, _ in results] == [True, True, True, False, True]
+        assert results[3][1] == 10
+
+    def test_limits_per_email_and_ip(self):
+        limiter = LoginRateLimiter(SlidingWindowCounter(2, 60), SlidingWindowCounter(3, 60))
+
+        async def attempt(email, ip):
+            try:
+                await limiter.hit(email, ip)
+                return "ok"
+            except Exception as e:
+                return e.scope
+
+        async def run():
+            results = [await attempt("A@example.com", "10.0.0.1"), await attempt("a@example.com", "10.0.0.2")]
+            results.append(await attempt("a@example.com", "10.0.0.3"))
+            await limiter.succeeded("a@example.com", "10.0.0.3")
+            results.append(await attempt("a@example.com", "10.0.0.3"))
+            results += [await attempt(f"user{i}@example.com", "10.0.0.9") for i in range(4)]
+            return results
+
+        assert asyncio.run(run()) == ["ok", "ok", "email", "ok", "ok", "ok", "ok", "ip"]
+        assert limiter.stats()["blocked_email"] == 1
+        assert limiter.stats()["blocked_ip"] == 1
+
+    def test_successful_logins_not_counted_per_ip(self):
+        # 同じ接続元IP（NAT の事業所）から上限を超える人数がログインしても、成功した分は数えない
+        limiter = LoginRateLimiter(SlidingWindowCounter(2, 60), SlidingWindowCounter(3, 60))
+
+        async def run():
+            for i in range(10):
+                await limiter.hit(f"user{i}@example.com", "10.0.0.1")
+                await limiter.succeeded(f"user{i}@example.com", "10.0.0.1")
+            for i in range(3):
+                await limiter.hit("attacker@example.com" if i < 2 else "other@example.com", "10.0.0.1")
+            await limiter.hit("user0@example.com", "10.0.0.1")
+
+        with pytest.raises(RateLimitExceeded) as excinfo:
+            asyncio.run(run())
+        assert excinfo.value.scope == "ip"
+        assert limiter.stats()["allowed"] == 13
+
+    def test_login_endpoint_counts_only_failures(self, client, monkeypatch):
+        monkeypatch.setattr(login_rate_limiter, "per_email", SlidingWindowCounter(2, 60))
+        monkeypatch.setattr(login_rate_limiter, "per_ip", SlidingWindowCounter(2, 60))
+
+        def login(password):
+            return client.post("/api/v1/auth/login", json={"email": "user@example.com", "password": password})
+
+        assert [login("password123").status_code for _ in range(5)] == [200] * 5
+        assert [login("wrong").status_code for _ in range(3)] == [401, 401, 429]
+
+    def test_login_endpoint_does_not_count_busy_attempts(self, client, monkeypatch):
+        # パスワード検証の混雑で 503 を返した試行は、Retry-After 後の再試行で上限に達しないよう数えない
+        monkeypatch.setattr(login_rate_limiter, "per_email", SlidingWindowCounter(2, 60))
+        monkeypatch.setattr(login_rate_limiter, "per_ip", SlidingWindowCounter(2, 60))
+        max_pending = password_hasher.max_pending
+        monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+        def login(password):
+            return client.post("/api/v1/auth/login", json={"email": "user@example.com", "password": password})
+
+        assert [login("wrong").status_code for _ in range(5)] == [503] * 5
+
+        # 混雑が解消した後は、通常どおり失敗した試行だけを数える
+        monkeypatch.setattr(password_hasher, "max_pending", max_pending)
+        assert [login("wrong").status_code for _ in range(3)] == [401, 401, 429]
+
+    def test_redis_counter_shared_between_workers(self):
+        class LocalRedis:
+            """テスト用の Redis 代替（ログイン制限の Lua スクリプトを1回の EVAL として実行）"""
+
+            def __init__(self):
+                self.data = {}
+                self.calls = 0
+
+            async def eval(self, script, numkeys, *args):
+                self.calls += 1
+                keys, argv = args[:numkeys], args[numkeys:]
+                counts = [self.data.get(key, 0) for key in keys]
+                if script == REDIS_RELEASE_SCRIPT:
+                    for key in reversed(keys):
+                        if self.data.get(key, 0) > 0:
+                            self.data[key] -= 1
+                            return self.data[key]
+                    return 0
+                if sum(counts) >= int(argv[0]):
+                    return counts
+                self.data[keys[-1]] = counts[-1] + 1
+                return []
+
+            async def delete(self, *keys):
+                for key in keys:
+                    self.data.pop(key, None)
+
+        redis = LocalRedis()
+        worker_a = RedisSlidingWindowCounter(redis, limit=2, window=60)
+        worker_b = RedisSlidingWindowCounter(redis, limit=2, window=60)
+
+        async def run():
+            results = [(await worker.hit("ip"))[0] for worker in (worker_a, worker_b, worker_a)]
+            await worker_b.release("ip")
+            results.append((await worker_a.hit("ip"))[0])
+            return results
+
+        assert asyncio.run(run()) == [True, True, False, True]
+        # 判定と加算は1回の EVAL（ワーカー間で割り込まれない）
+        assert redis.calls == 5 and worker_a.errors == worker_b.errors == 0
+
+
+class TestTokenRevocation:
+    """リフレッシュトークン・トークン失効のテスト"""
+
+    def test_revocation_list_expires_entries(self):
+        now = [1000.0]
+        revocations = RevocationList(capacity=4, clock=lambda: now[0])
+        revocations.add("a", 1100)
+        revocations.add("b", 2000)
+        revocations.add("old", 900)  # 期限切れのトークンは登録不要
+        assert revocations.is_revoked("a") and revocations.is_revoked("b")
+        assert not revocations.is_revoked("c") and not revocations.is_revoked("old")
+        assert not revocations.is_revoked(None)
+
+        now[0] = 1200.0
+        assert not revocations.is_revoked("a")
+        assert revocations.purge() == 1
+        assert len(revocations) == 1 and revocations.is_revoked("b")
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = [f"jti-{i}" for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        assert all(key in bloom for key in keys)
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+
+    def test_syncer_loads_new_rows(self):
+        rows = [(1, "a", datetime.utcnow() + timedelta(minutes=5))]
+        cleaned = []
+
+        async def fetch(after_id):
+            return [row for row in rows if row[0] > after_id]
+
+        async def cleanup():
+            cleaned.append(True)
+            return 0
+
+        revocations = RevocationList()
+        syncer = RevocationSyncer(revocations, fetch, cleanup, cleanup_every=2)
+
+        async def run():
+            await syncer.sync_once()
+            rows.append((2, "b", datetime.utcnow() + timedelta(minutes=5)))
+            await syncer.sync_once()
+
+        asyncio.run(run())
+        assert revocations.is_revoked("a") and revocations.is_revoked("b")
+        assert revocations.last_id == 2
+        assert syncer.stats()["syncs"] == 2 and len(cleaned) == 1
+
+    def test_revoked_token_ids_are_not_reused(self, sync_db, users):
+        # 同期済みの最大 id の行が期限切れで削除されても、次の失効はより大きい id で登録される
+        expires_at = datetime.utcnow() + timedelta(minutes=5)
+        sync_db.add_all([
+            RevokedToken(jti="a", user_id=users["user"], expires_at=expires_at),
+            RevokedToken(jti="b", user_id=users["user"], expires_at=datetime.utcnow() - timedelta(minutes=1)),
+        ])
+        sync_db.commit()
+        last_id = max(row.id for row in sync_db.query(RevokedToken))
+        sync_db.query(RevokedToken).filter(RevokedToken.expires_at <= datetime.utcnow()).delete()
+        sync_db.commit()
+
+        token = RevokedToken(jti="c", user_id=users["user"], expires_at=expires_at)
+        sync_db.add(token)
+        sync_db.commit()
+        assert token.id > last_id
+
+    def test_refresh_rotates_tokens(self, client):
+        login = client.post("/api/v1/auth/login", json={
+            "email": "user@example.com",
+            "password": "password123"
+        }).json()
+        assert login["refresh_token"] and login["expires_in"] > 0
+
+        # リフレッシュトークンはアクセストークンとして使えない
+        response = client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {login['refresh_token']}"})
+        assert response.status_code == 401
+
+        refreshed = client.post("/api/v1/auth/refresh", json={"refresh_token": login["refresh_token"]})
+        assert refreshed.status_code == 200
+        new_tokens = refreshed.json()
+        response = client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {new_tokens['access_token']}"})
+        assert response.status_code == 200
+
+        # 使用済みのリフレッシュトークンは再利用できない
+        reused = client.post("/api/v1/auth/refresh", json={"refresh_token": login["refresh_token"]})
+        assert reused.status_code == 401
+
+    def test_refresh_token_is_rotated_once(self, client, users):
+        # 他プロセス（メモリ未同期）での同じトークンの再使用も、失効の登録で弾かれる
+        refresh_token = create_refresh_token({"sub": str(users["user"])})
+        assert client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token}).status_code == 200
+        revocation_list.clear()
+        assert client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token}).status_code == 401
+
+    def test_logout_revokes_tokens(self, client, sync_db, users):
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(users['user'])})}"}
+        refresh_token = create_refresh_token({"sub": str(users["user"])})
+        assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+        response = client.post("/api/v1/auth/logout", headers=headers, json={"refresh_token": refresh_token})
+        assert response.status_code == 200
+        assert client.get("/api/v1/auth/me", headers=headers).status_code == 401
+        assert client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token}).status_code == 401
+
+        # 他プロセスへは revoked_tokens 経由で伝わる
+        assert {row.token_type for row in sync_db.query(RevokedToken)} == {"access", "refresh"}
+
+    def test_logout_revokes_only_own_refresh_token(self, client, sync_db, users):
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(users['user'])})}"}
+        others = create_refresh_token({"sub": str(users["admin"])})
+
+        # 他のユーザーのリフレッシュトークン・無効なトークンは失効させず、ログアウト自体は成功する
+        for refresh_token in (others, "not-a-token"):
+            response = client.post("/api/v1/auth/logout", headers=headers, json={"refresh_token": refresh_token})
+            assert response.status_code == 200
+        assert [row.token_type for row in sync_db.query(RevokedToken)] == ["access"]
+        assert client.post("/api/v1/auth/refresh", json={"refresh_token": others}).status_code == 200
+
+
+class TestPasswordHasher:
+    """パスワードハッシュ実行器のテスト"""
+
+    def test_verify_and_hash(self):
+        hasher = PasswordHasher(workers=1, max_pending=2)
+
+        async def scenario():
+            hashed = await hasher.hash("secret")
+            return (
+                await hasher.verify("secret", hashed),
+                await hasher.verify("wrong", hashed),
+                await hasher.verify("secret", "not-a-bcrypt-hash"),
+            )
+
+        assert asyncio.run(scenario()) == (True, False, False)
+        stats = hasher.stats()
+        assert stats["completed"] == 4
+        assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+        hasher.shutdown()
+
+    def test_rejects_when_saturated(self):
+        hasher = PasswordHasher(workers=1, max_pending=2)
+        release = threading.Event()
+
+        async def scenario():
+            first = asyncio.ensure_future(hasher.run(release.wait))
+            second = asyncio.ensure_future(hasher.run(release.wait))
+            await asyncio.sleep(0.05)
+            stats = hasher.stats()
+            with pytest.raises(PasswordHasherBusy) as exc_info:
+                await hasher.run(release.wait)
+            release.set()
+            await asyncio.gather(first, second)
+            return stats, exc_info.value
+
+        stats, busy = asyncio.run(scenario())
+        assert stats["in_flight"] == 1
+        assert stats["queue_depth"] == 1
+        assert busy.retry_after >= 1
+        assert hasher.stats()["rejected"] == 1
+        assert hasher.stats()["max_queue_depth"] == 1
+        hasher.shutdown()
+
+
+class TestRequests:
+    """申請エンドポイントのテスト"""
+
+    def _create_leave(self, client, headers):
+        return client.post("/api/v1/requests/leave", headers=headers, json={
+            "leave_request": {
+                "leave_type": "paid",
+                "start_date": "2025-07-01",
+                "end_date": "2025-07-02",
+                "days": 2,
+                "reason": "私用"
+            }
+        })
+
+    def test_create_and_list(self, client, user_headers):
+        response = self._create_leave(client, user_headers)
+        assert response.status_code == 200
+        assert response.json()["title"] == "有給休暇申請"
+
+        response = client.get("/api/v1/requests/", headers=user_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 1
+        assert data["data"][0]["applicant_name"] == "山田 太郎"
+
+    def test_approve(self, client, user_headers, admin_headers):
+        request_id = self._create_leave(client, user_headers).json()["id"]
+
+        response = client.post(f"/api/v1/requests/{request_id}/approve", headers=admin_headers)
+        assert response.status_code == 200
+
+        response = client.get(f"/api/v1/requests/{request_id}", headers=user_headers)
+        assert response.json()["status"] == "approved"
+
+    def test_list_pagination_and_filters(self, client, sync_db, users, user_headers, admin_headers):
+        base = datetime(2025, 7, 1, 9, 0)
+        for i in range(5):
+            sync_db.add(Request(type="leave" if i % 2 else "overtime", applicant_id=users["user"],
+                                status="approved" if i < 2 else "pending", title=f"申請{i}",
+                                created_at=base + timedelta(days=i)))
+        sync_db.add(Request(type="leave", applicant_id=users["admin"], status="pending",
+                            title="管理者の申請", created_at=base))
+        sync_db.commit()
+
+        first = client.get("/api/v1/requests/?limit=2", headers=user_headers).json()
+        assert first["total"] == 5
+        assert first["has_more"] is True
+        titles = [item["title"] for item in first["data"]]
+        assert titles == ["申請4", "申請3"]
+
+        cursor = first["next_cursor"]
+        while cursor:
+            page = client.get(
+                "/api/v1/requests/",
+                params={"limit": 2, "cursor": cursor, "with_total": "false"},
+                headers=user_headers
+            ).json()
+            assert page["total"] is None
+            titles += [item["title"] for item in page["data"]]
+            cursor = page["next_cursor"]
+        assert titles == ["申請4", "申請3", "申請2", "申請1", "申請0"]
+
+        data = client.get(
+            "/api/v1/requests/",
+            params={"type": "leave", "status": "approved"}, headers=user_headers
+        ).json()
+        assert [item["title"] for item in data["data"]] == ["申請1"]
+
+        data = client.get(
+            "/api/v1/requests/",
+            params={"start_date": "2025-07-02", "end_date": "2025-07-03"}, headers=user_headers
+        ).json()
+        assert [item["title"] for item in data["data"]] == ["申請2", "申請1"]
+
+        # 管理者は全申請者、申請者で絞り込み可能
+        assert client.get("/api/v1/requests/", headers=admin_headers).json()["total"] == 6
+        data = client.get(
+            "/api/v1/requests/", params={"applicant_id": users["admin"]}, headers=admin_headers
+        ).json()
+        assert [item["title"] for item in data["data"]] == ["管理者の申請"]
+
+        # 一般ユーザーは他の申請者を指定できない
+        response = client.get(
+            "/api/v1/requests/", params={"applicant_id": users["admin"]}, headers=user_headers
+        )
+        assert response.status_code == 403
+
+    def test_admin_stats(self, client, user_headers, admin_headers):
+        self._create_leave(client, user_headers)
+
+        response = client.get("/api/v1/admin/stats", headers=admin_headers)
+        assert response.status_code == 200
+        stats = response.json()["data"]
+        assert stats["total_users"] == 2
+        assert stats["total_requests"] == 1
+        assert stats["requests_by_type"]["leave"] == 1
+
+        # TTL 内はキャッシュを返す
+        self._create_leave(client, user_headers)
+        cached = client.get("/api/v1/admin/stats", headers=admin_headers).json()["data"]
+        assert cached["total_requests"] == 1
+
+        cache_stats = client.get("/api/v1/admin/stats/cache", headers=admin_headers).json()["data"]
+        assert cache_stats["misses"] == 1
+        assert cache_stats["hits"] == 1
+
+class TestRequestCounters:
+    """申請件数の集計テーブルのテスト"""
+
+    def _create_leave(self, client, headers):
+        return client.post("/api/v1/requests/leave", headers=headers, json={
+            "leave_request": {
+                "leave_type": "paid", "start_date": "2025-07-01", "end_date": "2025-07-01",
+                "days": 1, "reason": "私用"
+            }
+        }).json()["id"]
+
+    def _counts(self, sync_db, applicant_id):
+        sync_db.expire_all()
+        return {
+            (row.type, row.status): row.count
+            for row in sync_db.scalars(
+                select(RequestCounter).where(RequestCounter.applicant_id == applicant_id)
+            )
+        }
+
+    def test_counters_follow_status_changes(self, client, sync_db, users, user_headers, admin_headers):
+        ids = [self._create_leave(client, user_headers) for _ in range(4)]
+        assert self._counts(sync_db, users["user"]) == {("leave", "pending"): 4}
+
+        client.post(f"/api/v1/requests/{ids[0]}/submit", headers=user_headers)
+        client.post(f"/api/v1/requests/{ids[1]}/approve", headers=admin_headers)
+        client.post(f"/api/v1/requests/{ids[2]}/reject", headers=admin_headers)
+        client.delete(f"/api/v1/requests/{ids[3]}", headers=user_headers)
+
+        assert self._counts(sync_db, users["user"]) == {
+            ("leave", "pending"): 0,
+            ("leave", "applied"): 1,
+            ("leave", "approved"): 1,
+            ("leave", "rejected"): 1,
+            ("leave", "cancelled"): 1,
+        }
+        assert check_request_counters(sync_db.connection()) == []
+
+        stats = client.get("/api/v1/admin/stats", headers=admin_headers).json()["data"]
+        assert stats["total_requests"] == 4
+        assert stats["pending_requests"] == 1
+        assert stats["pending_by_type"]["leave"] == 1
+
+    def test_check_and_rebuild(self, client, sync_db, users, user_headers, admin_headers):
+        self._create_leave(client, user_headers)
+        sync_db.execute(text("UPDATE request_counters SET count = 5"))
+        sync_db.commit()
+
+        data = client.get("/api/v1/admin/request-counters/check", headers=admin_headers).json()["data"]
+        assert data["consistent"] is False
+        assert data["mismatches"] == [{
+            "applicant_id": users["user"], "type": "leave", "status": "pending",
+            "expected": 1, "stored": 5,
+        }]
+
+        response = client.post("/api/v1/admin/request-counters/rebuild", headers=admin_headers)
+        assert response.json()["data"]["rows"] == 1
+        data = client.get("/api/v1/admin/request-counters/check", headers=admin_headers).json()["data"]
+        assert data["consistent"] is True
+
+    def test_counter_check_admin_only(self, client, user_headers):
+        response = client.get("/api/v1/admin/request-counters/check", headers=user_headers)
+        assert response.status_code == 403
+
+
+class TestTTLCache:
+    """stale-while-revalidate キャッシュのテスト"""
+
+    def _cache(self):
+        now = [0.0]
+        cache = TTLCache(ttl=10, stale_ttl=30, clock=lambda: now[0])
+        return cache, now
+
+    def test_hit_stale_and_miss(self):
+        cache, now = self._cache()
+        calls = []
+
+        async def loader():
+            calls.append(now[0])
+            return len(calls)
+
+        async def run():
+            results = [await cache.get("k", loader)]
+            now[0] = 5
+            results.append(await cache.get("k", loader))
+            # TTL 経過後は古い値を返し、バックグラウンドで再取得
+            now[0] = 15
+            results.append(await cache.get("k", loader))
+            await asyncio.sleep(0)
+            results.append(await cache.get("k", loader))
+            # STALE_TTL も経過したらその場で取得
+            now[0] = 100
+            results.append(await cache.get("k", loader))
+            return results
+
+        assert asyncio.run(run()) == [1, 1, 1, 2, 3]
+        stats = cache.stats()
+        assert (stats["hits"], stats["stale_hits"], stats["misses"], stats["refreshes"]) == (2, 1, 2, 1)
+
+    def test_concurrent_misses_load_once(self):
+        cache, _ = self._cache()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "value"
+
+        async def run():
+            return await asyncio.gather(*[cache.get("k", loader) for _ in range(5)])
+
+        assert asyncio.run(run()) == ["value"] * 5
+        assert len(calls) == 1
+
+    def test_failed_refresh_keeps_stale_value(self):
+        cache, now = self._cache()
+
+        async def ok():
+            return "old"
+
+        async def fail():
+            raise RuntimeError("db down")
+
+        async def run():
+            await cache.get("k", ok)
+            now[0] = 15
+            first = await cache.get("k", fail)
+            await asyncio.sleep(0)
+            # 再取得に失敗しても古い値を返し、次の参照で再度取得を試みる
+            second = await cache.get("k", fail)
+            await asyncio.sleep(0)
+            return first, second
+
+        assert asyncio.run(run()) == ("old", "old")
+        assert cache.stats()["refreshes"] == 2
+        assert cache.stats()["errors"] == 2
+
+
+class TestPdfCache:
+    """PDFディスクキャッシュのテスト"""
+
+    def test_content_key(self):
+        payload = {"year": 2025, "dates": [date(2025, 7, 1)], "matrix": {"leave": np.zeros(3)}}
+        key = content_key("shift_table", payload, 1)
+        assert key == content_key("shift_table", dict(reversed(list(payload.items()))), 1)
+        assert key != content_key("shift_table", {**payload, "year": 2026}, 1)
+        assert key != content_key("shift_table", payload, 2)
+        assert key != content_key("timesheet", payload, 1)
+
+    def test_lru_eviction_by_size(self, tmp_path):
+        cache = PdfCache(str(tmp_path), max_bytes=25)
+        cache.put("a", b"x" * 10)
+        cache.put("b", b"x" * 10)
+        assert cache.get("a") is not None
+        cache.put("c", b"x" * 10)
+
+        # 最も長く使われていない b が削除される
+        assert cache.get("b") is None
+        assert not (tmp_path / "b.pdf").exists()
+        assert open(cache.get("c"), "rb").read() == b"x" * 10
+        assert cache.stats()["evictions"] == 1 and cache.stats()["bytes"] == 20
+
+    def test_invalidate_by_tag(self, tmp_path):
+        cache = PdfCache(str(tmp_path))
+        cache.put("k1", b"1", tags=("timesheet:1", "timesheet:1:2025-07"))
+        cache.put("k2", b"2", tags=("timesheet:1", "timesheet:1:2025-08"))
+        cache.put("k3", b"3", tags=("timesheet:2",))
+
+        assert cache.invalidate("timesheet:1:2025-07") == 1
+        assert cache.invalidate("timesheet:1") == 1
+        assert cache.get("k1") is None and cache.get("k2") is None
+        assert cache.get("k3") is not None
+        assert cache.invalidate("timesheet:1") == 0
+
+    def test_existing_files_loaded_after_restart(self, tmp_path):
+        PdfCache(str(tmp_path)).put("k1", b"%PDF")
+        cache = PdfCache(str(tmp_path))
+        assert cache.get("k1") == str(tmp_path / "k1.pdf")
+        assert cache.stats()["entries"] == 1
+
+    def test_opened_file_readable_after_eviction(self, tmp_path):
+        cache = PdfCache(str(tmp_path), max_bytes=15)
+        cache.put("a", b"a" * 10)
+        with cache.open("a") as opened:
+            cache.put("b", b"b" * 10)
+            assert not (tmp_path / "a.pdf").exists()
+            assert opened.read() == b"a" * 10
+        assert cache.open("a") is None
+
+    def test_missing_file_is_a_miss(self, tmp_path):
+        cache = PdfCache(str(tmp_path))
+        cache.put("k1", b"%PDF")
+        os.unlink(tmp_path / "k1.pdf")  # 他のプロセスが削除した
+        assert cache.open("k1") is None
+        stats = cache.stats()
+        assert stats["misses"] == 1 and stats["entries"] == 0 and stats["bytes"] == 0
+
+    def test_eviction_keeps_file_replaced_by_other_process(self, tmp_path):
+        first, second = PdfCache(str(tmp_path)), PdfCache(str(tmp_path))
+        first.put("k1", b"1", tags=("t",))
+        second.put("k1", b"1", tags=("t",))
+        # first が記録したファイルは置き換え済みのため、first の一覧から外すだけで削除しない
+        assert first.invalidate("t") == 1
+        with second.open("k1") as opened:
+            assert opened.read() == b"1"
+        assert second.invalidate("t") == 1
+        assert not (tmp_path / "k1.pdf").exists()
+
+
+class TestApprovals:
+    """承認待ち一覧のテスト"""
+
+    def _add_request(self, sync_db, applicant_id, status, applied_at, type="leave"):
+        request = Request(type=type, applicant_id=applicant_id, status=status,
+                          title=f"{type} {status}", applied_at=applied_at)
+        sync_db.add(request)
+        sync_db.commit()
+        return request.id
+
+    def test_pending_queue_pagination(self, client, sync_db, users, admin_headers):
+        now = datetime.now()
+        ids = [
+            self._add_request(sync_db, users["user"], "pending", now - timedelta(days=days))
+            for days in (0, 2, 5, 7, 9)
+        ]
+        self._add_request(sync_db, users["user"], "approved", now)
+        self._add_request(sync_db, users["user"], "draft", None)
+
+        response = client.get("/api/v1/approvals/?limit=2", headers=admin_headers)
+        assert response.status_code == 200
+        first = response.json()
+        assert first["total"] == 5
+        assert first["has_more"] is True
+        assert [item["id"] for item in first["data"]] == [str(ids[0]), str(ids[1])]
+        assert [item["priority"] for item in first["data"]] == ["low", "medium"]
+        assert first["data"][0]["applicant_name"] == "山田 太郎"
+
+        seen = [item["id"] for item in first["data"]]
+        cursor = first["next_cursor"]
+        while cursor:
+            page = client.get(
+                "/api/v1/approvals/", params={"limit": 2, "cursor": cursor}, headers=admin_headers
+            ).json()
+            seen += [item["id"] for item in page["data"]]
+            cursor = page["next_cursor"]
+        assert seen == [str(i) for i in ids]
+
+    def test_priority_sort_and_status_filter(self, client, sync_db, users, admin_headers):
+        now = datetime.now()
+        newer = self._add_request(sync_db, users["user"], "applied", now - timedelta(hours=1))
+        older = self._add_request(sync_db, users["user"], "pending", now - timedelta(days=10))
+        self._add_request(sync_db, users["user"], "approved", now - timedelta(days=3))
+
+        data = client.get("/api/v1/approvals/?sort=priority", headers=admin_headers).json()
+        assert [item["id"] for item in data["data"]] == [str(older), str(newer)]
+        assert data["data"][0]["priority"] == "high"
+
+        data = client.get("/api/v1/approvals/?status=all", headers=admin_headers).json()
+        assert data["total"] == 3
+
+        data = client.get("/api/v1/approvals/?status=approved", headers=admin_headers).json()
+        assert [item["status"] for item in data["data"]] == ["approved"]
+
+    def test_invalid_cursor(self, client, admin_headers):
+        response = client.get("/api/v1/approvals/?cursor=invalid", headers=admin_headers)
+        assert response.status_code == 400
+
+    def test_admin_only(self, client, user_headers):
+        response = client.get("/api/v1/approvals/", headers=user_headers)
+        assert response.status_code == 403
+
+
+class TestAttendance:
+    """勤怠管理エンドポイントのテスト"""
+
+    def _add_leave(self, sync_db, applicant_id, leave_type, start, end, status="approved"):
+        request = Request(type="leave", applicant_id=applicant_id, status=status, title="休暇申請")
+        sync_db.add(request)
+        sync_db.flush()
+        sync_db.add(LeaveRequest(request_id=request.id, leave_type=leave_type,
+                                 start_date=start, end_date=end, days=1))
+        sync_db.commit()
+
+    def _add_holiday_work(self, sync_db, applicant_id, work_date):
+        request = Request(type="holiday_work", applicant_id=applicant_id, status="approved", title="休日出勤申請")
+        sync_db.add(request)
+        sync_db.flush()
+        sync_db.add(HolidayWorkRequest(request_id=request.id, work_date=work_date,
+                                       start_time="08:00", end_time="17:00"))
+        sync_db.commit()
+
+    def test_shift_table(self, client, sync_db, users, admin_headers):
+        user_id = users["user"]
+        # 前月から続く有給、月内の代休（有給と重複）、未承認の特別休暇
+        self._add_leave(sync_db, user_id, "paid", date(2025, 6, 29), date(2025, 7, 2))
+        self._add_leave(sync_db, user_id, "compensatory", date(2025, 7, 2), date(2025, 7, 3))
+        self._add_leave(sync_db, user_id, "special", date(2025, 7, 10), date(2025, 7, 10), status="applied")
+        self._add_holiday_work(sync_db, user_id, date(2025, 7, 3))
+        self._add_holiday_work(sync_db, user_id, date(2025, 7, 6))
+        sync_db.add(LeaveBalance(user_id=user_id, fiscal_year=2025,
+                                 paid_leave_balance=12.0, compensatory_leave_balance=1.0))
+        sync_db.commit()
+
+        response = client.get("/api/v1/attendance/shift/2025/7", headers=admin_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["dates"]) == 31
+
+        employee = next(e for e in data["employees"] if e["user_id"] == user_id)
+        status = employee["daily_status"]
+        assert status["2025-07-01"] == "有"
+        assert status["2025-07-02"] == "有"
+        assert status["2025-07-03"] == "代"
+        assert status["2025-07-06"] == "◎"
+        assert status["2025-07-10"] is None
+        assert employee["summary"] == {
+            "paid_leave": 1, "compensatory_leave": 1, "special_leave": 0, "holiday_work": 2
+        }
+        assert employee["balance"] == {"paid_leave": 12.0, "compensatory_leave": 1.0}
+
+        admin = next(e for e in data["employees"] if e["user_id"] == users["admin"])
+        assert set(admin["daily_status"].values()) == {None}
+        assert admin["balance"] == {"paid_leave": 0.0, "compensatory_leave": 0.0}
+
+    def test_shift_summary_across_year_end(self, client, sync_db, users, admin_headers):
+        user_id = users["user"]
+        self._add_leave(sync_db, user_id, "paid", date(2025, 12, 30), date(2026, 1, 2))
+        self._add_leave(sync_db, user_id, "special", date(2026, 2, 10), date(2026, 2, 11))
+        self._add_holiday_work(sync_db, user_id, date(2026, 1, 4))
+
+        response = client.get("/api/v1/attendance/shift/2025/12/summary?months=3", headers=admin_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["start_date"], data["end_date"]) == ("2025-12-01", "2026-02-28")
+
+        employee = next(e for e in data["employees"] if e["user_id"] == user_id)
+        assert [m["month"] for m in employee["months"]] == ["2025-12", "2026-01", "2026-02"]
+        assert [m["paid_leave_days"] for m in employee["months"]] == [2, 2, 0]
+        assert [m["holiday_work_days"] for m in employee["months"]] == [0, 1, 0]
+        assert employee["total"] == {
+            "paid_leave_days": 4, "compensatory_leave_days": 0,
+            "special_leave_days": 2, "holiday_work_days": 1
+        }
+
+    def test_shift_table_pdf(self, client, sync_db, users, admin_headers):
+        self._add_leave(sync_db, users["user"], "paid", date(2025, 7, 1), date(2025, 7, 2))
+
+        response = client.get("/api/v1/attendance/shift/2025/7/pdf", headers=admin_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/pdf"
+        assert response.content.startswith(b"%PDF")
+        assert response.headers["content-length"] == str(len(response.content))
+
+    def test_pdf_generator_writes_to_spooled_file(self):
+        import tempfile
+        from app.services.pdf_generator import generate_timesheet_pdf
+
+        with tempfile.SpooledTemporaryFile(max_size=1024) as output:
+            assert generate_timesheet_pdf(self._timesheet_data(), output) is None
+            # 上限を超えた分はディスクへ書き出される
+            assert output._rolled
+            output.seek(0)
+            assert output.read(4) == b"%PDF"
+
+    def test_pdf_returns_429_when_renderer_saturated(self, client, admin_headers, monkeypatch):
+        from app.services.pdf_renderer import pdf_render_service
+
+        monkeypatch.setattr(pdf_render_service, "max_pending", 0)
+        response = client.get("/api/v1/attendance/shift/2025/7/pdf", headers=admin_headers)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert pdf_render_service.stats()["rejected"] >= 1
+
+    def test_pdf_returns_503_when_renderer_unavailable(self, client, admin_headers, monkeypatch):
+        from app.services.pdf_renderer import PdfRenderUnavailable, pdf_render_service
+
+        async def crashed(*args, **kwargs):
+            raise PdfRenderUnavailable(retry_after=5)
+
+        monkeypatch.setattr(pdf_render_service, "render_to_file", crashed)
+        response = client.get("/api/v1/attendance/shift/2025/7/pdf", headers=admin_headers)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+
+    def test_pdf_renderer_recovers_from_killed_worker(self, tmp_path):
+        import signal
+        from app.services.pdf_renderer import PdfRenderService
+
+        service = PdfRenderService(workers=1, max_pending=2)
+        path = str(tmp_path / "timesheet.pdf")
+
+        async def run():
+            await service.render_to_file("timesheet", self._timesheet_data(), path)
+            # ワーカーが異常終了するとプールが壊れ、以降の submit は BrokenProcessPool になる
+            for process in list(service._executor._processes.values()):
+                os.kill(process.pid, signal.SIGKILL)
+                process.join()
+            return await service.render_to_file("timesheet", self._timesheet_data(), path)
+
+        try:
+            assert asyncio.run(run()) > 0
+            stats = service.stats()
+            assert stats["restarts"] == 1 and stats["completed"] == 2 and stats["failed"] == 0
+        finally:
+            service.shutdown()
+
+    def test_pdf_renderer_unavailable_when_worker_keeps_crashing(self, tmp_path):
+        from app.services.pdf_renderer import PdfRenderService, PdfRenderUnavailable
+
+        service = PdfRenderService(workers=1, max_pending=2)
+
+        async def run():
+            # 実行するとワーカーごと終了するジョブは、作り直して1回再実行した後に諦める
+            with pytest.raises(PdfRenderUnavailable):
+                await service._submit("timesheet", os._exit, 1)
+            return await service.render_to_file("timesheet", self._timesheet_data(), str(tmp_path / "ok.pdf"))
+
+        try:
+            assert asyncio.run(run()) > 0
+            stats = service.stats()
+            assert stats["restarts"] == 2 and stats["failed"] == 1 and stats["completed"] == 1
+        finally:
+            service.shutdown()
+
+    def test_construction_daily_pdf_rendered_in_worker(self, client, sync_db, users, user_headers):
+        from app.services.pdf_renderer import pdf_render_service
+
+        report = ConstructionDailyReport(
+            user_id=users["user"], report_date=date(2025, 7, 1), site_name="本社ビル改修",
+            work_location="3階", work_content="内装工事", work_start_time="08:00",
+            work_end_time="17:00", workers=[{"category": "職長", "name": "山田"}], ky_activities=[],
+        )
+        sync_db.add(report)
+        sync_db.commit()
+        completed = pdf_render_service.stats()["completed"]
+
+        response = client.get(f"/api/v1/construction-daily/{report.id}/pdf", headers=user_headers)
+        assert response.status_code == 200
+        assert response.content.startswith(b"%PDF")
+        stats = pdf_render_service.stats()
+        assert stats["completed"] == completed + 1
+        assert stats["avg_render_ms"] > 0 and stats["queue_depth"] == 0
+
+    def test_japanese_font_registered_once(self, monkeypatch):
+        from app.core.config import settings
+        from app.services import pdf_generator
+
+        font_path = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+        if not os.path.exists(font_path):
+            pytest.skip("テスト用フォントがありません")
+        loaded = []
+
+        class CountingTTFont(pdf_generator.TTFont):
+            def __init__(self, name, filename, **kwargs):
+                loaded.append(filename)
+                super().__init__(name, filename, **kwargs)
+
+        monkeypatch.setattr(pdf_generator, "_registered_font", None)
+        monkeypatch.setattr(pdf_generator, "TTFont", CountingTTFont)
+        monkeypatch.setattr(settings, "PDF_FONT_PATH", font_path)
+
+        assert pdf_generator.register_japanese_font() == (True, "Japanese")
+        assert pdf_generator.register_japanese_font() == (True, "Japanese")
+        assert loaded == [font_path]
+
+    def test_missing_font_falls_back_once(self, monkeypatch, caplog):
+        from app.core.config import settings
+        from app.services import pdf_generator
+
+        monkeypatch.setattr(pdf_generator, "_registered_font", None)
+        monkeypatch.setattr(pdf_generator, "FONT_CANDIDATES", [])
+        monkeypatch.setattr(settings, "PDF_FONT_PATH", "/nonexistent/font.ttf")
+
+        with caplog.at_level("WARNING", logger=pdf_generator.logger.name):
+            assert pdf_generator.register_japanese_font() == (False, "Helvetica")
+            assert pdf_generator.register_japanese_font() == (False, "Helvetica")
+        assert sum("Japanese font not found" in r.message for r in caplog.records) == 1
+
+    def _timesheet_data(self, work_content="内装工事"):
+        return {
+            "year": 2025, "month": 7, "user": {"id": 1, "name": "山田 太郎", "department": "工事部"},
+            "daily_records": [
+                {"date": f"2025-07-{day:02d}", "weekday": "土" if day % 7 == 5 else "月",
+                 "attendance_am": "○", "attendance_pm": "○", "work_content": work_content}
+                for day in range(1, 32)
+            ],
+            "summary": {"total_work_days": 31},
+        }
+
+    def _count_platypus_docs(self, monkeypatch):
+        from app.services import pdf_generator
+
+        built = []
+
+        class CountingDocTemplate(pdf_generator.SimpleDocTemplate):
+            def build(self, *args, **kwargs):
+                built.append(self)
+                return super().build(*args, **kwargs)
+
+        monkeypatch.setattr(pdf_generator, "SimpleDocTemplate", CountingDocTemplate)
+        return built
+
+    def test_fast_shift_table_paginates_large_tables(self, monkeypatch):
+        from app.services.pdf_generator import generate_shift_table_pdf
+
+        built = self._count_platypus_docs(monkeypatch)
+        dates = [{"date": f"2025-07-{day:02d}", "day": day, "weekday": "日" if day % 7 == 6 else "月"}
+                 for day in range(1, 32)]
+        shift_data = {
+            "year": 2025, "month": 7, "dates": dates,
+            "employees": [
+                {"user_id": i, "name": f"従業員{i}", "department": "工事部",
+                 "daily_status": {d["date"]: "有" if (i + d["day"]) % 9 == 0 else None for d in dates},
+                 "summary": {}, "balance": {}}
+                for i in range(120)
+            ],
+        }
+
+        pdf_bytes = generate_shift_table_pdf(shift_data, fast=True)
+        assert pdf_bytes.startswith(b"%PDF")
+        assert len(re.findall(rb"/Type /Page\b", pdf_bytes)) > 1
+        assert built == []
+
+    def test_fast_timesheet_falls_back_to_platypus_for_multiline_cells(self, monkeypatch):
+        from app.services.pdf_generator import generate_timesheet_pdf
+
+        built = self._count_platypus_docs(monkeypatch)
+        assert generate_timesheet_pdf(self._timesheet_data(), fast=True).startswith(b"%PDF")
+        assert built == []
+
+        assert generate_timesheet_pdf(self._timesheet_data("午前: 内装\n午後: 外構"), fast=True).startswith(b"%PDF")
+        assert len(built) == 1
+
+    def test_timesheet_pdf_served_from_cache_until_approval(self, client, sync_db, users, admin_headers):
+        from app.services.pdf_renderer import pdf_render_service
+
+        user_id = users["user"]
+        url = f"/api/v1/attendance/timesheet/{user_id}/2025/7/pdf"
+        completed = pdf_render_service.stats()["completed"]
+
+        first = client.get(url, headers=admin_headers)
+        second = client.get(url, headers=admin_headers)
+        assert first.status_code == second.status_code == 200
+        assert first.content == second.content and first.content.startswith(b"%PDF")
+        assert "filename*=UTF-8''" in second.headers["content-disposition"]
+        assert pdf_render_service.stats()["completed"] == completed + 1
+        assert pdf_cache.stats()["hits"] == 1
+
+        # 他のプロセスがファイルを削除していたら生成し直す
+        for cached in os.listdir(pdf_cache.directory):
+            os.unlink(os.path.join(pdf_cache.directory, cached))
+        response = client.get(url, headers=admin_headers)
+        assert response.status_code == 200 and response.content.startswith(b"%PDF")
+        assert pdf_render_service.stats()["completed"] == completed + 2
+        completed += 1
+
+        # 承認で出勤簿のキャッシュが破棄され、次回は新しいデータで生成される
+        self._add_leave(sync_db, user_id, "paid", date(2025, 7, 7), date(2025, 7, 7), status="pending")
+        request_id = sync_db.scalar(select(Request.id).where(Request.status == "pending"))
+        response = client.post(f"/api/v1/requests/{request_id}/approve", headers=admin_headers)
+        assert response.status_code == 200
+        assert pdf_cache.stats()["invalidated"] == 1
+
+        # 承認後に事前生成されたPDFが返る（ダウンロード時には生成しない）
+        assert pdf_prerenderer.stats()["completed"] == 2
+        rendered = pdf_render_service.stats()["completed"]
+        response = client.get(url, headers=admin_headers)
+        assert response.status_code == 200 and response.content != first.content
+        assert pdf_render_service.stats()["completed"] == rendered == completed + 3
+
+    def test_construction_daily_pdf_prerendered_after_create(self, client, user_headers):
+        from app.services.pdf_renderer import pdf_render_service
+
+        response = client.post("/api/v1/construction-daily/", headers=user_headers, json={
+            "report_date": "2025-07-01", "site_name": "本社ビル改修", "work_location": "3階",
+            "work_content": "内装工事", "work_start_time": "08:00", "work_end_time": "17:00",
+            "workers": [{"category": "職長", "name": "山田"}],
+        })
+        assert response.status_code == 200
+        assert pdf_prerenderer.stats()["completed"] == 1
+        completed = pdf_render_service.stats()["completed"]
+
+        response = client.get(f"/api/v1/construction-daily/{response.json()['id']}/pdf", headers=user_headers)
+        assert response.status_code == 200 and response.content.startswith(b"%PDF")
+        assert pdf_render_service.stats()["completed"] == completed
+        assert pdf_cache.stats()["hits"] == 1
+
+    def test_month_close_prerenders_shift_and_timesheets(self, client, users, admin_headers):
+        response = client.post("/api/v1/attendance/shift/2025/7/prerender", headers=admin_headers)
+        assert response.status_code == 200
+        assert response.json()["data"]["jobs"] == 3
+        assert pdf_prerenderer.stats()["completed"] == 3
+        assert pdf_cache.stats()["entries"] == 3
+
+        response = client.get("/api/v1/attendance/shift/2025/7/pdf", headers=admin_headers)
+        assert response.status_code == 200
+        assert pdf_cache.stats()["hits"] == 1
+
+    def test_prerender_deduplicates_running_jobs(self, monkeypatch):
+        from app.services import pdf_prerender
+
+        rendered = []
+
+        async def fake_render_pdf_file(kind, payload, tags=()):
+            rendered.append(payload["version"])
+            await asyncio.sleep(0.01)
+
+        class FakeSession:
+            async def __aenter__(self):
+                return None
+
+            async def __aexit__(self, *exc):
+                return False
+
+        monkeypatch.setattr(pdf_prerender, "render_pdf_file", fake_render_pdf_file)
+        prerenderer = PdfPrerenderer()
+        prerenderer.session_factory = FakeSession
+        versions = iter(range(10))
+
+        async def job(db):
+            return "timesheet", {"version": next(versions)}, ()
+
+        async def main():
+            await asyncio.gather(*(prerenderer.run(("timesheet", 1, 2025, 7), job) for _ in range(3)))
+
+        asyncio.run(main())
+        # 実行中に来た2件は1回の再生成にまとめられる
+        assert rendered == [0, 1]
+        assert prerenderer.stats() == {
+            "enabled": True, "running": 0, "completed": 2, "deduplicated": 2, "skipped": 0, "failed": 0
+        }
+
+    def test_timesheet(self, client, sync_db, users, user_headers):
+        user_id = users["user"]
+        self._add_leave(sync_db, user_id, "paid", date(2025, 6, 30), date(2025, 7, 1))
+        self._add_leave(sync_db, user_id, "special", date(2025, 7, 1), date(2025, 7, 3))
+        self._add_holiday_work(sync_db, user_id, date(2025, 7, 6))
+
+        response = client.get(f"/api/v1/attendance/timesheet/{user_id}/2025/7", headers=user_headers)
+        assert response.status_code == 200
+        data = response.json()
+        records = {r["date"]: r for r in data["daily_records"]}
+        assert records["2025-07-01"]["leave_status"] == "有給"
+        assert records["2025-07-02"]["leave_status"] == "特別休"
+        assert records["2025-07-06"]["attendance_am"] == "○"
+        assert data["summary"]["paid_leave_days"] == 1
+        assert data["summary"]["special_leave_days"] == 2
+        assert data["summary"]["holiday_work_days"] == 1
+        assert data["summary"]["total_work_days"] == 1
+
+    def test_shift_table_admin_only(self, client, user_headers):
+        response = client.get("/api/v1/attendance/shift/2025/7", headers=user_headers)
+        assert response.status_code == 403
+
+
+class TestExportJobs:
+    """エクスポートのバックグラウンドジョブのテスト"""
+
+    @staticmethod
+    async def _write_rows(params, path, progress):
+        with open(path, "w") as output:
+            for rows in range(1, params["rows"] + 1):
+                output.write(f"row{rows}\n")
+                await progress(rows)
+
+    def _manager(self, tmp_path, queue=None, ttl=60):
+        manager = ExportJobManager(queue or LocalExportQueue(), str(tmp_path / "exports"), workers=1, ttl=ttl,
+                                   poll_interval=0.05)
+        manager.register("rows", self._write_rows, ".txt", "text/plain")
+        return manager
+
+    def test_dedup_progress_and_cleanup(self, tmp_path):
+        manager = self._manager(tmp_path)
+
+        async def wait_completed(*job_ids):
+            for _ in range(200):
+                jobs = [await manager.get(job_id) for job_id in job_ids]
+                if all(job["status"] == COMPLETED for job in jobs):
+                    return jobs
+                await asyncio.sleep(0.01)
+            raise AssertionError("export jobs did not complete")
+
+        async def run():
+            first, created = await manager.submit("rows", {"rows": 3}, owner_id=1)
+            same, created_again = await manager.submit("rows", {"rows": 3}, owner_id=1)
+            other, _ = await manager.submit("rows", {"rows": 3}, owner_id=2)
+            done, _ = await wait_completed(first["id"], other["id"])
+            # 完了後は同じ条件でも新しいジョブになる
+            after, created_after = await manager.submit("rows", {"rows": 3}, owner_id=1)
+            await wait_completed(after["id"])
+            await manager.stop()
+            return first, created, same, created_again, done, after, created_after
+
+        first, created, same, created_again, done, after, created_after = asyncio.run(run())
+        assert created
+        # 待ち・処理中の同じ条件のジョブは共有される
+        assert not created_again and same["id"] == first["id"]
+        assert done["rows"] == 3 and done["size"] == len("row1\nrow2\nrow3\n")
+        assert created_after and after["id"] != first["id"]
+        assert manager.stats()["deduplicated"] == 1
+        path = manager.path(done)
+        assert open(path).read().splitlines() == ["row1", "row2", "row3"]
+        # 本人以外からは見えない
+        assert asyncio.run(manager.get(done["id"], owner_id=2)) is None
+
+        # 保存期間を過ぎたジョブはファイルごと削除される
+        removed = asyncio.run(manager.cleanup(now=done["expires_at"] + 3600))
+        assert removed == 3
+        assert asyncio.run(manager.get(done["id"])) is None
+        assert not os.path.exists(path)
+
+    def test_failed_job_releases_dedup(self, tmp_path):
+        manager = self._manager(tmp_path)
+
+        async def fail(params, path, progress):
+            with open(path, "w") as output:
+                output.write("partial")
+            raise RuntimeError("boom")
+
+        manager.register("broken", fail, ".txt", "text/plain")
+
+        async def run():
+            job, _ = await manager.submit("broken", {}, owner_id=1)
+            await manager.stop()
+            await manager.run_job(job["id"])
+            return await manager.get(job["id"]), await manager.submit("broken", {}, owner_id=1)
+
+        failed, (retry, created) = asyncio.run(run())
+        assert failed["status"] == FAILED and failed["error"] == "boom"
+        assert not os.path.exists(manager.path(failed))
+        assert created and retry["id"] != failed["id"]
+
+    def test_redis_queue_shared_between_workers(self, tmp_path):
+        class LocalRedis:
+            """テスト用の Redis 代替（rpush / blpop / get / set / delete / scan_iter のみ）"""
+
+            def __init__(self):
+                self.data = {}
+
+            async def rpush(self, key, value):
+                self.data.setdefault(key, []).append(value.encode())
+
+            async def blpop(self, keys, timeout=0):
+                for key in keys:
+                    if self.data.get(key):
+                        return key.encode(), self.data[key].pop(0)
+                return None
+
+            async def get(self, key):
+                value = self.data.get(key)
+                return value.encode() if isinstance(value, str) else value
+
+            async def set(self, key, value, ex=None, nx=False):
+                if nx and key in self.data:
+                    return None
+                self.data[key] = value
+                return True
+
+            async def delete(self, *keys):
+                for key in keys:
+                    self.data.pop(key, None)
+
+            async def scan_iter(self, match):
+                for key in list(self.data):
+                    if key.startswith(match.rstrip("*")):
+                        yield key.encode()
+
+        redis = LocalRedis()
+        # API を受けるプロセスと、ジョブを処理するプロセスが同じ Redis を共有
+        api, worker = self._manager(tmp_path, RedisExportQueue(redis)), self._manager(tmp_path, RedisExportQueue(redis))
+
+        async def run():
+            job, _ = await api.submit("rows", {"rows": 2}, owner_id=1)
+            duplicate, created = await api.submit("rows", {"rows": 2}, owner_id=1)
+            await api.stop()
+            job_id = await worker.queue.pop(0)
+            await worker.run_job(job_id)
+            return job, duplicate, created, await api.get(job["id"], owner_id=1), await api.queue.job_ids()
+
+        job, duplicate, created, done, job_ids = asyncio.run(run())
+        assert duplicate["id"] == job["id"] and not created
+        assert done["status"] == COMPLETED and done["rows"] == 2
+        assert job_ids == [job["id"]]
+
+
+class TestRangeResponse:
+    """Range 対応のファイルレスポンスのテスト"""
+
+    @pytest.fixture
+    def range_client(self, tmp_path):
+        from fastapi import FastAPI, Request as HTTPRequest
+
+        path = tmp_path / "export.csv"
+        path.write_bytes(bytes(range(256)) * 4)
+        range_app = FastAPI()
+
+        @range_app.get("/file")
+        async def download(request: HTTPRequest):
+            return range_file_response(request, str(path), "text/csv; charset=Shift_JIS", "export.csv")
+
+        return TestClient(range_app), path.read_bytes()
+
+    def test_full_and_partial(self, range_client):
+        client, body = range_client
+        response = client.get("/file")
+        assert response.status_code == 200 and response.content == body
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["content-type"] == "text/csv; charset=Shift_JIS"
+
+        partial = client.get("/file", headers={"Range": "bytes=100-199"})
+        assert partial.status_code == 206 and partial.content == body[100:200]
+        assert partial.headers["content-range"] == f"bytes 100-199/{len(body)}"
+
+        # 途中から最後まで・末尾のNバイト
+        assert client.get("/file", headers={"Range": "bytes=1000-"}).content == body[1000:]
+        assert client.get("/file", headers={"Range": "bytes=-24"}).content == body[-24:]
+
+    def test_unsatisfiable_and_if_range(self, range_client):
+        client, body = range_client
+        response = client.get("/file", headers={"Range": f"bytes={len(body)}-"})
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(body)}"
+
+        etag = client.get("/file").headers["etag"]
+        assert client.get("/file", headers={"Range": "bytes=0-9", "If-Range": etag}).status_code == 206
+        # ファイルが変わっていれば（ETag 不一致）全体を返す
+        stale = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+        assert stale.status_code == 200 and stale.content == body
+
+
+class TestReportSummary:
+    """集計レポート（SQL の GROUP BY と締まった期間のキャッシュ）のテスト"""
+
+    def test_summarize_groups(self):
+        summary = summarize([
+            ("approved", "leave", "2025-06", "工事部", 3),
+            ("applied", "leave", "2025-07", "工事部", 1),
+            ("approved", "overtime", "2025-07", None, 4),
+            ("draft", "expense", None, "総務部", 2),
+        ])
+        assert summary["total_requests"] == 10
+        assert summary["status_summary"]["approved"] == {"count": 7, "percentage": 70.0}
+        assert summary["type_summary"]["leave"] == {"count": 4, "percentage": 40.0}
+        assert summary["monthly_summary"] == {"2025-06": 3, "2025-07": 5}
+        assert summary["department_summary"]["未設定"]["count"] == 4
+        assert summary["approval_rate"] == 70.0
+        assert summarize([])["total_requests"] == 0
+
+    def test_closed_period(self):
+        today = date(2025, 8, 1)
+        assert is_closed_period("2025-07-01", "2025-07-31", today)
+        assert is_closed_period(None, date(2025, 7, 31), today)
+        assert not is_closed_period("2025-07-01", "2025-08-01", today)
+        assert not is_closed_period("2025-07-01", None, today)
+        assert not is_closed_period("invalid", "2025-07-31", today)
+
+    def test_cache_closed_periods_only(self):
+        cache = SummaryCache(ttl=60)
+        loads = []
+
+        async def load():
+            loads.append(1)
+            return {"total_requests": len(loads)}
+
+        async def scenario():
+            for _ in range(2):
+                await cache.get("june", "2025-06-01", "2025-06-30", load)
+                await cache.get("july", "2025-07-01", "2025-07-31", load)
+                await cache.get("open", "2025-07-01", None, load)
+            assert len(loads) == 4
+            assert cache.stats()["hits"] == 2 and cache.stats()["bypassed"] == 2
+
+            # 申請日を含む期間だけ破棄する
+            cache.invalidate_date(datetime(2025, 7, 15, 9, 0))
+            await cache.get("june", "2025-06-01", "2025-06-30", load)
+            assert len(loads) == 4
+            assert (await cache.get("july", "2025-07-01", "2025-07-31", load))["total_requests"] == 5
+
+        asyncio.run(scenario())
+
+    def test_load_during_invalidation_not_cached(self):
+        cache = SummaryCache(ttl=60)
+
+        async def stale_load():
+            # 集計中に申請が承認された
+            cache.invalidate_date("2025-07-10")
+            return {"total_requests": 1}
+
+        async def scenario():
+            await cache.get("july", "2025-07-01", "2025-07-31", stale_load)
+            assert cache.stats()["size"] == 0
+
+        asyncio.run(scenario())
+
+    def _add_request(self, sync_db, applicant_id, req_type, status, applied_at):
+        request = Request(type=req_type, applicant_id=applicant_id, status=status,
+                          title=f"{req_type}申請", applied_at=applied_at)
+        sync_db.add(request)
+        sync_db.flush()
+        return request
+
+    def test_summary_endpoint(self, client, sync_db, users, admin_headers, user_headers):
+        june, july = datetime(2025, 6, 20, 9, 0), datetime(2025, 7, 10, 9, 0)
+        overtime = self._add_request(sync_db, users["user"], "overtime", "approved", july)
+        sync_db.add(OvertimeRequest(request_id=overtime.id, work_date=date(2025, 7, 9),
+                                    start_time="18:00", end_time="20:30", total_hours=2.5))
+        leave = self._add_request(sync_db, users["user"], "leave", "applied", july)
+        sync_db.add(LeaveRequest(request_id=leave.id, leave_type="paid", start_date=date(2025, 7, 14),
+                                 end_date=date(2025, 7, 15), days=2))
+        self._add_request(sync_db, users["admin"], "expense", "rejected", july)
+        self._add_request(sync_db, users["user"], "expense", "approved", june)
+        sync_db.add(ConstructionDailyReport(
+            user_id=users["user"], report_date=date(2025, 7, 9), site_name="本社ビル改修",
+            work_location="3階", work_content="内装工事", work_start_time="08:00",
+            work_end_time="17:00", workers=[], ky_activities=[],
+        ))
+        sync_db.commit()
+
+        params = {"start_date": "2025-07-01", "end_date": "2025-07-31"}
+        response = client.get("/api/v1/reports/summary", params=params, headers=admin_headers)
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["period"] == {"start": "2025-07-01", "end": "2025-07-31"}
+        assert data["total_requests"] == 3
+        assert data["requests_summary"]["by_type"] == {"overtime": 1, "leave": 1, "expense": 1}
+        assert data["monthly_summary"] == {"2025-07": 3}
+        assert data["department_summary"]["工事部"]["count"] == 2
+        assert data["approval_rate"] == 33.3
+        assert data["attendance_summary"] == {
+            "total_work_days": 1, "total_overtime_hours": 2.5,
+            "total_leave_days": 0.0, "total_holiday_work_days": 0,
+        }
+
+        # 締まった期間はキャッシュから返し、申請の承認で破棄する
+        client.get("/api/v1/reports/summary", params=params, headers=admin_headers)
+        assert summary_cache.stats()["hits"] == 1
+        response = client.post(f"/api/v1/requests/{leave.id}/approve", headers=admin_headers)
+        assert response.status_code == 200
+        data = client.get("/api/v1/reports/summary", params=params, headers=admin_headers).json()["data"]
+        assert data["status_summary"]["approved"]["count"] == 2
+        assert data["attendance_summary"]["total_leave_days"] == 2.0
+
+        # 全期間（締まっていない）はキャッシュしない
+        data = client.get("/api/v1/reports/summary", headers=admin_headers).json()["data"]
+        assert data["total_requests"] == 4
+        assert summary_cache.stats()["bypassed"] == 1
+
+        response = client.get("/api/v1/reports/summary", headers=user_headers)
+        assert response.status_code == 403
+
+
+class TestChangeFeed:
+    """給与連携の変更フィード（audit_logs）のテスト"""
+
+    def _create_leave(self, client, headers):
+        return client.post("/api/v1/requests/leave", headers=headers, json={
+            "leave_request": {
+                "leave_type": "paid", "start_date": "2025-07-01", "end_date": "2025-07-02",
+                "days": 2, "reason": "私用"
+            }
+        }).json()["id"]
+
+    def _read_all(self, client, headers, cursor=None, **params):
+        """has_more が false になるまでカーソルをたどって全件読む"""
+        import json
+
+        changes = []
+        while True:
+            response = client.get("/api/v1/changes/", params={"cursor": cursor, **params}, headers=headers)
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/x-ndjson"
+            changes += [json.loads(line) for line in response.text.splitlines()]
+            cursor = response.headers["x-next-cursor"]
+            if response.headers["x-has-more"] == "false":
+                return changes, cursor
+
+    def test_request_and_attendance_changes(self, client, users, admin_headers, user_headers):
+        request_id = self._create_leave(client, user_headers)
+        client.post(f"/api/v1/requests/{request_id}/approve", headers=admin_headers)
+
+        changes, cursor = self._read_all(client, admin_headers, limit=1)
+        assert [(c["entity"], c["action"]) for c in changes] == [
+            ("request", "created"), ("request", "status_changed"), ("leave", "upsert"),
+        ]
+        assert [c["seq"] for c in changes] == sorted({c["seq"] for c in changes})
+        assert changes[1]["previous"] == {"status": "pending"}
+        assert changes[1]["data"]["status"] == "approved"
+        leave = changes[2]["data"]
+        assert leave["request_id"] == int(request_id) and leave["applicant_id"] == users["user"]
+        assert leave["start_date"] == "2025-07-01" and leave["days"] == 2
+
+        # 続きがなければ同じカーソルが返り、次回はそこから再開できる
+        assert self._read_all(client, admin_headers, cursor) == ([], cursor)
+        client.post(f"/api/v1/requests/{request_id}/reject", headers=admin_headers)
+        changes, _ = self._read_all(client, admin_headers, cursor, types="leave")
+        assert [(c["entity"], c["action"], c["id"]) for c in changes] == [("leave", "delete", leave["id"])]
+
+        head = client.get("/api/v1/changes/cursor", headers=admin_headers).json()["data"]
+        assert self._read_all(client, admin_headers, head["cursor"]) == ([], head["cursor"])
+
+    def test_unapproved_details_not_in_feed(self, client, sync_db, users, admin_headers):
+        request = Request(type="overtime", applicant_id=users["user"], status="applied", title="時間外労働申請")
+        sync_db.add(request)
+        sync_db.flush()
+        overtime = OvertimeRequest(request_id=request.id, work_date=date(2025, 7, 1),
+                                   start_time="18:00", end_time="20:00", total_hours=2.0)
+        sync_db.add(overtime)
+        sync_db.commit()
+        overtime.total_hours = 2.5
+        sync_db.commit()
+        assert sync_db.scalar(select(func.count()).where(AuditLog.entity_type == "overtime")) == 0
+
+        request.status = "approved"
+        sync_db.commit()
+        overtime.total_hours = 3.0
+        sync_db.commit()
+        changes, _ = self._read_all(client, admin_headers, types="overtime")
+        assert [(c["action"], c["data"]["total_hours"]) for c in changes] == [("upsert", 2.5), ("upsert", 3.0)]
+
+    def test_construction_daily_reports(self, client, sync_db, users, admin_headers):
+        report = ConstructionDailyReport(
+            user_id=users["user"], report_date=date(2025, 7, 1), site_name="本社ビル改修",
+            work_location="3階", work_content="内装工事", work_start_time="08:00",
+            work_end_time="17:00", workers=[], ky_activities=[],
+        )
+        sync_db.add(report)
+        sync_db.commit()
+        report.work_end_time = "19:00"
+        sync_db.commit()
+        sync_db.delete(report)
+        sync_db.commit()
+
+        changes, _ = self._read_all(client, admin_headers, types="construction_daily_report")
+        assert [c["action"] for c in changes] == ["upsert", "upsert", "delete"]
+        assert changes[1]["data"]["work_end_time"] == "19:00"
+        assert changes[2]["previous"]["report_date"] == "2025-07-01"
+
+    def test_recorded_at_commit(self, client, sync_db, users, admin_headers):
+        # 変更履歴はコミット直前に記録し、ロールバックした変更は記録しない
+        def report(day):
+            return ConstructionDailyReport(
+                user_id=users["user"], report_date=date(2025, 7, day), site_name="本社ビル改修",
+                work_location="3階", work_content="内装工事", work_start_time="08:00",
+                work_end_time="17:00", workers=[], ky_activities=[],
+            )
+
+        sync_db.add(report(1))
+        sync_db.flush()
+        assert sync_db.query(AuditLog).count() == 0
+        sync_db.rollback()
+        sync_db.add(report(2))
+        sync_db.flush()
+        sync_db.add(report(3))
+        sync_db.commit()
+
+        changes, _ = self._read_all(client, admin_headers, types="construction_daily_report")
+        assert [c["data"]["report_date"] for c in changes] == ["2025-07-02", "2025-07-03"]
+
+    def test_invalid_parameters(self, client, admin_headers, user_headers):
+        assert client.get("/api/v1/changes/", params={"types": "salary"}, headers=admin_headers).status_code == 400
+        assert client.get("/api/v1/changes/", params={"cursor": "broken"}, headers=admin_headers).status_code == 400
+        assert client.get("/api/v1/changes/", headers=user_headers).status_code == 403
+
+
+class TestInitDb:
+    """init_db による新規DBの作成・既存DBへのマイグレーション適用のテスト"""
+
+    @pytest.fixture
+    def config(self):
+        config = Config()
+        config.set_main_option("script_location", ALEMBIC_SCRIPT_LOCATION)
+        return config
+
+    @pytest.fixture
+    def engine(self, tmp_path, monkeypatch):
+        engine = create_engine(f"sqlite:///{tmp_path / 'init.db'}")
+        monkeypatch.setattr("app.core.database.engine", engine)
+        yield engine
+        engine.dispose()
+
+    def _assert_head(self, engine, config):
+        from alembic.autogenerate import compare_metadata
+        from alembic.migration import MigrationContext
+        from alembic.script import ScriptDirectory
+
+        with engine.connect() as conn:
+            context = MigrationContext.configure(conn)
+            assert context.get_current_revision() == ScriptDirectory.from_config(config).get_current_head()
+            assert compare_metadata(context, Base.metadata) == []
+
+    def test_creates_new_database(self, engine, config):
+        init_db()
+        self._assert_head(engine, config)
+        init_db()  # 2回目以降は upgrade head（適用済みなので何もしない）
+        self._assert_head(engine, config)
+
+    @pytest.mark.parametrize("created_tables", [
+        [],
+        # 以前の init_db は新しいテーブルを create_all で作成済み（requests.updated_at は追加されない）
+        ["request_counters", "revoked_tokens", "audit_logs"],
+    ])
+    def test_upgrades_baseline_database(self, engine, config, created_tables):
+        # リビジョンを記録していない初期スキーマ（0001）のDB
+        with engine.begin() as conn:
+            config.attributes["connection"] = conn
+            command.upgrade(config, "0001")
+            conn.execute(text("DROP TABLE alembic_version"))
+            conn.execute(text(
+                "INSERT INTO users (id, email, hashed_password, name, role, is_active) "
+                "VALUES (1, 'user@example.com', 'x', '山田 太郎', 'user', 1)"
+            ))
+            conn.execute(text(
+                "INSERT INTO requests (id, type, applicant_id, status, title, created_at, approved_at) "
+                "VALUES (1, 'leave', 1, 'approved', '有給休暇', '2025-07-01 09:00:00', '2025-07-02 09:00:00')"
+            ))
+            conn.execute(text(
+                "INSERT INTO leave_requests (id, request_id, leave_type, start_date, end_date, days) "
+                "VALUES (1, 1, 'paid', '2025-07-10', '2025-07-10', 1)"
+            ))
+            Base.metadata.create_all(conn, tables=[Base.metadata.tables[name] for name in created_tables])
+            if "request_counters" in created_tables:
+                rebuild_request_counters(conn)
+        config.attributes.pop("connection")
+
+        init_db()
+        self._assert_head(engine, config)
+        with engine.connect() as conn:
+            assert check_request_counters(conn) == []
+
+        session = sessionmaker(bind=engine)()
+        try:
+            assert session.get(Request, 1).updated_at == datetime(2025, 7, 2, 9)
+            assert [(log.entity_type, log.entity_id, log.action) for log in session.query(AuditLog)] == [
+                ("leave", 1, "upsert")
+            ]
+        finally:
+            session.close()
+
+
+# 各エンドポイントの主要クエリ（絞り込み・結合・並び順を実装と揃える）
+MONTH_START, MONTH_END = date(2025, 7, 1), date(2025, 7, 31)
+HOT_QUERIES = {
+    "requests_by_applicant": select(Request).where(
+        Request.applicant_id == 1
+    ).order_by(Request.created_at.desc()),
+    "requests_by_applicant_status": select(Request).where(
+        Request.applicant_id == 1, Request.status == "applied"
+    ).order_by(Request.created_at.desc()),
+    "requests_recent": select(Request).order_by(Request.created_at.desc()).limit(10),
+    "count_by_status": select(func.count(Request.id)).where(Request.status == "applied"),
+    "count_by_status_type": select(func.count(Request.id)).where(
+        Request.status == "applied", Request.type == "leave"
+    ),
+    "leave_for_month": select(LeaveRequest).join(Request).where(
+        Request.applicant_id == 1,
+        Request.status == "approved",
+        or_(
+            LeaveRequest.start_date.between(MONTH_START, MONTH_END),
+            LeaveRequest.end_date.between(MONTH_START, MONTH_END),
+            (LeaveRequest.start_date <= MONTH_START) & (LeaveRequest.end_date >= MONTH_END),
+        ),
+    ),
+    "leave_overlapping_month": select(LeaveRequest).where(
+        LeaveRequest.start_date <= MONTH_END, LeaveRequest.end_date >= MONTH_START
+    ),
+    "overtime_for_month": select(OvertimeRequest).join(Request).where(
+        Request.applicant_id == 1,
+        Request.status == "approved",
+        OvertimeRequest.work_date.between(MONTH_START, MONTH_END),
+    ),
+    "overtime_by_work_date": select(OvertimeRequest).where(
+        OvertimeRequest.work_date.between(MONTH_START, MONTH_END)
+    ),
+    "holiday_work_for_month": select(HolidayWorkRequest).join(Request).where(
+        Request.applicant_id == 1,
+        Request.status == "approved",
+        HolidayWorkRequest.work_date.between(MONTH_START, MONTH_END),
+    ),
+    "holiday_work_by_work_date": select(HolidayWorkRequest).where(
+        HolidayWorkRequest.work_date.between(MONTH_START, MONTH_END)
+    ),
+    "daily_reports_for_month": select(ConstructionDailyReport).where(
+        ConstructionDailyReport.user_id == 1,
+        ConstructionDailyReport.report_date.between(MONTH_START, MONTH_END),
+    ),
+    "leave_balance": select(LeaveBalance).where(
+        LeaveBalance.user_id == 1, LeaveBalance.fiscal_year == 2025
+    ),
+    "request_list_by_applicant": select(Request).where(
+        Request.applicant_id == 1,
+        tuple_(Request.created_at, Request.id) < tuple_(datetime(2025, 7, 1), 100),
+    ).order_by(Request.created_at.desc(), Request.id.desc()).limit(51),
+    "request_list_by_status": select(Request).where(
+        Request.status == "approved"
+    ).order_by(Request.created_at.desc(), Request.id.desc()).limit(51),
+    "approval_queue": select(Request).where(
+        Request.status.in_(["pending", "applied"]), Request.applied_at.is_not(None)
+    ).order_by(Request.applied_at.desc(), Request.id.desc()).limit(51),
+    "approval_queue_all": select(Request).where(
+        Request.applied_at.is_not(None)
+    ).order_by(Request.applied_at.desc(), Request.id.desc()).limit(51),
+    "expense_by_request_ids": select(ExpenseRequest).where(
+        ExpenseRequest.request_id.in_([1, 2, 3])
+    ),
+    "revoked_tokens_since": select(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at).where(
+        RevokedToken.id > 100, RevokedToken.expires_at > datetime(2025, 7, 1)
+    ).order_by(RevokedToken.id),
+    "revoked_tokens_expired": select(RevokedToken.id).where(RevokedToken.expires_at <= datetime(2025, 7, 1)),
+    "change_feed": changes_query(100, 1001),
+    "change_feed_by_type": changes_query(100, 1001, ["leave", "overtime"]),
+}
+
+# "SCAN requests" / "SCAN TABLE requests AS r" のようなインデックスを使わない全件走査
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?\w+( AS \w+)?$")
+
+
+@pytest.fixture(scope="module")
+def migrated_engine(tmp_path_factory):
+    """全マイグレーションを適用したDB（TestQueryPlans 用）"""
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+    config = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic"))
+    with engine.begin() as conn:
+        config.attributes["connection"] = conn
+        command.upgrade(config, "head")
+    yield engine
+    engine.dispose()
+
+
+class TestQueryPlans:
+    """マイグレーション適用後のDBで主要クエリが全件走査にならないことを確認"""
+
+    def test_migrations_match_models(self, migrated_engine):
+        from alembic.autogenerate import compare_metadata
+        from alembic.migration import MigrationContext
+
+        with migrated_engine.connect() as conn:
+            diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+        assert diff == []
+
+    @pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+    def test_no_full_table_scan(self, migrated_engine, name):
+        sql = str(HOT_QUERIES[name].compile(
+            dialect=migrated_engine.dialect, compile_kwargs={"literal_binds": True}
+        ))
+        with migrated_engine.connect() as conn:
+            plan = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+        assert not [step for step in plan if FULL_SCAN.match(step)], plan
@@ -6,6 +6,8 @@ from unittest.mock import AsyncMock, patch
 
 from main import app
 from auth import auth_manager
+from app.core.rate_limit import login_rate_limiter
+from app.core.user_cache import user_cache
 
 
 # テスト用のテストクライアント
@@ -20,6 +22,8 @@ def event_loop():
 @pytest.fixture
 def client():
     """FastAPIテストクライアント"""
+    asyncio.run(user_cache.clear())
+    login_rate_limiter.clear()
     return TestClient(app)
 
 
@@ -241,5 +245,547 @@ class TestRequestManagement:
         assert "request_id" in data["data"]
 
 
+class TestSQLiteConnectionPool:
+    """SQLite接続プールのテスト"""
+
+    @pytest.fixture
+    def manager(self, tmp_path, monkeypatch):
+        from database_sqlite import SQLiteDatabaseManager
+        monkeypatch.setenv("SQLITE_DB_PATH", str(tmp_path / "pool.db"))
+        monkeypatch.setenv("SQLITE_POOL_SIZE", "2")
+        manager = SQLiteDatabaseManager()
+        yield manager
+        manager.pool.close()
+
+    def test_pragmas(self, manager):
+        async def run():
+            await manager.init_pool()
+            return await manager.pool.run_read(
+                lambda conn: (
+                    conn.execute("PRAGMA journal_mode").fetchone()[0],
+                    conn.execute("PRAGMA synchronous").fetchone()[0],
+                    conn.execute("PRAGMA busy_timeout").fetchone()[0],
+                )
+            )
+
+        journal_mode, synchronous, busy_timeout = asyncio.run(run())
+        assert journal_mode == "wal"
+        assert synchronous == 1  # NORMAL
+        assert busy_timeout == 5000
+
+    def test_write_and_read(self, manager):
+        async def run():
+            user_id = await manager.create_user(
+                {"email": "pool@example.com", "name": "Pool User", "role": "user"},
+                "password123"
+            )
+            users = await asyncio.gather(*[manager.get_user_by_id(user_id) for _ in range(10)])
+            return user_id, users
+
+        user_id, users = asyncio.run(run())
+        assert all(user["id"] == user_id for user in users)
+
+        stats = manager.get_pool_stats()
+        assert stats["pool_size"] == 2
+        assert stats["writes"] == 1
+        assert stats["reads"] == 10
+        assert stats["idle_readers"] == 2
+
+    def test_readers_are_read_only(self, manager):
+        import sqlite3
+
+        async def run():
+            await manager.pool.run_read(lambda conn: conn.execute("DELETE FROM users"))
+
+        with pytest.raises(sqlite3.OperationalError):
+            asyncio.run(run())
+
+    def test_failed_write_is_rolled_back(self, manager):
+        def write(conn):
+            conn.execute(
+                "INSERT INTO users (id, email, name) VALUES ('u1', 'rollback@example.com', 'x')"
+            )
+            raise RuntimeError("boom")
+
+        async def run():
+            with pytest.raises(RuntimeError):
+                await manager.pool.run_write(write)
+            return await manager.get_user_by_id("u1")
+
+        assert asyncio.run(run()) is None
+        assert manager.get_pool_stats()["errors"] == 1
+
+
+class TestRequestCounters:
+    """申請件数の集計テーブルのテスト"""
+
+    @pytest.fixture
+    def manager(self, tmp_path, monkeypatch):
+        from database_sqlite import SQLiteDatabaseManager
+        monkeypatch.setenv("SQLITE_DB_PATH", str(tmp_path / "counters.db"))
+        manager = SQLiteDatabaseManager()
+        yield manager
+        manager.pool.close()
+
+    def test_counters_follow_status_changes(self, manager):
+        async def run():
+            user_id = await manager.create_user(
+                {"email": "counter@example.com", "name": "Counter User", "role": "user"}, "password123"
+            )
+            leave = {"leave_type": "annual", "start_date": "2024-08-01", "end_date": "2024-08-01", "days": 1}
+            ids = [await manager.create_leave_request(user_id, {"title": "休暇"}, leave) for _ in range(3)]
+            for request_id in ids:
+                await manager.submit_request(request_id)
+            await manager.approve_request(ids[0], user_id)
+            await manager.reject_request(ids[1], user_id)
+            # 承認待ちでない申請の承認は何もしない
+            assert await manager.approve_request(ids[0], user_id) is False
+            return await manager.get_dashboard_stats(user_id)
+
+        stats = asyncio.run(run())
+        assert stats == {
+            "total_requests": 3,
+            "pending_requests": 1,
+            "approved_requests": 1,
+            "rejected_requests": 1,
+            "my_pending_approvals": 1,
+        }
+        assert asyncio.run(manager.check_request_counters()) == []
+
+    def test_check_and_rebuild(self, manager):
+        async def run():
+            user_id = await manager.create_user(
+                {"email": "rebuild@example.com", "name": "Rebuild User", "role": "user"}, "password123"
+            )
+            leave = {"leave_type": "annual", "start_date": "2024-08-01", "end_date": "2024-08-01", "days": 1}
+            await manager.create_leave_request(user_id, {"title": "休暇"}, leave)
+            await manager.pool.run_write(lambda conn: conn.execute("DELETE FROM request_counters"))
+            mismatches = await manager.check_request_counters()
+            rows = await manager.rebuild_request_counters()
+            return mismatches, rows, await manager.check_request_counters()
+
+        mismatches, rows, after = asyncio.run(run())
+        assert [(m["status"], m["expected"], m["stored"]) for m in mismatches] == [("draft", 1, 0)]
+        assert rows == 1
+        assert after == []
+
+
+class TestUserManagerCache:
+    """ユーザー更新時のキャッシュ破棄のテスト"""
+
+    @pytest.fixture
+    def manager(self, tmp_path, monkeypatch):
+        from database_sqlite import SQLiteDatabaseManager
+        monkeypatch.setenv("SQLITE_DB_PATH", str(tmp_path / "users.db"))
+        manager = SQLiteDatabaseManager()
+        yield manager
+        manager.pool.close()
+
+    def test_updates_invalidate_cache(self, manager):
+        async def run():
+            await user_cache.clear()
+            user_id = await manager.create_user(
+                {"email": "cache@example.com", "name": "Cache User", "role": "user"}, "password123"
+            )
+            results = []
+            for update in (
+                lambda: manager.update_user(user_id, {"role": "approver"}),
+                lambda: manager.reset_user_password(user_id, "newpassword123"),
+                lambda: manager.deactivate_user(user_id),
+                lambda: manager.delete_user(user_id),
+            ):
+                await user_cache.set(user_id, {"id": user_id})
+                results.append(await update())
+                results.append(await user_cache.get(user_id))
+            return results, await manager.get_user_by_id(user_id)
+
+        results, deleted = asyncio.run(run())
+        assert results == [True, None] * 4
+        assert deleted is None
+
+
+class TestRevokedTokens:
+    """失効トークンの登録・同期・削除のテスト"""
+
+    @pytest.fixture
+    def manager(self, tmp_path, monkeypatch):
+        from database_sqlite import SQLiteDatabaseManager
+        monkeypatch.setenv("SQLITE_DB_PATH", str(tmp_path / "revoked.db"))
+        manager = SQLiteDatabaseManager()
+        yield manager
+        manager.pool.close()
+
+    def test_revoke_sync_and_cleanup(self, manager):
+        from datetime import datetime, timedelta
+        from app.core.token_revocation import RevocationList, RevocationSyncer
+
+        async def run():
+            inserted = [
+                await manager.revoke_token("live", "u1", "access", datetime.utcnow() + timedelta(minutes=15))
+                for _ in range(2)
+            ]
+            await manager.revoke_token("expired", "u1", "refresh", datetime.utcnow() - timedelta(minutes=1))
+            revocations = RevocationList()
+            syncer = RevocationSyncer(
+                revocations, manager.get_revoked_tokens, manager.delete_expired_revoked_tokens
+            )
+            await syncer.sync_once()
+            return inserted, revocations, await manager.get_revoked_tokens(0)
+
+        inserted, revocations, remaining = asyncio.run(run())
+        # 2回目は登録済みのため False（リフレッシュはこの結果で二重発行を防ぐ）
+        assert inserted == [True, False]
+        assert revocations.is_revoked("live")
+        assert not revocations.is_revoked("expired")
+        assert [jti for _, jti, _ in remaining] == ["live"]
+
+
+class TestLogout:
+    """ログアウト時のトークン失効のテスト"""
+
+    def test_logout_revokes_only_own_refresh_token(self, client, test_user, test_token):
+        from main import get_current_user
+
+        app.dependency_overrides[get_current_user] = lambda: test_user
+        headers = {"Authorization": f"Bearer {test_token}"}
+        try:
+            with patch("main.db_manager.revoke_token", new=AsyncMock(return_value=True)) as revoke:
+                # 無効なトークン・他のユーザーのトークンは無視し、ログアウト自体は成功する
+                for refresh_token in (
+                    "not-a-token",
+                    auth_manager.create_refresh_token("other-user-id"),
+                    auth_manager.create_refresh_token(test_user["id"]),
+                ):
+                    response = client.post("/api/v1/auth/logout", headers=headers, json={"refresh_token": refresh_token})
+                    assert response.status_code == 200
+        finally:
+            app.dependency_overrides.pop(get_current_user, None)
+
+        revoked = [(call.args[1], call.args[2]) for call in revoke.call_args_list]
+        assert revoked.count((test_user["id"], "refresh")) == 1
+        assert {token_type for _, token_type in revoked} == {"access", "refresh"}
+
+
+class TestSessionTouches:
+    """セッション last_accessed の一括書き込みのテスト"""
+
+    @pytest.fixture
+    def manager(self, tmp_path, monkeypatch):
+        from database_sqlite import SQLiteDatabaseManager
+        monkeypatch.setenv("SQLITE_DB_PATH", str(tmp_path / "sessions.db"))
+        monkeypatch.setenv("SESSION_TOUCH_MAX_BUFFER", "3")
+        manager = SQLiteDatabaseManager()
+        yield manager
+        manager.pool.close()
+
+    def _last_accessed(self, manager):
+        async def query():
+            def _query(conn):
+                return {
+                    row["session_token"]: row["last_accessed"]
+                    for row in conn.execute("SELECT session_token, last_accessed FROM user_sessions")
+                }
+            return await manager.pool.run_read(_query)
+        return query()
+
+    def test_validate_buffers_until_flush(self, manager):
+        from datetime import datetime, timedelta
+
+        async def run():
+            user_id = await manager.create_user(
+                {"email": "session@example.com", "name": "Session User", "role": "user"}, "password123"
+            )
+            token = await manager.create_session(user_id)
+            # 有効期限の比較は UTC（datetime('now')）で行うため、テスト用に十分先へ延ばす
+            await manager.pool.run_write(lambda conn: conn.execute(
+                "UPDATE user_sessions SET expires_at = ?, last_accessed = '2000-01-01 00:00:00'",
+                (datetime.utcnow() + timedelta(days=1),)
+            ))
+
+            assert await manager.validate_session(token)
+            assert await manager.validate_session(token)
+            before = await self._last_accessed(manager)
+            flushed = await manager.session_touches.flush()
+            after = await self._last_accessed(manager)
+            return token, before, flushed, after
+
+        token, before, flushed, after = asyncio.run(run())
+        assert before[token] == "2000-01-01 00:00:00"
+        assert flushed == 1
+        assert after[token] > "2000-01-01 00:00:00"
+        stats = manager.session_touches.stats()
+        assert stats["touches"] == 2 and stats["flushed_rows"] == 1 and stats["pending"] == 0
+
+    def test_flush_when_buffer_is_full_and_on_close(self, manager):
+        async def run():
+            tokens = [f"token-{i}" for i in range(4)]
+            for token in tokens[:3]:
+                manager.session_touches.touch(token)
+            # 上限（3件）に達したらバックグラウンドで書き込む
+            await asyncio.sleep(0.05)
+            full_flushes = manager.session_touches.flushes
+            manager.session_touches.touch(tokens[3])
+            await manager.close_pool()
+            return full_flushes
+
+        assert asyncio.run(run()) == 1
+        stats = manager.session_touches.stats()
+        assert stats["flushes"] == 2 and stats["flushed_rows"] == 4 and stats["pending"] == 0
+
+    def test_failed_flush_is_retried(self):
+        from app.core.session_touch import SessionTouchBuffer
+        written = []
+        failures = [True]
+
+        async def flush(items):
+            if failures.pop() if failures else False:
+                raise RuntimeError("database is locked")
+            written.extend(items)
+
+        buffer = SessionTouchBuffer(flush, interval=0)
+
+        async def run():
+            buffer.touch("a")
+            with pytest.raises(RuntimeError):
+                await buffer.flush()
+            return await buffer.flush()
+
+        assert asyncio.run(run()) == 1
+        assert [token for token, _ in written] == ["a"]
+        assert buffer.stats()["errors"] == 1
+
+
+class TestExportPdf:
+    """申請レポートPDF（一時ファイル経由）のテスト"""
+
+    def test_pdf_streamed_from_temp_file_and_removed(self):
+        import os
+        from main import export_pdf_response, render_export_pdf
+
+        requests_data = [{
+            "id": "1", "type": "leave", "title": "休暇申請", "applicant_name": "山田 太郎",
+            "status": "approved", "created_at": "2025-07-01T09:00:00",
+        }]
+        path = asyncio.run(render_export_pdf(requests_data, "requests"))
+        size = os.path.getsize(path)
+        messages = []
+
+        async def receive():
+            return {"type": "http.request"}
+
+        async def send(message):
+            messages.append(message)
+
+        response = export_pdf_response(path, "requests_report.pdf")
+        asyncio.run(response({"type": "http", "method": "GET", "headers": []}, receive, send))
+
+        headers = dict(messages[0]["headers"])
+        body = b"".join(message.get("body", b"") for message in messages[1:])
+        assert headers[b"content-length"] == str(size).encode()
+        assert body.startswith(b"%PDF") and len(body) == size
+        # 送信後に一時ファイルは削除される
+        assert not os.path.exists(path)
+
+
+class TestRequestSummary:
+    """集計レポート（GROUP BY・締まった期間のキャッシュ）のテスト"""
+
+    @pytest.fixture
+    def manager(self, tmp_path, monkeypatch):
+        from database_sqlite import SQLiteDatabaseManager
+        monkeypatch.setenv("SQLITE_DB_PATH", str(tmp_path / "summary.db"))
+        manager = SQLiteDatabaseManager()
+        yield manager
+        manager.pool.close()
+
+    def test_summary_and_invalidation(self, manager):
+        from export_service import export_service
+
+        async def run():
+            user_id = await manager.create_user(
+                {"email": "summary@example.com", "name": "集計 太郎", "role": "user", "department": "工事部"},
+                "password123"
+            )
+            approver_id = await manager.create_user(
+                {"email": "approver@example.com", "name": "承認 花子", "role": "approver"}, "password123"
+            )
+
+            def _insert(conn):
+                conn.executemany(
+                    "INSERT INTO requests (id, type, applicant_id, title, status, applied_at) "
+                    "VALUES (?, ?, ?, '申請', ?, ?)",
+                    [
+                        ("r1", "leave", user_id, "approved", "2025-06-30 23:00:00"),
+                        ("r2", "leave", user_id, "applied", "2025-07-01 09:00:00"),
+                        ("r3", "overtime", approver_id, "rejected", "2025-07-31 18:00:00"),
+                        ("r4", "expense", user_id, "applied", "2025-08-01 09:00:00"),
+                    ]
+                )
+            await manager.pool.run_write(_insert)
+
+            july = await manager.get_request_summary("2025-07-01", "2025-07-31")
+            cached = await manager.get_request_summary("2025-07-01", "2025-07-31")
+            await manager.approve_request("r2", approver_id)
+            updated = await manager.get_request_summary("2025-07-01", "2025-07-31")
+            everything = await manager.get_request_summary()
+            return july, cached, updated, everything, manager.summary_cache.stats()
+
+        july, cached, updated, everything, stats = asyncio.run(run())
+        assert july["total_requests"] == 2
+        assert july["type_summary"] == {
+            "leave": {"count": 1, "percentage": 50.0}, "overtime": {"count": 1, "percentage": 50.0}
+        }
+        assert july["monthly_summary"] == {"2025-07": 2}
+        assert july["department_summary"] == {
+            "工事部": {"count": 1, "percentage": 50.0}, "未設定": {"count": 1, "percentage": 50.0}
+        }
+        assert july["approval_rate"] == 0
+        assert cached is july and stats["hits"] == 1
+        # 承認で申請日を含む期間の結果が破棄される
+        assert updated["approval_rate"] == 50.0
+        assert everything["monthly_summary"] == {"2025-06": 1, "2025-07": 2, "2025-08": 1}
+        assert stats["bypassed"] == 1
+
+        pdf = export_service.generate_summary_pdf(updated)
+        assert pdf.startswith(b"%PDF")
+
+
+class TestExportCsv:
+    """申請CSVのストリーミング出力のテスト"""
+
+    @pytest.fixture
+    def manager(self, tmp_path, monkeypatch):
+        from database_sqlite import SQLiteDatabaseManager
+        monkeypatch.setenv("SQLITE_DB_PATH", str(tmp_path / "export.db"))
+        manager = SQLiteDatabaseManager()
+        yield manager
+        manager.pool.close()
+
+    def _insert_requests(self, manager, user_id, count):
+        def _insert(conn):
+            conn.executemany(
+                "INSERT INTO requests (id, type, applicant_id, title, status, applied_at, created_at) "
+                "VALUES (?, 'leave', ?, ?, 'applied', '2025-07-01 09:00:00', ?)",
+                [(f"r{i:03d}", user_id, f"休暇申請 {i}", f"2025-07-01 09:{i // 60:02d}:{i % 60:02d}")
+                 for i in range(count)]
+            )
+        return manager.pool.run_write(_insert)
+
+    def test_iterates_in_chunks_newest_first(self, manager):
+        async def run():
+            user_id = await manager.create_user(
+                {"email": "export@example.com", "name": "出力 太郎", "role": "user"}, "password123"
+            )
+            await self._insert_requests(manager, user_id, 25)
+            chunks = [rows async for rows in manager.iter_requests_for_export(user_id=user_id, chunk_size=10)]
+            return chunks, manager.pool.stats()
+
+        chunks, stats = asyncio.run(run())
+        assert [len(rows) for rows in chunks] == [10, 10, 5]
+        assert chunks[0][0]["id"] == "r024" and chunks[-1][-1]["id"] == "r000"
+        assert tuple(chunks[0][0])[2:4] == ("出力 太郎", "export@example.com")
+        # 読み終えたら接続はプールへ戻る
+        assert stats["readers_in_use"] == 0
+
+    def test_concurrent_streams_beyond_pool_size(self, tmp_path, monkeypatch):
+        from database_sqlite import SQLiteDatabaseManager
+        monkeypatch.setenv("SQLITE_DB_PATH", str(tmp_path / "streams.db"))
+        monkeypatch.setenv("SQLITE_POOL_SIZE", "2")
+        manager = SQLiteDatabaseManager()
+
+        async def consume(user_id):
+            total = 0
+            async for rows in manager.iter_requests_for_export(user_id=user_id, chunk_size=5):
+                total += len(rows)
+                # 読み取り中に別の読み取りを挟む
+                await manager.pool.run_read(lambda conn: conn.execute("SELECT 1").fetchone())
+            return total
+
+        async def run():
+            user_id = await manager.create_user(
+                {"email": "streams@example.com", "name": "同時 太郎", "role": "user"}, "password123"
+            )
+            await self._insert_requests(manager, user_id, 20)
+            tasks = [consume(user_id) for _ in range(4)]
+            tasks += [manager.pool.run_read(lambda conn: conn.execute("SELECT COUNT(*) FROM requests").fetchone()[0])
+                      for _ in range(4)]
+            return await asyncio.wait_for(asyncio.gather(*tasks), timeout=10)
+
+        try:
+            results = asyncio.run(run())
+        finally:
+            stats = manager.pool.stats()
+            manager.pool.close()
+        # pool_size を超えるエクスポートと読み取りを同時に流しても止まらない
+        assert results == [20] * 8
+        assert stats["readers_in_use"] == 0 and stats["active_streams"] == 0
+
+    def test_stream_encodings(self):
+        from export_service import export_service
+
+        async def chunks():
+            yield [("r1", "leave", "髙橋 一郎", "t@example.com", "休暇", None, "approved",
+                    "2025-07-01T09:00:00", "2025-07-02T10:00:00", "承認者", None)]
+            yield [("r2", "overtime", "山田", "y@example.com", "残業", "説明", "applied",
+                    "2025-07-03T09:00:00", None, None, None)]
+
+        async def collect(encoding):
+            return [block async for block in export_service.stream_csv_export(chunks(), encoding)]
+
+        utf8 = asyncio.run(collect("utf-8"))
+        # ヘッダーと、受け取ったまとまりごとに1ブロック
+        assert len(utf8) == 3
+        assert utf8[0].decode("utf-8").startswith("申請ID,申請種類")
+        lines = b"".join(utf8).decode("utf-8").splitlines()
+        assert lines[1] == "r1,休暇申請,髙橋 一郎,t@example.com,休暇,,承認済み,2025/07/01,2025/07/02,承認者,"
+
+        bom = b"".join(asyncio.run(collect("utf-8-bom")))
+        assert bom.startswith(b"\xef\xbb\xbf") and bom.count(b"\xef\xbb\xbf") == 1
+
+        sjis = b"".join(asyncio.run(collect("shift_jis")))
+        assert sjis.decode("cp932").splitlines()[2].startswith("r2,時間外労働申請,山田")
+        assert "髙橋" in sjis.decode("cp932")
+
+
+class TestExportExcel:
+    """申請Excel（write_only）の出力のテスト"""
+
+    def test_sheets_widths_and_values(self, tmp_path):
+        from openpyxl import load_workbook
+        from export_service import export_service
+
+        async def chunks(rows):
+            for start in range(0, len(rows), 2):
+                yield rows[start:start + 2]
+
+        requests_rows = [
+            (f"r{i}", "expense", "山田 太郎", "y@example.com", "出張旅費の立替" * (i + 1), None, "approved",
+             "2025-07-01T09:00:00", "2025-07-02T10:00:00", "承認者", None)
+            for i in range(5)
+        ]
+        line_rows = [("r0", "出張", "山田 太郎", "6100", "旅費交通費", "taxable", 1200.0, "新幹線")]
+        approval_rows = [("r0", "出張", "承認者", "approve", "OK", "2025-07-02T10:00:00")]
+        path = str(tmp_path / "export.xlsx")
+
+        counts = asyncio.run(export_service.write_excel_export({
+            "requests": chunks(requests_rows),
+            "expense_lines": chunks(line_rows),
+            "approvals": chunks(approval_rows),
+        }, path, sample_rows=3))
+
+        assert counts == {"requests": 5, "expense_lines": 1, "approvals": 1}
+        workbook = load_workbook(path)
+        assert workbook.sheetnames == ["申請一覧", "経費明細", "承認履歴"]
+        sheet = workbook["申請一覧"]
+        assert sheet.max_row == 6
+        assert [cell.value for cell in sheet[2]][:3] == ["r0", "仮払・立替申請", "山田 太郎"]
+        # 列幅は先頭 sample_rows 行から全角を2として測る（4行目以降は幅に影響しない）
+        assert sheet.column_dimensions["C"].width == 11
+        assert sheet.column_dimensions["E"].width == 44
+        assert workbook["経費明細"]["F2"].value == "課税"
+        assert workbook["経費明細"]["G2"].value == 1200
+        assert workbook["承認履歴"]["D2"].value == "承認"
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
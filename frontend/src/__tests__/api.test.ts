@@ -153,6 +153,48 @@ describe('ApiClient', () => {
     })
   })
 
+  describe('token refresh', () => {
+    it('should refresh the access token on 401 and retry once', async () => {
+      mockLocalStorage.getItem.mockImplementation((key: string) =>
+        key === 'refresh_token' ? 'refresh-token' : 'expired-token'
+      )
+
+      mockFetch
+        .mockResolvedValueOnce({
+          ok: false,
+          status: 401,
+          statusText: 'Unauthorized',
+          json: async () => ({ message: 'Token expired' }),
+        } as Response)
+        .mockResolvedValueOnce({
+          ok: true,
+          status: 200,
+          json: async () => ({ access_token: 'new-token', refresh_token: 'new-refresh-token' }),
+        } as Response)
+        .mockResolvedValueOnce({
+          ok: true,
+          status: 200,
+          json: async () => ({ data: [] }),
+        } as Response)
+
+      await apiClient.getCurrentUser()
+
+      expect(mockFetch).toHaveBeenNthCalledWith(
+        2,
+        'http://localhost:8000/api/v1/auth/refresh',
+        expect.objectContaining({
+          method: 'POST',
+          body: JSON.stringify({ refresh_token: 'refresh-token' })
+        })
+      )
+      expect(mockLocalStorage.setItem).toHaveBeenCalledWith('access_token', 'new-token')
+      expect(mockLocalStorage.setItem).toHaveBeenCalledWith('refresh_token', 'new-refresh-token')
+      expect(mockFetch).toHaveBeenCalledTimes(3)
+
+      mockLocalStorage.getItem.mockReset()
+    })
+  })
+
   describe('network errors', () => {
     it('should handle network errors', async () => {
       mockFetch.mockRejectedValueOnce(
@@ -19,25 +19,40 @@ interface ApprovalRequest {
   priority: 'high' | 'medium' | 'low'
 }
 
+const PAGE_SIZE = 50
+
 function ApprovalsContent() {
   const router = useRouter()
   const [requests, setRequests] = useState<ApprovalRequest[]>([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState('')
-  const [filter, setFilter] = useState('all')
+  const [filter, setFilter] = useState('pending')
   const [sortBy, setSortBy] = useState('applied_at')
+  const [total, setTotal] = useState(0)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [showReceivedDateModal, setShowReceivedDateModal] = useState(false)
   const [selectedRequestId, setSelectedRequestId] = useState<string>('')
   const [receivedDate, setReceivedDate] = useState<string>(new Date().toISOString().split('T')[0])
 
   useEffect(() => {
     fetchApprovals()
-  }, [])
+  }, [filter, sortBy])
+
+  // 絞り込み・並び順（申請種別以外）はサーバー側で行い、続きはカーソルで取得する
+  const approvalParams = (cursor?: string) => ({
+    status: filter,
+    sort: sortBy === 'priority' ? 'priority' : 'applied_at',
+    limit: PAGE_SIZE,
+    cursor,
+  })
 
   const fetchApprovals = async () => {
     try {
-      const response = await apiClient.getApprovalRequests()
-      setRequests(response as ApprovalRequest[])
+      const response = await apiClient.getApprovalRequests(approvalParams())
+      setRequests(response.data as ApprovalRequest[])
+      setTotal(response.total)
+      setNextCursor(response.nextCursor)
     } catch (err) {
       setError('承認待ち申請の取得に失敗しました。')
       console.error('Approvals fetch error:', err)
@@ -46,6 +61,21 @@ function ApprovalsContent() {
     }
   }
 
+  const fetchMoreApprovals = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const response = await apiClient.getApprovalRequests(approvalParams(nextCursor))
+      setRequests(prev => [...prev, ...(response.data as ApprovalRequest[])])
+      setNextCursor(response.nextCursor)
+    } catch (err) {
+      setError('承認待ち申請の取得に失敗しました。')
+      console.error('Approvals fetch error:', err)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleApprove = async (requestId: string, requestType: string) => {
     // 仮払金申請の場合のみ受領日モーダルを表示（精算・立替金は不要）
     if (requestType === 'expense') {
@@ -142,24 +172,10 @@ function ApprovalsContent() {
     }
   }
 
-  const filteredRequests = requests.filter(request => {
-    if (filter === 'all') return true
-    return request.status === filter
-  })
-
-  const sortedRequests = [...filteredRequests].sort((a, b) => {
-    switch (sortBy) {
-      case 'applied_at':
-        return new Date(b.applied_at).getTime() - new Date(a.applied_at).getTime()
-      case 'priority':
-        const priorityOrder = { high: 3, medium: 2, low: 1 }
-        return priorityOrder[b.priority] - priorityOrder[a.priority]
-      case 'type':
-        return a.type.localeCompare(b.type)
-      default:
-        return 0
-    }
-  })
+  // 申請日時・優先度はサーバーの並び順のまま、申請種別のみ取得済みの範囲で並び替え
+  const sortedRequests = sortBy === 'type'
+    ? [...requests].sort((a, b) => a.type.localeCompare(b.type))
+    : requests
 
   if (loading) {
     return (
@@ -319,6 +335,20 @@ function ApprovalsContent() {
               ))
             )}
           </div>
+
+          {/* 続きの読み込み */}
+          {nextCursor && (
+            <div className="mt-6 text-center">
+              <p className="text-sm text-gray-500 mb-2">{requests.length} / {total} 件を表示中</p>
+              <button
+                onClick={fetchMoreApprovals}
+                disabled={loadingMore}
+                className="btn btn-secondary"
+              >
+                {loadingMore ? '読み込み中...' : 'もっと見る'}
+              </button>
+            </div>
+          )}
         </div>
       </main>
 
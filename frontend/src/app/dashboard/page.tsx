@@ -5,6 +5,8 @@ import { apiClient } from '@/lib/api'
 import Link from 'next/link'
 import { useAuth } from '@/contexts/AuthContext'
 
+const PAGE_SIZE = 50
+
 export default function DashboardPage() {
   const { user: authUser, isAdmin, logout } = useAuth()
   const [user, setUser] = useState<any>(null)
@@ -12,25 +14,21 @@ export default function DashboardPage() {
   const [loading, setLoading] = useState(true)
   const [exporting, setExporting] = useState<string | null>(null)
   const [cancelling, setCancelling] = useState<string | null>(null)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
 
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [userData, requestsData] = await Promise.all([
+        const [userData, requestsPage] = await Promise.all([
           apiClient.getCurrentUser(),
-          apiClient.getRequests()
+          apiClient.getRequests({ limit: PAGE_SIZE })
         ])
         setUser(userData as any)
 
-        // 一般ユーザーの場合は自分の申請のみフィルタリング
-        if (authUser && authUser.role === 'user') {
-          const filteredRequests = (requestsData as any[]).filter(
-            (req: any) => req.applicant_id === authUser.id || req.applicant_id === authUser.user_id
-          )
-          setRequests(filteredRequests)
-        } else {
-          setRequests(requestsData as any[])
-        }
+        // 一般ユーザーの申請はサーバー側で自分の申請のみに絞り込まれる
+        setRequests(requestsPage.data)
+        setNextCursor(requestsPage.nextCursor)
       } catch (error) {
         console.error('データの取得に失敗しました:', error)
       } finally {
@@ -41,6 +39,24 @@ export default function DashboardPage() {
     fetchData()
   }, [authUser])
 
+  const handleLoadMore = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const requestsPage = await apiClient.getRequests({
+        limit: PAGE_SIZE,
+        cursor: nextCursor,
+        with_total: false
+      })
+      setRequests(prev => [...prev, ...requestsPage.data])
+      setNextCursor(requestsPage.nextCursor)
+    } catch (error) {
+      console.error('データの取得に失敗しました:', error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleCancelRequest = async (requestId: string) => {
     if (!confirm('この申請を取り消しますか？')) {
       return
@@ -50,15 +66,9 @@ export default function DashboardPage() {
     try {
       await apiClient.cancelRequest(requestId)
       // 申請一覧を再取得
-      const requestsData = await apiClient.getRequests()
-      if (authUser && authUser.role === 'user') {
-        const filteredRequests = (requestsData as any[]).filter(
-          (req: any) => req.applicant_id === authUser.id || req.applicant_id === authUser.user_id
-        )
-        setRequests(filteredRequests)
-      } else {
-        setRequests(requestsData as any[])
-      }
+      const requestsPage = await apiClient.getRequests({ limit: PAGE_SIZE })
+      setRequests(requestsPage.data)
+      setNextCursor(requestsPage.nextCursor)
       alert('申請を取り消しました')
     } catch (error) {
       console.error('Cancel error:', error)
@@ -310,6 +320,17 @@ export default function DashboardPage() {
                       )}
                     </tbody>
                   </table>
+                  {nextCursor && (
+                    <div className="mt-4 text-center">
+                      <button
+                        onClick={handleLoadMore}
+                        disabled={loadingMore}
+                        className="btn btn-secondary btn-sm"
+                      >
+                        {loadingMore ? '読み込み中...' : 'もっと見る'}
+                      </button>
+                    </div>
+                  )}
                 </div>
               )}
             </div>
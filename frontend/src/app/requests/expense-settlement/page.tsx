@@ -59,13 +59,21 @@ function ExpenseSettlementContent() {
     const fetchApprovedRequests = async () => {
       setLoadingRequests(true)
       try {
-        const requests = await apiClient.getRequests()
-        // 承認済みで未精算の仮払金申請のみをフィルタ
-        const approved = requests.filter((r: any) =>
-          r.type === 'expense' &&
-          r.status === 'approved' &&
-          !r.is_settled
-        )
+        // 1ページに収まらない場合も古い申請が漏れないよう、最後のページまで取得
+        const approved: AdvancePayment[] = []
+        let cursor: string | undefined
+        do {
+          const page = await apiClient.getRequests({
+            type: 'expense',
+            status: 'approved',
+            limit: 200,
+            cursor,
+            with_total: false
+          })
+          // 未精算の仮払金申請のみをフィルタ
+          approved.push(...page.data.filter((r: any) => !r.is_settled))
+          cursor = page.hasMore && page.nextCursor ? page.nextCursor : undefined
+        } while (cursor)
         setApprovedRequests(approved)
       } catch (err) {
         console.error('Failed to fetch approved requests:', err)
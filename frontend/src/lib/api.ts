@@ -7,32 +7,82 @@ export class ApiClient {
     this.baseUrl = baseUrl
   }
 
+  // リフレッシュ中の Promise（同時に401になった複数リクエストで1回だけ再発行する）
+  private refreshPromise: Promise<boolean> | null = null
+
+  private storeTokens(data: { access_token: string; refresh_token?: string }) {
+    localStorage.setItem('access_token', data.access_token)
+    if (data.refresh_token) {
+      localStorage.setItem('refresh_token', data.refresh_token)
+    }
+  }
+
+  private clearTokens() {
+    localStorage.removeItem('access_token')
+    localStorage.removeItem('refresh_token')
+    localStorage.removeItem('user')
+  }
+
+  // リフレッシュトークンでアクセストークンを再発行
+  private async refreshAccessToken(): Promise<boolean> {
+    if (typeof window === 'undefined') return false
+    const refreshToken = localStorage.getItem('refresh_token')
+    if (!refreshToken) return false
+
+    if (!this.refreshPromise) {
+      this.refreshPromise = (async () => {
+        try {
+          const response = await fetch(`${this.baseUrl}/api/v1/auth/refresh`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ refresh_token: refreshToken }),
+          })
+          if (!response.ok) return false
+          this.storeTokens(await response.json())
+          return true
+        } catch {
+          return false
+        } finally {
+          this.refreshPromise = null
+        }
+      })()
+    }
+    return this.refreshPromise
+  }
+
+  // 認証ヘッダー付きで送信（アクセストークン期限切れの401は再発行して1回だけ再送）
+  private async authorizedFetch(url: string, options: RequestInit = {}): Promise<Response> {
+    const send = () => {
+      const token = typeof window !== 'undefined' ? localStorage.getItem('access_token') : null
+      const headers: Record<string, string> = { ...options.headers as Record<string, string> }
+      if (token) {
+        headers['Authorization'] = `Bearer ${token}`
+      }
+      return fetch(url, { ...options, headers })
+    }
+
+    const response = await send()
+    if (response.status === 401 && await this.refreshAccessToken()) {
+      return send()
+    }
+    return response
+  }
+
   private async request<T>(
     endpoint: string,
     options: RequestInit = {}
   ): Promise<T> {
     const url = `${this.baseUrl}${endpoint}`
 
-    // 認証トークンを追加
-    const token = typeof window !== 'undefined' ? localStorage.getItem('access_token') : null
-    console.log('[API Request]', endpoint, 'Token:', token ? `${token.substring(0, 20)}...` : 'null')
-
     const headers: Record<string, string> = {
       'Content-Type': 'application/json',
       ...options.headers as Record<string, string>,
     }
 
-    if (token) {
-      headers['Authorization'] = `Bearer ${token}`
-      console.log('[API Request] Authorization header added')
-    } else {
-      console.log('[API Request] No token available')
-    }
-
     try {
-      const response = await fetch(url, {
-        headers,
+      const response = await this.authorizedFetch(url, {
         ...options,
+        headers,
       })
 
       if (!response.ok) {
@@ -47,8 +97,7 @@ export class ApiClient {
         if (response.status === 401) {
           // 認証エラーの場合、トークンを削除
           if (typeof window !== 'undefined') {
-            localStorage.removeItem('access_token')
-            localStorage.removeItem('user')
+            this.clearTokens()
             // ログイン画面以外にいる場合のみリダイレクト
             if (!window.location.pathname.includes('/auth/login')) {
               window.location.href = '/auth/login'
@@ -98,7 +147,7 @@ export class ApiClient {
     // トークンをローカルストレージに保存
     if (data.access_token) {
       console.log('Saving token to localStorage:', data.access_token.substring(0, 20) + '...')
-      localStorage.setItem('access_token', data.access_token)
+      this.storeTokens(data)
       localStorage.setItem('user', JSON.stringify(data.user))
 
       // 保存確認
@@ -114,14 +163,15 @@ export class ApiClient {
 
   async logout() {
     try {
+      // アクセストークンとリフレッシュトークンをサーバー側で失効させる
       await this.request('/api/v1/auth/logout', {
         method: 'POST',
+        body: JSON.stringify({ refresh_token: localStorage.getItem('refresh_token') }),
       })
     } finally {
       // トークンを削除
       if (typeof window !== 'undefined') {
-        localStorage.removeItem('access_token')
-        localStorage.removeItem('user')
+        this.clearTokens()
       }
     }
   }
@@ -140,9 +190,41 @@ export class ApiClient {
   }
 
   // 申請関連
-  async getRequests() {
-    const response = await this.request<{success: boolean, data: any[], total: number}>('/api/v1/requests/')
-    return response.data || []
+  // 申請一覧（作成日時の新しい順、next_cursor で続きのページを取得）
+  async getRequests(params?: {
+    type?: string;
+    status?: string;
+    start_date?: string;
+    end_date?: string;
+    applicant_id?: string;
+    limit?: number;
+    cursor?: string;
+    with_total?: boolean;
+  }) {
+    const query = new URLSearchParams();
+    if (params?.type) query.append('type', params.type);
+    if (params?.status) query.append('status', params.status);
+    if (params?.start_date) query.append('start_date', params.start_date);
+    if (params?.end_date) query.append('end_date', params.end_date);
+    if (params?.applicant_id) query.append('applicant_id', params.applicant_id);
+    if (params?.limit) query.append('limit', String(params.limit));
+    if (params?.cursor) query.append('cursor', params.cursor);
+    if (params?.with_total === false) query.append('with_total', 'false');
+
+    const queryString = query.toString();
+    const response = await this.request<{
+      success: boolean,
+      data: any[],
+      total: number | null,
+      has_more: boolean,
+      next_cursor: string | null
+    }>(`/api/v1/requests/${queryString ? `?${queryString}` : ''}`)
+    return {
+      data: response.data || [],
+      total: response.total ?? null,
+      hasMore: response.has_more || false,
+      nextCursor: response.next_cursor || null,
+    }
   }
 
   async getRequest(requestId: string) {
@@ -256,9 +338,33 @@ export class ApiClient {
   }
 
   // 承認関連
-  async getApprovalRequests() {
-    const response = await this.request<{success: boolean, data: any[], total: number}>('/api/v1/approvals/')
-    return response.data || []
+  async getApprovalRequests(params?: {
+    status?: string;
+    type?: string;
+    sort?: string;
+    limit?: number;
+    cursor?: string;
+  }) {
+    const query = new URLSearchParams();
+    if (params?.status) query.append('status', params.status);
+    if (params?.type) query.append('type', params.type);
+    if (params?.sort) query.append('sort', params.sort);
+    if (params?.limit) query.append('limit', String(params.limit));
+    if (params?.cursor) query.append('cursor', params.cursor);
+
+    const response = await this.request<{
+      success: boolean,
+      data: any[],
+      total: number,
+      has_more: boolean,
+      next_cursor: string | null
+    }>(`/api/v1/approvals/?${query}`)
+    return {
+      data: response.data || [],
+      total: response.total || 0,
+      hasMore: response.has_more || false,
+      nextCursor: response.next_cursor || null,
+    }
   }
 
   // 管理関連
@@ -295,15 +401,9 @@ export class ApiClient {
   }
 
   async downloadConstructionDailyPDF(reportId: string) {
-    const token = typeof window !== 'undefined' ? localStorage.getItem('access_token') : null
     const url = `${this.baseUrl}/api/v1/construction-daily/${reportId}/pdf`
 
-    const headers: Record<string, string> = {}
-    if (token) {
-      headers['Authorization'] = `Bearer ${token}`
-    }
-
-    const response = await fetch(url, { headers })
+    const response = await this.authorizedFetch(url)
     if (!response.ok) {
       throw new Error('PDFのダウンロードに失敗しました')
     }
@@ -434,16 +534,11 @@ export class ApiClient {
   }
 
   private async downloadFile(url: string) {
-    const token = localStorage.getItem('access_token');
-    if (!token) {
+    if (!localStorage.getItem('access_token')) {
       throw new Error('認証が必要です');
     }
 
-    const response = await fetch(`${this.baseUrl}${url}`, {
-      headers: {
-        'Authorization': `Bearer ${token}`,
-      },
-    });
+    const response = await this.authorizedFetch(`${this.baseUrl}${url}`);
 
     if (!response.ok) {
       throw new Error('ダウンロードに失敗しました');
@@ -498,13 +593,7 @@ export class ApiClient {
 
   async downloadShiftTablePdf(year: number, month: number) {
     const url = `${this.baseUrl}/api/v1/attendance/shift/${year}/${month}/pdf`
-    const token = typeof window !== 'undefined' ? localStorage.getItem('access_token') : null
-
-    const response = await fetch(url, {
-      headers: {
-        'Authorization': `Bearer ${token}`
-      }
-    })
+    const response = await this.authorizedFetch(url)
 
     if (!response.ok) {
       throw new Error(`PDF download failed: ${response.status}`)
@@ -528,13 +617,7 @@ export class ApiClient {
 
   async downloadTimesheetPdf(userId: number, year: number, month: number) {
     const url = `${this.baseUrl}/api/v1/attendance/timesheet/${userId}/${year}/${month}/pdf`
-    const token = typeof window !== 'undefined' ? localStorage.getItem('access_token') : null
-
-    const response = await fetch(url, {
-      headers: {
-        'Authorization': `Bearer ${token}`
-      }
-    })
+    const response = await this.authorizedFetch(url)
 
     if (!response.ok) {
       throw new Error(`PDF download failed: ${response.status}`)